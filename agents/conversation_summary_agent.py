@@ -0,0 +1,84 @@
+"""
+Conversation Summary Agent
+
+Purpose:
+    This file defines the Conversation Summary Agent.
+    The agent rolls the older turns of an advisory session into a
+    short running summary.
+
+Why this agent exists:
+    Every follow-up question resends the conversation so far, so
+    without a bound the prompt, and with it the prefill time,
+    grows with every turn. Sessions keep only the latest turns
+    verbatim and replace the rest with this agent's summary (see
+    orchestrator/advisory_session.py).
+"""
+
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
+
+# Import the LLM configuration utility.
+from utils.llm_configuration import get_llm_model
+
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
+
+# -------------------------------------------------------------------
+# Conversation Summary Agent Definition
+# -------------------------------------------------------------------
+# Condensing only: a low temperature and a small token budget, which
+# also bounds the size of the summary carried into later prompts.
+# -------------------------------------------------------------------
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the summarization task.
+CONVERSATION_SUMMARY_PROMPT = """
+    You summarize a conversation between a financial advisor and
+    a client.
+
+    CRITICAL INSTRUCTIONS:
+    - Merge the existing summary (if any) with the new turns
+    - Keep the client's stated goals, constraints, risk
+      preferences and any changes to the recommendations
+    - Drop greetings, repetition and general explanations
+    - Return ONLY the summary, at most a short paragraph
+    """
+
+
+@lru_cache(maxsize=None)
+def get_conversation_summary_agent():
+    """
+    Returns the Conversation Summary Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Same local model as the other agents.
+        model=get_llm_model(MODEL_NAME),
+
+        # Small budget: the summary is one short paragraph
+        # (see utils.generation_profiles).
+        model_settings=get_generation_profile("conversation_summary").model_settings(),
+
+        # System prompt (see above).
+        system_prompt=CONVERSATION_SUMMARY_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, CONVERSATION_SUMMARY_PROMPT)
+
+
+def __getattr__(name: str):
+    # `conversation_summary_agent` stays importable: it is built
+    # on first access, then cached by get_conversation_summary_agent()
+    if name == "conversation_summary_agent":
+        return get_conversation_summary_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
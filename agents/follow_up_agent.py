@@ -0,0 +1,84 @@
+"""
+Follow-Up Agent
+
+Purpose:
+    This file defines the Follow-Up Agent.
+    The agent answers a client's follow-up questions about a
+    report they already received ("what if I'm more risk-averse?").
+
+Why this agent exists:
+    Re-running the whole workflow for every follow-up repeats the
+    market analysis and both recommendations. The follow-up agent
+    instead works from the report and the conversation so far,
+    which an advisory session keeps (see
+    orchestrator/advisory_session.py).
+"""
+
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
+
+# Import the LLM configuration utility.
+from utils.llm_configuration import get_llm_model
+
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
+
+# -------------------------------------------------------------------
+# Follow-Up Agent Definition
+# -------------------------------------------------------------------
+# Sessions always pass a message history, so PydanticAI does not add
+# this system prompt itself: the session puts it at the start of
+# the history, together with the report.
+# -------------------------------------------------------------------
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the role and scope of this agent.
+FOLLOW_UP_PROMPT = """
+    You are a financial advisor answering a client's follow-up
+    questions about the advisory report they received.
+
+    Guidelines:
+    - Base your answers on the report's market analysis and
+      recommendations, and on the conversation so far
+    - When the client's situation or preferences change, say how
+      the recommendations should change and why
+    - Be concise and factual, and mention the main risks
+    """
+
+
+@lru_cache(maxsize=None)
+def get_follow_up_agent():
+    """
+    Returns the Follow-Up Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Same local model as the other agents.
+        model=get_llm_model(MODEL_NAME),
+
+        # A few paragraphs at most (see utils.generation_profiles).
+        model_settings=get_generation_profile("follow_up").model_settings(),
+
+        # System prompt (see above).
+        system_prompt=FOLLOW_UP_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, FOLLOW_UP_PROMPT)
+
+
+def __getattr__(name: str):
+    # `follow_up_agent` stays importable: it is built
+    # on first access, then cached by get_follow_up_agent()
+    if name == "follow_up_agent":
+        return get_follow_up_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,9 +15,8 @@ Why this agent exists:
     and sustainable growth.
 """
 
-# Import the Agent class from the PydanticAI framework.
-# This is used to define a role-based AI agent.
-from pydantic_ai import Agent
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
 
 # Import the Pydantic schema used to describe the expected
 # structure of an investment recommendation.
@@ -29,6 +28,9 @@ from schemas.investment_schema import InvestmentRecommendation
 # running locally through Ollama.
 from utils.llm_configuration import get_llm_model
 
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
 
 # -------------------------------------------------------------------
 # Long-Term Investment Agent Definition
@@ -41,20 +43,12 @@ from utils.llm_configuration import get_llm_model
 # - Responses are stable and retry-safe
 # - No function calling is used (to avoid parsing issues)
 # -------------------------------------------------------------------
-long_term_investment_agent = Agent(
-    # Specify the language model used by this agent.
-    # "llama3.2:latest" refers to the latest LLaMA model
-    # served locally via Ollama.
-    model=get_llm_model("llama3.2:latest"),
-
-    # Number of retry attempts if the model output
-    # does not match the expected format.
-    # This improves reliability when dealing with LLMs.
-    retries=3,
-
-    # System prompt defines the behavior, role,
-    # and strict output requirements for this agent.
-    system_prompt="""
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the behavior, role,
+# and strict output requirements for this agent.
+LONG_TERM_PROMPT = """
     You are a long-term investment advisor.
 
     Focus:
@@ -86,4 +80,47 @@ long_term_investment_agent = Agent(
         "time_horizon": "Long-term"
     }
     """
-)
+
+
+@lru_cache(maxsize=None)
+def get_long_term_investment_agent():
+    """
+    Returns the Long-Term Investment Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Specify the language model used by this agent.
+        # "llama3.2:latest" refers to the latest LLaMA model
+        # served locally via Ollama.
+        model=get_llm_model(MODEL_NAME),
+
+        # Small token budget and a stop at the closing brace: the
+        # answer is one flat JSON object (see utils.generation_profiles).
+        model_settings=get_generation_profile("long_term").model_settings(),
+
+        # Number of retry attempts if the model output
+        # does not match the expected format.
+        # This improves reliability when dealing with LLMs.
+        retries=3,
+
+        # System prompt (see above).
+        system_prompt=LONG_TERM_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, LONG_TERM_PROMPT)
+
+
+def __getattr__(name: str):
+    # `long_term_investment_agent` stays importable: it is built
+    # on first access, then cached by get_long_term_investment_agent()
+    if name == "long_term_investment_agent":
+        return get_long_term_investment_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
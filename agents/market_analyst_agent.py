@@ -15,15 +15,17 @@ Why this agent exists:
     are made.
 """
 
-# Import the Agent class from the PydanticAI framework.
-# This class is used to define intelligent, role-based AI agents.
-from pydantic_ai import Agent
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
 
 # Import the LLM configuration utility.
 # This function returns the configured language model
 # (running locally via Ollama).
 from utils.llm_configuration import get_llm_model
 
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
 
 # -------------------------------------------------------------------
 # Market Analyst Agent Definition
@@ -35,15 +37,12 @@ from utils.llm_configuration import get_llm_model
 # The system_prompt acts as instructions for the LLM, ensuring
 # that responses remain factual, structured, and finance-focused.
 # -------------------------------------------------------------------
-market_analyst_agent = Agent(
-    # Specify the language model to be used by this agent.
-    # "llama3.2:latest" refers to the latest version of the LLaMA model
-    # running locally through Ollama.
-    model=get_llm_model("llama3.2:latest"),
-
-    # System prompt defines the role and scope of this agent.
-    # It guides the LLM to behave like a professional financial analyst.
-    system_prompt="""
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the role and scope of this agent.
+# It guides the LLM to behave like a professional financial analyst.
+MARKET_ANALYST_PROMPT = """
     You are a professional financial market analyst.
 
     Responsibilities:
@@ -55,4 +54,42 @@ market_analyst_agent = Agent(
       market overview that can be used by other agents
       for investment decision-making
     """
-)
+
+
+@lru_cache(maxsize=None)
+def get_market_analyst_agent():
+    """
+    Returns the Market Analyst Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Specify the language model to be used by this agent.
+        # "llama3.2:latest" refers to the latest version of the LLaMA model
+        # running locally through Ollama.
+        model=get_llm_model(MODEL_NAME),
+
+        # Generation settings sized for a concise overview
+        # (see utils.generation_profiles).
+        model_settings=get_generation_profile("market_analyst").model_settings(),
+
+        # System prompt (see above).
+        system_prompt=MARKET_ANALYST_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, MARKET_ANALYST_PROMPT)
+
+
+def __getattr__(name: str):
+    # `market_analyst_agent` stays importable: it is built
+    # on first access, then cached by get_market_analyst_agent()
+    if name == "market_analyst_agent":
+        return get_market_analyst_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
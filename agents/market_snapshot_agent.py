@@ -0,0 +1,97 @@
+"""
+Market Snapshot Agent
+
+Purpose:
+    This file defines the Market Snapshot Agent.
+    The agent condenses the Market Analyst Agent's free-text
+    analysis into a compact MarketSnapshot JSON object.
+
+Why this agent exists:
+    The investment agents do not need the full prose analysis,
+    only its key facts. Extracting them once, with a short and
+    cheap generation, lets both investment agents work from a
+    prompt that is a fraction of the size (see
+    schemas/market_snapshot.py).
+"""
+
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
+
+# Import the LLM configuration utility.
+from utils.llm_configuration import get_llm_model
+
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
+
+# -------------------------------------------------------------------
+# Market Snapshot Agent Definition
+# -------------------------------------------------------------------
+# Extraction only: the agent restates facts from the analysis it is
+# given, so a low temperature and a small token budget are enough.
+# -------------------------------------------------------------------
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the extraction task and the exact
+# output format.
+MARKET_SNAPSHOT_PROMPT = """
+    You extract a market snapshot from a market analysis.
+
+    CRITICAL INSTRUCTIONS:
+    - Use only facts stated in the analysis
+    - You must return ONLY a valid JSON object
+    - Do NOT wrap the response in any additional text
+
+    Required JSON format:
+    {
+        "sentiment": "Bullish" or "Neutral" or "Bearish" (or a short phrase),
+        "rates_trend": "Rising" or "Stable" or "Falling",
+        "inflation": "Short description",
+        "top_sectors": [{"name": "Sector", "score": number from -1.0 to 1.0}],
+        "key_risks": ["Risk", "..."]
+    }
+
+    List at most five sectors, strongest first.
+    """
+
+
+@lru_cache(maxsize=None)
+def get_market_snapshot_agent():
+    """
+    Returns the Market Snapshot Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Same local model as the other agents. Extraction is an easy
+        # task, so a smaller model can be configured here if available.
+        model=get_llm_model(MODEL_NAME),
+
+        # Small budget: the snapshot is a short JSON object
+        # (see utils.generation_profiles).
+        model_settings=get_generation_profile("market_snapshot").model_settings(),
+
+        # Number of retry attempts if the output is malformed.
+        retries=3,
+
+        # System prompt (see above).
+        system_prompt=MARKET_SNAPSHOT_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, MARKET_SNAPSHOT_PROMPT)
+
+
+def __getattr__(name: str):
+    # `market_snapshot_agent` stays importable: it is built
+    # on first access, then cached by get_market_snapshot_agent()
+    if name == "market_snapshot_agent":
+        return get_market_snapshot_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
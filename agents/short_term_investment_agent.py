@@ -14,9 +14,8 @@ Why this agent exists:
     who focuses on near-term opportunities.
 """
 
-# Import the Agent class from the PydanticAI framework.
-# This class is used to create role-based intelligent agents.
-from pydantic_ai import Agent
+# Memoizes the agent, which is built on first use.
+from functools import lru_cache
 
 # Import the Pydantic schema that defines the structure
 # of an investment recommendation.
@@ -28,6 +27,9 @@ from schemas.investment_schema import InvestmentRecommendation
 # language model running locally via Ollama.
 from utils.llm_configuration import get_llm_model
 
+# Per-agent token budget, stop sequences and temperature.
+from utils.generation_profiles import get_generation_profile
+
 
 # -------------------------------------------------------------------
 # Short-Term Investment Agent Definition
@@ -40,20 +42,12 @@ from utils.llm_configuration import get_llm_model
 # - Avoid function calling to simplify response parsing
 # - Use retry logic to handle occasional formatting issues
 # -------------------------------------------------------------------
-short_term_investment_agent = Agent(
-    # Specify the local open-source LLM to be used.
-    # "llama3.2:latest" refers to the latest LLaMA model
-    # served locally using Ollama.
-    model=get_llm_model("llama3.2:latest"),
-
-    # Number of retry attempts if the LLM output
-    # does not follow the expected JSON structure.
-    # This improves robustness when working with LLMs.
-    retries=3,
-
-    # System prompt defines the role, scope,
-    # and strict output requirements for this agent.
-    system_prompt="""
+# Ollama model of this agent (also preloaded by utils.model_warmup).
+MODEL_NAME = "llama3.2:latest"
+
+# System prompt defines the role, scope,
+# and strict output requirements for this agent.
+SHORT_TERM_PROMPT = """
     You are a short-term investment advisor.
 
     Focus:
@@ -85,4 +79,47 @@ short_term_investment_agent = Agent(
         "time_horizon": "Short-term"
     }
     """
-)
+
+
+@lru_cache(maxsize=None)
+def get_short_term_investment_agent():
+    """
+    Returns the Short-Term Investment Agent, built on first use.
+
+    Building an agent imports PydanticAI and the OpenAI client
+    stack, which dominate start-up time, so nothing is built
+    until an agent is actually needed.
+    """
+    from pydantic_ai import Agent
+
+    from utils.response_cache import register_system_prompt
+
+    agent = Agent(
+        # Specify the local open-source LLM to be used.
+        # "llama3.2:latest" refers to the latest LLaMA model
+        # served locally using Ollama.
+        model=get_llm_model(MODEL_NAME),
+
+        # Small token budget and a stop at the closing brace: the
+        # answer is one flat JSON object (see utils.generation_profiles).
+        model_settings=get_generation_profile("short_term").model_settings(),
+
+        # Number of retry attempts if the LLM output
+        # does not follow the expected JSON structure.
+        # This improves robustness when working with LLMs.
+        retries=3,
+
+        # System prompt (see above).
+        system_prompt=SHORT_TERM_PROMPT
+    )
+
+    # The response cache keys on the system prompt
+    return register_system_prompt(agent, SHORT_TERM_PROMPT)
+
+
+def __getattr__(name: str):
+    # `short_term_investment_agent` stays importable: it is built
+    # on first access, then cached by get_short_term_investment_agent()
+    if name == "short_term_investment_agent":
+        return get_short_term_investment_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,396 @@
+"""
+
+Batch Advisor
+
+Purpose:
+    This file generates advisories for many client profiles in one
+    process: client requests are read from a JSONL file and one
+    JSONL report per client is written as soon as it completes.
+
+Why this file exists:
+    Running `main.py` once per client pays Python start-up, agent
+    construction and a market analysis for every row. In batch
+    mode:
+    - the market analysis is computed once per batch and shared
+      by every client
+    - at most `concurrency` clients are in flight at once
+    - input is read lazily and output is written as rows finish,
+      so memory stays flat however large the input file is
+    - a checkpoint file records finished rows, so a crashed run
+      resumes without regenerating them
+
+Input format (one JSON object per line):
+    {"id": "client-001", "profile": {"age": 42, "risk_tolerance": "Low"}}
+    {"id": "client-002", "profile": "Retired teacher, wants income"}
+
+    "id" defaults to the line number; "profile" may be a mapping or
+    free text and is added to the investment prompts.
+
+Output format (one JSON object per line, in completion order):
+    {"id": ..., "as_of": "2026-10-16", "short_term_investment": {...},
+     "long_term_investment": {...}, "errors": {}, "seconds": 1.2}
+
+    "as_of" is the date the advice was generated, so the file can
+    be scored later with evaluation.backtest.
+
+    The file is append-only. A row with errors is retried by the
+    next run and written again, so an id can appear more than once:
+    readers take the last row per id (evaluation.backtest does).
+
+Checkpoint format (JSONL):
+    The first line stores the batch's market analysis, so a resumed
+    run advises the remaining clients on the same market view.
+    Every further line is {"id": ...} for a successfully finished
+    row. Rows with errors are written to the output but not
+    checkpointed, so the next run retries them (and its row
+    supersedes theirs, see Output format).
+
+Usage:
+    python -m batch.batch_advisor clients.jsonl reports.jsonl
+    python -m batch.batch_advisor clients.jsonl reports.jsonl --concurrency 8
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date
+
+# Workflow stages shared with the CLI and the HTTP service
+from orchestrator.financial_orchestrator import (
+    format_client_profile,
+    run_investment_recommendations,
+    run_market_analysis
+)
+from market_data.indicators import load_market_summary
+from retrieval.bm25_index import research_context
+from storage.report_store import ReportStore
+from utils.deadline import deadline_scope
+from utils.llm_configuration import release_http_connections
+from utils.llm_scheduler import request_class
+
+
+# -------------------------------------------------------------------
+# Batch Summary
+# -------------------------------------------------------------------
+@dataclass
+class BatchSummary:
+    """
+    Counters for one batch run.
+
+    Attributes:
+        completed (int): Rows written without errors.
+        failed (int): Rows written with at least one agent error.
+        skipped (int): Rows already finished by a previous run.
+        invalid (int): Input lines that are not valid JSON objects.
+        seconds (float): Wall-clock time of the run.
+    """
+
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of generated rows."""
+        generated = self.completed + self.failed
+        return generated / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a plain dict."""
+        return {**vars(self), "rows_per_second": self.rows_per_second}
+
+
+# -------------------------------------------------------------------
+# Checkpoint
+# -------------------------------------------------------------------
+class BatchCheckpoint:
+    """
+    Append-only record of finished rows (see module docstring).
+
+    Only row ids are kept in memory, never reports.
+
+    Args:
+        path (str): Location of the checkpoint file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.market_analysis = None
+        self.finished = set()
+        self._handle = None
+
+    def load(self) -> "BatchCheckpoint":
+        """Reads a checkpoint left by a previous run, if any."""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash may leave a partial last line
+                    continue
+                if "market_analysis" in entry:
+                    self.market_analysis = entry["market_analysis"]
+                elif "id" in entry:
+                    self.finished.add(entry["id"])
+        return self
+
+    def open(self, market_analysis: str) -> None:
+        """Opens the file for appending, recording the market analysis once."""
+        self._handle = open(self.path, "a", encoding="utf-8")
+        if self.market_analysis is None:
+            self.market_analysis = market_analysis
+            self._write({"market_analysis": market_analysis})
+
+    def mark_finished(self, row_id) -> None:
+        """Records a row as finished."""
+        self.finished.add(row_id)
+        self._write({"id": row_id})
+
+    def _write(self, entry: dict) -> None:
+        self._handle.write(json.dumps(entry) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        """Closes the checkpoint file."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+# -------------------------------------------------------------------
+# Input Reading
+# -------------------------------------------------------------------
+def read_client_requests(path: str, summary: BatchSummary):
+    """
+    Lazily yields (row_id, profile) pairs from a JSONL file.
+
+    Blank lines are ignored; invalid lines are counted in
+    summary.invalid and skipped.
+    """
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                summary.invalid += 1
+                continue
+            if not isinstance(request, dict):
+                summary.invalid += 1
+                continue
+            yield request.get("id", line_number), request.get("profile")
+
+
+# -------------------------------------------------------------------
+# Output Rows
+# -------------------------------------------------------------------
+def report_row(row_id, outcomes) -> dict:
+    """
+    Builds an output row (see module docstring) from the outcomes of
+    run_investment_recommendations(); a failed agent leaves its
+    recommendation None and its error under "errors".
+    """
+    row = {"id": row_id, "as_of": date.today().isoformat(), "errors": {}}
+    for name, outcome in zip(("short_term", "long_term"), outcomes):
+        if isinstance(outcome, BaseException):
+            row[f"{name}_investment"] = None
+            row["errors"][name] = str(outcome)
+        else:
+            row[f"{name}_investment"] = outcome.model_dump()
+    return row
+
+
+# -------------------------------------------------------------------
+# Batch Runner
+# -------------------------------------------------------------------
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    checkpoint_path: str = None,
+    concurrency: int = 4,
+    use_cache: bool = True,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    cascade: bool = False,
+    market_data: str = None,
+    research: str = None,
+    archive: str = None,
+    deadline: float = None,
+    hedge: bool = False
+) -> BatchSummary:
+    """
+    Generates one advisory per client request.
+
+    Args:
+        input_path (str):
+            JSONL file of client requests.
+
+        output_path (str):
+            JSONL file the reports are appended to.
+
+        checkpoint_path (str):
+            Checkpoint file. Defaults to "<output_path>.checkpoint".
+
+        concurrency (int):
+            Maximum number of clients in flight. Each client runs
+            both investment agents, so up to 2 * concurrency model
+            requests are outstanding.
+
+        use_cache, structured_output, validate_stream, cascade,
+        market_data, research:
+            See run_agentic_financial_advisor_async(). They are
+            computed once and shared by every row.
+
+        archive (str):
+            Optional report store directory (see
+            storage.report_store); every successful row is also
+            appended there.
+
+        deadline (float):
+            Optional time budget per row, in seconds. A row whose
+            agents miss it is written with their errors (and not
+            checkpointed, so a resumed run retries it).
+
+        hedge (bool):
+            Duplicate slow agent calls (see utils.hedging).
+
+    Returns:
+        BatchSummary:
+            Counters for the run.
+    """
+    start_time = time.perf_counter()
+    summary = BatchSummary()
+    checkpoint = BatchCheckpoint(checkpoint_path or f"{output_path}.checkpoint").load()
+
+    # Shared market analysis: reused from the checkpoint when
+    # resuming, so every row of the batch sees the same market view.
+    market_analysis = checkpoint.market_analysis
+    if market_analysis is None:
+        with request_class("batch"):
+            market_analysis, _, _ = await run_market_analysis(
+                use_cache, market_data=market_data, research=research, hedge=hedge
+            )
+    checkpoint.open(market_analysis)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+    store = ReportStore(archive) if archive else None
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        async def advise(row_id, profile):
+            try:
+                started = time.perf_counter()
+                # Batch rows yield the endpoints to interactive reports
+                with request_class("batch"), deadline_scope(deadline):
+                    outcomes = await run_investment_recommendations(
+                        market_analysis,
+                        use_cache,
+                        structured_output,
+                        validate_stream,
+                        client_profile=format_client_profile(profile),
+                        cascade=cascade,
+                        market_data=market_data,
+                        hedge=hedge
+                    )
+                row = report_row(row_id, outcomes)
+                row["seconds"] = round(time.perf_counter() - started, 3)
+
+                # Write the report before checkpointing it: a crash
+                # in between repeats a row, but never loses one.
+                output.write(json.dumps(row) + "\n")
+                output.flush()
+                if row["errors"]:
+                    summary.failed += 1
+                else:
+                    summary.completed += 1
+                    checkpoint.mark_finished(row_id)
+                    if store is not None:
+                        store.append(row)
+            finally:
+                semaphore.release()
+
+        try:
+            for row_id, profile in read_client_requests(input_path, summary):
+                if row_id in checkpoint.finished:
+                    summary.skipped += 1
+                    continue
+                # Waiting here, before reading the next line, keeps
+                # at most `concurrency` rows in memory.
+                await semaphore.acquire()
+                task = asyncio.create_task(advise(row_id, profile))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+            checkpoint.close()
+            if store is not None:
+                store.close()
+
+    summary.seconds = time.perf_counter() - start_time
+    return summary
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Batch financial advisories from JSONL")
+    parser.add_argument("input", help="JSONL file of client requests.")
+    parser.add_argument("output", help="JSONL file the reports are appended to.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint).")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--validate-stream", action="store_true")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--market-data", metavar="PATH", help="Price history for indicators.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--research-index", metavar="PATH", help="BM25 research index.")
+    parser.add_argument("--archive", metavar="DIR", help="Report store for finished rows.")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS", help="Time budget per row.")
+    parser.add_argument("--hedge", action="store_true", help="Duplicate slow agent calls.")
+    args = parser.parse_args(argv)
+    market_data = load_market_summary(args.market_data, args.top_k) if args.market_data else None
+    research = research_context(args.research_index) if args.research_index else None
+
+    async def run_and_release():
+        try:
+            return await run_batch(
+                args.input,
+                args.output,
+                checkpoint_path=args.checkpoint,
+                concurrency=args.concurrency,
+                use_cache=not args.no_cache,
+                structured_output=args.structured_output,
+                validate_stream=args.validate_stream,
+                cascade=args.cascade,
+                market_data=market_data,
+                research=research,
+                archive=args.archive,
+                deadline=args.deadline,
+                hedge=args.hedge
+            )
+        finally:
+            await release_http_connections()
+
+    summary = asyncio.run(run_and_release())
+    print(
+        f"Completed: {summary.completed}  failed: {summary.failed}  "
+        f"skipped: {summary.skipped}  invalid: {summary.invalid}  "
+        f"({summary.seconds:.1f}s, {summary.rows_per_second:.2f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
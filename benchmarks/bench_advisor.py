@@ -0,0 +1,267 @@
+"""
+
+Advisor Benchmark
+
+Purpose:
+    This file drives run_agentic_financial_advisor_async end to end
+    against the local stub LLM server and reports latency and
+    throughput.
+
+Why this file exists:
+    With a deterministic stand-in for Ollama, the time the stub
+    spends "generating" is known, so anything above it is
+    orchestrator overhead. Running the same scenarios before and
+    after a change shows regressions without a GPU.
+
+What it reports:
+    - p50 / p95 / p99 end-to-end latency
+    - throughput (reports per second) at N concurrent runs
+    - the effect of malformed outputs (repairs and retries)
+
+Usage:
+    python -m benchmarks.bench_advisor
+    python -m benchmarks.bench_advisor --concurrency 1 4 16 --runs 32
+    python -m benchmarks.bench_advisor --malformed-rate 0.3 --json out.json
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from contextlib import ExitStack
+from dataclasses import replace
+
+# Agents are pointed at the stub server with Agent.override()
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_snapshot_agent import market_snapshot_agent
+from agents.follow_up_agent import follow_up_agent
+from agents.conversation_summary_agent import conversation_summary_agent
+
+# Orchestrator under test and its statistics
+from orchestrator.financial_orchestrator import (
+    VALIDATION_STATS,
+    run_agentic_financial_advisor_async
+)
+from utils.json_repair import REPAIR_STATS
+from utils.model_cascade import CASCADE_POLICIES, CASCADE_STATS, cascade_summary
+from utils.llm_configuration import get_llm_model, release_http_connections
+from utils.telemetry import METRICS, percentile
+
+# Local stand-in for Ollama
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+
+
+ADVISOR_AGENTS = (
+    market_analyst_agent,
+    short_term_investment_agent,
+    long_term_investment_agent,
+    market_snapshot_agent,
+    follow_up_agent,
+    conversation_summary_agent,
+)
+
+
+@contextlib.contextmanager
+def agents_using(base_url: str):
+    """
+    Points every advisor agent, and the cheap cascade tiers, at
+    another OpenAI-compatible endpoint for the duration of the block.
+    """
+    model = get_llm_model("llama3.2:latest", base_url=base_url)
+    saved_policies = dict(CASCADE_POLICIES)
+    try:
+        for name, policy in saved_policies.items():
+            CASCADE_POLICIES[name] = replace(policy, base_url=base_url)
+        with ExitStack() as stack:
+            for agent in ADVISOR_AGENTS:
+                stack.enter_context(agent.override(model=model))
+            yield
+    finally:
+        CASCADE_POLICIES.update(saved_policies)
+
+
+async def run_scenario(
+    concurrency: int,
+    runs: int,
+    **advisor_kwargs
+) -> dict:
+    """
+    Runs `runs` reports with at most `concurrency` in flight.
+
+    Args:
+        concurrency (int):
+            Maximum number of concurrent reports.
+
+        runs (int):
+            Total number of reports.
+
+        **advisor_kwargs:
+            Passed to run_agentic_financial_advisor_async().
+
+    Returns:
+        dict:
+            Latency percentiles, throughput and error count.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_run():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await run_agentic_financial_advisor_async(
+                    use_cache=False, **advisor_kwargs
+                )
+            except Exception:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    # The orchestrator prints progress; keep the benchmark output readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one_run() for _ in range(runs)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def _reset_statistics() -> None:
+    VALIDATION_STATS.clear()
+    CASCADE_STATS.clear()
+    METRICS.clear()
+    REPAIR_STATS.clean = REPAIR_STATS.repaired = REPAIR_STATS.unrepairable = 0
+
+
+def run_benchmark(
+    stub_config: StubConfig,
+    concurrency_levels=(1, 4, 16),
+    runs: int = 16,
+    **advisor_kwargs
+) -> dict:
+    """
+    Starts a stub server and runs one scenario per concurrency level.
+
+    Returns:
+        dict:
+            Per-scenario results plus stub, validation and repair
+            counters.
+    """
+    _reset_statistics()
+
+    with StubLLMServer(stub_config) as server, agents_using(server.base_url):
+        async def all_scenarios():
+            try:
+                return [
+                    await run_scenario(level, runs, **advisor_kwargs)
+                    for level in concurrency_levels
+                ]
+            finally:
+                await release_http_connections()
+
+        scenarios = asyncio.run(all_scenarios())
+        stub_stats = vars(server.stats).copy()
+
+    return {
+        "stub": {**vars(stub_config), **stub_stats, "recommendations": None},
+        "scenarios": scenarios,
+        "validation": {key: stats.as_dict() for key, stats in VALIDATION_STATS.items()},
+        "repair": REPAIR_STATS.as_dict(),
+        "cascade": cascade_summary(),
+        "stages": METRICS.snapshot()["stages"],
+    }
+
+
+def print_results(results: dict) -> None:
+    """Prints a compact table of benchmark results."""
+    stub = results["stub"]
+    print("\n" + "=" * 70)
+    print(
+        f"Stub: ttft={stub['ttft']}s per_token={stub['per_token_latency']}s "
+        f"errors={stub['error_rate']} malformed={stub['malformed_rate']}"
+    )
+    print("=" * 70)
+    print(f"{'conc':>5} {'runs':>5} {'err':>4} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'rep/s':>8}")
+    for row in results["scenarios"]:
+        print(
+            f"{row['concurrency']:>5} {row['runs']:>5} {row['errors']:>4} "
+            f"{row['p50'] or 0:>8.3f} {row['p95'] or 0:>8.3f} "
+            f"{row['p99'] or 0:>8.3f} {row['throughput_per_s']:>8.2f}"
+        )
+
+    repair = results["repair"]
+    corrections = sum(v["corrections"] for v in results["validation"].values())
+    print(
+        f"\nRequests: {stub['requests']}  injected errors: {stub['errors']}  "
+        f"malformed: {stub['malformed']}"
+    )
+    print(
+        f"Repaired locally: {repair['repaired']}  "
+        f"correction retries: {corrections}  unrepairable: {repair['unrepairable']}"
+    )
+
+    if results["cascade"]:
+        print(f"\n{'cascade tier':<32} {'tries':>6} {'hit %':>6} {'p50 s':>8} {'p95 s':>8}")
+        for tier, stats in results["cascade"].items():
+            print(
+                f"{tier:<32} {stats['attempts']:>6} {stats['hit_rate'] * 100:>6.1f} "
+                f"{stats['latency_p50'] or 0:>8.3f} {stats['latency_p95'] or 0:>8.3f}"
+            )
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="End-to-end advisor benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=16)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--per-token-latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--validate-stream", action="store_true")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--handoff", choices=("prose", "snapshot"), default="prose")
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        StubConfig(
+            ttft=args.ttft,
+            per_token_latency=args.per_token_latency,
+            error_rate=args.error_rate,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed
+        ),
+        concurrency_levels=args.concurrency,
+        runs=args.runs,
+        structured_output=args.structured_output,
+        validate_stream=args.validate_stream,
+        cascade=args.cascade,
+        handoff=args.handoff
+    )
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+
+Hand-off Benchmark
+
+Purpose:
+    This file compares the two ways the market analysis can be
+    handed to the investment agents:
+    - "prose":    the full free-text analysis in both prompts
+    - "snapshot": a compact MarketSnapshot written by the analyst
+
+Why this file exists:
+    The snapshot hand-off costs the analyst a few extra output
+    tokens but shrinks the prompt of both investment agents.
+    Whether that is a net win depends on how long the analysis is
+    and how expensive prompt processing is, so the stub server
+    models both (market_text, per_prompt_token_latency) and this
+    benchmark reports prompt tokens and end-to-end latency.
+
+Usage:
+    python -m benchmarks.bench_handoff
+    python -m benchmarks.bench_handoff --per-prompt-token-latency 0.002 --runs 32
+"""
+
+# Standard library imports
+import argparse
+import json
+
+# End-to-end runner shared with the advisor benchmark
+from benchmarks.bench_advisor import run_benchmark
+from benchmarks.stub_llm_server import MARKET_ANALYSIS_TEXT, StubConfig
+
+
+# Stages whose prompts carry the market analysis (or snapshot)
+INVESTMENT_STAGES = ("short_term", "long_term")
+
+
+def summarize(results: dict) -> dict:
+    """
+    Reduces run_benchmark() results to per-report token counts
+    and latency.
+    """
+    stages = results["stages"]
+    reports = sum(row["runs"] - row["errors"] for row in results["scenarios"]) or 1
+    investment_prompt_tokens = sum(
+        stages.get(stage, {}).get("prompt_tokens", 0) for stage in INVESTMENT_STAGES
+    )
+    snapshot_prompt_tokens = stages.get("market_snapshot", {}).get("prompt_tokens", 0)
+    scenario = results["scenarios"][-1]
+    return {
+        "investment_prompt_tokens_per_report": investment_prompt_tokens / reports,
+        "snapshot_prompt_tokens_per_report": snapshot_prompt_tokens / reports,
+        "total_prompt_tokens_per_report": results["stub"]["prompt_tokens"] / reports,
+        "investment_generation_p50": {
+            stage: stages.get(stage, {}).get("generation_seconds", {}).get("p50")
+            for stage in INVESTMENT_STAGES
+        },
+        "p50": scenario["p50"],
+        "p95": scenario["p95"],
+        "throughput_per_s": scenario["throughput_per_s"],
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Prose vs snapshot hand-off benchmark")
+    parser.add_argument("--runs", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--ttft", type=float, default=0.02)
+    parser.add_argument("--per-prompt-token-latency", type=float, default=0.001)
+    parser.add_argument("--per-token-latency", type=float, default=0.002)
+    parser.add_argument(
+        "--analysis-paragraphs", type=int, default=5,
+        help="Length of the simulated market analysis, in stub paragraphs "
+             "(~110 tokens each; real analyses are several hundred tokens)."
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON.")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        ttft=args.ttft,
+        per_prompt_token_latency=args.per_prompt_token_latency,
+        per_token_latency=args.per_token_latency,
+        market_text="\n\n".join([MARKET_ANALYSIS_TEXT] * args.analysis_paragraphs)
+    )
+
+    comparison = {}
+    for handoff in ("prose", "snapshot"):
+        results = run_benchmark(
+            config,
+            concurrency_levels=[args.concurrency],
+            runs=args.runs,
+            handoff=handoff
+        )
+        comparison[handoff] = summarize(results)
+
+    print("\n" + "=" * 70)
+    print(
+        f"Hand-off comparison ({args.runs} reports, concurrency {args.concurrency}, "
+        f"{args.per_prompt_token_latency * 1000:.1f} ms per prompt token, "
+        f"{args.analysis_paragraphs} analysis paragraphs)"
+    )
+    print("=" * 70)
+    print(f"{'':<34} {'prose':>12} {'snapshot':>12}")
+    rows = (
+        ("investment prompt tokens/report", "investment_prompt_tokens_per_report", "{:>12.0f}"),
+        ("extraction prompt tokens/report", "snapshot_prompt_tokens_per_report", "{:>12.0f}"),
+        ("total prompt tokens/report", "total_prompt_tokens_per_report", "{:>12.0f}"),
+        ("end-to-end p50 (s)", "p50", "{:>12.3f}"),
+        ("end-to-end p95 (s)", "p95", "{:>12.3f}"),
+        ("reports/s", "throughput_per_s", "{:>12.2f}"),
+    )
+    for label, key, fmt in rows:
+        print(
+            f"{label:<34}"
+            + fmt.format(comparison["prose"][key] or 0)
+            + fmt.format(comparison["snapshot"][key] or 0)
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(comparison, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+
+Market Data Benchmark
+
+Purpose:
+    This file measures how long the market data layer takes to
+    load a large price history and compute every indicator.
+
+Why this file exists:
+    The indicator summary is computed before every report (or
+    once per batch), so it must stay far below one LLM call. The
+    benchmark writes a synthetic universe in the native .npy
+    format, memory-maps it and times the indicators, so changes
+    to the loader or the indicators can be checked for
+    regressions without real market data.
+
+Usage:
+    python -m benchmarks.bench_market_data
+    python -m benchmarks.bench_market_data --symbols 5000 --days 5040
+"""
+
+# Standard library imports
+import argparse
+import tempfile
+import time
+
+# NumPy generates the synthetic prices
+import numpy as np
+
+from market_data.indicators import compute_indicators, summarize_indicators
+from market_data.loader import PriceHistory, load_price_history, save_price_history
+
+
+def synthetic_history(n_symbols: int, n_days: int, seed: int = 7) -> PriceHistory:
+    """
+    Generates geometric random-walk prices for a synthetic universe.
+
+    Each symbol gets its own drift and volatility; symbols listed
+    late have NaN before their first bar, like a real universe.
+    """
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.0003, 0.0004, n_symbols)
+    volatility = rng.uniform(0.008, 0.03, n_symbols)
+    returns = rng.normal(drift, volatility, (n_days, n_symbols))
+    close = 100.0 * np.exp(np.cumsum(returns, axis=0))
+
+    # A tenth of the universe listed partway through the history
+    late = rng.choice(n_symbols, n_symbols // 10, replace=False)
+    listing_day = rng.integers(0, n_days, len(late))
+    unlisted = np.zeros(close.shape, dtype=bool)
+    unlisted[:, late] = np.arange(n_days)[:, None] < listing_day
+    close[unlisted] = np.nan
+
+    return PriceHistory(
+        symbols=np.array([f"SYM{i:05d}" for i in range(n_symbols)]),
+        dates=np.datetime64("2026-10-16") - np.arange(n_days)[::-1],
+        fields={"close": close}
+    )
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the market data layer")
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=2520, help="Trading days (2520 = ~10 years).")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_price_history(synthetic_history(args.symbols, args.days), directory)
+
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            history = load_price_history(directory)
+            table = compute_indicators(history)
+            summary = summarize_indicators(table)
+            timings.append(time.perf_counter() - started)
+
+    print(summary)
+    print(
+        f"\n{args.symbols} symbols x {args.days} days: "
+        f"best {min(timings) * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms "
+        f"(load + indicators + summary, memory-mapped)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+
+Retrieval Benchmark
+
+Purpose:
+    This file builds a BM25 index over a large synthetic research
+    corpus and measures build throughput and query latency.
+
+Why this file exists:
+    Retrieval runs before every market analysis, so queries must
+    stay in the low milliseconds however large the corpus grows,
+    and a build over hundreds of thousands of documents must not
+    need memory proportional to the corpus. The synthetic corpus
+    mixes a long tail of filler words (so the dictionary is
+    realistically large) with finance terms that each appear in
+    about a tenth of the notes (so queries read long postings
+    lists).
+
+Usage:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --documents 300000
+"""
+
+# Standard library imports
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+# NumPy generates the synthetic corpus
+import numpy as np
+
+from retrieval.bm25_index import DEFAULT_RESEARCH_QUERY, BM25Index
+from utils.telemetry import percentile
+
+
+# Common finance words; most queries use several of them.
+VOCABULARY = (
+    "inflation rates repo rbi fed yields bond equity nifty sensex earnings "
+    "guidance margin banking it pharma auto fmcg metals energy crude rupee "
+    "dollar liquidity credit growth gdp fiscal deficit monsoon capex exports "
+    "imports tariffs valuation outlook sentiment volatility risk upgrade "
+    "downgrade dividend buyback ipo flows fii dii"
+).split()
+
+QUERIES = (
+    DEFAULT_RESEARCH_QUERY,
+    "rbi repo rate decision inflation",
+    "banking credit growth margin",
+    "crude oil rupee imports deficit",
+    "it sector earnings guidance downgrade",
+    "fii flows equity valuation",
+)
+
+
+def synthetic_documents(count: int, seed: int = 11):
+    """
+    Yields (name, text) pairs lazily, one short note each.
+
+    Notes are mostly filler words with Zipf-like frequencies, plus a
+    few finance words each, so every finance term appears in roughly
+    one note in ten, like topical words in a real news corpus.
+    """
+    rng = np.random.default_rng(seed)
+    filler = np.array([f"w{rank}" for rank in range(20_000)])
+    # Inverse-CDF sampling: much faster than rng.choice(p=...) per note
+    cumulative = np.cumsum(1.0 / np.arange(1, len(filler) + 1))
+    cumulative /= cumulative[-1]
+    for number in range(count):
+        draws = rng.random(rng.integers(40, 160))
+        words = list(filler[np.searchsorted(cumulative, draws)])
+        words += list(rng.choice(VOCABULARY, size=rng.integers(2, 8)))
+        rng.shuffle(words)
+        yield f"note-{number:07d}.txt", " ".join(words)
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process (Linux reports KiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 research index")
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "research.bm25")
+        memory_before = peak_memory_mb()
+        started = time.perf_counter()
+        with BM25Index(path) as index:
+            for name, text in synthetic_documents(args.documents):
+                index.add_document(name, text)
+        build_seconds = time.perf_counter() - started
+
+        with BM25Index(path) as index:
+            started = time.perf_counter()
+            index.search("warm up", 1)
+            load_seconds = time.perf_counter() - started
+
+            latencies = []
+            for _ in range(args.repeat):
+                for query in QUERIES:
+                    started = time.perf_counter()
+                    index.search(query, 20)
+                    latencies.append(time.perf_counter() - started)
+
+        size_mb = os.path.getsize(path) / 2**20
+
+    print(
+        f"Indexed {args.documents} documents in {build_seconds:.1f}s "
+        f"({args.documents / build_seconds:,.0f} docs/s, {size_mb:.0f} MB on disk, "
+        f"peak RSS +{peak_memory_mb() - memory_before:.0f} MB)"
+    )
+    print(f"Opening the index for search: {load_seconds * 1000:.0f} ms")
+    print(
+        f"Query latency: p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 95) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+
+Scheduler Benchmark
+
+Purpose:
+    This file overloads a stub endpoint that, like Ollama, runs only
+    a few generations at once, and compares interactive report
+    latency with and without the LLM scheduler.
+
+Why this file exists:
+    Admission control only pays off under overload: a steady batch
+    load keeps many recommendation calls outstanding while
+    interactive reports arrive at a fixed rate. Without the
+    scheduler every request joins the server's arrival-order queue,
+    so an interactive report waits behind the whole batch backlog.
+    With it, the endpoint runs at its parallelism and interactive
+    requests (market analysis first) start as soon as a slot frees
+    up. The batch throughput is reported too, since priority should
+    not cost capacity.
+
+Usage:
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --batch-concurrency 64 --seconds 20
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+# Local stand-in for Ollama, and the agents pointed at it
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import (
+    run_agentic_financial_advisor_async,
+    run_investment_recommendations
+)
+from utils.llm_configuration import release_http_connections
+from utils.llm_scheduler import SCHEDULERS, configure_scheduler, request_class
+from utils.telemetry import percentile
+
+
+async def overload(seconds: float, batch_concurrency: int, interval: float) -> dict:
+    """
+    Runs batch recommendations in a closed loop and starts one
+    interactive report every `interval` seconds.
+
+    Returns:
+        dict: Interactive latency percentiles and batch throughput.
+    """
+    stop = asyncio.Event()
+    latencies, errors = [], 0
+    batch_done = 0
+
+    async def batch_client():
+        nonlocal batch_done
+        with request_class("batch"):
+            while not stop.is_set():
+                await run_investment_recommendations("Markets are calm.", use_cache=False)
+                batch_done += 1
+
+    async def interactive_report():
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await run_agentic_financial_advisor_async(use_cache=False)
+        except Exception:
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        clients = [asyncio.create_task(batch_client()) for _ in range(batch_concurrency)]
+        reports = []
+        # Let the batch backlog build up first
+        await asyncio.sleep(1.0)
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            reports.append(asyncio.create_task(interactive_report()))
+            await asyncio.sleep(interval)
+        await asyncio.gather(*reports)
+        stop.set()
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "reports": len(latencies),
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "batch_per_s": batch_done / elapsed,
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the LLM scheduler under overload")
+    parser.add_argument("--num-parallel", type=int, default=2, help="Stub generations at once.")
+    parser.add_argument("--batch-concurrency", type=int, default=32)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between reports.")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(ttft=0.05, per_token_latency=0.001, num_parallel=args.num_parallel)
+    print(
+        f"Stub: {args.num_parallel} parallel generations, {args.batch_concurrency} batch "
+        f"clients, one interactive report every {args.interval}s"
+    )
+    print(f"{'scheduler':>10} {'reports':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'batch/s':>8}")
+    for limit in (0, args.num_parallel):
+        configure_scheduler(max_concurrency=limit)
+        SCHEDULERS.clear()
+        with StubLLMServer(config) as server, agents_using(server.base_url):
+            async def scenario():
+                try:
+                    return await overload(args.seconds, args.batch_concurrency, args.interval)
+                finally:
+                    await release_http_connections()
+
+            row = asyncio.run(scenario())
+        print(
+            f"{'on' if limit else 'off':>10} {row['reports']:>8} {row['p50']:>8.3f} "
+            f"{row['p95']:>8.3f} {row['p99']:>8.3f} {row['batch_per_s']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
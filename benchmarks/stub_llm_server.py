@@ -0,0 +1,503 @@
+"""
+
+Stub LLM Server
+
+Purpose:
+    This file provides a deterministic, local stand-in for the
+    Ollama OpenAI-compatible endpoint (/v1/chat/completions).
+
+Why this file exists:
+    The agent test scripts need a live Ollama with llama3.2, so
+    orchestrator overhead and regressions cannot be measured in
+    CI. This server answers like the real agents would (a market
+    analysis, or a JSON recommendation), with configurable
+    timing and failure behavior:
+    - time-to-first-token and per-token latency
+    - HTTP error injection
+    - malformed-output injection (prose, fences, bad fields)
+    - model load time on the first request per model, and the
+      preload request of Ollama's native API (/api/generate
+      without a prompt)
+
+Usage:
+    # As a context manager (tests and benchmarks)
+    with StubLLMServer(StubConfig(ttft=0.05)) as server:
+        model = get_llm_model(base_url=server.base_url)
+
+    # As a standalone process
+    python -m benchmarks.stub_llm_server --port 11500 --ttft 0.2
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+# Starlette provides the ASGI app; uvicorn serves it.
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+# -------------------------------------------------------------------
+# Canned Outputs
+# -------------------------------------------------------------------
+MARKET_ANALYSIS_TEXT = (
+    "Global equity markets are consolidating after a strong quarter. "
+    "Inflation in India is easing towards the RBI target band, and the "
+    "central bank is expected to keep the repo rate unchanged. Bond yields "
+    "are stable, the rupee is range-bound, and foreign portfolio flows have "
+    "turned positive. Banking and IT lead earnings momentum, while FMCG "
+    "faces margin pressure. Geopolitical risks and crude oil prices remain "
+    "the main sources of volatility. Overall sentiment is cautiously "
+    "optimistic."
+)
+
+RECOMMENDATIONS = {
+    "Short-term": {
+        "asset_name": "NIFTY Bank ETF",
+        "rationale": "Banking earnings momentum and stable rates favour "
+                     "financials over the next few months",
+        "risk_level": "Medium",
+        "expected_return": "6-8% over 3 months",
+        "time_horizon": "Short-term",
+    },
+    "Long-term": {
+        "asset_name": "NIFTY 50 Index Fund",
+        "rationale": "Broad diversified exposure to India's long-term "
+                     "growth at low cost",
+        "risk_level": "Medium",
+        "expected_return": "11-13% annually",
+        "time_horizon": "Long-term",
+    },
+}
+
+MARKET_SNAPSHOT = {
+    "sentiment": "Cautiously optimistic",
+    "rates_trend": "Stable",
+    "inflation": "Easing towards target",
+    "top_sectors": [
+        {"name": "Banking", "score": 0.7},
+        {"name": "IT", "score": 0.5},
+        {"name": "FMCG", "score": -0.3},
+    ],
+    "key_risks": ["Geopolitics", "Crude oil prices"],
+}
+
+
+def _malformed_variants(recommendation: dict) -> list:
+    """
+    Returns malformed renderings of a recommendation.
+
+    The first two are repairable locally; the last two require
+    a correction retry.
+    """
+    clean = json.dumps(recommendation, indent=2)
+    return [
+        "```json\n" + clean[:-2] + ",\n}\n```",
+        "Here is my recommendation:\n" + clean,
+        json.dumps({**recommendation, "risk_level": "Moderate"}),
+        "I recommend " + recommendation["asset_name"] + " because "
+        + recommendation["rationale"] + ".",
+    ]
+
+
+# -------------------------------------------------------------------
+# Configuration and Statistics
+# -------------------------------------------------------------------
+@dataclass
+class StubConfig:
+    """
+    Behavior of the stub server.
+
+    Attributes:
+        ttft (float): Seconds before the first token.
+        per_prompt_token_latency (float): Extra seconds before the first
+            token per prompt token, modelling prompt processing.
+        per_token_latency (float): Seconds between tokens.
+        error_rate (float): Share of requests answered with HTTP 500.
+        malformed_rate (float): Share of JSON answers that are malformed.
+        model_malformed_rates (dict): malformed_rate per requested model
+            name, to simulate small models that fail more often.
+        seed (int): Seed for the deterministic random generator.
+        num_parallel (int): Generations run at once, like
+            OLLAMA_NUM_PARALLEL; further requests wait in arrival
+            order. None runs everything at once.
+        load_time (float): Seconds the first request for a model
+            waits while the model is "loaded".
+        market_text (str): Text returned for market analysis prompts.
+        market_snapshot (dict): JSON returned for market snapshot prompts.
+        recommendations (dict): JSON returned per time horizon.
+    """
+
+    ttft: float = 0.05
+    per_prompt_token_latency: float = 0.0
+    per_token_latency: float = 0.005
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    model_malformed_rates: dict = field(default_factory=dict)
+    seed: int = 0
+    num_parallel: int = None
+    load_time: float = 0.0
+    market_text: str = MARKET_ANALYSIS_TEXT
+    market_snapshot: dict = field(default_factory=lambda: dict(MARKET_SNAPSHOT))
+    recommendations: dict = field(default_factory=lambda: dict(RECOMMENDATIONS))
+
+
+@dataclass
+class StubStats:
+    """
+    Counters kept by the stub server.
+
+    Attributes:
+        requests (int): Chat completion requests received.
+        errors (int): Injected HTTP errors.
+        malformed (int): Injected malformed outputs.
+        tokens_sent (int): Completion tokens actually sent.
+        streams_cancelled (int): Streams closed by the client early.
+        prompt_tokens (int): Approximate prompt tokens received.
+        stopped (int): Outputs cut short by a stop sequence.
+        active (int): Generations running right now.
+        peak_active (int): Most generations ever run at once.
+        loads (int): Models loaded (by a request or a preload).
+        keep_alive: keep_alive of the last preload request.
+        response_formats (list): response_format of every request
+            that asked for one (structured output).
+    """
+
+    requests: int = 0
+    errors: int = 0
+    malformed: int = 0
+    tokens_sent: int = 0
+    streams_cancelled: int = 0
+    prompt_tokens: int = 0
+    stopped: int = 0
+    active: int = 0
+    peak_active: int = 0
+    loads: int = 0
+    keep_alive: object = None
+    response_formats: list = field(default_factory=list)
+
+
+def tokenize(text: str) -> list:
+    """Splits text into word-like tokens, keeping whitespace."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+# -------------------------------------------------------------------
+# ASGI Application
+# -------------------------------------------------------------------
+def create_stub_app(config: StubConfig, stats: StubStats) -> Starlette:
+    """
+    Builds the Starlette app implementing /v1/chat/completions.
+
+    Args:
+        config (StubConfig): Timing and failure behavior.
+        stats (StubStats): Counters updated by the app.
+
+    Returns:
+        Starlette: The ASGI application.
+    """
+    rng = random.Random(config.seed)
+    # Like Ollama: a fixed number of parallel generations, the rest
+    # wait in arrival order
+    parallel = asyncio.Semaphore(config.num_parallel) if config.num_parallel else None
+
+    # Like Ollama: the first request for a model waits for its load
+    loaded = set()
+    load_lock = asyncio.Lock()
+
+    async def ensure_loaded(model: str):
+        async with load_lock:
+            if model not in loaded:
+                await asyncio.sleep(config.load_time)
+                loaded.add(model)
+                stats.loads += 1
+
+    @asynccontextmanager
+    async def generation_slot():
+        if parallel is not None:
+            await parallel.acquire()
+        stats.active += 1
+        stats.peak_active = max(stats.peak_active, stats.active)
+        try:
+            yield
+        finally:
+            stats.active -= 1
+            if parallel is not None:
+                parallel.release()
+
+    def choose_output(body: dict) -> str:
+        messages = body.get("messages", [])
+        system = " ".join(
+            str(m.get("content", "")) for m in messages if m.get("role") == "system"
+        )
+        prompt = str(messages[-1].get("content", "")) if messages else ""
+
+        if "market snapshot" in system.lower():
+            return json.dumps(config.market_snapshot, indent=2)
+
+        wants_json = "JSON" in system or "response_format" in body
+        if not wants_json:
+            if "SNAPSHOT:" in prompt:
+                return config.market_text + "\nSNAPSHOT: " + json.dumps(config.market_snapshot)
+            return config.market_text
+
+        is_long_term = (
+            "long-term" in system.lower()
+            or "provide a long-term" in prompt.lower()
+        )
+        horizon = "Long-term" if is_long_term else "Short-term"
+        recommendation = config.recommendations[horizon]
+        malformed_rate = config.model_malformed_rates.get(
+            body.get("model"), config.malformed_rate
+        )
+        if rng.random() < malformed_rate:
+            stats.malformed += 1
+            return rng.choice(_malformed_variants(recommendation))
+        return json.dumps(recommendation, indent=2)
+
+    def usage(body: dict, completion_tokens: int) -> dict:
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages", [])))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        if "response_format" in body:
+            stats.response_formats.append(body["response_format"])
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages", [])))
+        stats.prompt_tokens += prompt_tokens
+        # Longer prompts take longer to process before the first token
+        first_token_delay = config.ttft + config.per_prompt_token_latency * prompt_tokens
+
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            await asyncio.sleep(config.ttft)
+            return JSONResponse(
+                {"error": {"message": "injected failure", "type": "server_error"}},
+                status_code=500
+            )
+
+        await ensure_loaded(body.get("model"))
+        output = choose_output(body)
+        # Like a real server, stop before the first stop sequence
+        # (which is not part of the output).
+        stop = body.get("stop") or []
+        for sequence in [stop] if isinstance(stop, str) else stop:
+            if sequence in output:
+                output = output[:output.index(sequence)]
+                stats.stopped += 1
+                break
+        tokens = tokenize(output)
+        model = body.get("model", "stub")
+        created = int(time.time())
+        max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+        if max_tokens:
+            tokens = tokens[:max_tokens]
+
+        if not body.get("stream"):
+            async with generation_slot():
+                await asyncio.sleep(first_token_delay + config.per_token_latency * len(tokens))
+            stats.tokens_sent += len(tokens)
+            return JSONResponse({
+                "id": f"stub-{stats.requests}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                }],
+                "usage": usage(body, len(tokens)),
+            })
+
+        async def event_stream():
+            def chunk(delta: dict, finish_reason=None, **extra) -> str:
+                payload = {
+                    "id": f"stub-{stats.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0, "delta": delta, "finish_reason": finish_reason
+                    }],
+                    **extra,
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            completed = False
+            try:
+                async with generation_slot():
+                    await asyncio.sleep(first_token_delay)
+                    yield chunk({"role": "assistant", "content": ""})
+                    for index, token in enumerate(tokens):
+                        if index:
+                            await asyncio.sleep(config.per_token_latency)
+                        stats.tokens_sent += 1
+                        yield chunk({"content": token})
+                yield chunk({}, "stop")
+                yield (
+                    "data: " + json.dumps({
+                        "id": f"stub-{stats.requests}",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage(body, len(tokens)),
+                    }) + "\n\n"
+                )
+                yield "data: [DONE]\n\n"
+                completed = True
+            finally:
+                if not completed:
+                    stats.streams_cancelled += 1
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    async def list_models(request: Request):
+        return JSONResponse({"object": "list", "data": [
+            {"id": "llama3.2:latest", "object": "model", "owned_by": "stub"}
+        ]})
+
+    async def generate(request: Request):
+        # Native API; only the preload form (no prompt) is supported
+        body = await request.json()
+        if body.get("prompt"):
+            return JSONResponse({"error": "only preload requests are supported"}, status_code=400)
+        stats.keep_alive = body.get("keep_alive")
+        started = time.perf_counter()
+        await ensure_loaded(body.get("model"))
+        return JSONResponse({
+            "model": body.get("model"),
+            "response": "",
+            "done": True,
+            "done_reason": "load",
+            "load_duration": int((time.perf_counter() - started) * 1e9),
+        })
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/models", list_models, methods=["GET"]),
+        Route("/api/generate", generate, methods=["POST"]),
+    ])
+
+
+# -------------------------------------------------------------------
+# Background Server
+# -------------------------------------------------------------------
+class StubLLMServer:
+    """
+    Runs the stub app with uvicorn in a background thread.
+
+    Args:
+        config (StubConfig): Timing and failure behavior.
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free port.
+
+    Attributes:
+        stats (StubStats): Counters updated while serving.
+        base_url (str): OpenAI-compatible base URL (".../v1").
+    """
+
+    def __init__(self, config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        """Starts serving and waits until the server accepts requests."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_stub_app(self.config, self.stats),
+            log_level="warning",
+            lifespan="off"
+        ))
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._server.serve(sockets=[sock])),
+            daemon=True
+        )
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and waits for the thread to finish."""
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+            self._server = None
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv=None):
+    """Runs the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--ttft", type=float, default=StubConfig.ttft)
+    parser.add_argument("--per-prompt-token-latency", type=float, default=0.0)
+    parser.add_argument("--per-token-latency", type=float, default=StubConfig.per_token_latency)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--num-parallel", type=int, help="Generations run at once.")
+    parser.add_argument("--load-time", type=float, default=0.0, help="Seconds to load a model.")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        ttft=args.ttft,
+        per_prompt_token_latency=args.per_prompt_token_latency,
+        per_token_latency=args.per_token_latency,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        num_parallel=args.num_parallel,
+        load_time=args.load_time
+    )
+    uvicorn.run(
+        create_stub_app(config, StubStats()),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,651 @@
+"""
+
+Distributed Job Queue
+
+Purpose:
+    This file defines a job queue for advisory requests on a Redis
+    server. Producers enqueue jobs, worker processes on any number of
+    machines claim and run them (see distributed.worker), and
+    producers read the results back.
+
+Why this file exists:
+    One process calling the orchestrator is limited to the Ollama
+    capacity it can reach. With a shared queue, adding capacity is a
+    matter of starting another worker next to another Ollama server.
+    The queue is built for workers that crash or stall:
+    - at-least-once delivery: a claimed job is only "in flight" until
+      its visibility timeout; a worker extends it with heartbeats
+      while it works, and jobs whose worker went silent are handed
+      to another worker
+    - leases: every claim gets a fresh lease token, so a worker that
+      lost its job (and comes back late) cannot acknowledge or fail
+      the new owner's attempt
+    - dead-lettering: a job that failed max_attempts times is moved
+      to a dead-letter list with its last error instead of looping
+      forever
+    - shared stages: a value such as the market analysis is computed
+      by exactly one worker (under a lock) and read by all others
+
+    Only plain Redis commands and WATCH/MULTI transactions are used
+    (no Lua scripts), so any Redis-protocol server works, including
+    fakeredis in the tests. Times come from the server's clock, so
+    workers on different machines agree on visibility deadlines.
+
+Keys (prefix "advisor" by default):
+    <prefix>:ready          list of job ids waiting to be claimed
+    <prefix>:inflight       sorted set: job id -> visibility deadline
+    <prefix>:dead           list of dead-lettered job ids
+    <prefix>:job:<id>       hash: payload, status, attempts, lease,
+                            result, error, timestamps
+    <prefix>:notify:<id>    list signalling "finished" to waiters
+    <prefix>:shared:<name>  shared stage values (and their locks)
+
+Usage:
+    python -m distributed.job_queue submit clients.jsonl reports.jsonl --redis redis://queue:6379/0
+    python -m distributed.job_queue stats --redis redis://queue:6379/0
+    python -m distributed.job_queue dead --redis redis://queue:6379/0 --retry
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from dataclasses import dataclass
+
+# Redis client (asyncio API); fakeredis provides the same interface
+import redis.asyncio as redis
+from redis.exceptions import WatchError
+
+
+# Default Redis URL for the command-line tools.
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+
+# Seconds a claimed job stays invisible to other workers.
+DEFAULT_VISIBILITY_TIMEOUT = 120.0
+
+# Attempts before a job is dead-lettered.
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds finished jobs (and their results) are kept.
+DEFAULT_RESULT_TTL = 24 * 3600
+
+# Jobs `submit` keeps outstanding at once, and seconds between its
+# status polls.
+DEFAULT_SUBMIT_WINDOW = int(os.getenv("ADVISOR_QUEUE_SUBMIT_WINDOW", 256))
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Job statuses.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+
+@dataclass
+class Job:
+    """
+    A claimed job.
+
+    Attributes:
+        id (str): Job id.
+        payload (dict): What the producer enqueued.
+        attempts (int): Deliveries so far, including this one.
+        lease (str): Token of this delivery; required to ack, nack
+            or extend it.
+    """
+
+    id: str
+    payload: dict
+    attempts: int
+    lease: str
+
+
+def _text(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+# -------------------------------------------------------------------
+# Job Queue
+# -------------------------------------------------------------------
+class JobQueue:
+    """
+    Job queue on a Redis server.
+
+    Args:
+        client:
+            A redis.asyncio.Redis (or fakeredis.FakeAsyncRedis) client.
+
+        prefix (str):
+            Key prefix; queues with different prefixes are independent.
+
+        visibility_timeout (float):
+            Seconds a claimed job stays invisible without a heartbeat.
+
+        max_attempts (int):
+            Deliveries before a failing job is dead-lettered.
+
+        result_ttl (float):
+            Seconds finished jobs are kept.
+    """
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "advisor",
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        result_ttl: float = DEFAULT_RESULT_TTL
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self.ready_key = f"{prefix}:ready"
+        self.inflight_key = f"{prefix}:inflight"
+        self.dead_key = f"{prefix}:dead"
+
+    @classmethod
+    def from_url(cls, url: str = DEFAULT_REDIS_URL, **kwargs) -> "JobQueue":
+        """Connects to the Redis server at `url`."""
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def _notify_key(self, job_id: str) -> str:
+        return f"{self.prefix}:notify:{job_id}"
+
+    async def _now(self, client=None) -> float:
+        seconds, microseconds = await (client or self.client).time()
+        return seconds + microseconds / 1e6
+
+    # ---------------------------------------------------------------
+    # Producers
+    # ---------------------------------------------------------------
+    async def enqueue(self, payload: dict, job_id: str = None) -> str:
+        """
+        Adds a job at the back of the queue.
+
+        Args:
+            payload (dict):
+                JSON-serializable job description.
+
+            job_id (str):
+                Optional id (for example the client id); a random id
+                is generated otherwise. A job with that id that is
+                still queued or running is left as it is, so it never
+                runs twice (re-running `submit` just waits for it).
+                A finished or dead-lettered one is replaced.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        job_key = self._job_key(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(job_key)
+                    status = _text(await pipe.hget(job_key, "status"))
+                    if status in (QUEUED, RUNNING):
+                        return job_id
+                    now = await self._now(pipe)
+                    pipe.multi()
+                    pipe.delete(job_key, self._notify_key(job_id))
+                    if status == DEAD:
+                        pipe.lrem(self.dead_key, 0, job_id)
+                    pipe.hset(job_key, mapping={
+                        "payload": json.dumps(payload),
+                        "status": QUEUED,
+                        "attempts": 0,
+                        "enqueued_at": now,
+                    })
+                    pipe.lpush(self.ready_key, job_id)
+                    await pipe.execute()
+                    return job_id
+                except WatchError:
+                    # Claimed or finished concurrently; look again
+                    continue
+
+    async def status(self, job_id: str) -> dict:
+        """
+        Returns a job's state.
+
+        Returns:
+            dict:
+                status, attempts, result (decoded JSON or None) and
+                error; None if the job is unknown (or expired).
+        """
+        return self._state(job_id, await self.client.hgetall(self._job_key(job_id)))
+
+    async def statuses(self, job_ids: list) -> list:
+        """Returns the status() of several jobs, read in one round trip."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(self._job_key(job_id))
+            replies = await pipe.execute()
+        return [self._state(job_id, fields) for job_id, fields in zip(job_ids, replies)]
+
+    @staticmethod
+    def _state(job_id: str, fields: dict) -> dict:
+        if not fields:
+            return None
+        fields = {_text(key): _text(value) for key, value in fields.items()}
+        return {
+            "id": job_id,
+            "status": fields.get("status"),
+            "attempts": int(fields.get("attempts", 0)),
+            "result": json.loads(fields["result"]) if "result" in fields else None,
+            "error": fields.get("error"),
+        }
+
+    async def wait(self, job_id: str, timeout: float = None) -> dict:
+        """
+        Waits until a job is done or dead-lettered.
+
+        Args:
+            job_id (str): The job.
+            timeout (float): Seconds to wait; None waits forever.
+
+        Returns:
+            dict: The job's status() (possibly still unfinished when
+            the timeout expired).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            state = await self.status(job_id)
+            if state is None or state["status"] in (DONE, DEAD):
+                return state
+            left = None if deadline is None else deadline - loop.time()
+            if left is not None and left <= 0:
+                return state
+            # Short blocking waits: several waiters may share a job
+            await self.client.blpop([self._notify_key(job_id)], timeout=min(left or 1.0, 1.0))
+
+    # ---------------------------------------------------------------
+    # Workers
+    # ---------------------------------------------------------------
+    async def claim(self) -> Job:
+        """
+        Claims the oldest ready job, or returns None if there is none.
+
+        The job becomes invisible to other workers until the
+        visibility timeout expires (see extend()).
+        """
+        while True:
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.ready_key)
+                    job_id = await pipe.lindex(self.ready_key, -1)
+                    if job_id is None:
+                        return None
+                    job_id = _text(job_id)
+                    job_key = self._job_key(job_id)
+                    await pipe.watch(job_key)
+                    if not await pipe.hexists(job_key, "payload"):
+                        # The job hash expired or was removed: drop the
+                        # id without recreating a hash for it
+                        pipe.multi()
+                        pipe.rpop(self.ready_key)
+                        await pipe.execute()
+                        continue
+                    now = await self._now(pipe)
+                    lease = uuid.uuid4().hex
+                    pipe.multi()
+                    pipe.rpop(self.ready_key)
+                    pipe.zadd(self.inflight_key, {job_id: now + self.visibility_timeout})
+                    pipe.hincrby(job_key, "attempts", 1)
+                    pipe.hset(job_key, mapping={
+                        "status": RUNNING,
+                        "lease": lease,
+                        "claimed_at": now,
+                    })
+                    pipe.hget(job_key, "payload")
+                    _, _, attempts, _, payload = await pipe.execute()
+                except WatchError:
+                    # Another worker claimed concurrently, or the job
+                    # changed; try again
+                    continue
+            return Job(job_id, json.loads(payload), attempts, lease)
+
+    async def _owned(self, job: Job, change) -> bool:
+        """
+        Applies change(pipe) atomically if the job's lease is still
+        job.lease; returns False when the lease was lost.
+        """
+        job_key = self._job_key(job.id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(job_key)
+                    if _text(await pipe.hget(job_key, "lease")) != job.lease:
+                        return False
+                    pipe.multi()
+                    await change(pipe)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    async def extend(self, job: Job) -> bool:
+        """
+        Heartbeat: pushes the job's visibility deadline forward.
+
+        Returns:
+            bool: False if the job was reclaimed by another worker
+            (the caller should stop working on it).
+        """
+        now = await self._now()
+
+        async def change(pipe):
+            pipe.zadd(self.inflight_key, {job.id: now + self.visibility_timeout}, xx=True)
+
+        return await self._owned(job, change)
+
+    async def ack(self, job: Job, result) -> bool:
+        """
+        Completes a job with a JSON-serializable result.
+
+        Returns:
+            bool: False if the lease was lost; the result is then
+            discarded (the current owner will produce one).
+        """
+        now = await self._now()
+
+        async def change(pipe):
+            self._finish(pipe, job, DONE, now, result=json.dumps(result))
+
+        return await self._owned(job, change)
+
+    async def nack(self, job: Job, error: str, retry: bool = True) -> bool:
+        """
+        Fails one attempt. The job is queued again, unless it has
+        used max_attempts (or retry is False): then it is
+        dead-lettered with the error.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+        now = await self._now()
+        give_up = not retry or job.attempts >= self.max_attempts
+
+        async def change(pipe):
+            if give_up:
+                self._finish(pipe, job, DEAD, now, error=error)
+            else:
+                pipe.zrem(self.inflight_key, job.id)
+                pipe.hset(self._job_key(job.id), mapping={"status": QUEUED, "error": error})
+                pipe.hdel(self._job_key(job.id), "lease")
+                pipe.lpush(self.ready_key, job.id)
+
+        return await self._owned(job, change)
+
+    def _finish(self, pipe, job: Job, status: str, now: float, **fields) -> None:
+        job_key = self._job_key(job.id)
+        pipe.zrem(self.inflight_key, job.id)
+        pipe.hset(job_key, mapping={"status": status, "finished_at": now, **fields})
+        pipe.hdel(job_key, "lease")
+        if status == DEAD:
+            pipe.lpush(self.dead_key, job.id)
+        else:
+            pipe.expire(job_key, int(self.result_ttl))
+        pipe.rpush(self._notify_key(job.id), status)
+        pipe.expire(self._notify_key(job.id), int(self.result_ttl))
+
+    async def requeue_expired(self) -> dict:
+        """
+        Redelivers jobs whose visibility timeout expired (their
+        worker crashed or stalled). Jobs that already used
+        max_attempts are dead-lettered instead. Any worker may call
+        this; concurrent calls are safe.
+
+        Returns:
+            dict: {"requeued": n, "dead": n}
+        """
+        counts = {"requeued": 0, "dead": 0}
+        now = await self._now()
+        expired = await self.client.zrangebyscore(self.inflight_key, "-inf", now)
+        for job_id in map(_text, expired):
+            job_key = self._job_key(job_id)
+            async with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(self.inflight_key, job_key)
+                    score = await pipe.zscore(self.inflight_key, job_id)
+                    if score is None or score > now:
+                        # Acknowledged or extended in the meantime
+                        continue
+                    attempts = int(await pipe.hget(job_key, "attempts") or 0)
+                    pipe.multi()
+                    pipe.zrem(self.inflight_key, job_id)
+                    pipe.hdel(job_key, "lease")
+                    if attempts >= self.max_attempts:
+                        error = "visibility timeout expired on the last attempt"
+                        pipe.hset(job_key, mapping={"status": DEAD, "error": error, "finished_at": now})
+                        pipe.lpush(self.dead_key, job_id)
+                        pipe.rpush(self._notify_key(job_id), DEAD)
+                        counts["dead"] += 1
+                    else:
+                        pipe.hset(job_key, "status", QUEUED)
+                        pipe.lpush(self.ready_key, job_id)
+                        counts["requeued"] += 1
+                    await pipe.execute()
+                except WatchError:
+                    # Someone else handled it first
+                    continue
+        return counts
+
+    # ---------------------------------------------------------------
+    # Shared Stages
+    # ---------------------------------------------------------------
+    async def shared(
+        self,
+        name: str,
+        compute,
+        ttl: float = 3600,
+        lock_timeout: float = 300,
+        poll_interval: float = 0.1
+    ) -> str:
+        """
+        Returns a value shared by every worker, computing it once.
+
+        The first worker to ask takes a lock and runs compute(); the
+        others wait for the published value. If the lock holder dies,
+        its lock expires and another worker computes the value.
+
+        Args:
+            name (str):
+                Key of the value, e.g. a digest of the analysis inputs.
+
+            compute:
+                Coroutine function returning the value (a string).
+
+            ttl (float):
+                Seconds the value stays valid.
+
+            lock_timeout (float):
+                Upper bound on compute() before others take over.
+
+            poll_interval (float):
+                Seconds between checks while another worker computes.
+        """
+        value_key = f"{self.prefix}:shared:{name}"
+        lock_key = f"{value_key}:lock"
+        token = uuid.uuid4().hex
+        while True:
+            value = await self.client.get(value_key)
+            if value is not None:
+                return _text(value)
+            if await self.client.set(lock_key, token, nx=True, ex=int(lock_timeout)):
+                try:
+                    value = await compute()
+                    await self.client.set(value_key, value, ex=int(ttl))
+                    return value
+                finally:
+                    # Release only our own lock (it may have expired
+                    # and been taken by another worker)
+                    async with self.client.pipeline(transaction=True) as pipe:
+                        try:
+                            await pipe.watch(lock_key)
+                            if _text(await pipe.get(lock_key)) == token:
+                                pipe.multi()
+                                pipe.delete(lock_key)
+                                await pipe.execute()
+                        except WatchError:
+                            pass
+            await asyncio.sleep(poll_interval)
+
+    # ---------------------------------------------------------------
+    # Monitoring
+    # ---------------------------------------------------------------
+    async def stats(self) -> dict:
+        """Returns the number of ready, in-flight and dead jobs."""
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.ready_key)
+            pipe.zcard(self.inflight_key)
+            pipe.llen(self.dead_key)
+            ready, inflight, dead = await pipe.execute()
+        return {"ready": ready, "inflight": inflight, "dead": dead}
+
+    async def dead_letters(self) -> list:
+        """Returns the status() of every dead-lettered job."""
+        ids = await self.client.lrange(self.dead_key, 0, -1)
+        return [await self.status(_text(job_id)) for job_id in ids]
+
+    async def retry_dead(self, job_id: str) -> bool:
+        """
+        Moves a dead-lettered job back to the queue with fresh attempts.
+
+        Returns:
+            bool: False (and nothing changed) if the job is not in
+            the dead-letter list.
+        """
+        job_key = self._job_key(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self.dead_key, job_key)
+                    if await pipe.lpos(self.dead_key, job_id) is None:
+                        return False
+                    pipe.multi()
+                    pipe.lrem(self.dead_key, 0, job_id)
+                    pipe.hset(job_key, mapping={"status": QUEUED, "attempts": 0})
+                    pipe.delete(self._notify_key(job_id))
+                    pipe.lpush(self.ready_key, job_id)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    # Another job was dead-lettered meanwhile; look again
+                    continue
+
+    async def close(self) -> None:
+        """Closes the Redis connection."""
+        await self.client.aclose()
+
+
+# -------------------------------------------------------------------
+# Command Line
+# -------------------------------------------------------------------
+async def submit(
+    queue: JobQueue,
+    input_path: str,
+    output_path: str,
+    job_options: dict,
+    window: int = DEFAULT_SUBMIT_WINDOW,
+    poll_interval: float = DEFAULT_POLL_INTERVAL
+) -> dict:
+    """
+    Enqueues every client request of a JSONL file (batch input
+    format) and writes the results as JSONL, in completion order.
+
+    At most `window` jobs are outstanding at once: the file is read
+    lazily, the outstanding jobs' statuses are polled in one round
+    trip, and each finished job is written and replaced by the next
+    request. Memory and Redis load therefore do not grow with the
+    file size.
+    """
+    # Imported here: the batch module imports the orchestrator
+    from batch.batch_advisor import BatchSummary, read_client_requests
+
+    summary = BatchSummary()
+    requests = read_client_requests(input_path, summary)
+    counts = {"submitted": 0, "done": 0, "dead": 0}
+    outstanding = []
+    with open(output_path, "a", encoding="utf-8") as output:
+        while True:
+            while len(outstanding) < window:
+                request = next(requests, None)
+                if request is None:
+                    break
+                row_id, profile = request
+                outstanding.append(await queue.enqueue(
+                    {"id": row_id, "profile": profile, **job_options}, str(row_id)
+                ))
+                counts["submitted"] += 1
+            if not outstanding:
+                break
+
+            pending = []
+            for job_id, state in zip(outstanding, await queue.statuses(outstanding)):
+                if state is not None and state["status"] == DONE:
+                    counts["done"] += 1
+                    output.write(json.dumps(state["result"]) + "\n")
+                elif state is None or state["status"] == DEAD:
+                    counts["dead"] += 1
+                    error = state["error"] if state else "job expired"
+                    output.write(json.dumps({"id": job_id, "errors": {"job": error}}) + "\n")
+                else:
+                    pending.append(job_id)
+            output.flush()
+            if len(pending) == len(outstanding):
+                await asyncio.sleep(poll_interval)
+            outstanding = pending
+    return {**counts, "invalid": summary.invalid}
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Advisory job queue")
+    parser.add_argument("--redis", default=DEFAULT_REDIS_URL, help="Redis URL.")
+    parser.add_argument("--prefix", default="advisor")
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit_parser = commands.add_parser("submit", help="Enqueue a JSONL file and collect results.")
+    submit_parser.add_argument("input", help="JSONL file of client requests.")
+    submit_parser.add_argument("output", help="JSONL file the results are appended to.")
+    submit_parser.add_argument("--market-data", metavar="PATH", help="Price history for indicators.")
+    submit_parser.add_argument("--top-k", type=int, default=5)
+    submit_parser.add_argument("--deadline", type=float, metavar="SECONDS", help="Time budget per job.")
+    submit_parser.add_argument("--window", type=int, default=DEFAULT_SUBMIT_WINDOW,
+                               help="Jobs outstanding at once.")
+    commands.add_parser("stats", help="Print queue sizes.")
+    dead_parser = commands.add_parser("dead", help="List (or retry) dead-lettered jobs.")
+    dead_parser.add_argument("--retry", action="store_true")
+    args = parser.parse_args(argv)
+
+    async def run():
+        queue = JobQueue.from_url(args.redis, prefix=args.prefix)
+        try:
+            if args.command == "submit":
+                job_options = {"deadline": args.deadline}
+                if args.market_data:
+                    from market_data.indicators import load_market_summary
+                    job_options["market_data"] = load_market_summary(args.market_data, args.top_k)
+                print(json.dumps(await submit(queue, args.input, args.output, job_options, args.window)))
+            elif args.command == "stats":
+                print(json.dumps(await queue.stats()))
+            else:
+                for state in await queue.dead_letters():
+                    print(json.dumps(state))
+                    if args.retry:
+                        await queue.retry_dead(state["id"])
+        finally:
+            await queue.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
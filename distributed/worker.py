@@ -0,0 +1,338 @@
+"""
+
+Advisory Worker
+
+Purpose:
+    This file defines the worker process of the distributed job
+    queue: it claims advisory jobs from Redis (see
+    distributed.job_queue), runs the orchestrator stages for them and
+    publishes the results.
+
+Why this file exists:
+    Workers are what scale the advisor across machines: start one
+    per node (or per Ollama server) and they share the queue. Each
+    worker:
+    - runs up to `concurrency` jobs at once
+    - sends heartbeats while a job runs, so slow generations are not
+      redelivered, and stops working on a job whose lease it lost
+    - fetches the market analysis through JobQueue.shared(): it is
+      generated by one worker and reused by every job with the same
+      inputs, exactly like the shared analysis of batch mode
+    - retries failed jobs through the queue (nack) and leaves jobs
+      that keep failing in the dead-letter list
+    - periodically redelivers jobs abandoned by crashed workers
+
+Job payload (JSON):
+    {"id": "client-001", "profile": {...} or "free text",
+     "market_data": "...", "research": "...", "deadline": 30}
+
+    Only "profile" is needed; the result is a batch output row
+    (see batch.batch_advisor.report_row()).
+
+Usage:
+    python -m distributed.worker --redis redis://queue:6379/0 --concurrency 4
+    OLLAMA_ENDPOINTS=http://gpu-2:11434/v1 python -m distributed.worker --redis redis://queue:6379/0
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import hashlib
+import json
+import signal
+import time
+from dataclasses import dataclass
+
+from batch.batch_advisor import report_row
+from distributed.job_queue import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_REDIS_URL,
+    DEFAULT_VISIBILITY_TIMEOUT,
+    Job,
+    JobQueue
+)
+from orchestrator.financial_orchestrator import (
+    format_client_profile,
+    run_investment_recommendations,
+    run_market_analysis
+)
+from utils.deadline import deadline_scope
+from utils.llm_configuration import release_http_connections
+from utils.llm_scheduler import request_class
+
+
+# Seconds a shared market analysis is reused before it is regenerated.
+DEFAULT_ANALYSIS_TTL = 3600
+
+
+@dataclass
+class WorkerStats:
+    """
+    Counters for one worker.
+
+    Attributes:
+        completed (int): Jobs acknowledged with a result.
+        failed (int): Attempts that failed (retried or dead-lettered).
+        lost (int): Jobs abandoned because their lease was lost.
+        analyses (int): Market analyses this worker generated.
+        requeued (int): Expired jobs this worker redelivered.
+    """
+
+    completed: int = 0
+    failed: int = 0
+    lost: int = 0
+    analyses: int = 0
+    requeued: int = 0
+
+
+def analysis_key(payload: dict) -> str:
+    """Name of the shared market analysis for a job's inputs."""
+    inputs = json.dumps(
+        [payload.get("market_data"), payload.get("research")], sort_keys=True
+    )
+    return "market_analysis:" + hashlib.sha256(inputs.encode("utf-8")).hexdigest()[:32]
+
+
+# -------------------------------------------------------------------
+# Worker
+# -------------------------------------------------------------------
+class AdvisoryWorker:
+    """
+    Claims and runs advisory jobs.
+
+    Args:
+        queue (JobQueue):
+            The shared queue.
+
+        concurrency (int):
+            Jobs run at once by this worker.
+
+        use_cache, structured_output, validate_stream, cascade, hedge:
+            See run_agentic_financial_advisor_async().
+
+        analysis_ttl (float):
+            Seconds a shared market analysis is reused.
+
+        poll_interval (float):
+            Seconds between claims while the queue is empty.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = 4,
+        use_cache: bool = True,
+        structured_output: bool = False,
+        validate_stream: bool = False,
+        cascade: bool = False,
+        hedge: bool = False,
+        analysis_ttl: float = DEFAULT_ANALYSIS_TTL,
+        poll_interval: float = 0.5
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+        self.structured_output = structured_output
+        self.validate_stream = validate_stream
+        self.cascade = cascade
+        self.hedge = hedge
+        self.analysis_ttl = analysis_ttl
+        self.poll_interval = poll_interval
+        self.stats = WorkerStats()
+
+    async def market_analysis(self, payload: dict) -> str:
+        """Returns the shared market analysis for a job's inputs."""
+        async def compute():
+            self.stats.analyses += 1
+            analysis, _, _ = await run_market_analysis(
+                self.use_cache,
+                market_data=payload.get("market_data"),
+                research=payload.get("research"),
+                hedge=self.hedge
+            )
+            return analysis
+
+        return await self.queue.shared(analysis_key(payload), compute, ttl=self.analysis_ttl)
+
+    async def process(self, payload: dict) -> dict:
+        """
+        Runs one job.
+
+        Returns:
+            dict: The output row (errors included, if any).
+        """
+        started = time.perf_counter()
+        # Queued jobs yield the Ollama endpoints to interactive reports
+        with request_class("batch"):
+            return await self._process(payload, started)
+
+    async def _process(self, payload: dict, started: float) -> dict:
+        market_analysis = await self.market_analysis(payload)
+        with deadline_scope(payload.get("deadline")):
+            outcomes = await run_investment_recommendations(
+                market_analysis,
+                self.use_cache,
+                self.structured_output,
+                self.validate_stream,
+                client_profile=format_client_profile(payload.get("profile")),
+                cascade=self.cascade,
+                market_data=payload.get("market_data"),
+                hedge=self.hedge
+            )
+        row = report_row(payload.get("id"), outcomes)
+        row["seconds"] = round(time.perf_counter() - started, 3)
+        return row
+
+    async def _heartbeat(self, job: Job, work: asyncio.Task) -> None:
+        # Extend the lease well before it expires; cancel the work
+        # if another worker has taken the job over
+        while not work.done():
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            if not await self.queue.extend(job):
+                work.cancel()
+                return
+
+    async def handle(self, job: Job) -> None:
+        """Runs a claimed job and acknowledges or fails it."""
+        work = asyncio.create_task(self.process(job.payload))
+        heartbeat = asyncio.create_task(self._heartbeat(job, work))
+        try:
+            row = await work
+        except asyncio.CancelledError:
+            if heartbeat.done():
+                # Lease lost: the new owner will produce the result
+                self.stats.lost += 1
+                return
+            raise
+        except Exception as error:
+            self.stats.failed += 1
+            await self.queue.nack(job, f"{type(error).__name__}: {error}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        if row["errors"]:
+            # Agent failures are retried; the last error is kept when
+            # the job is dead-lettered
+            self.stats.failed += 1
+            await self.queue.nack(job, json.dumps(row["errors"]))
+        elif await self.queue.ack(job, row):
+            self.stats.completed += 1
+        else:
+            self.stats.lost += 1
+
+    async def run(
+        self,
+        max_jobs: int = None,
+        until_empty: bool = False,
+        stop: asyncio.Event = None
+    ) -> WorkerStats:
+        """
+        Claims and runs jobs until stopped.
+
+        Args:
+            max_jobs (int):
+                Stop after claiming this many jobs.
+
+            until_empty (bool):
+                Stop once the queue is empty and this worker's jobs
+                are finished.
+
+            stop (asyncio.Event):
+                Stop claiming when set; running jobs are finished.
+
+        Returns:
+            WorkerStats: This worker's counters.
+        """
+        loop = asyncio.get_running_loop()
+        stop = stop or asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        running = set()
+        claimed = 0
+        next_reap = 0.0
+
+        async def run_one(job):
+            try:
+                await self.handle(job)
+            finally:
+                semaphore.release()
+
+        try:
+            while not stop.is_set() and (max_jobs is None or claimed < max_jobs):
+                # Any worker may redeliver abandoned jobs
+                if loop.time() >= next_reap:
+                    counts = await self.queue.requeue_expired()
+                    self.stats.requeued += counts["requeued"]
+                    next_reap = loop.time() + self.queue.visibility_timeout / 4
+
+                await semaphore.acquire()
+                job = await self.queue.claim()
+                if job is None:
+                    semaphore.release()
+                    if until_empty and not running:
+                        break
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.poll_interval)
+                    except TimeoutError:
+                        pass
+                    continue
+
+                claimed += 1
+                task = asyncio.create_task(run_one(job))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        return self.stats
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Advisory job queue worker")
+    parser.add_argument("--redis", default=DEFAULT_REDIS_URL, help="Redis URL.")
+    parser.add_argument("--prefix", default="advisor")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT)
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument("--analysis-ttl", type=float, default=DEFAULT_ANALYSIS_TTL)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--validate-stream", action="store_true")
+    parser.add_argument("--cascade", action="store_true")
+    parser.add_argument("--hedge", action="store_true")
+    parser.add_argument("--until-empty", action="store_true", help="Exit when the queue is empty.")
+    args = parser.parse_args(argv)
+
+    async def run():
+        queue = JobQueue.from_url(
+            args.redis,
+            prefix=args.prefix,
+            visibility_timeout=args.visibility_timeout,
+            max_attempts=args.max_attempts
+        )
+        worker = AdvisoryWorker(
+            queue,
+            concurrency=args.concurrency,
+            use_cache=not args.no_cache,
+            structured_output=args.structured_output,
+            validate_stream=args.validate_stream,
+            cascade=args.cascade,
+            hedge=args.hedge,
+            analysis_ttl=args.analysis_ttl
+        )
+        # SIGTERM / Ctrl+C: stop claiming, finish running jobs
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+        try:
+            return await worker.run(until_empty=args.until_empty, stop=stop)
+        finally:
+            await queue.close()
+            await release_http_connections()
+
+    print(json.dumps(vars(asyncio.run(run()))))
+
+
+if __name__ == "__main__":
+    main()
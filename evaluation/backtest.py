@@ -0,0 +1,522 @@
+"""
+
+Recommendation Backtest
+
+Purpose:
+    This file scores archived investment recommendations against
+    local price history: each recommendation is mapped to an
+    instrument, held over its time horizon, and its realized return
+    is compared with what the agent claimed.
+
+Why this file exists:
+    Nothing checked whether the asset_name and expected_return the
+    agents produce were any good, so prompt or model changes could
+    only be judged by eye. The backtest reports:
+    - hit rate: share of recommendations with a positive return
+    - claim accuracy: realized versus claimed return
+    - risk calibration: whether "High" risk picks really were more
+      volatile than "Medium" and "Low" ones
+    overall and per group (for example per prompt or model variant),
+    which makes A/B tests routine.
+
+How it stays fast:
+    Recommendations are held as columns, not objects. Free text
+    (asset names, return claims, horizons) repeats heavily, so each
+    distinct string is parsed once and broadcast back. Entry and
+    exit prices come from a single fancy-indexing lookup. Holding-
+    period volatility uses cumulative sums of log returns, so every
+    window costs O(1). Tens of thousands of recommendations take a
+    fraction of a second.
+
+Input format (JSONL, one object per line):
+    Either a flat recommendation:
+        {"as_of": "2026-03-02", "variant": "prompt-v2",
+         "asset_name": "HDFC Bank", "risk_level": "Medium",
+         "expected_return": "8-10% annually", "time_horizon": "Short-term"}
+    or a report row with nested recommendations (the batch output):
+        {"id": "client-001", "as_of": "2026-03-02",
+         "short_term_investment": {...}, "long_term_investment": {...}}
+
+    A resumed batch appends a new row for each id it retried; only
+    the last report row per id is scored.
+
+Usage:
+    python -m evaluation.backtest recommendations.jsonl --prices data/nifty50
+    python -m evaluation.backtest recommendations.jsonl --prices data/nifty50 --by variant
+"""
+
+# Standard library imports
+import argparse
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
+# NumPy does the vectorized computation
+import numpy as np
+
+# Columnar price history and gap filling
+from market_data.indicators import TRADING_DAYS, forward_fill
+from market_data.loader import PriceHistory, load_price_history
+
+
+# Holding period per horizon keyword, in trading days. A horizon
+# with an explicit duration ("6 months", "2 years") uses that instead.
+HORIZON_DAYS = {
+    "short": 63,     # ~3 months: "weeks to months"
+    "medium": 126,   # ~6 months
+    "long": 252,     # 1 year; longer holds rarely fit the price history
+}
+
+# Trading days per unit of an explicit duration.
+_DURATION_DAYS = {"day": 1, "week": 5, "month": 21, "year": TRADING_DAYS}
+
+# Instrument names the agents commonly use for funds and indices.
+DEFAULT_ALIASES = {
+    "NIFTY 50 ETF": "NIFTYBEES",
+    "NIFTY 50 INDEX FUND": "NIFTYBEES",
+    "NIFTY BANK ETF": "BANKBEES",
+    "GOLD ETF": "GOLDBEES",
+}
+
+# Company suffixes, ignored when a name's words are run together
+# ("HDFC Bank Ltd" -> "HDFCBANK").
+CORPORATE_SUFFIXES = frozenset({"LTD", "LIMITED", "INC", "CORP", "CORPORATION", "PLC", "CO"})
+
+# Words too generic to identify an instrument on their own; the
+# word fallback ignores them ("Energy Index Fund" resolves to
+# nothing, not to a symbol named ENERGY).
+GENERIC_WORDS = CORPORATE_SUFFIXES | frozenset({
+    "THE", "OF", "AND", "COMPANY", "GROUP", "HOLDINGS", "INDUSTRIES", "INDIA",
+    "BANK", "FINANCE", "FINANCIAL", "CAPITAL", "SERVICES", "TECHNOLOGIES",
+    "POWER", "ENERGY", "GOLD", "METAL", "METALS", "PHARMA", "INFRA",
+    "FUND", "FUNDS", "MUTUAL", "INDEX", "ETF", "BOND", "BONDS", "GILT",
+    "STOCK", "STOCKS", "SHARES", "EQUITY", "SECTOR", "PORTFOLIO", "TRUST",
+    "LARGE", "MID", "SMALL", "CAP", "GROWTH", "VALUE", "DIVIDEND", "GOVERNMENT",
+})
+
+# Risk levels in increasing order, for the calibration check.
+RISK_LEVELS = ("Low", "Medium", "High")
+
+# Outcome of one recommendation.
+EVALUATED = 0     # held over its full horizon
+UNRESOLVED = 1    # unknown instrument, horizon or as_of date, or as_of
+                  # before the price history starts
+PENDING = 2       # horizon not elapsed yet, or no price at entry
+
+
+# -------------------------------------------------------------------
+# Recommendation Columns
+# -------------------------------------------------------------------
+@dataclass
+class RecommendationBatch:
+    """
+    Archived recommendations as columns of equal length.
+
+    Attributes:
+        as_of (np.ndarray): Date each recommendation was made
+            (datetime64[D]; NaT when unknown).
+        asset_name, risk_level, expected_return, time_horizon,
+        variant (np.ndarray): The recommendation fields as strings;
+            variant labels an A/B group ("" when absent).
+    """
+
+    as_of: np.ndarray
+    asset_name: np.ndarray
+    risk_level: np.ndarray
+    expected_return: np.ndarray
+    time_horizon: np.ndarray
+    variant: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.as_of)
+
+    @classmethod
+    def from_records(cls, records: list) -> "RecommendationBatch":
+        """Builds the columns from flat recommendation dicts."""
+        def column(name):
+            return np.array([str(record.get(name) or "") for record in records], dtype=str)
+
+        dates = column("as_of")
+        as_of = np.full(len(records), np.datetime64("NaT"), dtype="datetime64[D]")
+        known = dates != ""
+        as_of[known] = dates[known].astype("datetime64[D]")
+        return cls(
+            as_of,
+            column("asset_name"),
+            column("risk_level"),
+            column("expected_return"),
+            column("time_horizon"),
+            column("variant")
+        )
+
+
+def flatten_report_row(row: dict) -> list:
+    """
+    Returns the flat recommendations contained in one JSONL row.
+
+    Report rows carry their recommendations under
+    "short_term_investment" / "long_term_investment"; their other
+    fields (as_of, variant, id, ...) are copied into each.
+    """
+    nested = [key for key in ("short_term_investment", "long_term_investment") if key in row]
+    if not nested:
+        return [row]
+    shared = {key: value for key, value in row.items() if not isinstance(value, dict)}
+    return [{**shared, **row[key]} for key in nested if isinstance(row[key], dict)]
+
+
+def read_recommendations(path: str) -> RecommendationBatch:
+    """
+    Reads a JSONL archive (see module docstring) into columns.
+
+    Report rows with an id replace any earlier row with the same id,
+    so a retried row is scored once, in its latest form.
+    """
+    rows = {}
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            report = "id" in row and (
+                "short_term_investment" in row or "long_term_investment" in row
+            )
+            key = ("id", row["id"]) if report else ("line", line_number)
+            # Re-inserted so that the row keeps its latest position
+            rows.pop(key, None)
+            rows[key] = row
+    records = [record for row in rows.values() for record in flatten_report_row(row)]
+    return RecommendationBatch.from_records(records)
+
+
+# -------------------------------------------------------------------
+# Parsing Free Text (once per distinct string)
+# -------------------------------------------------------------------
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_RANGE = re.compile(_NUMBER + r"\s*%?\s*(?:-|–|to)\s*" + _NUMBER + r"\s*%")
+_SINGLE = re.compile(_NUMBER + r"\s*%")
+_ANNUAL = re.compile(r"annual|per year|per annum|p\.\s?a\.?|a year|yearly|/yr|cagr")
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*(day|week|month|year)")
+
+
+def parse_claimed_return(text: str) -> tuple:
+    """
+    Parses a return claim such as "10-12% annually" or "5%".
+
+    Returns:
+        tuple:
+            (fraction, annual) - the midpoint of the claimed range
+            (0.11) and whether it is a yearly rate; (nan, False)
+            when the text has no percentage.
+    """
+    lower = text.lower()
+    match = _RANGE.search(lower)
+    if match:
+        value = (float(match.group(1)) + float(match.group(2))) / 2
+    else:
+        match = _SINGLE.search(lower)
+        if not match:
+            return np.nan, False
+        value = float(match.group(1))
+    return value / 100, bool(_ANNUAL.search(lower))
+
+
+def parse_horizon_days(text: str) -> float:
+    """
+    Converts a time_horizon such as "Short-term" or "6 months" into
+    trading days; nan when it cannot be interpreted.
+    """
+    lower = text.lower()
+    match = _DURATION.search(lower)
+    if match:
+        return float(match.group(1)) * _DURATION_DAYS[match.group(2)]
+    for keyword, days in HORIZON_DAYS.items():
+        if keyword in lower:
+            return float(days)
+    return np.nan
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", " ", name.upper()).strip()
+
+
+class InstrumentResolver:
+    """
+    Maps free-text asset names to symbols of a price history.
+
+    A name resolves, in order, through:
+    1. the alias table ("NIFTY 50 ETF" -> "NIFTYBEES")
+    2. its letters and digits run together, with or without company
+       suffixes ("HDFC Bank Ltd" -> "HDFCBANK")
+    3. its distinctive words, i.e. those not in GENERIC_WORDS, when
+       every one of them is the same symbol ("Reliance Industries"
+       -> "RELIANCE")
+
+    Args:
+        symbols (np.ndarray): Symbols of the price history.
+        aliases (dict): Extra name -> symbol mappings, merged over
+            DEFAULT_ALIASES.
+    """
+
+    def __init__(self, symbols, aliases: dict = None):
+        self.index = {_normalize(str(symbol)).replace(" ", ""): i for i, symbol in enumerate(symbols)}
+        self.aliases = {
+            _normalize(name): _normalize(symbol).replace(" ", "")
+            for name, symbol in {**DEFAULT_ALIASES, **(aliases or {})}.items()
+        }
+
+    def resolve(self, name: str) -> int:
+        """Returns the symbol index of a name, or -1."""
+        normalized = _normalize(name)
+        words = normalized.split()
+        for candidate in (
+            self.aliases.get(normalized),
+            "".join(words),
+            "".join(word for word in words if word not in CORPORATE_SUFFIXES)
+        ):
+            if candidate in self.index:
+                return self.index[candidate]
+
+        distinctive = {word for word in words if word not in GENERIC_WORDS}
+        matches = {self.index.get(word, -1) for word in distinctive}
+        if len(matches) == 1 and -1 not in matches:
+            return matches.pop()
+        return -1
+
+
+def _map_unique(values: np.ndarray, function, dtype) -> np.ndarray:
+    """Applies a parser to each distinct value and broadcasts back."""
+    unique, inverse = np.unique(values, return_inverse=True)
+    parsed = np.array([function(str(value)) for value in unique], dtype=dtype)
+    return parsed[inverse]
+
+
+# -------------------------------------------------------------------
+# Backtest
+# -------------------------------------------------------------------
+@dataclass
+class BacktestResult:
+    """
+    Per-recommendation outcome, as columns aligned with the batch.
+
+    Attributes:
+        status (np.ndarray): EVALUATED, UNRESOLVED or PENDING.
+        symbol (np.ndarray): Symbol index (-1 when unresolved).
+        claimed (np.ndarray): Claimed return over the holding period.
+        realized (np.ndarray): Realized return over the holding period.
+        volatility (np.ndarray): Annualized volatility while held.
+        batch (RecommendationBatch): The evaluated recommendations.
+    """
+
+    status: np.ndarray
+    symbol: np.ndarray
+    claimed: np.ndarray
+    realized: np.ndarray
+    volatility: np.ndarray
+    batch: RecommendationBatch = field(repr=False)
+
+
+class Backtester:
+    """
+    Backtests recommendation batches against one price history.
+
+    The forward-filled closes and cumulative log-return sums are
+    computed once, so every later batch only pays for lookups.
+
+    Args:
+        history (PriceHistory): Daily closes of the universe.
+        aliases (dict): Extra asset-name aliases (see InstrumentResolver).
+    """
+
+    def __init__(self, history: PriceHistory, aliases: dict = None):
+        self.history = history
+        self.resolver = InstrumentResolver(history.symbols, aliases)
+        self.close = forward_fill(np.asarray(history.close, dtype=np.float64))
+
+        # Prefix sums of daily log returns and their squares, with a
+        # leading zero row: sum over (entry, exit] = S[exit] - S[entry].
+        returns = np.nan_to_num(np.diff(np.log(self.close), axis=0))
+        zeros = np.zeros((1, self.close.shape[1]))
+        self.sum_returns = np.vstack([zeros, np.cumsum(returns, axis=0)])
+        self.sum_squares = np.vstack([zeros, np.cumsum(returns ** 2, axis=0)])
+
+    def run(self, batch: RecommendationBatch) -> BacktestResult:
+        """
+        Evaluates every recommendation of a batch.
+
+        Args:
+            batch (RecommendationBatch):
+                Recommendations to score.
+
+        Returns:
+            BacktestResult:
+                Per-recommendation outcomes.
+        """
+        n_days = len(self.history.dates)
+        symbol = _map_unique(batch.asset_name, self.resolver.resolve, np.int64)
+        horizon = _map_unique(batch.time_horizon, parse_horizon_days, np.float64)
+        claimed_rate = _map_unique(
+            batch.expected_return, lambda text: parse_claimed_return(text)[0], np.float64
+        )
+        annual = _map_unique(
+            batch.expected_return, lambda text: parse_claimed_return(text)[1], bool
+        )
+
+        # Entry on the first trading day on or after as_of. A date
+        # before the history would enter on its first day instead,
+        # scoring the call on prices long after it was made.
+        known_date = ~np.isnat(batch.as_of)
+        if n_days:
+            known_date &= batch.as_of >= self.history.dates[0]
+        resolved = (symbol >= 0) & ~np.isnan(horizon) & known_date
+        entry = np.searchsorted(self.history.dates, batch.as_of)
+        exit = entry + np.nan_to_num(horizon).astype(np.int64)
+
+        status = np.full(len(batch), UNRESOLVED, dtype=np.int8)
+        status[resolved] = PENDING
+        in_range = resolved & (exit < n_days)
+        rows = np.where(in_range, entry, 0)
+        exits = np.where(in_range, exit, 0)
+        columns = np.where(in_range, symbol, 0)
+        entry_price = self.close[rows, columns]
+        status[in_range & ~np.isnan(entry_price)] = EVALUATED
+
+        evaluated = status == EVALUATED
+        realized = np.where(evaluated, self.close[exits, columns] / entry_price - 1.0, np.nan)
+
+        # Holding-period volatility from the prefix sums
+        days = np.maximum(exits - rows, 2)
+        total = self.sum_returns[exits, columns] - self.sum_returns[rows, columns]
+        squares = self.sum_squares[exits, columns] - self.sum_squares[rows, columns]
+        variance = np.maximum(squares - total ** 2 / days, 0.0) / (days - 1)
+        volatility = np.where(evaluated, np.sqrt(variance * TRADING_DAYS), np.nan)
+
+        # Yearly claims are compounded over the holding period
+        years = horizon / TRADING_DAYS
+        with np.errstate(invalid="ignore"):
+            claimed = np.where(annual, (1.0 + claimed_rate) ** years - 1.0, claimed_rate)
+
+        return BacktestResult(status, symbol, claimed, realized, volatility, batch)
+
+
+# -------------------------------------------------------------------
+# Report
+# -------------------------------------------------------------------
+def _mean(values: np.ndarray) -> float:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else None
+
+
+def summarize_result(result: BacktestResult, mask: np.ndarray = None) -> dict:
+    """
+    Aggregates outcomes into hit rate, claim accuracy and risk
+    calibration.
+
+    Args:
+        result (BacktestResult):
+            Output of Backtester.run().
+
+        mask (np.ndarray):
+            Optional boolean selection (for example one variant).
+
+    Returns:
+        dict:
+            Counts, hit_rate, claim_met_rate, mean claimed and
+            realized returns, mean (absolute) claim error, per-risk-
+            level statistics and whether volatility increases with
+            the stated risk level ("calibrated").
+    """
+    mask = np.ones(len(result.status), dtype=bool) if mask is None else mask
+    evaluated = mask & (result.status == EVALUATED)
+    realized = result.realized[evaluated]
+    claimed = result.claimed[evaluated]
+    with_claim = ~np.isnan(claimed)
+    error = realized[with_claim] - claimed[with_claim]
+
+    risk_levels = {}
+    for level in RISK_LEVELS:
+        selected = evaluated & (np.char.lower(result.batch.risk_level) == level.lower())
+        if selected.any():
+            risk_levels[level] = {
+                "count": int(selected.sum()),
+                "hit_rate": float((result.realized[selected] > 0).mean()),
+                "mean_return": _mean(result.realized[selected]),
+                "mean_volatility": _mean(result.volatility[selected]),
+            }
+    volatilities = [stats["mean_volatility"] for stats in risk_levels.values()]
+
+    return {
+        "recommendations": int(mask.sum()),
+        "evaluated": int(evaluated.sum()),
+        "unresolved": int((mask & (result.status == UNRESOLVED)).sum()),
+        "pending": int((mask & (result.status == PENDING)).sum()),
+        "hit_rate": float((realized > 0).mean()) if realized.size else None,
+        "claim_met_rate": float((error >= 0).mean()) if error.size else None,
+        "mean_claimed": _mean(claimed),
+        "mean_realized": _mean(realized),
+        "mean_error": _mean(error),
+        "mean_abs_error": _mean(np.abs(error)),
+        "risk_levels": risk_levels,
+        # Needs at least two levels to say anything
+        "calibrated": (
+            bool(np.all(np.diff(volatilities) > 0)) if len(volatilities) >= 2 else None
+        ),
+    }
+
+
+def backtest_report(result: BacktestResult, by: str = None) -> dict:
+    """
+    Summarizes a backtest overall, or per value of a batch column.
+
+    Args:
+        result (BacktestResult):
+            Output of Backtester.run().
+
+        by (str):
+            Column to group by, e.g. "variant" or "risk_level".
+
+    Returns:
+        dict:
+            summarize_result() output, or {group: summary} when
+            grouped.
+    """
+    if by is None:
+        return summarize_result(result)
+    groups = getattr(result.batch, by)
+    return {
+        str(group): summarize_result(result, groups == group)
+        for group in np.unique(groups)
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Backtest archived recommendations")
+    parser.add_argument("recommendations", help="JSONL archive of recommendations or reports.")
+    parser.add_argument("--prices", required=True, help="Price history (see market_data.loader).")
+    parser.add_argument("--by", help="Group results by a column, e.g. variant.")
+    parser.add_argument("--aliases", help="JSON file mapping asset names to symbols.")
+    args = parser.parse_args(argv)
+
+    aliases = None
+    if args.aliases:
+        with open(args.aliases, encoding="utf-8") as handle:
+            aliases = json.load(handle)
+
+    backtester = Backtester(load_price_history(args.prices), aliases)
+    batch = read_recommendations(args.recommendations)
+    started = time.perf_counter()
+    result = backtester.run(batch)
+    report = backtest_report(result, args.by)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps(report, indent=2))
+    print(
+        f"\n{len(batch)} recommendations in {elapsed * 1000:.1f} ms "
+        f"({len(batch) / elapsed if elapsed else 0:,.0f}/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
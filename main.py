@@ -13,12 +13,189 @@ Why this file exists:
       in a clear, human-readable manner
 """
 
+# argparse is used to read optional command-line flags.
+import argparse
+
 # Import the main orchestration function that coordinates
 # all agents and generates the final report.
-from orchestrator.financial_orchestrator import run_agentic_financial_advisor
+# Agents are built on first use, so this import stays cheap.
+from orchestrator.financial_orchestrator import load_agents, run_agentic_financial_advisor
+
+# Import the metrics dump used by --metrics-json
+from utils.telemetry import dump_metrics_json
+
+# Import the switch for adaptive token budgets
+from utils.generation_profiles import configure_adaptive_budgets
+
+# Import the indicator summary used by --market-data
+from market_data.indicators import load_market_summary
+
+# Import the research passage retrieval used by --research-index
+from retrieval.bm25_index import DEFAULT_RESEARCH_QUERY, research_context
+
+# Import the report archive used by --archive
+from storage.report_store import ReportStore
+
+# Import the declarative agent graph used by --graph
+from orchestrator.agent_graph import (
+    DEFAULT_GRAPH_PATH,
+    GraphResult,
+    load_graph,
+    run_graph_sync
+)
 
+# Import the follow-up sessions used by --chat
+from orchestrator.advisory_session import QuestionTooLong, SessionStore, session_report
 
-def main():
+# Import the model preload used by --warmup
+from utils.model_warmup import DEFAULT_KEEP_ALIVE, format_warmup, start_warmup
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parses the command-line options of the advisor.
+
+    Args:
+        argv (list):
+            Arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace:
+            Parsed options.
+    """
+    parser = argparse.ArgumentParser(
+        description="Agentic AI Financial Advisor"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the response cache and generate fresh outputs."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the market analysis to the terminal as it is generated."
+    )
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Constrain the investment agents' decoding to the JSON Schema."
+    )
+    parser.add_argument(
+        "--validate-stream",
+        action="store_true",
+        help="Validate recommendations while streaming and abort bad ones early."
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Try a cheap model first for the investment agents; escalate on failure."
+    )
+    parser.add_argument(
+        "--handoff",
+        choices=("prose", "snapshot"),
+        default="prose",
+        help="Pass the full analysis or a compact market snapshot to the investment agents."
+    )
+    parser.add_argument(
+        "--market-data",
+        metavar="PATH",
+        help="Ground the analysis in indicators computed from local price history "
+             "(.npy directory, .npz, .csv or .parquet)."
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=5,
+        help="Symbols listed per line of the market data summary."
+    )
+    parser.add_argument(
+        "--research-index",
+        metavar="PATH",
+        help="Ground the analysis in passages from a BM25 research index "
+             "(see python -m retrieval.bm25_index build)."
+    )
+    parser.add_argument(
+        "--research-query",
+        default=DEFAULT_RESEARCH_QUERY,
+        help="Query used to select research passages."
+    )
+    parser.add_argument(
+        "--research-tokens",
+        type=int,
+        default=600,
+        help="Token budget for the research passages in the analyst prompt."
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Time budget for the whole report; late agents are cancelled and "
+             "a partial report is shown."
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Duplicate agent calls slower than their p95 latency to a backup "
+             "endpoint or model ($ADVISOR_HEDGE_ENDPOINTS, $ADVISOR_HEDGE_MODEL)."
+    )
+    parser.add_argument(
+        "--adaptive-budgets",
+        action="store_true",
+        help="Derive each agent's max_tokens from its observed output lengths."
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="DIR",
+        help="Append the final report to a compressed, indexed report store."
+    )
+    parser.add_argument(
+        "--graph",
+        nargs="?",
+        const=DEFAULT_GRAPH_PATH,
+        metavar="PATH",
+        help="Run an agent graph from a JSON/YAML file instead of the built-in "
+             "workflow (the default graph when no path is given)."
+    )
+    parser.add_argument(
+        "--graph-input",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Graph input, e.g. client_profile='age: 42' (repeatable)."
+    )
+    parser.add_argument(
+        "--graph-state",
+        metavar="PATH",
+        help="Reuse the outputs saved here for nodes whose inputs are unchanged, "
+             "then save the new outputs (partial re-execution)."
+    )
+    parser.add_argument(
+        "--chat",
+        action="store_true",
+        help="After the report, answer follow-up questions about it without "
+             "running the workflow again."
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Preload the models into Ollama memory before the report, so the "
+             "first generations run at steady-state latency."
+    )
+    parser.add_argument(
+        "--keep-alive",
+        default=DEFAULT_KEEP_ALIVE,
+        help="How long Ollama keeps preloaded models loaded (e.g. 30m, 1h, -1)."
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="Write per-stage latency, token and retry metrics to a JSON file."
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     Executes the Agentic AI Financial Advisor system.
 
@@ -28,6 +205,15 @@ def main():
         - Display market analysis and investment recommendations
           in a clean, client-friendly format
     """
+    args = parse_args(argv)
+    if args.adaptive_budgets:
+        configure_adaptive_budgets(enabled=True)
+
+    # Start loading the models into Ollama first: the load runs in
+    # the background while the data is prepared and agents are built
+    warmup = None
+    if args.warmup:
+        warmup = start_warmup(keep_alive=args.keep_alive, cascade=args.cascade)
 
     # Import time module locally to measure execution duration.
     # This helps evaluate system performance and responsiveness.
@@ -36,13 +222,65 @@ def main():
     # Record the start time before running the workflow
     start_time = time.time()
 
+    # Summarize local price history for the agents, if provided
+    market_data = None
+    if args.market_data:
+        market_data = load_market_summary(args.market_data, args.top_k)
+
+    # Select research passages for the analyst, if an index is given
+    research = None
+    if args.research_index:
+        research = research_context(
+            args.research_index, args.research_query, token_budget=args.research_tokens
+        )
+
+    # Finish the warm-up before the report (and its deadline) starts
+    if warmup is not None:
+        load_agents()
+        print(format_warmup(warmup.result()))
+
+    # Run a declarative agent graph instead, if requested
+    if args.graph:
+        run_graph_command(args, market_data, research)
+        return
+
     # Execute the full agentic workflow.
     # This call triggers all agents and returns a structured report.
-    final_report = run_agentic_financial_advisor()
+    final_report = run_agentic_financial_advisor(
+        use_cache=not args.no_cache,
+        stream=args.stream,
+        structured_output=args.structured_output,
+        validate_stream=args.validate_stream,
+        cascade=args.cascade,
+        handoff=args.handoff,
+        market_data=market_data,
+        research=research,
+        deadline=args.deadline,
+        hedge=args.hedge
+    )
 
     # Calculate total execution time
     elapsed_time = time.time() - start_time
 
+    # Keep the report for later queries and backtests, if requested
+    # (partial reports are not worth keeping)
+    if args.archive and final_report["complete"]:
+        with ReportStore(args.archive) as store:
+            store.append(final_report)
+
+    # Dump per-stage metrics for offline analysis, if requested
+    if args.metrics_json:
+        dump_metrics_json(
+            args.metrics_json,
+            timings=final_report["timings"],
+            validation=final_report["validation"],
+            repair=final_report["repair"],
+            cascade=final_report["cascade"],
+            hedging=final_report["hedging"],
+            scheduler=final_report["scheduler"],
+            budgets=final_report["budgets"]
+        )
+
     # -----------------------------------------------------------
     # Display Report Header and Execution Summary
     # -----------------------------------------------------------
@@ -50,8 +288,20 @@ def main():
     print("📋 FINAL FINANCIAL ADVISORY REPORT")
     print("=" * 70)
     print(f"⏱️  Total processing time: {elapsed_time:.2f} seconds")
+    ttft = final_report["timings"]["market_analysis_ttft"]
+    if ttft is not None:
+        print(f"⚡ Time to first token: {ttft:.2f} seconds")
     print("=" * 70 + "\n")
 
+    # -----------------------------------------------------------
+    # Display Market Data Section (only with --market-data)
+    # -----------------------------------------------------------
+    if final_report["market_data"]:
+        print("\n" + "=" * 70)
+        print("📉 MARKET DATA")
+        print("=" * 70 + "\n")
+        print(final_report["market_data"])
+
     # -----------------------------------------------------------
     # Display Market Analysis Section
     # -----------------------------------------------------------
@@ -59,8 +309,14 @@ def main():
     print("📊 MARKET ANALYSIS")
     print("=" * 70 + "\n")
 
-    # Market analysis is presented as a textual summary
-    print(final_report["market_analysis"])
+    # Market analysis is presented as a textual summary.
+    # When streamed, it was already shown while being generated.
+    if final_report["market_analysis"] is None:
+        print(f"⏰ Not available: {final_report['errors']['market_analyst']}")
+    elif args.stream:
+        print("(Shown above while it was being generated.)")
+    else:
+        print(final_report["market_analysis"])
 
     # -----------------------------------------------------------
     # Display Short-Term Investment Recommendation
@@ -70,14 +326,18 @@ def main():
     print("=" * 70 + "\n")
 
     # Extract short-term investment recommendation object
+    # (None in a partial report)
     investment = final_report["short_term_investment"]
 
     # Display each field in a user-friendly format
-    print(f"💼 Asset Name: {investment.asset_name}")
-    print(f"📝 Rationale: {investment.rationale}")
-    print(f"⚠️  Risk Level: {investment.risk_level}")
-    print(f"📊 Expected Return: {investment.expected_return}")
-    print(f"⏰ Time Horizon: {investment.time_horizon}")
+    if investment is None:
+        print(f"⏰ Not available: {final_report['errors'].get('short_term', 'no market analysis')}")
+    else:
+        print(f"💼 Asset Name: {investment.asset_name}")
+        print(f"📝 Rationale: {investment.rationale}")
+        print(f"⚠️  Risk Level: {investment.risk_level}")
+        print(f"📊 Expected Return: {investment.expected_return}")
+        print(f"⏰ Time Horizon: {investment.time_horizon}")
 
     # -----------------------------------------------------------
     # Display Long-Term Investment Recommendation
@@ -90,17 +350,145 @@ def main():
     investment = final_report["long_term_investment"]
 
     # Display long-term investment details
-    print(f"💼 Asset Name: {investment.asset_name}")
-    print(f"📝 Rationale: {investment.rationale}")
-    print(f"⚠️  Risk Level: {investment.risk_level}")
-    print(f"📊 Expected Return: {investment.expected_return}")
-    print(f"⏰ Time Horizon: {investment.time_horizon}")
+    if investment is None:
+        print(f"⏰ Not available: {final_report['errors'].get('long_term', 'no market analysis')}")
+    else:
+        print(f"💼 Asset Name: {investment.asset_name}")
+        print(f"📝 Rationale: {investment.rationale}")
+        print(f"⚠️  Risk Level: {investment.risk_level}")
+        print(f"📊 Expected Return: {investment.expected_return}")
+        print(f"⏰ Time Horizon: {investment.time_horizon}")
 
     # -----------------------------------------------------------
     # Completion Message
     # -----------------------------------------------------------
     print("\n" + "=" * 70)
-    print("✅ Report generation completed successfully!")
+    if final_report["complete"]:
+        print("✅ Report generation completed successfully!")
+    else:
+        print("⚠️  Partial report: some agents missed the deadline.")
+    print("=" * 70 + "\n")
+
+    # Answer follow-up questions about the report, if requested
+    if args.chat and final_report["market_analysis"] is not None:
+        run_chat(final_report)
+
+
+def run_chat(final_report: dict) -> None:
+    """
+    Answers follow-up questions about a report until an empty
+    line or end of input.
+
+    Args:
+        final_report (dict):
+            The report returned by run_agentic_financial_advisor().
+    """
+    import asyncio
+
+    from utils.llm_configuration import release_http_connections
+
+    session = SessionStore().add(session_report(
+        final_report["market_analysis"],
+        (final_report["short_term_investment"], final_report["long_term_investment"])
+    ))
+
+    async def chat():
+        try:
+            while True:
+                try:
+                    question = await asyncio.to_thread(
+                        input, "💬 Follow-up question (empty line to quit): "
+                    )
+                except EOFError:
+                    break
+                if not question.strip():
+                    break
+                try:
+                    print(f"\n{await session.ask(question.strip())}\n")
+                except QuestionTooLong as error:
+                    print(f"\n⚠️  {error}\n")
+            # Let a background summary finish before the loop closes
+            await session.settle()
+        finally:
+            await release_http_connections()
+
+    asyncio.run(chat())
+
+
+def run_graph_command(args: argparse.Namespace, market_data: str, research: str) -> None:
+    """
+    Runs the agent graph given with --graph and displays its outputs.
+
+    Args:
+        args (argparse.Namespace):
+            Parsed options.
+
+        market_data (str):
+            Indicator summary (--market-data), if any.
+
+        research (str):
+            Research passages (--research-index), if any.
+    """
+    import json
+    import os
+
+    graph = load_graph(args.graph)
+    inputs = {"market_data": market_data, "research": research}
+    for item in args.graph_input:
+        name, _, value = item.partition("=")
+        inputs[name.strip()] = value
+
+    # Outputs of the previous run, for partial re-execution
+    previous = None
+    if args.graph_state and os.path.exists(args.graph_state):
+        with open(args.graph_state, encoding="utf-8") as handle:
+            previous = GraphResult.from_dict(json.load(handle), graph)
+
+    result = run_graph_sync(
+        graph,
+        inputs,
+        previous=previous,
+        use_cache=not args.no_cache,
+        structured_output=args.structured_output,
+        validate_stream=args.validate_stream,
+        cascade=args.cascade,
+        hedge=args.hedge,
+        deadline=args.deadline
+    )
+
+    if args.graph_state:
+        with open(args.graph_state, "w", encoding="utf-8") as handle:
+            json.dump(result.to_dict(), handle, indent=2)
+    if args.metrics_json:
+        dump_metrics_json(args.metrics_json, graph=result.to_dict())
+
+    print("\n" + "=" * 70)
+    print(f"🕸️  AGENT GRAPH: {graph.name}")
+    print("=" * 70)
+    print(f"⏱️  Total processing time: {result.seconds:.2f} seconds")
+    print(f"▶️  Ran: {', '.join(result.ran) or 'none'}")
+    print(f"♻️  Reused: {', '.join(result.reused) or 'none'}")
+    print("=" * 70)
+
+    for name in graph.order:
+        print("\n" + "=" * 70)
+        print(f"📄 {name.upper()}")
+        print("=" * 70 + "\n")
+        if name in result.errors:
+            print(f"⏰ Not available: {result.errors[name]}")
+            continue
+        output = result.outputs[name]
+        if isinstance(output, str):
+            print(output)
+        else:
+            for field_name, value in output.model_dump().items():
+                print(f"• {field_name.replace('_', ' ').capitalize()}: {value}")
+
+    print("\n" + "=" * 70)
+    if result.complete:
+        print("✅ Graph completed successfully!")
+    else:
+        print("⚠️  Partial result: some nodes failed or were skipped.")
     print("=" * 70 + "\n")
 
 
@@ -0,0 +1,319 @@
+"""
+
+Market Indicators
+
+Purpose:
+    This file computes momentum, realized volatility, drawdown and
+    moving-average signals for a whole instrument universe at once,
+    and condenses them into a short top-k summary for the agents.
+
+Why this file exists:
+    - Every indicator is one or two NumPy operations over an
+      (n_days, n_symbols) array; there is no per-symbol Python
+      loop, so thousands of symbols take milliseconds
+    - Only the trailing window the longest indicator needs is
+      read, which keeps memory-mapped histories cheap
+    - The agents cannot use a table of thousands of numbers; a
+      summary of the strongest and weakest names plus market
+      breadth fits in a few hundred prompt tokens
+
+Conventions:
+    Windows are in trading days. Returns and drawdowns are
+    fractions (0.12 = +12%). Volatility is annualized.
+"""
+
+# Standard library imports
+import argparse
+import math
+import time
+import warnings
+from dataclasses import dataclass
+
+# NumPy does the vectorized computation
+import numpy as np
+
+# Columnar price history
+from market_data.loader import PriceHistory, load_price_history
+
+
+# Trading days per year, used to annualize volatility.
+TRADING_DAYS = 252
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    """
+    Indicator windows, in trading days.
+
+    Attributes:
+        momentum_short (int): Short momentum lookback (~1 month).
+        momentum (int): Main momentum lookback (~3 months).
+        momentum_long (int): Long momentum lookback (~12 months).
+        volatility (int): Realized volatility window.
+        drawdown (int): Window for the maximum drawdown.
+        ma_short (int): Short moving average.
+        ma_long (int): Long moving average.
+    """
+
+    momentum_short: int = 21
+    momentum: int = 63
+    momentum_long: int = 252
+    volatility: int = 63
+    drawdown: int = 252
+    ma_short: int = 50
+    ma_long: int = 200
+
+    @property
+    def lookback(self) -> int:
+        """Trading days needed by the longest indicator."""
+        return max(vars(self).values()) + 1
+
+
+@dataclass
+class IndicatorTable:
+    """
+    Latest indicator values, one entry per symbol.
+
+    Attributes:
+        as_of (np.datetime64): Last trading day of the history.
+        symbols (np.ndarray): Symbol names.
+        last_close (np.ndarray): Latest close (forward-filled).
+        momentum_short, momentum, momentum_long (np.ndarray):
+            Total return over the configured lookbacks.
+        volatility (np.ndarray): Annualized realized volatility.
+        max_drawdown (np.ndarray): Worst peak-to-trough decline in
+            the drawdown window (<= 0).
+        drawdown (np.ndarray): Current decline from that window's
+            peak (<= 0).
+        trend (np.ndarray): Short over long moving average, minus 1.
+        above_ma_long (np.ndarray): Whether the close is above the
+            long moving average.
+        config (IndicatorConfig): Windows the values were computed with.
+
+    Values are NaN (False for above_ma_long) where a symbol does not
+    have enough history.
+    """
+
+    as_of: np.datetime64
+    symbols: np.ndarray
+    last_close: np.ndarray
+    momentum_short: np.ndarray
+    momentum: np.ndarray
+    momentum_long: np.ndarray
+    volatility: np.ndarray
+    max_drawdown: np.ndarray
+    drawdown: np.ndarray
+    trend: np.ndarray
+    above_ma_long: np.ndarray
+    config: IndicatorConfig = IndicatorConfig()
+
+
+# -------------------------------------------------------------------
+# Vectorized Building Blocks
+# -------------------------------------------------------------------
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Carries the last observed price forward over gaps (holidays,
+    suspensions), column by column. Leading NaNs stay NaN.
+    """
+    rows = np.arange(values.shape[0])[:, None]
+    last_seen = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+    return values[last_seen, np.arange(values.shape[1])]
+
+
+def momentum(close: np.ndarray, lookback: int) -> np.ndarray:
+    """Total return over the last `lookback` days."""
+    if close.shape[0] <= lookback:
+        return np.full(close.shape[1], np.nan)
+    return close[-1] / close[-1 - lookback] - 1.0
+
+
+def realized_volatility(close: np.ndarray, window: int) -> np.ndarray:
+    """Annualized standard deviation of daily log returns."""
+    returns = np.diff(np.log(close[-window - 1:]), axis=0)
+    with warnings.catch_warnings():
+        # Symbols without enough history give all-NaN columns
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanstd(returns, axis=0, ddof=1) * math.sqrt(TRADING_DAYS)
+
+
+def drawdowns(close: np.ndarray, window: int) -> tuple:
+    """
+    Returns (max_drawdown, current_drawdown) over the last
+    `window` days, both <= 0.
+    """
+    segment = close[-window:]
+    # fmax ignores NaN, so a late listing starts its own peak
+    peaks = np.fmax.accumulate(segment, axis=0)
+    declines = segment / peaks - 1.0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmin(declines, axis=0), declines[-1]
+
+
+def moving_average(close: np.ndarray, window: int) -> np.ndarray:
+    """Latest simple moving average; NaN without `window` full days."""
+    segment = close[-window:]
+    average = segment.mean(axis=0)
+    if segment.shape[0] < window:
+        average[:] = np.nan
+    return average
+
+
+# -------------------------------------------------------------------
+# Indicator Table
+# -------------------------------------------------------------------
+def compute_indicators(history: PriceHistory, config: IndicatorConfig = None) -> IndicatorTable:
+    """
+    Computes every indicator for every symbol.
+
+    Args:
+        history (PriceHistory):
+            Daily history; may be memory-mapped.
+
+        config (IndicatorConfig):
+            Indicator windows. Defaults to IndicatorConfig().
+
+    Returns:
+        IndicatorTable:
+            Latest values per symbol.
+    """
+    config = config or IndicatorConfig()
+
+    # Read only the trailing window, as float64, gaps filled
+    close = forward_fill(np.asarray(history.close[-config.lookback:], dtype=np.float64))
+
+    ma_short = moving_average(close, config.ma_short)
+    ma_long = moving_average(close, config.ma_long)
+    max_drawdown, drawdown = drawdowns(close, config.drawdown)
+
+    return IndicatorTable(
+        as_of=history.dates[-1],
+        symbols=np.asarray(history.symbols),
+        last_close=close[-1],
+        momentum_short=momentum(close, config.momentum_short),
+        momentum=momentum(close, config.momentum),
+        momentum_long=momentum(close, config.momentum_long),
+        volatility=realized_volatility(close, config.volatility),
+        max_drawdown=max_drawdown,
+        drawdown=drawdown,
+        trend=ma_short / ma_long - 1.0,
+        above_ma_long=close[-1] > ma_long,
+        config=config
+    )
+
+
+def top_k(values: np.ndarray, k: int, largest: bool = True) -> np.ndarray:
+    """
+    Returns the indices of the k largest (or smallest) values,
+    best first, ignoring NaN. Uses a partial sort: O(n) + O(k log k).
+    """
+    candidates = np.flatnonzero(~np.isnan(values))
+    scores = values[candidates] if largest else -values[candidates]
+    if len(candidates) > k:
+        keep = np.argpartition(scores, -k)[-k:]
+        candidates, scores = candidates[keep], scores[keep]
+    return candidates[np.argsort(-scores, kind="stable")]
+
+
+# -------------------------------------------------------------------
+# Prompt Summary
+# -------------------------------------------------------------------
+def _percent(value: float) -> str:
+    return f"{value * 100:+.1f}%"
+
+
+def summarize_indicators(table: IndicatorTable, k: int = 5) -> str:
+    """
+    Condenses an indicator table into a few lines for agent prompts.
+
+    Example:
+        Market data as of 2026-10-16 (50 symbols):
+        - Breadth: 62% above 200d average; median 63d momentum +2.1%; median volatility 19%
+        - Strongest 63d momentum: RELIANCE +14.2% (vol 21%), TCS +11.0% (vol 17%), ...
+        - Weakest 63d momentum: ...
+        - Strongest uptrends (50d vs 200d average): ...
+        - Deepest drawdowns (252d): ...
+
+    Args:
+        table (IndicatorTable):
+            Output of compute_indicators().
+
+        k (int):
+            Names listed per line.
+
+    Returns:
+        str:
+            The summary text.
+    """
+    def names(indices, values, with_volatility=False):
+        return ", ".join(
+            f"{table.symbols[i]} {_percent(values[i])}"
+            + (f" (vol {table.volatility[i] * 100:.0f}%)" if with_volatility else "")
+            for i in indices
+        )
+
+    config = table.config
+    valid = ~np.isnan(table.momentum)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median_momentum = np.nanmedian(table.momentum)
+        median_volatility = np.nanmedian(table.volatility)
+    breadth = table.above_ma_long[~np.isnan(table.trend)]
+
+    lines = [
+        f"Market data as of {table.as_of} ({valid.sum()} symbols):",
+        f"- Breadth: {breadth.mean() * 100 if breadth.size else 0:.0f}% above "
+        f"{config.ma_long}d average; median {config.momentum}d momentum "
+        f"{_percent(median_momentum) if valid.any() else 'n/a'}; "
+        f"median volatility {median_volatility * 100 if valid.any() else 0:.0f}%",
+        f"- Strongest {config.momentum}d momentum: "
+        f"{names(top_k(table.momentum, k), table.momentum, True)}",
+        f"- Weakest {config.momentum}d momentum: "
+        f"{names(top_k(table.momentum, k, largest=False), table.momentum, True)}",
+        f"- Strongest uptrends ({config.ma_short}d vs {config.ma_long}d average): "
+        f"{names(top_k(table.trend, k), table.trend)}",
+        f"- Deepest drawdowns ({config.drawdown}d): "
+        f"{names(top_k(table.max_drawdown, k, largest=False), table.max_drawdown)}",
+    ]
+    return "\n".join(lines)
+
+
+def load_market_summary(path: str, k: int = 5, config: IndicatorConfig = None) -> str:
+    """
+    Loads a price history and returns its prompt summary.
+
+    Args:
+        path (str): Any source accepted by load_price_history().
+        k (int): Names listed per line.
+        config (IndicatorConfig): Indicator windows.
+
+    Returns:
+        str: See summarize_indicators().
+    """
+    return summarize_indicators(compute_indicators(load_price_history(path), config), k)
+
+
+def main(argv=None):
+    """Prints the market summary of a price history and how long it took."""
+    parser = argparse.ArgumentParser(description="Summarize market indicators")
+    parser.add_argument("path", help="Native .npy directory or a .npz/.csv/.parquet file.")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history = load_price_history(args.path)
+    loaded = time.perf_counter()
+    table = compute_indicators(history)
+    computed = time.perf_counter()
+    print(summarize_indicators(table, args.top_k))
+    n_days, n_symbols = history.shape
+    print(
+        f"\n{n_symbols} symbols x {n_days} days: load {(loaded - started) * 1000:.1f} ms, "
+        f"indicators {(computed - loaded) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
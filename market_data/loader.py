@@ -0,0 +1,276 @@
+"""
+
+Market Data Loader
+
+Purpose:
+    This file loads daily OHLCV history for an instrument universe
+    (for example the NIFTY 50 constituents, or a few thousand
+    listed stocks) from local files into columnar NumPy arrays.
+
+Why this file exists:
+    The agents only had their training data to go on ("No real-time
+    market data integration" in PROJECT_REPORT.md). Feeding them
+    real indicators needs a data layer that is fast enough to run
+    before every report:
+    - prices are stored time-major, one (n_days, n_symbols) array
+      per field, so indicators are computed for the whole universe
+      with a handful of vectorized operations
+    - the native format is a directory of .npy files that is
+      memory-mapped, not read: computing 1-year indicators on
+      10 years of history only touches the last year's pages
+
+Supported inputs:
+    - directory with dates.npy, symbols.npy and <field>.npy files
+      (the native format, written by save_price_history())
+    - .npz archive with the same arrays (loaded, not mapped)
+    - .csv in long format, one row per (date, symbol):
+          date,symbol,open,high,low,close,volume
+          2026-10-16,RELIANCE,2841.0,2866.5,2830.1,2859.9,5512301
+      only date, symbol and close are required
+    - .parquet with the same columns (requires pyarrow)
+
+    CSV and Parquet files are parsed in full; convert large ones
+    once to the native format:
+
+        python -m market_data.loader prices.csv data/nifty50
+"""
+
+# Standard library imports
+import argparse
+import csv
+import os
+import time
+from dataclasses import dataclass, field
+
+# NumPy holds the columnar price arrays
+import numpy as np
+
+
+# Price fields, in file order. Only "close" is required.
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# -------------------------------------------------------------------
+# Price History
+# -------------------------------------------------------------------
+@dataclass
+class PriceHistory:
+    """
+    Daily price history of an instrument universe.
+
+    Attributes:
+        symbols (np.ndarray): Symbol names, shape (n_symbols,).
+        dates (np.ndarray): Trading days (datetime64[D]), ascending,
+            shape (n_days,).
+        fields (dict): Field name ("close", "volume", ...) -> float
+            array of shape (n_days, n_symbols); NaN where a symbol
+            has no bar. Arrays may be read-only memory maps.
+    """
+
+    symbols: np.ndarray
+    dates: np.ndarray
+    fields: dict = field(default_factory=dict)
+
+    @property
+    def close(self) -> np.ndarray:
+        """Closing prices, shape (n_days, n_symbols)."""
+        return self.fields["close"]
+
+    @property
+    def shape(self) -> tuple:
+        """(n_days, n_symbols)."""
+        return len(self.dates), len(self.symbols)
+
+    def tail(self, days: int) -> "PriceHistory":
+        """
+        Returns the last `days` trading days.
+
+        The arrays are views, so slicing a memory-mapped history
+        reads nothing until the values are used.
+        """
+        return PriceHistory(
+            self.symbols,
+            self.dates[-days:],
+            {name: values[-days:] for name, values in self.fields.items()}
+        )
+
+
+# -------------------------------------------------------------------
+# Native Format (.npy directory)
+# -------------------------------------------------------------------
+def save_price_history(history: PriceHistory, directory: str) -> None:
+    """
+    Writes a history in the native, memory-mappable format.
+
+    Args:
+        history (PriceHistory):
+            The history to store.
+
+        directory (str):
+            Target folder; created if needed, existing files are
+            overwritten.
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "dates.npy"), history.dates.astype("datetime64[D]"))
+    np.save(os.path.join(directory, "symbols.npy"), np.asarray(history.symbols, dtype=str))
+    for name, values in history.fields.items():
+        # C order, time-major: the most recent days are contiguous
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values, dtype=np.float64))
+
+
+def _load_directory(directory: str, mmap: bool) -> PriceHistory:
+    mode = "r" if mmap else None
+    fields = {}
+    for name in PRICE_FIELDS:
+        path = os.path.join(directory, f"{name}.npy")
+        if os.path.exists(path):
+            fields[name] = np.load(path, mmap_mode=mode)
+    return PriceHistory(
+        np.load(os.path.join(directory, "symbols.npy")),
+        np.load(os.path.join(directory, "dates.npy")).astype("datetime64[D]"),
+        fields
+    )
+
+
+def _load_npz(path: str) -> PriceHistory:
+    with np.load(path) as archive:
+        fields = {name: archive[name] for name in PRICE_FIELDS if name in archive}
+        return PriceHistory(
+            archive["symbols"],
+            archive["dates"].astype("datetime64[D]"),
+            fields
+        )
+
+
+# -------------------------------------------------------------------
+# Long-Format Tables (CSV / Parquet)
+# -------------------------------------------------------------------
+def pivot_long_table(dates, symbols, columns: dict) -> PriceHistory:
+    """
+    Turns long-format rows (one per date and symbol) into columnar
+    (n_days, n_symbols) arrays.
+
+    Args:
+        dates: Row dates (anything np.datetime64 accepts).
+        symbols: Row symbols.
+        columns (dict): Field name -> row values.
+
+    Returns:
+        PriceHistory:
+            Dates and symbols sorted; missing bars are NaN. If a
+            (date, symbol) pair repeats, the last row wins.
+    """
+    date_values, date_index = np.unique(
+        np.asarray(dates, dtype="datetime64[D]"), return_inverse=True
+    )
+    symbol_values, symbol_index = np.unique(np.asarray(symbols, dtype=str), return_inverse=True)
+
+    fields = {}
+    for name, values in columns.items():
+        table = np.full((len(date_values), len(symbol_values)), np.nan)
+        table[date_index, symbol_index] = np.asarray(values, dtype=np.float64)
+        fields[name] = table
+    return PriceHistory(symbol_values, date_values, fields)
+
+
+def _numeric(value: str) -> float:
+    return float(value) if value not in ("", "null", "NaN", "nan") else np.nan
+
+
+def _load_csv(path: str) -> PriceHistory:
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [name.strip().lower() for name in next(reader)]
+        for required in ("date", "symbol", "close"):
+            if required not in header:
+                raise ValueError(f"{path}: missing required column {required!r}")
+
+        present = [name for name in PRICE_FIELDS if name in header]
+        positions = {name: header.index(name) for name in ("date", "symbol", *present)}
+        rows = [row for row in reader if row]
+
+    return pivot_long_table(
+        [row[positions["date"]] for row in rows],
+        [row[positions["symbol"]] for row in rows],
+        {
+            name: [_numeric(row[positions[name]]) for row in rows]
+            for name in present
+        }
+    )
+
+
+def _load_parquet(path: str) -> PriceHistory:
+    try:
+        import pyarrow.parquet as parquet
+    except ImportError as error:
+        raise ImportError(
+            "Reading Parquet files requires pyarrow: pip install pyarrow"
+        ) from error
+
+    table = parquet.read_table(path)
+    names = {name.lower(): name for name in table.column_names}
+    for required in ("date", "symbol", "close"):
+        if required not in names:
+            raise ValueError(f"{path}: missing required column {required!r}")
+
+    def column(name):
+        return table.column(names[name]).to_numpy(zero_copy_only=False)
+
+    return pivot_long_table(
+        column("date"),
+        column("symbol"),
+        {name: column(name) for name in PRICE_FIELDS if name in names}
+    )
+
+
+# -------------------------------------------------------------------
+# Public Entry Point
+# -------------------------------------------------------------------
+def load_price_history(path: str, mmap: bool = True) -> PriceHistory:
+    """
+    Loads a price history from any supported source.
+
+    Args:
+        path (str):
+            A native .npy directory, or a .npz, .csv or .parquet file
+            (see module docstring).
+
+        mmap (bool):
+            Memory-map the arrays of a native directory instead of
+            reading them (default). Ignored for other formats.
+
+    Returns:
+        PriceHistory:
+            The loaded history.
+    """
+    if os.path.isdir(path):
+        return _load_directory(path, mmap)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npz":
+        return _load_npz(path)
+    if extension == ".csv":
+        return _load_csv(path)
+    if extension in (".parquet", ".pq"):
+        return _load_parquet(path)
+    raise ValueError(f"Unsupported market data file: {path}")
+
+
+def main(argv=None):
+    """Converts a CSV/Parquet/.npz file to the native .npy directory format."""
+    parser = argparse.ArgumentParser(description="Convert market data to memory-mappable .npy files")
+    parser.add_argument("source", help="CSV, Parquet or .npz file.")
+    parser.add_argument("directory", help="Output directory.")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    history = load_price_history(args.source)
+    save_price_history(history, args.directory)
+    n_days, n_symbols = history.shape
+    print(
+        f"Wrote {n_symbols} symbols x {n_days} days to {args.directory} "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+"""
+
+Advisory Sessions
+
+Purpose:
+    This file keeps multi-turn advisory conversations. A client
+    receives a report once, then asks follow-up questions that are
+    answered from that report and the conversation so far.
+
+Why this file exists:
+    Every workflow run is stateless, so a follow-up question ("what
+    if I'm more risk-averse?") used to need a whole new report,
+    including a fresh market analysis. A session keeps the report
+    and the messages of its previous Agent.run results, so a
+    follow-up costs one generation (agents/follow_up_agent.py).
+
+Bounded prompts:
+    Every follow-up resends the history. Without a bound, each
+    turn's prompt, and with it the prefill time, would be longer
+    than the last. A session sends the report, a running summary
+    and the recent turns verbatim, up to `history_tokens`. When the
+    turns exceed that budget, the oldest ones are rolled into the
+    summary (agents/conversation_summary_agent.py) until the rest
+    fit in half of it, so a summary is generated every few turns
+    rather than on every turn. The summary runs in the background
+    once a turn is answered; the next question waits for it only
+    if it is still running. The summary agent's token budget caps
+    the summary itself, and questions longer than
+    `max_question_chars` are rejected (the follow-up agent's token
+    budget caps the answer), so the prompt stays bounded (report +
+    summary + budget + the latest turn) however long the
+    conversation runs.
+
+Session store:
+    Sessions live in memory, in a SessionStore with least-recently-
+    used eviction: starting a session beyond `max_sessions` drops
+    the one that was used longest ago.
+
+Usage:
+    python main.py --chat
+
+    store = get_session_store()
+    session = await store.start(client_profile={"age": 42})
+    answer = await store.ask(session.session_id, "What if I'm more risk-averse?")
+"""
+
+# Standard library imports
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+# The session agents (built on first use)
+from agents.conversation_summary_agent import get_conversation_summary_agent
+from agents.follow_up_agent import FOLLOW_UP_PROMPT, get_follow_up_agent
+
+# The initial report reuses the workflow's stages
+from orchestrator.financial_orchestrator import (
+    format_client_profile,
+    run_investment_recommendations,
+    run_market_analysis
+)
+from retrieval.passages import estimate_tokens
+from utils.deadline import within_deadline
+from utils.generation_profiles import generation_settings
+from utils.telemetry import record_usage, stage_span
+
+
+# Token budget of the verbatim turns in every follow-up prompt.
+DEFAULT_HISTORY_TOKENS = int(os.getenv("ADVISOR_SESSION_HISTORY_TOKENS", 1024))
+
+# Sessions kept in memory before the least recently used is evicted.
+DEFAULT_MAX_SESSIONS = int(os.getenv("ADVISOR_MAX_SESSIONS", 1000))
+
+# Longest follow-up question accepted, in characters.
+DEFAULT_MAX_QUESTION_CHARS = int(os.getenv("ADVISOR_SESSION_MAX_QUESTION_CHARS", 2000))
+
+
+class SessionNotFound(KeyError):
+    """Raised for an unknown (or evicted) session id."""
+
+
+class QuestionTooLong(ValueError):
+    """Raised for a follow-up question longer than the session accepts."""
+
+
+def message_text(message) -> str:
+    """
+    Returns the text of a PydanticAI message: prompts, answers
+    and tool traffic, for token estimates.
+    """
+    texts = []
+    for part in message.parts:
+        content = getattr(part, "content", None)
+        if content is None and hasattr(part, "args_as_json_str"):
+            content = part.args_as_json_str()
+        if content is not None:
+            texts.append(content if isinstance(content, str) else str(content))
+    return "\n".join(texts)
+
+
+# -------------------------------------------------------------------
+# Session
+# -------------------------------------------------------------------
+@dataclass
+class SessionTurn:
+    """
+    One follow-up question and its answer.
+
+    Attributes:
+        question (str): The client's question.
+        answer (str): The follow-up agent's answer.
+        messages (list): The run's new messages (ModelRequest/ModelResponse).
+        tokens (int): Estimated tokens of those messages.
+        prompt_tokens (int): Input tokens the model reported for the turn.
+    """
+
+    question: str
+    answer: str
+    messages: list
+    tokens: int
+    prompt_tokens: int = 0
+
+
+@dataclass
+class AdvisorySession:
+    """
+    A client's report and the follow-up conversation about it.
+
+    Attributes:
+        session_id (str): Identifier used by the store and the service.
+        report (dict): Client profile, market analysis and recommendations.
+        history_tokens (int): Token budget of the verbatim turns.
+        max_question_chars (int): Longest question accepted.
+        summary (str): Running summary of the turns rolled out of the history.
+        turns (list[SessionTurn]): Recent turns, oldest first.
+        asked (int): Follow-ups answered so far.
+        summarized_turns (int): Turns rolled into the summary so far.
+        summary_failures (int): Summaries that failed (their turns were dropped).
+    """
+
+    session_id: str
+    report: dict
+    history_tokens: int = DEFAULT_HISTORY_TOKENS
+    max_question_chars: int = DEFAULT_MAX_QUESTION_CHARS
+    summary: str = ""
+    turns: list = field(default_factory=list)
+    asked: int = 0
+    summarized_turns: int = 0
+    summary_failures: int = 0
+    last_used: float = field(default_factory=time.time)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    _compaction: asyncio.Task = field(default=None, repr=False)
+
+    @property
+    def turn_tokens(self) -> int:
+        """Estimated tokens of the verbatim turns."""
+        return sum(turn.tokens for turn in self.turns)
+
+    def context(self) -> str:
+        """The report, and the summary of earlier turns, for the prompt."""
+        report = self.report
+        sections = ["The client has received this advisory report."]
+        if report.get("client_profile"):
+            sections.append(f"Client Profile: {report['client_profile']}")
+        sections.append(f"Market Analysis:\n{report['market_analysis']}")
+        for key, label in (
+            ("short_term_investment", "Short-Term Recommendation"),
+            ("long_term_investment", "Long-Term Recommendation")
+        ):
+            if report.get(key):
+                sections.append(f"{label}: {json.dumps(report[key])}")
+        if self.summary:
+            sections.append(f"Summary of the earlier conversation:\n{self.summary}")
+        return "\n\n".join(sections)
+
+    def message_history(self) -> list:
+        """
+        Builds the message history for the next follow-up.
+
+        The history is never empty, so PydanticAI does not add the
+        agent's system prompt itself: it is the first part here,
+        followed by the report, the summary and the recent turns.
+        """
+        from pydantic_ai.messages import ModelRequest, SystemPromptPart
+
+        history = [ModelRequest(parts=[
+            SystemPromptPart(FOLLOW_UP_PROMPT),
+            SystemPromptPart(self.context())
+        ])]
+        for turn in self.turns:
+            history.extend(turn.messages)
+        return history
+
+    async def ask(self, question: str) -> str:
+        """
+        Answers a follow-up question.
+
+        Questions to one session are answered one at a time, in
+        order: each one needs the previous answer in its history.
+
+        Args:
+            question (str):
+                The client's question.
+
+        Returns:
+            str: The answer.
+
+        Raises:
+            QuestionTooLong: The question is longer than
+                `max_question_chars` (the latest turn is always
+                sent verbatim, so its size must be bounded).
+        """
+        if len(question) > self.max_question_chars:
+            raise QuestionTooLong(
+                f"question is {len(question)} characters long, "
+                f"the limit is {self.max_question_chars}"
+            )
+        async with self._lock:
+            # The history must include the summary being generated
+            await self.settle()
+
+            agent = get_follow_up_agent()
+            run_kwargs = {}
+            model_settings = generation_settings("follow_up")
+            if model_settings:
+                run_kwargs["model_settings"] = model_settings
+
+            with stage_span("follow_up"):
+                result = await within_deadline(
+                    agent.run(question, message_history=self.message_history(), **run_kwargs),
+                    "follow_up"
+                )
+                record_usage(result.usage())
+
+            messages = result.new_messages()
+            self.turns.append(SessionTurn(
+                question,
+                result.output,
+                messages,
+                sum(estimate_tokens(message_text(message)) for message in messages),
+                result.usage().input_tokens or 0
+            ))
+            self.asked += 1
+            self.last_used = time.time()
+
+            # Roll old turns into the summary while the client reads
+            if self.turn_tokens > self.history_tokens:
+                self._compaction = asyncio.create_task(self.compact())
+            return result.output
+
+    async def settle(self) -> None:
+        """Waits for a background summary, if one is running."""
+        if self._compaction is not None:
+            compaction, self._compaction = self._compaction, None
+            await compaction
+
+    async def compact(self) -> None:
+        """
+        Rolls the oldest turns into the summary until the remaining
+        turns fit in half of the history budget.
+
+        The latest turn always stays verbatim. If the summary agent
+        fails, the old summary is kept and the turns are dropped
+        anyway: the prompt stays bounded, at the cost of the
+        dropped turns' details.
+        """
+        count, remaining = 0, self.turn_tokens
+        while count < len(self.turns) - 1 and remaining > self.history_tokens // 2:
+            remaining -= self.turns[count].tokens
+            count += 1
+        if not count:
+            return
+
+        transcript = "\n\n".join(
+            f"Client: {turn.question}\nAdvisor: {turn.answer}" for turn in self.turns[:count]
+        )
+        prompt = (
+            f"Existing summary:\n{self.summary or '(none)'}\n\n"
+            f"New turns:\n{transcript}"
+        )
+        run_kwargs = {}
+        model_settings = generation_settings("conversation_summary")
+        if model_settings:
+            run_kwargs["model_settings"] = model_settings
+        try:
+            with stage_span("conversation_summary"):
+                result = await get_conversation_summary_agent().run(prompt, **run_kwargs)
+                record_usage(result.usage())
+            self.summary = result.output.strip()
+        except Exception:
+            self.summary_failures += 1
+
+        del self.turns[:count]
+        self.summarized_turns += count
+
+    def as_dict(self) -> dict:
+        """Returns the session's state, without the message objects."""
+        return {
+            "session_id": self.session_id,
+            "asked": self.asked,
+            "turns": len(self.turns),
+            "turn_tokens": self.turn_tokens,
+            "history_tokens": self.history_tokens,
+            "summarized_turns": self.summarized_turns,
+            "summary_failures": self.summary_failures,
+            "summary": self.summary,
+            "last_prompt_tokens": self.turns[-1].prompt_tokens if self.turns else None
+        }
+
+
+def session_report(market_analysis: str, outcomes: tuple, client_profile=None) -> dict:
+    """
+    Builds a session's report from the workflow's outputs.
+
+    Args:
+        market_analysis (str):
+            The market analysis.
+
+        outcomes (tuple):
+            (short_term_outcome, long_term_outcome), as returned by
+            run_investment_recommendations(), or the report's
+            recommendations. A failed agent leaves its
+            recommendation None and its error under "errors".
+
+        client_profile (dict | str):
+            The client's profile, if any.
+
+    Returns:
+        dict: The report, JSON-serializable.
+    """
+    report = {
+        "client_profile": format_client_profile(client_profile),
+        "market_analysis": market_analysis,
+        "errors": {}
+    }
+    for name, outcome in zip(("short_term", "long_term"), outcomes):
+        if isinstance(outcome, BaseException):
+            report[f"{name}_investment"] = None
+            report["errors"][name] = str(outcome)
+        elif outcome is None:
+            # Missing from a partial report
+            report[f"{name}_investment"] = None
+        else:
+            report[f"{name}_investment"] = outcome.model_dump()
+    return report
+
+
+# -------------------------------------------------------------------
+# Session Store
+# -------------------------------------------------------------------
+@dataclass
+class SessionStats:
+    """Counters of a SessionStore."""
+
+    started: int = 0
+    evicted: int = 0
+    not_found: int = 0
+
+    def as_dict(self) -> dict:
+        return {"started": self.started, "evicted": self.evicted, "not_found": self.not_found}
+
+
+class SessionStore:
+    """
+    In-memory sessions with least-recently-used eviction.
+
+    Attributes:
+        max_sessions (int): Sessions kept before evicting.
+        history_tokens (int): History budget of new sessions.
+        max_question_chars (int): Longest question new sessions accept.
+        stats (SessionStats): Started, evicted and unknown-id counters.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        history_tokens: int = DEFAULT_HISTORY_TOKENS,
+        max_question_chars: int = DEFAULT_MAX_QUESTION_CHARS
+    ):
+        self.max_sessions = max_sessions
+        self.history_tokens = history_tokens
+        self.max_question_chars = max_question_chars
+        self.stats = SessionStats()
+        # Least recently used first
+        self._sessions = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add(self, report: dict) -> AdvisorySession:
+        """
+        Opens a session for a report already generated.
+
+        Args:
+            report (dict):
+                See session_report().
+
+        Returns:
+            AdvisorySession: The new session.
+        """
+        session = AdvisorySession(
+            uuid.uuid4().hex, report, self.history_tokens, self.max_question_chars
+        )
+        self._sessions[session.session_id] = session
+        self.stats.started += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats.evicted += 1
+        return session
+
+    def get(self, session_id: str) -> AdvisorySession:
+        """
+        Returns a session and marks it as the most recently used.
+
+        Raises:
+            SessionNotFound: The id is unknown or was evicted.
+        """
+        try:
+            self._sessions.move_to_end(session_id)
+        except KeyError:
+            self.stats.not_found += 1
+            raise SessionNotFound(session_id) from None
+        return self._sessions[session_id]
+
+    def remove(self, session_id: str) -> None:
+        """Closes a session (unknown ids are ignored)."""
+        self._sessions.pop(session_id, None)
+
+    async def start(
+        self,
+        client_profile=None,
+        use_cache: bool = True,
+        structured_output: bool = False,
+        validate_stream: bool = False,
+        cascade: bool = False,
+        market_data: str = None,
+        research: str = None,
+        hedge: bool = False
+    ) -> AdvisorySession:
+        """
+        Generates a client's report and opens a session for it.
+
+        The market analysis is the shared, cached one, so starting
+        a session usually costs only the two recommendations.
+
+        Args:
+            client_profile (dict | str):
+                The client's profile (see format_client_profile()).
+
+            use_cache, structured_output, validate_stream, cascade,
+            market_data, research, hedge:
+                See run_agentic_financial_advisor_async().
+
+        Returns:
+            AdvisorySession: The new session; see its report.
+        """
+        market_analysis, _, _ = await run_market_analysis(
+            use_cache, market_data=market_data, research=research, hedge=hedge
+        )
+        outcomes = await run_investment_recommendations(
+            market_analysis,
+            use_cache,
+            structured_output,
+            validate_stream,
+            client_profile=format_client_profile(client_profile),
+            cascade=cascade,
+            market_data=market_data,
+            hedge=hedge
+        )
+        return self.add(session_report(market_analysis, outcomes, client_profile))
+
+    async def ask(self, session_id: str, question: str) -> str:
+        """Answers a follow-up question in a session (see AdvisorySession.ask())."""
+        return await self.get(session_id).ask(question)
+
+    def summary(self) -> dict:
+        """Returns the store's counters and size."""
+        return {"active": len(self._sessions), "max_sessions": self.max_sessions, **self.stats.as_dict()}
+
+
+# Shared store, created on first use.
+_session_store = None
+
+
+def get_session_store() -> SessionStore:
+    """Returns the process-wide SessionStore instance."""
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
@@ -0,0 +1,708 @@
+"""
+
+Agent Graph
+
+Purpose:
+    This file defines advisory workflows declaratively, as a graph
+    of agent nodes loaded from a JSON or YAML file, and an executor
+    that runs the graph.
+
+Why this file exists:
+    The built-in workflow (see financial_orchestrator) is a fixed
+    sequence: market analysis, then the two investment agents.
+    Adding a medium-term, sector or tax agent meant editing the
+    orchestrator. Here each node declares its prompt template, its
+    output schema and its inputs, so adding an agent only means
+    adding a node. The executor:
+    - runs every node whose dependencies are done, concurrently, so
+      independent agents never wait for each other
+    - when concurrency is limited, starts the nodes on the critical
+      path (longest remaining chain of expected latency) first
+    - hashes each node's inputs and, given a previous result, only
+      re-runs the nodes whose inputs changed (changes propagate to
+      dependents only if the output actually changed)
+    - records failures per node and skips their dependents, so a
+      failing agent leaves a partial result instead of nothing
+
+Graph file (JSON or YAML):
+    {
+      "name": "default",
+      "nodes": [
+        {"name": "market_analyst", "agent": "market_analyst",
+         "prompt": ["Analyze current financial market conditions.",
+                    "Market Data:\\n{market_data}"]},
+        {"name": "short_term", "agent": "short_term",
+         "output": "InvestmentRecommendation", "horizon": "short-term",
+         "prompt": ["Market Context: {market_analyst}",
+                    "Provide a short-term investment recommendation."]}
+      ]
+    }
+
+    - prompt: a string or a list of parts joined by blank lines. A
+      part is left out when one of its {placeholders} is empty, so
+      optional context needs no conditionals. Literal braces are
+      written {{ and }}.
+    - placeholders: names of other nodes (their outputs; this makes
+      them dependencies) or graph inputs (market_data, research,
+      client_profile, ...)
+    - agent: a built-in agent (BUILTIN_AGENTS), or system_prompt
+      (and optionally model) to define a new one
+    - output: "text" (default) or a schema (OUTPUT_SCHEMAS, or
+      "package.module:Class" for any Pydantic model)
+    - depends_on: extra dependencies not used in the prompt
+    - horizon: horizon label of recommendation nodes ("short-term")
+    - cost: expected seconds, used for the critical path until the
+      node has been measured
+
+Usage:
+    graph = load_graph("orchestrator/graphs/default.json")
+    result = await run_graph(graph, {"client_profile": "age: 42"})
+    result = await run_graph(graph, {"client_profile": "age: 43"}, previous=result)
+    # -> only the investment nodes run again
+"""
+
+# Standard library imports
+import asyncio
+import hashlib
+import heapq
+import importlib
+import json
+import os
+import string
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+
+# Pydantic models are the node output schemas
+from pydantic import BaseModel
+
+from agents.long_term_investment_agent import get_long_term_investment_agent
+from agents.market_analyst_agent import get_market_analyst_agent
+from agents.market_snapshot_agent import get_market_snapshot_agent
+from agents.short_term_investment_agent import get_short_term_investment_agent
+from orchestrator.financial_orchestrator import (
+    _run_investment_agent,
+    parse_market_snapshot
+)
+from schemas.investment_schema import InvestmentRecommendation
+from schemas.market_snapshot import MarketSnapshot
+from utils.deadline import DeadlineExceeded, deadline_scope, within_deadline
+from utils.generation_profiles import generation_settings, get_generation_profile
+from utils.hedging import HEDGE_POLICIES, hedged_generator
+from utils.json_repair import repair_json_object
+from utils.llm_configuration import get_llm_model, release_http_connections
+from utils.response_cache import (
+    agent_output_generator,
+    get_response_cache,
+    register_system_prompt
+)
+from utils.telemetry import METRICS, percentile, stage_span
+
+
+# Graph shipped with the advisor: the three agents of the built-in
+# workflow, with the same prompts (so both share cached outputs).
+DEFAULT_GRAPH_PATH = os.path.join(os.path.dirname(__file__), "graphs", "default.json")
+
+# Built-in agents a node can name.
+BUILTIN_AGENTS = {
+    "market_analyst": get_market_analyst_agent,
+    "market_snapshot": get_market_snapshot_agent,
+    "short_term": get_short_term_investment_agent,
+    "long_term": get_long_term_investment_agent,
+}
+
+# Output schemas by name; "text" means free text.
+OUTPUT_SCHEMAS = {
+    "text": None,
+    "InvestmentRecommendation": InvestmentRecommendation,
+    "MarketSnapshot": MarketSnapshot,
+}
+
+# Model of agents defined in a graph file without one.
+DEFAULT_NODE_MODEL = "llama3.2:latest"
+
+# Expected seconds of a node never measured and without a cost.
+DEFAULT_NODE_COST = 1.0
+
+
+# -------------------------------------------------------------------
+# Nodes
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class AgentNode:
+    """
+    One agent call in a graph.
+
+    Attributes:
+        name (str): Node name; also the stage, cache and telemetry name.
+        prompt (tuple): Prompt template parts (see module docstring).
+        agent (str): Built-in agent name (BUILTIN_AGENTS).
+        system_prompt (str): System prompt of a graph-defined agent.
+        model (str): Ollama model of a graph-defined agent.
+        output (str): "text" or a schema name.
+        depends_on (tuple): Dependencies not used in the prompt.
+        horizon (str): Horizon label of recommendation nodes.
+        cost (float): Expected seconds, before measurements exist.
+    """
+
+    name: str
+    prompt: tuple
+    agent: str = None
+    system_prompt: str = None
+    model: str = None
+    output: str = "text"
+    depends_on: tuple = ()
+    horizon: str = None
+    cost: float = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AgentNode":
+        """Builds a node from its graph-file entry."""
+        data = dict(data)
+        unknown = set(data) - {field_name for field_name in cls.__dataclass_fields__}
+        if unknown:
+            raise ValueError(f"Node {data.get('name')!r}: unknown keys {sorted(unknown)}")
+        prompt = data.get("prompt")
+        data["prompt"] = (prompt,) if isinstance(prompt, str) else tuple(prompt or ())
+        data["depends_on"] = tuple(data.get("depends_on") or ())
+        node = cls(**data)
+        if not node.prompt:
+            raise ValueError(f"Node {node.name!r} has no prompt")
+        if (node.agent is None) == (node.system_prompt is None):
+            raise ValueError(f"Node {node.name!r} needs either an agent or a system_prompt")
+        if node.agent is not None and node.agent not in BUILTIN_AGENTS:
+            raise ValueError(f"Node {node.name!r}: unknown agent {node.agent!r}")
+        resolve_schema(node.output)
+        return node
+
+    @property
+    def placeholders(self) -> set:
+        """Names used in the prompt template."""
+        return {
+            name
+            for part in self.prompt
+            for _, name, _, _ in string.Formatter().parse(part)
+            if name
+        }
+
+    @property
+    def schema(self):
+        """The output schema class, or None for text."""
+        return resolve_schema(self.output)
+
+    def render(self, values: dict) -> str:
+        """
+        Renders the prompt, leaving out parts with empty placeholders.
+
+        Args:
+            values (dict): Text of every placeholder (missing = empty).
+
+        Returns:
+            str: The prompt.
+        """
+        parts = []
+        for part in self.prompt:
+            names = {name for _, name, _, _ in string.Formatter().parse(part) if name}
+            if all(values.get(name) for name in names):
+                parts.append(part.format(**{name: values[name] for name in names}))
+        return "\n\n".join(parts)
+
+    def get_agent(self):
+        """Returns the node's agent (built on first use)."""
+        if self.agent is not None:
+            return BUILTIN_AGENTS[self.agent]()
+        return _graph_agent(self.name, self.system_prompt, self.model or DEFAULT_NODE_MODEL)
+
+    def signature(self) -> dict:
+        """Definition fields that affect the output (cost excluded)."""
+        definition = asdict(self)
+        definition.pop("cost")
+        return definition
+
+
+def resolve_schema(name: str):
+    """
+    Returns the schema class of a node output name.
+
+    Raises:
+        ValueError: Unknown name, or not a Pydantic model.
+    """
+    if name in OUTPUT_SCHEMAS:
+        return OUTPUT_SCHEMAS[name]
+    module_name, _, class_name = (name or "").partition(":")
+    try:
+        schema = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError) as error:
+        raise ValueError(f"Unknown output schema {name!r}") from error
+    if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+        raise ValueError(f"Output schema {name!r} is not a Pydantic model")
+    return schema
+
+
+@lru_cache(maxsize=None)
+def _graph_agent(name: str, system_prompt: str, model_name: str):
+    """Builds (once) the agent of a graph-defined node."""
+    from pydantic_ai import Agent
+
+    agent = Agent(
+        model=get_llm_model(model_name),
+        model_settings=get_generation_profile(name).model_settings(),
+        retries=3,
+        system_prompt=system_prompt
+    )
+    return register_system_prompt(agent, system_prompt)
+
+
+def parse_output(schema, output):
+    """
+    Validates a node output against its schema (repairing JSON first).
+
+    Returns:
+        The schema instance, or the text for text nodes.
+
+    Raises:
+        ValueError: The output does not match the schema.
+    """
+    if schema is None:
+        return output
+    if schema is MarketSnapshot:
+        return parse_market_snapshot(output)
+    if isinstance(output, schema):
+        return output
+    try:
+        if isinstance(output, str):
+            try:
+                data = json.loads(output)
+            except json.JSONDecodeError:
+                data = repair_json_object(output)
+        else:
+            data = output
+        return schema(**data)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Failed to parse {schema.__name__}: {error}")
+
+
+def output_text(output) -> str:
+    """Text of a node output, as inserted in dependent prompts."""
+    if output is None:
+        return ""
+    if isinstance(output, MarketSnapshot):
+        return output.to_prompt()
+    if isinstance(output, BaseModel):
+        return json.dumps(output.model_dump())
+    return str(output)
+
+
+# -------------------------------------------------------------------
+# Graph
+# -------------------------------------------------------------------
+class AgentGraph:
+    """
+    A validated, acyclic graph of agent nodes.
+
+    Args:
+        nodes (list): AgentNode instances.
+        name (str): Graph name (reports and logs).
+
+    Raises:
+        ValueError: Duplicate names, unknown dependencies or a cycle.
+    """
+
+    def __init__(self, nodes: list, name: str = "graph"):
+        self.name = name
+        self.nodes = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate node name: {node.name!r}")
+            self.nodes[node.name] = node
+
+        self.dependencies = {}
+        for node in nodes:
+            missing = set(node.depends_on) - set(self.nodes)
+            if missing:
+                raise ValueError(f"Node {node.name!r} depends on unknown nodes {sorted(missing)}")
+            deps = (node.placeholders & set(self.nodes)) | set(node.depends_on)
+            if node.name in deps:
+                raise ValueError(f"Node {node.name!r} depends on itself")
+            self.dependencies[node.name] = deps
+
+        self.dependents = {name: set() for name in self.nodes}
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].add(name)
+
+        self.order = self._topological_order()
+        # Placeholders that are not nodes are graph inputs
+        self.inputs = sorted(
+            set().union(*(node.placeholders for node in nodes)) - set(self.nodes)
+        )
+
+    def _topological_order(self) -> list:
+        # Kahn's algorithm, keeping file order among ready nodes
+        position = {name: index for index, name in enumerate(self.nodes)}
+        waiting = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = [(position[name], name) for name, count in waiting.items() if not count]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, name = heapq.heappop(ready)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, (position[dependent], dependent))
+        if len(order) < len(self.nodes):
+            cycle = sorted(name for name, count in waiting.items() if count)
+            raise ValueError(f"The graph has a cycle through {cycle}")
+        return order
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "AgentGraph":
+        """Builds a graph from a parsed graph file."""
+        return cls(
+            [AgentNode.from_dict(entry) for entry in config.get("nodes", [])],
+            name=config.get("name", "graph")
+        )
+
+    # ---------------------------------------------------------------
+    # Critical Path
+    # ---------------------------------------------------------------
+    def expected_cost(self, name: str) -> float:
+        """
+        Expected seconds of a node: the median of its measured
+        recent generations (see utils.telemetry), else its
+        configured cost.
+        """
+        measured = [
+            record.generation_seconds for record in METRICS.recent(name)
+            if not record.cache_hit
+        ]
+        if measured:
+            return percentile(measured, 50)
+        node = self.nodes[name]
+        return node.cost if node.cost is not None else DEFAULT_NODE_COST
+
+    def ranks(self) -> dict:
+        """
+        Critical-path rank of every node: its expected cost plus the
+        largest rank among its dependents (the time from its start
+        to the end of the graph).
+        """
+        ranks = {}
+        for name in reversed(self.order):
+            below = [ranks[dependent] for dependent in self.dependents[name]]
+            ranks[name] = self.expected_cost(name) + max(below, default=0.0)
+        return ranks
+
+    def critical_path(self) -> list:
+        """The chain of nodes with the largest total expected cost."""
+        ranks = self.ranks()
+        path = []
+        candidates = [name for name in self.order if not self.dependencies[name]]
+        while candidates:
+            name = max(candidates, key=lambda candidate: ranks[candidate])
+            path.append(name)
+            candidates = list(self.dependents[name])
+        return path
+
+
+def load_graph(path: str = None) -> AgentGraph:
+    """
+    Loads a graph file (.json, or .yaml/.yml with PyYAML).
+
+    Args:
+        path (str): Graph file; the default graph when None.
+
+    Returns:
+        AgentGraph: The validated graph.
+    """
+    path = path or DEFAULT_GRAPH_PATH
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as error:
+                raise ImportError(
+                    "Reading YAML graphs requires PyYAML: pip install pyyaml"
+                ) from error
+            config = yaml.safe_load(handle)
+        else:
+            config = json.load(handle)
+    return AgentGraph.from_dict(config)
+
+
+# -------------------------------------------------------------------
+# Results
+# -------------------------------------------------------------------
+@dataclass
+class GraphResult:
+    """
+    Outputs of one graph run.
+
+    Attributes:
+        graph (str): Graph name.
+        outputs (dict): Output per node (text or schema instance).
+        hashes (dict): Input hash per node that produced an output.
+        errors (dict): Error message per failed or skipped node.
+        ran (list): Nodes that called their agent, in start order.
+        reused (list): Nodes whose output came from `previous`.
+        seconds (float): Wall-clock duration of the run.
+    """
+
+    graph: str
+    outputs: dict = field(default_factory=dict)
+    hashes: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    ran: list = field(default_factory=list)
+    reused: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> dict:
+        """Plain, JSON-serializable form (see from_dict())."""
+        return {
+            "graph": self.graph,
+            "outputs": {
+                name: output.model_dump() if isinstance(output, BaseModel) else output
+                for name, output in self.outputs.items()
+            },
+            "hashes": dict(self.hashes),
+            "errors": dict(self.errors),
+            "ran": list(self.ran),
+            "reused": list(self.reused),
+            "seconds": self.seconds,
+            "complete": self.complete,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, graph: AgentGraph) -> "GraphResult":
+        """Restores a saved result, re-validating schema outputs."""
+        outputs = {}
+        for name, output in data.get("outputs", {}).items():
+            node = graph.nodes.get(name)
+            if node is not None:
+                outputs[name] = parse_output(node.schema, output)
+        return cls(
+            graph=data.get("graph", graph.name),
+            outputs=outputs,
+            hashes={name: value for name, value in data.get("hashes", {}).items() if name in outputs},
+            errors=dict(data.get("errors", {})),
+            ran=list(data.get("ran", [])),
+            reused=list(data.get("reused", [])),
+            seconds=data.get("seconds", 0.0)
+        )
+
+
+def input_hash(node: AgentNode, prompt: str, options: dict) -> str:
+    """Hash of everything a node's output depends on."""
+    payload = json.dumps(
+        {"node": node.signature(), "prompt": prompt, "options": options},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------------------
+# Node Execution
+# -------------------------------------------------------------------
+async def _run_node(
+    node: AgentNode,
+    prompt: str,
+    use_cache: bool,
+    structured_output: bool,
+    validate_stream: bool,
+    cascade: bool,
+    hedge: bool,
+    queued_at: float
+):
+    """Runs one node's agent and returns its validated output."""
+    agent = node.get_agent()
+    if node.schema is InvestmentRecommendation:
+        # Recommendations get the full treatment: repair, correction
+        # retries, stream validation, cascade and hedging
+        return await _run_investment_agent(
+            agent,
+            node.name,
+            None,
+            node.horizon or node.name.replace("_", "-"),
+            use_cache,
+            structured_output,
+            validate_stream,
+            queued_at=queued_at,
+            cascade=cascade,
+            hedge=hedge,
+            user_prompt=prompt
+        )
+
+    run_kwargs = {}
+    model_settings = generation_settings(node.name)
+    if model_settings:
+        run_kwargs["model_settings"] = model_settings
+    hedge_policy = HEDGE_POLICIES.get(node.name) if hedge else None
+    if hedge_policy is not None:
+        run_kwargs["generate"] = hedged_generator(
+            agent, node.name, hedge_policy, agent_output_generator(agent)
+        )
+
+    schema = node.schema
+    with stage_span(node.name, queued_at) as record:
+        output, cache_hit = await within_deadline(
+            get_response_cache().run(
+                agent,
+                node.name,
+                prompt,
+                bypass=not use_cache,
+                validator=(lambda output: parse_output(schema, output)) if schema else None,
+                **run_kwargs
+            ),
+            node.name
+        )
+        record.cache_hit = cache_hit
+    return output if schema is None else parse_output(schema, output)
+
+
+# -------------------------------------------------------------------
+# Executor
+# -------------------------------------------------------------------
+async def run_graph(
+    graph: AgentGraph,
+    inputs: dict = None,
+    previous: GraphResult = None,
+    use_cache: bool = True,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    cascade: bool = False,
+    hedge: bool = False,
+    max_concurrency: int = None,
+    deadline: float = None
+) -> GraphResult:
+    """
+    Runs a graph: every ready node at once, critical path first.
+
+    Args:
+        graph (AgentGraph):
+            The graph to run.
+
+        inputs (dict):
+            Graph inputs by placeholder name (market_data, research,
+            client_profile, ...); missing inputs are empty.
+
+        previous (GraphResult):
+            An earlier result of the same graph. Nodes whose input
+            hash is unchanged reuse its output instead of running.
+
+        use_cache, structured_output, validate_stream, cascade, hedge:
+            See run_agentic_financial_advisor_async().
+
+        max_concurrency (int):
+            Nodes running at once; None runs every ready node. When
+            limited, ready nodes start by critical-path rank.
+
+        deadline (float):
+            Time budget in seconds; late nodes fail with
+            DeadlineExceeded and their dependents are skipped.
+
+    Returns:
+        GraphResult:
+            Outputs, errors, and which nodes ran or were reused.
+            Node failures are recorded, not raised.
+    """
+    started = time.perf_counter()
+    values = {name: "" if value is None else str(value) for name, value in (inputs or {}).items()}
+    options = {"structured_output": structured_output, "cascade": cascade}
+    result = GraphResult(graph=graph.name)
+    ranks = graph.ranks()
+    position = {name: index for index, name in enumerate(graph.order)}
+
+    waiting = {name: len(deps) for name, deps in graph.dependencies.items()}
+    ready = []
+    ready_at = {}
+    running = {}
+
+    def make_ready(name):
+        ready_at[name] = time.perf_counter()
+        heapq.heappush(ready, (-ranks[name], position[name], name))
+
+    def finish(name):
+        for dependent in graph.dependents[name]:
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                make_ready(dependent)
+
+    async def execute(name, prompt, key):
+        node = graph.nodes[name]
+        return await _run_node(
+            node, prompt, use_cache, structured_output, validate_stream,
+            cascade, hedge, ready_at[name]
+        ), key
+
+    for name in graph.order:
+        if not waiting[name]:
+            make_ready(name)
+
+    with deadline_scope(deadline):
+        try:
+            while ready or running:
+                while ready and (max_concurrency is None or len(running) < max_concurrency):
+                    _, _, name = heapq.heappop(ready)
+                    failed = sorted(dep for dep in graph.dependencies[name] if dep in result.errors)
+                    if failed:
+                        result.errors[name] = f"skipped: {', '.join(failed)} failed"
+                        finish(name)
+                        continue
+
+                    node = graph.nodes[name]
+                    node_values = dict(values)
+                    for dep in graph.dependencies[name]:
+                        node_values[dep] = output_text(result.outputs[dep])
+                    prompt = node.render(node_values)
+                    key = input_hash(node, prompt, options)
+                    if (
+                        previous is not None
+                        and previous.hashes.get(name) == key
+                        and name in previous.outputs
+                    ):
+                        result.outputs[name] = previous.outputs[name]
+                        result.hashes[name] = key
+                        result.reused.append(name)
+                        finish(name)
+                        continue
+
+                    result.ran.append(name)
+                    running[asyncio.create_task(execute(name, prompt, key))] = name
+
+                if not running:
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        output, key = task.result()
+                    except DeadlineExceeded as error:
+                        result.errors[name] = str(error)
+                    except Exception as error:
+                        result.errors[name] = f"{type(error).__name__}: {error}"
+                    else:
+                        result.outputs[name] = output
+                        result.hashes[name] = key
+                    finish(name)
+        finally:
+            for task in running:
+                task.cancel()
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_graph_sync(graph: AgentGraph, inputs: dict = None, **kwargs) -> GraphResult:
+    """Synchronous wrapper around run_graph() (see run_graph())."""
+    async def run():
+        try:
+            return await run_graph(graph, inputs, **kwargs)
+        finally:
+            await release_http_connections()
+
+    return asyncio.run(run())
@@ -15,17 +15,90 @@ Why this file is critical:
     coordinates different specialists.
 """
 
-# Import individual agents responsible for different tasks
-from agents.market_analyst_agent import market_analyst_agent
-from agents.short_term_investment_agent import short_term_investment_agent
-from agents.long_term_investment_agent import long_term_investment_agent
+# Import the accessors of the agents responsible for different tasks.
+# Agents are built on first use, so importing the orchestrator stays
+# cheap (no PydanticAI or OpenAI client stack until a report runs).
+from agents.market_analyst_agent import get_market_analyst_agent
+from agents.short_term_investment_agent import get_short_term_investment_agent
+from agents.long_term_investment_agent import get_long_term_investment_agent
+from agents.market_snapshot_agent import get_market_snapshot_agent
 
 # Import the Pydantic schema used to validate investment recommendations
 from schemas.investment_schema import InvestmentRecommendation
 
+# Import the compact market summary handed to the investment agents
+from schemas.market_snapshot import MarketSnapshot
+
+# Import LLM helpers: connection cleanup and schema-constrained decoding
+from utils.llm_configuration import (
+    get_llm_model,
+    release_http_connections,
+    structured_output_settings
+)
+
+# Import the local JSON repair stage and its counters
+from utils.json_repair import (
+    REPAIR_STATS,
+    RISK_LEVELS,
+    normalize_risk_level,
+    repair_json_object
+)
+
+# Import per-agent generation settings (token budgets, stop sequences)
+from utils.generation_profiles import (
+    budget_summary,
+    generation_settings,
+    restore_json_stop
+)
+
+# Import the persistent response cache used around agent runs
+from utils.response_cache import active_model, agent_output_generator, get_response_cache
+
+# Import cascade policies (cheap model first) and their statistics
+from utils.model_cascade import (
+    CASCADE_POLICIES,
+    cascade_summary,
+    tier_stats
+)
+
+# Import hedging policies (duplicate slow calls) and their statistics
+from utils.hedging import HEDGE_POLICIES, hedge_summary, hedged_generator
+
+# Import request deadlines, which cancel agent calls when they expire
+from utils.deadline import DeadlineExceeded, deadline_scope, within_deadline
+
+# Import the default terminal sink for streamed tokens
+from utils.streaming import TokenSink, console_sink
+
+# Import per-stage telemetry (spans, Prometheus metrics, JSON dump)
+from utils.telemetry import (
+    record_ttft,
+    record_usage,
+    stage_span,
+    tracer
+)
+
+# Import the incremental validator used to abort bad generations early
+from utils.streaming_json_validator import (
+    IncrementalRecommendationValidator,
+    StreamValidationError
+)
+
 # Import JSON library for parsing model outputs
 import json
 
+# Import asyncio to run independent agents concurrently
+import asyncio
+
+# Import time to measure time-to-first-token and total time
+import time
+
+# Import dataclass to define simple statistics containers
+from dataclasses import dataclass
+
+# Import aclosing to stop streamed generations cleanly
+from contextlib import aclosing
+
 
 # -------------------------------------------------------------------
 # Helper Function: Extract and Validate Investment Data
@@ -41,6 +114,11 @@ def extract_investment_data(result_output) -> InvestmentRecommendation:
         the output and ensures it strictly follows the
         InvestmentRecommendation schema.
 
+        Strings that are not valid JSON (code fences, leading
+        prose, trailing commas, single quotes, ...) go through
+        a local repair stage first (see utils.json_repair), so
+        only genuinely unusable outputs need another generation.
+
     Args:
         result_output:
             Raw output returned by an investment agent
@@ -56,34 +134,954 @@ def extract_investment_data(result_output) -> InvestmentRecommendation:
             If the output cannot be parsed or does not
             match the expected schema.
     """
+    try:
+        recommendation, repaired = _parse_investment_data(result_output)
+    except ValueError:
+        REPAIR_STATS.unrepairable += 1
+        raise
+
+    if repaired:
+        REPAIR_STATS.repaired += 1
+    else:
+        REPAIR_STATS.clean += 1
+    return recommendation
+
+
+def _parse_investment_data(result_output) -> tuple:
+    """
+    extract_investment_data() without the REPAIR_STATS counters.
+
+    Returns:
+        tuple: (recommendation, repaired).
+    """
+    repaired = False
     try:
         # If the agent output is a string, parse it as JSON
         if isinstance(result_output, str):
-            data = json.loads(result_output)
+            try:
+                data = json.loads(result_output)
+            except json.JSONDecodeError:
+                # Not valid JSON: try the local repair stage
+                data = repair_json_object(result_output)
+                repaired = True
         else:
             # If already a dictionary, use it directly
             data = result_output
 
+        # Accept "low", "HIGH", ... by coercing to canonical casing;
+        # anything else ("Moderate", "Extreme") needs a correction
+        if isinstance(data, dict) and "risk_level" in data:
+            data = {**data, "risk_level": normalize_risk_level(data["risk_level"])}
+            if data["risk_level"] not in RISK_LEVELS.values():
+                raise ValueError(
+                    f"risk_level must be Low, Medium or High, got {data['risk_level']!r}"
+                )
+
         # Validate and convert data into a Pydantic model
-        return InvestmentRecommendation(**data)
+        recommendation = InvestmentRecommendation(**data)
 
-    except (json.JSONDecodeError, TypeError) as e:
+    except (ValueError, TypeError) as e:
         # Raise a clear error if parsing or validation fails
         raise ValueError(f"Failed to parse investment data: {e}")
 
+    return recommendation, repaired
+
+
+def parse_market_snapshot(result_output) -> MarketSnapshot:
+    """
+    Parses and validates the Market Snapshot Agent's output.
+
+    Like extract_investment_data(), strings that are not valid
+    JSON go through the local repair stage first.
+
+    Args:
+        result_output:
+            Raw output (JSON string or dictionary).
+
+    Returns:
+        MarketSnapshot:
+            The validated snapshot.
+
+    Raises:
+        ValueError:
+            If the output cannot be parsed or does not match the
+            MarketSnapshot schema.
+    """
+    try:
+        if isinstance(result_output, str):
+            try:
+                data = json.loads(result_output)
+            except json.JSONDecodeError:
+                data = repair_json_object(result_output)
+        else:
+            data = result_output
+        return MarketSnapshot(**data)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Failed to parse market snapshot: {e}")
+
 
 # -------------------------------------------------------------------
-# Main Orchestration Function
+# Output Validation Statistics
 # -------------------------------------------------------------------
-def run_agentic_financial_advisor() -> dict:
+@dataclass
+class OutputValidationStats:
     """
-    Executes the complete agentic financial advisory workflow.
+    Counts how often an investment agent's output had to be
+    rejected, per agent and output mode.
+
+    Why this class exists:
+        Every rejected output costs a full extra generation.
+        Comparing the prompt-only mode with schema-constrained
+        decoding shows how much retry latency the schema saves.
+
+    Attributes:
+        generations (int):
+            Number of outputs generated by the model
+            (cache hits are not counted).
+
+        failures (int):
+            Number of outputs that failed validation
+            (after local repair).
+
+        corrections (int):
+            Number of correction retries sent back to the model.
+
+        early_aborts (int):
+            Number of streamed generations cancelled by the
+            incremental validator before they finished.
+
+        generation_seconds (float):
+            Total time spent generating those outputs.
+    """
+
+    generations: int = 0
+    failures: int = 0
+    corrections: int = 0
+    early_aborts: int = 0
+    generation_seconds: float = 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of generated outputs that failed validation."""
+        return self.failures / self.generations if self.generations else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counters and derived rates as a plain dict."""
+        return {
+            "generations": self.generations,
+            "failures": self.failures,
+            "corrections": self.corrections,
+            "early_aborts": self.early_aborts,
+            "failure_rate": self.failure_rate,
+            "mean_generation_seconds": (
+                self.generation_seconds / self.generations
+                if self.generations else 0.0
+            )
+        }
+
+
+# Statistics keyed by "<agent_name>/<output mode>",
+# where the output mode is "prompt" or "schema".
+VALIDATION_STATS = {}
+
+
+def validation_summary() -> dict:
+    """Returns VALIDATION_STATS as plain dictionaries."""
+    return {key: stats.as_dict() for key, stats in VALIDATION_STATS.items()}
+
+
+# -------------------------------------------------------------------
+# Correction Retries
+# -------------------------------------------------------------------
+# Maximum number of times an unrepairable output is sent back to
+# the model together with the validation error.
+MAX_CORRECTION_RETRIES = 2
+
+
+class RejectedOutputError(ValueError):
+    """
+    Raised when an agent output cannot be turned into a valid
+    InvestmentRecommendation, even after local repair.
+
+    Attributes:
+        output:
+            The rejected raw output, used to build the
+            correction prompt.
+    """
+
+    def __init__(self, output, error: Exception):
+        super().__init__(str(error))
+        self.output = output
+
+
+def _validate_recommendation(output) -> InvestmentRecommendation:
+    """Validator used with the response cache for investment agents."""
+    try:
+        return extract_investment_data(output)
+    except ValueError as error:
+        raise RejectedOutputError(output, error) from error
+
+
+def _validated_stream_generator(agent, stats: OutputValidationStats):
+    """
+    Returns a generate() coroutine for the response cache that
+    streams the agent output through the incremental validator.
+
+    The generation is cancelled (by leaving the run_stream context)
+    as soon as the validator rejects the output, and stopped as
+    soon as the closing brace of the JSON object arrives.
+    """
+    async def generate(user_prompt: str, **run_kwargs) -> str:
+        validator = IncrementalRecommendationValidator()
+        started = time.perf_counter()
+        try:
+            async with agent.run_stream(user_prompt, **run_kwargs) as result:
+                # aclosing() shuts the delta stream down cleanly when
+                # we stop reading before the model has finished.
+                deltas = result.stream_text(delta=True, debounce_by=None)
+                async with aclosing(deltas):
+                    async for delta in deltas:
+                        if delta:
+                            record_ttft(time.perf_counter() - started)
+                        if validator.feed(delta):
+                            break
+                record_usage(result.usage())
+        except StreamValidationError as error:
+            stats.early_aborts += 1
+            raise RejectedOutputError(validator.text, error) from error
+        return validator.text
+
+    return generate
+
+
+def build_correction_prompt(prompt: str, rejected_output, error) -> str:
+    """
+    Builds a retry prompt that tells the model what was wrong
+    with its previous answer, instead of regenerating blind.
+
+    Args:
+        prompt (str):
+            The original prompt.
+
+        rejected_output:
+            The output that failed validation.
+
+        error:
+            The validation error.
+
+    Returns:
+        str:
+            The correction prompt.
+    """
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer was:\n{rejected_output}\n\n"
+        f"It was rejected because: {error}\n"
+        "Return ONLY the corrected JSON object with the fields "
+        "asset_name, rationale, risk_level (Low, Medium or High), "
+        "expected_return and time_horizon."
+    )
+
+
+def _restoring_json_stop(generate):
+    """
+    Wraps a generate() coroutine so that outputs cut by the "}"
+    stop sequence get their closing brace back (see
+    utils.generation_profiles.restore_json_stop).
+    """
+    async def restored(user_prompt: str, **run_kwargs):
+        return restore_json_stop(await generate(user_prompt, **run_kwargs))
+
+    return restored
+
+
+# -------------------------------------------------------------------
+# Cascade: Cheap Model First
+# -------------------------------------------------------------------
+def _cascade_generator(agent, agent_name: str, horizon_label: str, policy, generate):
+    """
+    Returns a generate() coroutine for the response cache that tries
+    the policy's cheap models before the agent's own model.
+
+    A cheap answer is used only if it parses (see
+    extract_investment_data()) and passes the policy's confidence
+    rule; otherwise the next tier runs. The final tier's output is
+    returned as-is, so the usual validation and correction retries
+    still apply to it. Tiers are checked without the REPAIR_STATS
+    counters: the returned output is counted once, by the validator.
+
+    Args:
+        agent:
+            The investment agent.
+
+        agent_name (str):
+            Short agent name, used for the tier statistics.
+
+        horizon_label (str):
+            "short-term" or "long-term", for the confidence rule.
+
+        policy (CascadePolicy):
+            Cheap tiers and confidence rule.
+
+        generate:
+            The generate() coroutine used for every tier (plain or
+            streamed with early abort).
+    """
+    async def cascade(user_prompt: str, **run_kwargs):
+        for model_name in policy.models:
+            stats = tier_stats(agent_name, model_name)
+            stats.attempts += 1
+            started = time.perf_counter()
+            try:
+                # override() also wins over an outer override (for
+                # example a benchmark pointing agents at a stub)
+                with agent.override(model=get_llm_model(model_name, base_url=policy.base_url)):
+                    output = await generate(user_prompt, **run_kwargs)
+                recommendation, _ = _parse_investment_data(output)
+            except ValueError:
+                # Includes RejectedOutputError from an early abort
+                stats.rejected += 1
+                continue
+            except Exception:
+                # A cheap tier that is down or not installed must not
+                # fail the call: escalate instead.
+                stats.errors += 1
+                continue
+            finally:
+                stats.latencies.append(time.perf_counter() - started)
+
+            if policy.confidence_rule(recommendation, horizon_label) is not None:
+                stats.low_confidence += 1
+                continue
+            stats.accepted += 1
+            return output
+
+        # Final tier: the agent's own model
+        # The model actually used, including an outer override
+        stats = tier_stats(agent_name, active_model(agent).model_name)
+        stats.attempts += 1
+        started = time.perf_counter()
+        try:
+            output = await generate(user_prompt, **run_kwargs)
+        except ValueError:
+            stats.rejected += 1
+            raise
+        finally:
+            stats.latencies.append(time.perf_counter() - started)
+        try:
+            _parse_investment_data(output)
+        except ValueError:
+            stats.rejected += 1
+        else:
+            stats.accepted += 1
+        return output
+
+    return cascade
+
+
+# -------------------------------------------------------------------
+# Agent Construction
+# -------------------------------------------------------------------
+def load_agents() -> tuple:
+    """
+    Builds every agent now instead of on first use.
+
+    Agents are otherwise built lazily, by the first report that
+    needs them. Long-running processes (the HTTP service) call this
+    at start-up, and the CLI calls it while the model warm-up runs,
+    so the PydanticAI import overlaps with the model load.
+
+    Returns:
+        tuple: The market analyst, market snapshot, short-term and
+        long-term agents.
+    """
+    return (
+        get_market_analyst_agent(),
+        get_market_snapshot_agent(),
+        get_short_term_investment_agent(),
+        get_long_term_investment_agent()
+    )
+
+
+# -------------------------------------------------------------------
+# Helper Coroutine: Run a Single Investment Agent
+# -------------------------------------------------------------------
+async def _run_investment_agent(
+    agent,
+    agent_name: str,
+    market_context: str,
+    horizon_label: str,
+    use_cache: bool = True,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    queued_at: float = None,
+    client_profile: str = None,
+    cascade: bool = False,
+    market_data: str = None,
+    hedge: bool = False,
+    user_prompt: str = None
+) -> InvestmentRecommendation:
+    """
+    Runs one investment agent asynchronously and validates its output.
+
+    Why this function exists:
+        The short-term and long-term agents only depend on the
+        market analysis, not on each other. Wrapping each call in
+        its own coroutine lets the orchestrator run both at the
+        same time while keeping their error handling separate.
+
+    Args:
+        agent:
+            The investment agent to execute.
+
+        agent_name (str):
+            Short agent name used by the response cache.
+
+        market_context (str):
+            Market analysis text produced by the Market Analyst Agent.
+
+        horizon_label (str):
+            Either "short-term" or "long-term". Used in the prompt
+            and in progress messages.
+
+        use_cache (bool):
+            Whether the response cache may be used.
+
+        structured_output (bool):
+            When True, Ollama constrains decoding to the
+            InvestmentRecommendation JSON Schema.
+
+        validate_stream (bool):
+            When True, the output is streamed and validated
+            incrementally, so bad generations are cancelled early.
+
+        queued_at (float):
+            time.perf_counter() value when the stage was scheduled,
+            used to measure queue wait.
+
+        client_profile (str):
+            Optional description of the client the recommendation
+            is for (see format_client_profile()).
+
+        cascade (bool):
+            When True and the agent has a cascade policy (see
+            utils.model_cascade), cheap models are tried first.
+
+        market_data (str):
+            Optional indicator summary computed from price history
+            (see market_data.indicators.summarize_indicators()).
+
+        hedge (bool):
+            When True and the agent has a hedging policy (see
+            utils.hedging), a call slower than the observed p95 is
+            duplicated to a backup endpoint or model.
+
+        user_prompt (str):
+            Complete prompt to send instead of the one built from
+            market_context, market_data, client_profile and
+            horizon_label (used by agent graph nodes, see
+            orchestrator.agent_graph).
+
+    Returns:
+        InvestmentRecommendation:
+            The validated recommendation returned by the agent.
+
+    Raises:
+        DeadlineExceeded:
+            The request deadline (see utils.deadline) expired; the
+            generation in flight is cancelled.
+    """
+    # Per-run settings: adaptive token budget and/or the JSON Schema
+    model_settings = dict(generation_settings(agent_name) or {})
+    if structured_output:
+        model_settings.update(structured_output_settings(InvestmentRecommendation))
+    run_kwargs = {"model_settings": model_settings} if model_settings else {}
+    stats = VALIDATION_STATS.setdefault(
+        f"{agent_name}/{'schema' if structured_output else 'prompt'}",
+        OutputValidationStats()
+    )
+    generate = _restoring_json_stop(
+        _validated_stream_generator(agent, stats)
+        if validate_stream
+        else agent_output_generator(agent)
+    )
+
+    # Duplicate calls that run past the usual latency
+    hedge_policy = HEDGE_POLICIES.get(agent_name) if hedge else None
+    if hedge_policy is not None:
+        generate = hedged_generator(agent, agent_name, hedge_policy, generate)
+
+    # Cheap model first, escalating only when needed
+    cache_extra = None
+    policy = CASCADE_POLICIES.get(agent_name) if cascade else None
+    if policy is not None:
+        generate = _cascade_generator(
+            agent,
+            agent_name,
+            horizon_label,
+            policy,
+            generate
+        )
+        cache_extra = {"cascade": list(policy.models)}
+
+    cache = get_response_cache()
+    if user_prompt is not None:
+        base_prompt = user_prompt
+    else:
+        base_prompt = f"Market Context: {market_context}\n\n"
+        if market_data:
+            base_prompt += f"Market Data:\n{market_data}\n\n"
+        if client_profile:
+            base_prompt += f"Client Profile: {client_profile}\n\n"
+        base_prompt += (
+            f"Provide a {horizon_label} investment recommendation. "
+            "Return ONLY a JSON object with the required fields."
+        )
+
+    # Measure the whole stage, including correction retries
+    with stage_span(agent_name, queued_at) as record:
+        prompt = base_prompt
+        for attempt in range(MAX_CORRECTION_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                # Generate (or load from cache), then parse, repair
+                # and validate the agent output
+                recommendation, cache_hit = await within_deadline(
+                    cache.run(
+                        agent,
+                        agent_name,
+                        prompt,
+                        bypass=not use_cache,
+                        cache_extra=cache_extra,
+                        validator=_validate_recommendation,
+                        generate=generate,
+                        **run_kwargs
+                    ),
+                    agent_name
+                )
+            except RejectedOutputError as rejected:
+                stats.generations += 1
+                stats.failures += 1
+                stats.generation_seconds += time.perf_counter() - started
+                record.validation_failures += 1
+                if attempt == MAX_CORRECTION_RETRIES:
+                    raise
+
+                # Send the validation error back as a correction hint
+                stats.corrections += 1
+                record.retries += 1
+                prompt = build_correction_prompt(base_prompt, rejected.output, rejected)
+                continue
+
+            record.cache_hit = cache_hit
+            if not cache_hit:
+                stats.generations += 1
+                stats.generation_seconds += time.perf_counter() - started
+
+            if attempt > 0:
+                # Let the next run of the original prompt hit the cache
+                cache.remember(
+                    agent,
+                    agent_name,
+                    base_prompt,
+                    recommendation.model_dump_json(),
+                    bypass=not use_cache,
+                    cache_extra=cache_extra,
+                    model_settings=run_kwargs.get("model_settings")
+                )
+            return recommendation
+
+
+# -------------------------------------------------------------------
+# Client Profiles
+# -------------------------------------------------------------------
+def format_client_profile(profile) -> str:
+    """
+    Renders a client profile for the investment prompts.
+
+    Args:
+        profile (dict | str | None):
+            Either free text or a mapping such as
+            {"age": 42, "risk_tolerance": "Low"}.
+
+    Returns:
+        str:
+            A single line like "age: 42; risk_tolerance: Low", or
+            None when there is no profile.
+    """
+    if not profile:
+        return None
+    if isinstance(profile, dict):
+        return "; ".join(f"{key}: {value}" for key, value in profile.items())
+    return str(profile)
+
+
+# -------------------------------------------------------------------
+# Workflow Stages
+# -------------------------------------------------------------------
+# Prompt sent to the Market Analyst Agent.
+MARKET_ANALYSIS_PROMPT = "Analyze current financial market conditions."
+
+# Marker introducing the inline market snapshot (snapshot hand-off).
+SNAPSHOT_MARKER = "SNAPSHOT:"
+
+# Prompt asking the analyst to end with a one-line MarketSnapshot, so
+# the compact hand-off costs a few output tokens instead of a call.
+MARKET_ANALYSIS_WITH_SNAPSHOT_PROMPT = (
+    f"{MARKET_ANALYSIS_PROMPT}\n\n"
+    f"After the analysis, add one final line starting with {SNAPSHOT_MARKER} "
+    "followed by a single-line JSON object with the fields sentiment, "
+    "rates_trend (Rising, Stable or Falling), inflation, top_sectors "
+    "(a list of {\"name\", \"score\"} with scores from -1.0 to 1.0) "
+    "and key_risks (a list of strings)."
+)
+
+
+def split_market_snapshot(text: str) -> tuple:
+    """
+    Separates the inline snapshot line from the analysis prose.
+
+    Args:
+        text (str):
+            Analyst output for MARKET_ANALYSIS_WITH_SNAPSHOT_PROMPT.
+
+    Returns:
+        tuple:
+            (prose, snapshot) where snapshot is a MarketSnapshot, or
+            None when the line is missing or invalid.
+    """
+    prose, marker, tail = text.rpartition(SNAPSHOT_MARKER)
+    if not marker:
+        return text, None
+    try:
+        snapshot = parse_market_snapshot(tail.strip())
+    except ValueError:
+        return text, None
+    return prose.rstrip(), snapshot
+
+
+async def run_market_analysis(
+    use_cache: bool = True,
+    stream: bool = False,
+    sink: TokenSink = None,
+    with_snapshot: bool = False,
+    market_data: str = None,
+    research: str = None,
+    hedge: bool = False
+) -> tuple:
+    """
+    Runs the Market Analyst Agent as a measured workflow stage.
+
+    Args:
+        use_cache (bool):
+            Whether the response cache may be used.
+
+        stream (bool):
+            When True, tokens are forwarded to the sink as they
+            are generated.
+
+        sink (TokenSink):
+            Async callable receiving streamed tokens. Defaults to
+            writing them to the terminal.
+
+        with_snapshot (bool):
+            When True, the analyst also ends its answer with an
+            inline MarketSnapshot (see split_market_snapshot()).
+
+        market_data (str):
+            Optional indicator summary the analysis should be
+            grounded in (see market_data.indicators).
+
+        research (str):
+            Optional passages from the local research corpus (see
+            retrieval.bm25_index.research_context()).
+
+        hedge (bool):
+            When True, a slow generation is duplicated to a backup
+            endpoint or model (see utils.hedging). Streamed analyses
+            are never hedged: the tokens already went to the sink.
+
+    Returns:
+        tuple:
+            (market_analysis, cache_hit, ttft) where ttft is None
+            unless the analysis was streamed.
+
+    Raises:
+        DeadlineExceeded:
+            The request deadline (see utils.deadline) expired.
+    """
+    prompt = MARKET_ANALYSIS_WITH_SNAPSHOT_PROMPT if with_snapshot else MARKET_ANALYSIS_PROMPT
+    if market_data:
+        prompt = f"{prompt}\n\nMarket Data:\n{market_data}"
+    if research:
+        prompt = f"{prompt}\n\nResearch Notes:\n{research}"
+    ttft = None
+    # Adaptive token budget, once enough analyses have been observed
+    run_kwargs = {}
+    model_settings = generation_settings("market_analyst")
+    if model_settings:
+        run_kwargs["model_settings"] = model_settings
+
+    market_analyst_agent = get_market_analyst_agent()
+    hedge_policy = HEDGE_POLICIES.get("market_analyst") if hedge else None
+    if hedge_policy is not None and not stream:
+        run_kwargs["generate"] = hedged_generator(
+            market_analyst_agent,
+            "market_analyst",
+            hedge_policy,
+            agent_output_generator(market_analyst_agent)
+        )
+
+    with stage_span("market_analyst") as market_stage:
+        if stream:
+            market_analysis, cache_hit, ttft = await within_deadline(
+                get_response_cache().run_stream(
+                    market_analyst_agent,
+                    "market_analyst",
+                    prompt,
+                    sink=sink or console_sink,
+                    bypass=not use_cache,
+                    **run_kwargs
+                ),
+                "market_analyst"
+            )
+        else:
+            market_analysis, cache_hit = await within_deadline(
+                get_response_cache().run(
+                    market_analyst_agent,
+                    "market_analyst",
+                    prompt,
+                    bypass=not use_cache,
+                    **run_kwargs
+                ),
+                "market_analyst"
+            )
+        market_stage.cache_hit = cache_hit
+    return market_analysis, cache_hit, ttft
+
+
+async def run_investment_recommendations(
+    market_analysis: str,
+    use_cache: bool = True,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    client_profile: str = None,
+    cascade: bool = False,
+    market_data: str = None,
+    hedge: bool = False
+) -> tuple:
+    """
+    Runs the Short-Term and Long-Term Investment Agents concurrently.
+
+    Args:
+        market_analysis (str):
+            Market analysis used as context by both agents.
+
+        use_cache, structured_output, validate_stream, client_profile,
+        cascade, hedge:
+            See _run_investment_agent().
+
+        market_data (str):
+            Optional indicator summary. Only the short-term agent
+            receives it: momentum and volatility drive weeks-to-
+            months calls, while the long-term agent works from the
+            analysis alone.
+
+    Returns:
+        tuple:
+            (short_term_outcome, long_term_outcome). Each outcome is
+            either an InvestmentRecommendation or the exception
+            raised by that agent, so one failure never hides the
+            other agent's result.
+    """
+    # Fan out both agents and wait for both of them.
+    # return_exceptions=True makes sure one failing agent does not
+    # hide the outcome of the other one.
+    queued_at = time.perf_counter()
+    short_term_outcome, long_term_outcome = await asyncio.gather(
+        _run_investment_agent(
+            get_short_term_investment_agent(),
+            "short_term",
+            market_analysis,
+            "short-term",
+            use_cache,
+            structured_output,
+            validate_stream,
+            queued_at,
+            client_profile,
+            cascade,
+            market_data,
+            hedge
+        ),
+        _run_investment_agent(
+            get_long_term_investment_agent(),
+            "long_term",
+            market_analysis,
+            "long-term",
+            use_cache,
+            structured_output,
+            validate_stream,
+            queued_at,
+            client_profile,
+            cascade,
+            hedge=hedge
+        ),
+        return_exceptions=True
+    )
+    return short_term_outcome, long_term_outcome
+
+
+# How the market analysis is handed to the investment agents:
+# - "prose":    the full free-text analysis
+# - "snapshot": a compact MarketSnapshot written by the analyst at
+#               the end of its answer (or, if that line is missing,
+#               extracted by the Market Snapshot Agent)
+HANDOFF_MODES = ("prose", "snapshot")
+
+
+async def run_market_snapshot(
+    market_analysis: str,
+    use_cache: bool = True,
+    structured_output: bool = False
+) -> MarketSnapshot:
+    """
+    Condenses the market analysis into a MarketSnapshot with the
+    Market Snapshot Agent (a separate, short generation).
+
+    Args:
+        market_analysis (str):
+            Free-text analysis from the Market Analyst Agent.
+
+        use_cache (bool):
+            Whether the response cache may be used.
+
+        structured_output (bool):
+            When True, decoding is constrained to the
+            MarketSnapshot JSON Schema.
+
+    Returns:
+        MarketSnapshot:
+            The snapshot, or None if the extraction failed (or ran
+            out of time); callers then fall back to the prose
+            hand-off.
+    """
+    model_settings = dict(generation_settings("market_snapshot") or {})
+    if structured_output:
+        model_settings.update(structured_output_settings(MarketSnapshot))
+    run_kwargs = {"model_settings": model_settings} if model_settings else {}
+
+    with stage_span("market_snapshot") as record:
+        try:
+            snapshot, cache_hit = await within_deadline(
+                get_response_cache().run(
+                    get_market_snapshot_agent(),
+                    "market_snapshot",
+                    f"Market Analysis:\n{market_analysis}",
+                    bypass=not use_cache,
+                    validator=parse_market_snapshot,
+                    **run_kwargs
+                ),
+                "market_snapshot"
+            )
+        except ValueError:
+            record.validation_failures += 1
+            return None
+        except DeadlineExceeded:
+            return None
+        record.cache_hit = cache_hit
+    return snapshot
+
+
+# -------------------------------------------------------------------
+# Main Orchestration Function (Async)
+# -------------------------------------------------------------------
+@tracer.start_as_current_span("advisor.report")
+async def run_agentic_financial_advisor_async(
+    use_cache: bool = True,
+    stream: bool = False,
+    sink: TokenSink = None,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    cascade: bool = False,
+    handoff: str = "prose",
+    market_data: str = None,
+    research: str = None,
+    deadline: float = None,
+    hedge: bool = False
+) -> dict:
+    """
+    Executes the complete agentic financial advisory workflow
+    using asyncio.
 
     Workflow Overview:
         1. Market Analyst Agent analyzes current market conditions
-        2. Short-Term Investment Agent generates tactical recommendations
-        3. Long-Term Investment Agent generates strategic recommendations
-        4. Orchestrator aggregates all outputs into a final report
+        2. Short-Term and Long-Term Investment Agents run
+           concurrently, both using the market analysis as context
+        3. Orchestrator aggregates all outputs into a final report
+
+    Why the investment agents run concurrently:
+        Neither investment agent depends on the other's output.
+        Running them together means the total wall-clock time is
+        roughly two LLM generations instead of three.
+
+    Args:
+        use_cache (bool):
+            When True (default), agent outputs are served from the
+            persistent response cache while they are fresh. Pass
+            False to force new generations.
+
+        stream (bool):
+            When True, the market analysis is streamed token by
+            token to the sink while it is generated.
+
+        sink (TokenSink):
+            Async callable receiving streamed tokens. Defaults to
+            writing them to the terminal.
+
+        structured_output (bool):
+            When True, the investment agents use schema-constrained
+            decoding (see utils.llm_configuration
+            .structured_output_settings) instead of relying on the
+            prompt alone.
+
+        validate_stream (bool):
+            When True, the investment agents' output is streamed
+            through an incremental validator that cancels a
+            generation as soon as it can no longer become valid.
+
+        cascade (bool):
+            When True, the investment agents try a cheap model first
+            and escalate to their own model only when the cheap
+            answer fails validation or a confidence rule (see
+            utils.model_cascade).
+
+        handoff (str):
+            "prose" (default) passes the full market analysis to the
+            investment agents; "snapshot" passes a compact
+            MarketSnapshot instead, which shortens both of their
+            prompts (see HANDOFF_MODES).
+
+        market_data (str):
+            Optional indicator summary computed from local price
+            history (see market_data.indicators.load_market_summary()).
+            It is given to the market analyst and the short-term agent.
+
+        research (str):
+            Optional research passages selected for the market
+            analyst (see retrieval.bm25_index.research_context()).
+
+        deadline (float):
+            Optional time budget for the whole report, in seconds.
+            Agent calls still running when it expires are cancelled
+            and the report is returned without their output: a
+            missed analysis leaves every field empty, a missed
+            recommendation leaves that recommendation None. The
+            stages are listed under "errors" (see utils.deadline).
+
+        hedge (bool):
+            When True, agent calls slower than their observed p95
+            latency are duplicated to a backup endpoint or model,
+            and the first answer wins (see utils.hedging).
 
     Returns:
         dict:
@@ -91,89 +1089,203 @@ def run_agentic_financial_advisor() -> dict:
             - Market analysis summary
             - Short-term investment recommendation
             - Long-term investment recommendation
+            - Timings (time-to-first-token and total seconds)
+            - Output validation statistics per agent and mode
+            - Local JSON repair counters (retries avoided)
+            - Cascade tier statistics (hit rates and latency)
+            - Token budgets per agent (static and adaptive)
+            - The market snapshot (snapshot hand-off only)
+            - The market data summary, if one was given
+            - complete / errors: stages that missed the deadline
+            - Hedging statistics per agent
     """
+    start_time = time.perf_counter()
 
     # Print header to clearly indicate workflow start
     print("\n" + "=" * 70)
     print("🤖 AGENTIC AI FINANCIAL ADVISOR - WORKFLOW STARTED")
     print("=" * 70)
 
-    # ---------------------------------------------------------------
-    # Step 1: Market Analysis
-    # ---------------------------------------------------------------
-    print("\n[1/3] 📊 Running Market Analyst Agent (LLaMA 3.2)...")
-    print("      Analyzing current financial market conditions...")
-
-    # Execute market analysis agent synchronously
-    market_analysis_result = market_analyst_agent.run_sync(
-        "Analyze current financial market conditions."
-    )
-
-    print("      ✅ Market analysis completed!\n")
+    if handoff not in HANDOFF_MODES:
+        raise ValueError(f"Unknown handoff mode: {handoff!r}")
 
-    # ---------------------------------------------------------------
-    # Step 2: Short-Term Investment Recommendation
-    # ---------------------------------------------------------------
-    print("[2/3] 📈 Running Short-Term Investment Agent (LLaMA 3.2)...")
-    print("      Generating short-term investment recommendations...")
+    # Stages that missed the deadline, by stage name
+    errors = {}
 
-    short_term_investment = None
-    try:
-        # Pass market analysis as context to the short-term agent
-        short_term_result = short_term_investment_agent.run_sync(
-            f"Market Context: {market_analysis_result.output}\n\n"
-            "Provide a short-term investment recommendation. "
-            "Return ONLY a JSON object with the required fields."
-        )
+    # Every agent call below (and in tasks started from here) shares
+    # this deadline
+    with deadline_scope(deadline):
+        # -----------------------------------------------------------
+        # Step 1: Market Analysis
+        # -----------------------------------------------------------
+        print("\n[1/3] 📊 Running Market Analyst Agent (LLaMA 3.2)...")
+        print("      Analyzing current financial market conditions...")
 
-        # Parse and validate the agent output
-        short_term_investment = extract_investment_data(
-            short_term_result.output
-        )
-
-        print("      ✅ Short-term recommendation completed!\n")
+        # Execute market analysis agent (both investment agents need it)
+        if stream:
+            # Stream the analysis so the user can start reading it
+            # while it is still being generated.
+            print("\n" + "-" * 70)
+        try:
+            market_analysis, cache_hit, market_analysis_ttft = await run_market_analysis(
+                use_cache, stream, sink, with_snapshot=handoff == "snapshot",
+                market_data=market_data,
+                research=research,
+                hedge=hedge
+            )
+        except DeadlineExceeded as error:
+            market_analysis, cache_hit, market_analysis_ttft = None, False, None
+            errors["market_analyst"] = str(error)
+        if stream:
+            print("\n" + "-" * 70)
 
-    except Exception as e:
-        # Capture and surface any error clearly
-        print(f"      ❌ Error in short-term agent: {e}")
-        raise
+        if market_analysis is None:
+            print("      ⏰ Market analysis missed the deadline.\n")
+        else:
+            print(
+                "      ✅ Market analysis completed!"
+                + (" (from cache)" if cache_hit else "")
+                + "\n"
+            )
 
-    # ---------------------------------------------------------------
-    # Step 3: Long-Term Investment Recommendation
-    # ---------------------------------------------------------------
-    print("[3/3] 🏛️  Running Long-Term Investment Agent (LLaMA 3.2)...")
-    print("      Generating long-term investment recommendations...")
+        # Hand the investment agents a compact snapshot, if requested
+        market_context, snapshot = market_analysis, None
+        if handoff == "snapshot" and market_analysis is not None:
+            market_analysis, snapshot = split_market_snapshot(market_analysis)
+            if snapshot is None:
+                print("      🧾 No inline snapshot; extracting one from the analysis...")
+                snapshot = await run_market_snapshot(market_analysis, use_cache, structured_output)
+            if snapshot is not None:
+                market_context = snapshot.to_prompt()
+            else:
+                print("      ⚠️  Snapshot extraction failed; using the full analysis.")
+                market_context = market_analysis
 
-    long_term_investment = None
-    try:
-        # Pass the same market context to the long-term agent
-        long_term_result = long_term_investment_agent.run_sync(
-            f"Market Context: {market_analysis_result.output}\n\n"
-            "Provide a long-term investment recommendation. "
-            "Return ONLY a JSON object with the required fields."
-        )
+        # -----------------------------------------------------------
+        # Steps 2 & 3: Short-Term and Long-Term Recommendations
+        # -----------------------------------------------------------
+        if market_analysis is None:
+            # Nothing to base recommendations on
+            short_term_outcome = long_term_outcome = None
+        else:
+            print("[2/3] 📈 Running Short-Term Investment Agent (LLaMA 3.2)...")
+            print("[3/3] 🏛️  Running Long-Term Investment Agent (LLaMA 3.2)...")
+            print("      Generating both recommendations concurrently...")
 
-        # Parse and validate the agent output
-        long_term_investment = extract_investment_data(
-            long_term_result.output
-        )
+            short_term_outcome, long_term_outcome = await run_investment_recommendations(
+                market_context,
+                use_cache,
+                structured_output,
+                validate_stream,
+                cascade=cascade,
+                market_data=market_data,
+                hedge=hedge
+            )
 
-        print("      ✅ Long-term recommendation completed!\n")
+    # Report each agent's outcome separately
+    first_error = None
+    outcomes = {"short_term": short_term_outcome, "long_term": long_term_outcome}
+    for name, outcome in outcomes.items():
+        label = name.replace("_", "-")
+        if isinstance(outcome, DeadlineExceeded):
+            # A missed deadline leaves a partial report, not a failure
+            print(f"      ⏰ {label.capitalize()} agent missed the deadline.")
+            errors[name] = str(outcome)
+            outcomes[name] = None
+        elif isinstance(outcome, BaseException):
+            print(f"      ❌ Error in {label} agent: {outcome}")
+            first_error = first_error or outcome
+        elif outcome is not None:
+            print(f"      ✅ {label.capitalize()} recommendation completed!")
 
-    except Exception as e:
-        print(f"      ❌ Error in long-term agent: {e}")
-        raise
+    # Surface the failure to the caller, as before
+    if first_error is not None:
+        raise first_error
 
     # ---------------------------------------------------------------
     # Final Aggregation
     # ---------------------------------------------------------------
-    print("=" * 70)
-    print("✨ All agents completed successfully! Generating final report...")
+    total_time = time.perf_counter() - start_time
+
+    print("\n" + "=" * 70)
+    if errors:
+        print(f"⏰ Deadline reached; returning a partial report ({', '.join(errors)} missing).")
+    else:
+        print("✨ All agents completed successfully! Generating final report...")
+    if market_analysis_ttft is not None:
+        print(
+            f"⏱️  Time to first token: {market_analysis_ttft:.2f}s "
+            f"| Total: {total_time:.2f}s"
+        )
     print("=" * 70 + "\n")
 
+    # The scheduler module imports PydanticAI, so it is imported
+    # here (after the agents have loaded it) rather than at the top
+    from utils.llm_scheduler import scheduler_summary
+
     # Return the aggregated results in a structured format
     return {
-        "market_analysis": market_analysis_result.output,
-        "short_term_investment": short_term_investment,
-        "long_term_investment": long_term_investment
+        "market_analysis": market_analysis,
+        "market_snapshot": snapshot.model_dump() if snapshot else None,
+        "market_data": market_data,
+        "short_term_investment": outcomes["short_term"],
+        "long_term_investment": outcomes["long_term"],
+        "complete": not errors,
+        "errors": errors,
+        "timings": {
+            "market_analysis_ttft": market_analysis_ttft,
+            "total": total_time
+        },
+        "validation": validation_summary(),
+        "repair": REPAIR_STATS.as_dict(),
+        "cascade": cascade_summary(),
+        "hedging": hedge_summary(),
+        "scheduler": scheduler_summary(),
+        "budgets": budget_summary()
     }
+
+
+# -------------------------------------------------------------------
+# Main Orchestration Function (Sync Wrapper)
+# -------------------------------------------------------------------
+def run_agentic_financial_advisor(
+    use_cache: bool = True,
+    stream: bool = False,
+    sink: TokenSink = None,
+    structured_output: bool = False,
+    validate_stream: bool = False,
+    cascade: bool = False,
+    handoff: str = "prose",
+    market_data: str = None,
+    research: str = None,
+    deadline: float = None,
+    hedge: bool = False
+) -> dict:
+    """
+    Executes the complete agentic financial advisory workflow.
+
+    This is a thin synchronous wrapper around
+    run_agentic_financial_advisor_async(), kept so that existing
+    callers such as main.py do not need to deal with asyncio.
+
+    Args:
+        use_cache, stream, sink, structured_output, validate_stream,
+        cascade, handoff, market_data, research, deadline, hedge:
+            See run_agentic_financial_advisor_async().
+
+    Returns:
+        dict:
+            The final report (see run_agentic_financial_advisor_async).
+    """
+    async def _run_and_release() -> dict:
+        try:
+            return await run_agentic_financial_advisor_async(
+                use_cache, stream, sink, structured_output, validate_stream,
+                cascade, handoff, market_data, research, deadline, hedge
+            )
+        finally:
+            # Close this event loop's pooled connections before
+            # asyncio.run() tears the loop down.
+            await release_http_connections()
+
+    return asyncio.run(_run_and_release())
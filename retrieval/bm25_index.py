@@ -0,0 +1,573 @@
+"""
+
+BM25 Index
+
+Purpose:
+    This file provides an on-disk BM25 inverted index over a local
+    directory of news, filings and research notes, and turns the
+    best passages for a query into grounding text for the market
+    analyst's prompt.
+
+Why this file exists:
+    The Market Analyst Agent only received "Analyze current
+    financial market conditions." and had nothing to ground its
+    answer in. A lexical index is enough to surface the relevant
+    paragraphs, needs no model or GPU and stays fast as the
+    corpus grows:
+    - everything lives in one SQLite file, so there is no server
+    - postings are stored as packed NumPy arrays (passage ids and
+      term frequencies), so a query reads a few blobs and scores
+      them with vectorized operations
+    - updates are incremental: only new or changed files are read,
+      and each batch of postings is written as a new "segment"
+      instead of rewriting the existing ones
+
+Storage layout (SQLite):
+    documents(id, path, mtime, size)        one row per indexed file
+    passages(id, doc_id, length, deleted, text)
+    postings(term, segment, ids, tfs)       int32 / uint16 blobs
+    meta(key, value)                        next segment number
+
+    Changed or removed files mark their passages as deleted; deleted
+    passages are skipped at query time and dropped from the postings
+    by merge_segments(), which runs automatically once there are
+    more than `max_segments` segments. Until then, document
+    frequencies still count deleted passages, which slightly skews
+    idf but never returns deleted text.
+
+Memory:
+    Builds stream: files are read one at a time, and buffered
+    postings are written out every `flush_postings` entries. Queries
+    keep two arrays of one number per passage in memory (lengths
+    and liveness).
+
+Usage:
+    python -m retrieval.bm25_index build research/ research.bm25
+    python -m retrieval.bm25_index search research.bm25 "RBI rate decision inflation"
+"""
+
+# Standard library imports
+import argparse
+import math
+import os
+import sqlite3
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+# NumPy scores postings in bulk
+import numpy as np
+
+# Chunking, tokenization and prompt-budget selection
+from retrieval.passages import (
+    Passage,
+    format_passages,
+    select_passages,
+    split_passages,
+    tokenize
+)
+
+
+# File types indexed by update_from_directory().
+INDEXED_EXTENSIONS = (".txt", ".md")
+
+# Query used to ground the market analysis.
+DEFAULT_RESEARCH_QUERY = (
+    "market outlook inflation interest rates central bank earnings "
+    "sectors sentiment risks"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_by_document ON passages (doc_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    ids BLOB NOT NULL,
+    tfs BLOB NOT NULL,
+    PRIMARY KEY (term, segment)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class IndexUpdate:
+    """
+    Outcome of update_from_directory().
+
+    Attributes:
+        added (int): New files indexed.
+        updated (int): Changed files re-indexed.
+        removed (int): Files no longer present.
+        unchanged (int): Files skipped because they did not change.
+        passages (int): Passages written.
+        seconds (float): Wall-clock time of the update.
+    """
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    passages: int = 0
+    seconds: float = 0.0
+
+
+class BM25Index:
+    """
+    Incrementally updated BM25 index stored in a SQLite file.
+
+    Args:
+        path (str):
+            Index file; created if missing.
+
+        k1, b (float):
+            BM25 term-frequency saturation and length normalization.
+
+        flush_postings (int):
+            Buffered postings written out as one segment; bounds the
+            memory used while indexing.
+
+        max_segments (int):
+            Segment count above which commit() merges them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        flush_postings: int = 500_000,
+        max_segments: int = 16
+    ):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.flush_postings = flush_postings
+        self.max_segments = max_segments
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+        self._next_passage_id = self._scalar("SELECT COALESCE(MAX(id), 0) + 1 FROM passages")
+        self._buffer = {}
+        self._buffered = 0
+        self._pending_passages = []
+        self._pending_deletes = []
+
+        # Per-passage lengths and liveness, loaded on the first search,
+        # and the BM25 length normalization derived from them
+        self._lengths = None
+        self._live = None
+        self._normalization = None
+        self._passage_count = 0
+
+    def _scalar(self, sql: str, *params):
+        return self.connection.execute(sql, params).fetchone()[0]
+
+    # ---------------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------------
+    def add_document(self, source: str, text: str, mtime: float = 0.0, size: int = 0) -> int:
+        """
+        Indexes (or re-indexes) one document.
+
+        Args:
+            source (str): Path or name identifying the document.
+            text (str): Its full text.
+            mtime, size: File metadata used to detect changes.
+
+        Returns:
+            int: Number of passages written.
+        """
+        row = self.connection.execute(
+            "SELECT id FROM documents WHERE path = ?", (source,)
+        ).fetchone()
+        if row is None:
+            doc_id = self.connection.execute(
+                "INSERT INTO documents (path, mtime, size) VALUES (?, ?, ?)",
+                (source, mtime, size)
+            ).lastrowid
+        else:
+            doc_id = row[0]
+            self._delete_passages(doc_id)
+            self.connection.execute(
+                "UPDATE documents SET mtime = ?, size = ? WHERE id = ?", (mtime, size, doc_id)
+            )
+
+        rows = []
+        for passage in split_passages(text):
+            terms = tokenize(passage)
+            if not terms:
+                continue
+            passage_id = self._next_passage_id
+            self._next_passage_id += 1
+            rows.append((passage_id, doc_id, len(terms), passage))
+            frequencies = Counter(terms)
+            for term, frequency in frequencies.items():
+                ids, tfs = self._buffer.setdefault(term, ([], []))
+                ids.append(passage_id)
+                tfs.append(frequency)
+            self._buffered += len(frequencies)
+
+        self.connection.executemany(
+            "INSERT INTO passages (id, doc_id, length, text) VALUES (?, ?, ?, ?)", rows
+        )
+        self._pending_passages.extend((passage_id, length) for passage_id, _, length, _ in rows)
+        if self._buffered >= self.flush_postings:
+            self.flush()
+        return len(rows)
+
+    def _delete_passages(self, doc_id: int) -> None:
+        ids = [row[0] for row in self.connection.execute(
+            "SELECT id FROM passages WHERE doc_id = ? AND deleted = 0", (doc_id,)
+        )]
+        self.connection.execute("UPDATE passages SET deleted = 1 WHERE doc_id = ?", (doc_id,))
+        self._pending_deletes.extend(ids)
+
+    def remove_document(self, source: str) -> bool:
+        """Removes a document; returns False if it was not indexed."""
+        row = self.connection.execute(
+            "SELECT id FROM documents WHERE path = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return False
+        self._delete_passages(row[0])
+        self.connection.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+        return True
+
+    def flush(self) -> None:
+        """Writes buffered postings as a new segment."""
+        if self._buffer:
+            segment = self.connection.execute(
+                "SELECT COALESCE(MAX(value), 0) FROM meta WHERE key = 'next_segment'"
+            ).fetchone()[0]
+            self.connection.executemany(
+                "INSERT INTO postings (term, segment, ids, tfs) VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        term,
+                        segment,
+                        np.asarray(ids, dtype=np.int32).tobytes(),
+                        np.minimum(tfs, 65535).astype(np.uint16).tobytes()
+                    )
+                    for term, (ids, tfs) in self._buffer.items()
+                )
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_segment', ?)",
+                (segment + 1,)
+            )
+            self._buffer.clear()
+            self._buffered = 0
+        self._apply_pending()
+
+    def _apply_pending(self) -> None:
+        # Keep the in-memory passage arrays in step with the file
+        if self._lengths is not None:
+            if self._pending_passages:
+                ids, lengths = np.array(self._pending_passages, dtype=np.int64).T
+                size = max(len(self._lengths), int(ids.max()) + 1)
+                if size > len(self._lengths):
+                    self._lengths = np.pad(self._lengths, (0, size - len(self._lengths)))
+                    self._live = np.pad(self._live, (0, size - len(self._live)))
+                self._lengths[ids] = lengths
+                self._live[ids] = True
+            if self._pending_deletes:
+                self._live[np.asarray(self._pending_deletes, dtype=np.int64)] = False
+            self._normalization = None
+        self._pending_passages = []
+        self._pending_deletes = []
+
+    def commit(self) -> None:
+        """Flushes and commits; merges segments when there are too many."""
+        self.flush()
+        self.connection.commit()
+        if self.segment_count() > self.max_segments:
+            self.merge_segments()
+
+    def segment_count(self) -> int:
+        """Number of distinct segments in the postings table."""
+        return self._scalar("SELECT COUNT(DISTINCT segment) FROM postings")
+
+    def merge_segments(self) -> None:
+        """
+        Rewrites every term's postings as a single segment without
+        deleted passages, and drops the deleted passages' text.
+        """
+        self.flush()
+        live = self._passage_arrays()[1]
+        self.connection.execute("DROP TABLE IF EXISTS postings_merged")
+        self.connection.execute(
+            "CREATE TABLE postings_merged (term TEXT NOT NULL, segment INTEGER NOT NULL, "
+            "ids BLOB NOT NULL, tfs BLOB NOT NULL, PRIMARY KEY (term, segment)) WITHOUT ROWID"
+        )
+
+        def merged_rows():
+            # Rows arrive grouped by term, so only one term's postings
+            # are held in memory at a time
+            term, ids, tfs = None, [], []
+            cursor = self.connection.execute(
+                "SELECT term, ids, tfs FROM postings ORDER BY term, segment"
+            )
+            for row_term, row_ids, row_tfs in cursor:
+                if row_term != term and ids:
+                    yield self._merged_row(term, ids, tfs, live)
+                    ids, tfs = [], []
+                term = row_term
+                ids.append(np.frombuffer(row_ids, dtype=np.int32))
+                tfs.append(np.frombuffer(row_tfs, dtype=np.uint16))
+            if ids:
+                yield self._merged_row(term, ids, tfs, live)
+
+        # Written to a new table: the old one is still being read
+        self.connection.executemany(
+            "INSERT INTO postings_merged (term, segment, ids, tfs) VALUES (?, 0, ?, ?)",
+            (row for row in merged_rows() if row is not None)
+        )
+        self.connection.execute("DROP TABLE postings")
+        self.connection.execute("ALTER TABLE postings_merged RENAME TO postings")
+        self.connection.execute("DELETE FROM passages WHERE deleted = 1")
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_segment', 1)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def _merged_row(term, ids, tfs, live):
+        ids, tfs = np.concatenate(ids), np.concatenate(tfs)
+        keep = live[ids]
+        if not keep.any():
+            return None
+        return term, ids[keep].tobytes(), tfs[keep].tobytes()
+
+    def update_from_directory(self, directory: str, extensions: tuple = INDEXED_EXTENSIONS) -> IndexUpdate:
+        """
+        Brings the index in line with a directory tree: new and
+        changed files are (re-)indexed, deleted files are removed.
+
+        Args:
+            directory (str): Root of the research corpus.
+            extensions (tuple): File types to index.
+
+        Returns:
+            IndexUpdate: What changed.
+        """
+        started = time.perf_counter()
+        update = IndexUpdate()
+        known = {
+            path: (mtime, size)
+            for path, mtime, size in self.connection.execute(
+                "SELECT path, mtime, size FROM documents"
+            )
+        }
+        seen = set()
+
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.lower().endswith(extensions):
+                    continue
+                path = os.path.join(root, name)
+                source = os.path.relpath(path, directory)
+                seen.add(source)
+                stat = os.stat(path)
+                if known.get(source) == (stat.st_mtime, stat.st_size):
+                    update.unchanged += 1
+                    continue
+                with open(path, encoding="utf-8", errors="replace") as handle:
+                    update.passages += self.add_document(
+                        source, handle.read(), stat.st_mtime, stat.st_size
+                    )
+                if source in known:
+                    update.updated += 1
+                else:
+                    update.added += 1
+
+        for source in known.keys() - seen:
+            self.remove_document(source)
+            update.removed += 1
+
+        self.commit()
+        update.seconds = time.perf_counter() - started
+        return update
+
+    # ---------------------------------------------------------------
+    # Searching
+    # ---------------------------------------------------------------
+    def _passage_arrays(self) -> tuple:
+        if self._lengths is None:
+            size = self._next_passage_id
+            self._lengths = np.zeros(size, dtype=np.float32)
+            self._live = np.zeros(size, dtype=bool)
+            cursor = self.connection.execute("SELECT id, length FROM passages WHERE deleted = 0")
+            while rows := cursor.fetchmany(100_000):
+                ids, lengths = np.array(rows, dtype=np.int64).T
+                self._lengths[ids] = lengths
+                self._live[ids] = True
+        return self._lengths, self._live
+
+    def _length_normalization(self) -> np.ndarray:
+        # k1 * (1 - b + b * length / average_length) per passage;
+        # recomputed only after the corpus changed
+        if self._normalization is None:
+            lengths, live = self._passage_arrays()
+            self._passage_count = int(live.sum())
+            average_length = float(lengths[live].mean()) if self._passage_count else 1.0
+            self._normalization = (
+                self.k1 * (1 - self.b + self.b * lengths / average_length)
+            ).astype(np.float32)
+        return self._normalization
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        Returns the k best passages for a query.
+
+        Only committed documents are searched.
+
+        Args:
+            query (str): Free-text query.
+            k (int): Number of passages.
+
+        Returns:
+            list[Passage]: Best first; empty when nothing matches.
+        """
+        normalization = self._length_normalization()
+        live = self._live
+        passage_count = self._passage_count
+        if not passage_count:
+            return []
+
+        scores = np.zeros(len(live), dtype=np.float32)
+        for term in set(tokenize(query)):
+            blobs = self.connection.execute(
+                "SELECT ids, tfs FROM postings WHERE term = ?", (term,)
+            ).fetchall()
+            if not blobs:
+                continue
+            ids = np.concatenate([np.frombuffer(row[0], dtype=np.int32) for row in blobs])
+            tfs = np.concatenate([np.frombuffer(row[1], dtype=np.uint16) for row in blobs])
+            tfs = tfs.astype(np.float32)
+            idf = math.log(1 + (passage_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            # A passage appears once per term, so plain indexing is safe
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + normalization[ids])
+        scores[~live] = 0
+
+        # Partial sort of the matching passages only: argpartition
+        # over the full array is slow when most scores are zero
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if not len(candidates):
+            return []
+
+        placeholders = ",".join("?" * len(candidates))
+        rows = {
+            passage_id: (source, text)
+            for passage_id, source, text in self.connection.execute(
+                "SELECT passages.id, documents.path, passages.text FROM passages "
+                f"JOIN documents ON documents.id = passages.doc_id WHERE passages.id IN ({placeholders})",
+                [int(passage_id) for passage_id in candidates]
+            )
+        }
+        return [
+            Passage(int(passage_id), *rows[passage_id], float(scores[passage_id]))
+            for passage_id in candidates
+            if passage_id in rows
+        ]
+
+    def close(self) -> None:
+        """Commits pending work and closes the file."""
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self) -> "BM25Index":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# -------------------------------------------------------------------
+# Prompt Context
+# -------------------------------------------------------------------
+def research_context(
+    index_path: str,
+    query: str = DEFAULT_RESEARCH_QUERY,
+    k: int = 20,
+    token_budget: int = 600
+) -> str:
+    """
+    Returns the best research passages for a query, formatted for
+    the market analyst's prompt.
+
+    Args:
+        index_path (str): BM25 index file.
+        query (str): Search query.
+        k (int): Candidate passages considered.
+        token_budget (int): Maximum estimated tokens injected.
+
+    Returns:
+        str:
+            Numbered passages with their sources, or None when
+            nothing matches.
+    """
+    with BM25Index(index_path) as index:
+        passages = select_passages(index.search(query, k), token_budget)
+    return format_passages(passages) if passages else None
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="BM25 index over a research corpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Create or incrementally update an index.")
+    build.add_argument("corpus", help="Directory of .txt / .md documents.")
+    build.add_argument("index", help="Index file.")
+    search = commands.add_parser("search", help="Query an index.")
+    search.add_argument("index")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5)
+    merge = commands.add_parser("merge", help="Merge segments and drop deleted passages.")
+    merge.add_argument("index")
+    args = parser.parse_args(argv)
+
+    with BM25Index(args.index) as index:
+        if args.command == "build":
+            update = index.update_from_directory(args.corpus)
+            print(
+                f"Added {update.added}, updated {update.updated}, removed {update.removed}, "
+                f"unchanged {update.unchanged} files; {update.passages} passages "
+                f"({update.seconds:.1f}s)"
+            )
+        elif args.command == "search":
+            started = time.perf_counter()
+            passages = index.search(args.query, args.k)
+            elapsed = time.perf_counter() - started
+            for passage in passages:
+                print(f"{passage.score:6.2f}  {passage.source}: {passage.text[:120]}")
+            print(f"\n{len(passages)} passages in {elapsed * 1000:.1f} ms")
+        else:
+            index.merge_segments()
+            print(f"Merged into {index.segment_count()} segment(s)")
+
+
+if __name__ == "__main__":
+    main()
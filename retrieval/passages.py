@@ -0,0 +1,136 @@
+"""
+
+Passages
+
+Purpose:
+    This file splits research documents into passages, tokenizes
+    text for the BM25 index and selects the best passages that fit
+    into a prompt token budget.
+
+Why this file exists:
+    - Whole filings or long notes do not fit into a prompt, and
+      scoring them as one unit dilutes the relevant paragraph;
+      passages of about a hundred words are scored and injected
+      individually
+    - The same tokenizer must be used to build the index and to
+      parse queries, so it lives in one place
+    - The analyst prompt has a fixed budget for grounding text;
+      selection stops before it would be exceeded
+"""
+
+# Standard library imports
+import math
+import re
+from dataclasses import dataclass
+
+
+# Target passage length, in words.
+PASSAGE_WORDS = 120
+
+# Very common words that carry no retrieval signal.
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have in into is it its "
+    "of on or that the their this to was were will with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+@dataclass(frozen=True)
+class Passage:
+    """
+    A scored passage returned by a search.
+
+    Attributes:
+        passage_id (int): Id of the passage in the index.
+        source (str): Path of the document it comes from.
+        text (str): The passage text.
+        score (float): BM25 score for the query.
+    """
+
+    passage_id: int
+    source: str
+    text: str
+    score: float
+
+
+def tokenize(text: str) -> list:
+    """Lowercases text and returns its index terms (stopwords removed)."""
+    return [
+        token for token in _TOKEN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def split_passages(text: str, passage_words: int = PASSAGE_WORDS) -> list:
+    """
+    Splits a document into passages of about `passage_words` words.
+
+    Consecutive paragraphs are grouped until the target length is
+    reached; longer paragraphs are cut into word windows.
+    """
+    passages, current, current_words = [], [], 0
+    for paragraph in _PARAGRAPH.split(text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if len(words) > passage_words:
+            if current:
+                passages.append(" ".join(current))
+                current, current_words = [], 0
+            for start in range(0, len(words), passage_words):
+                passages.append(" ".join(words[start:start + passage_words]))
+            continue
+        if current_words + len(words) > passage_words and current:
+            passages.append(" ".join(current))
+            current, current_words = [], 0
+        current.append(" ".join(words))
+        current_words += len(words)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: about 4/3 tokens per word."""
+    return math.ceil(len(text.split()) * 4 / 3)
+
+
+def select_passages(passages: list, token_budget: int, per_source: int = 2) -> list:
+    """
+    Picks passages in score order until the token budget is used.
+
+    Args:
+        passages (list[Passage]):
+            Search results, best first.
+
+        token_budget (int):
+            Maximum estimated tokens of the selected texts.
+
+        per_source (int):
+            Maximum passages from one document, so a single long
+            filing cannot crowd out every other source.
+
+    Returns:
+        list[Passage]:
+            The selection, best first. Passages that do not fit are
+            skipped, so a shorter lower-ranked one may still be used.
+    """
+    selected, used, per_document = [], 0, {}
+    for passage in passages:
+        cost = estimate_tokens(passage.text)
+        if used + cost > token_budget or per_document.get(passage.source, 0) >= per_source:
+            continue
+        selected.append(passage)
+        used += cost
+        per_document[passage.source] = per_document.get(passage.source, 0) + 1
+    return selected
+
+
+def format_passages(passages: list) -> str:
+    """Renders selected passages as numbered, attributed notes."""
+    return "\n".join(
+        f"[{number}] ({passage.source}) {passage.text}"
+        for number, passage in enumerate(passages, start=1)
+    )
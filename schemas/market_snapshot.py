@@ -0,0 +1,90 @@
+"""
+Market Snapshot Schema
+
+Purpose:
+    This file defines a compact, structured summary of the
+    market analysis that is handed to the investment agents.
+
+Why this file exists:
+    - The free-text market analysis is several hundred tokens long
+      and was pasted into the prompt of both investment agents,
+      roughly doubling prompt-processing work
+    - The investment agents only need a handful of facts: overall
+      sentiment, direction of rates and inflation, and which
+      sectors look strong or weak
+    - A validated structure with a short serialized form keeps
+      those facts while cutting the prompt (and time-to-first-token)
+      of every downstream agent
+"""
+
+# Import BaseModel and Field from Pydantic.
+from pydantic import BaseModel, Field
+
+
+class SectorScore(BaseModel):
+    """
+    Outlook of one market sector.
+
+    Attributes:
+        name (str):
+            Sector name (e.g., "Banking", "IT").
+
+        score (float):
+            Outlook from -1.0 (very weak) to +1.0 (very strong).
+    """
+
+    name: str
+    score: float = Field(..., ge=-1.0, le=1.0)
+
+
+class MarketSnapshot(BaseModel):
+    """
+    Structured summary of current market conditions.
+
+    Attributes:
+        sentiment (str):
+            Overall market sentiment
+            (e.g., "Bullish", "Neutral", "Bearish",
+            "Cautiously optimistic").
+
+        rates_trend (str):
+            Direction of interest rates
+            ("Rising", "Stable" or "Falling").
+
+        inflation (str):
+            Inflation situation (e.g., "Easing, near target").
+
+        top_sectors (list[SectorScore]):
+            Most relevant sectors with their outlook scores.
+
+        key_risks (list[str]):
+            Main sources of risk or volatility.
+    """
+
+    sentiment: str
+    rates_trend: str
+    inflation: str
+    top_sectors: list[SectorScore] = Field(default_factory=list)
+    key_risks: list[str] = Field(default_factory=list)
+
+    def to_prompt(self) -> str:
+        """
+        Serializes the snapshot compactly for agent prompts.
+
+        Example:
+            sentiment=Cautiously optimistic; rates=Stable;
+            inflation=Easing; sectors=Banking:+0.7,IT:+0.5,FMCG:-0.3;
+            risks=Geopolitics,Crude oil
+
+        Returns:
+            str:
+                A single line, a fraction of the prose length.
+        """
+        sectors = ",".join(
+            f"{sector.name}:{sector.score:+.1f}" for sector in self.top_sectors
+        )
+        return (
+            f"sentiment={self.sentiment}; rates={self.rates_trend}; "
+            f"inflation={self.inflation}; sectors={sectors}; "
+            f"risks={','.join(self.key_risks)}"
+        )
@@ -0,0 +1,481 @@
+"""
+
+Advisory Service
+
+Purpose:
+    This file exposes the financial advisory workflow as a
+    long-running HTTP service (ASGI, served by uvicorn).
+
+Why this file exists:
+    With the CLI, every caller pays Python start-up, the
+    pydantic_ai import and agent construction before the first
+    token is generated. The service does that once, keeps the
+    HTTP connection pool to Ollama warm, and serves any number of
+    reports from the same process.
+
+Request coalescing:
+    Identical requests that arrive while a generation is already
+    running join it instead of starting their own (see
+    utils.single_flight). A burst of clients asking for the current
+    market view therefore triggers one market-analyst generation,
+    and one pair of investment recommendations per market analysis.
+
+Endpoints:
+    GET/POST /advise         Full report as JSON
+    GET/POST /advise/stream  Same report as Server-Sent Events:
+                             "token" events while the market
+                             analysis is generated, then
+                             "market_analysis", "short_term",
+                             "long_term" (or "error") and "done"
+    GET      /health         Liveness check
+    GET      /metrics        Prometheus metrics
+    GET      /stats          Coalescing, cache, validation, scheduler and session counters
+    POST     /sessions       Report for a client ({"client_profile": ...})
+                             and a session id for follow-up questions
+    POST     /sessions/{id}/ask  Follow-up answer ({"question": ...}),
+                             see orchestrator.advisory_session;
+                             400 for an overly long question
+    DELETE   /sessions/{id}  Closes a session
+
+Options (query string or JSON body):
+    fresh=1              Bypass the response cache
+    structured_output=1  Schema-constrained decoding
+    validate_stream=1    Incremental validation with early abort
+    client_profile       Client profile of a new session (dict or text)
+
+    A POST body that is not a JSON object is answered with 400.
+
+Start-up:
+    The agents are built when the application starts, not on the
+    first request. With --warmup (or ADVISOR_WARMUP=1 under
+    uvicorn) the models are also preloaded into Ollama's memory
+    (see utils.model_warmup) before requests are served.
+
+Usage:
+    uvicorn service.advisory_service:app --port 8000
+    python -m service.advisory_service --port 8000 --warmup
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+
+# Web framework and SSE support
+import uvicorn
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Follow-up conversations about a report
+from orchestrator.advisory_session import (
+    QuestionTooLong,
+    SessionNotFound,
+    SessionStore,
+    session_report
+)
+
+# The application builds the agents once, at start-up (load_agents),
+# instead of once per request.
+from orchestrator.financial_orchestrator import (
+    format_client_profile,
+    load_agents,
+    run_investment_recommendations,
+    run_market_analysis,
+    validation_summary
+)
+from utils.json_repair import REPAIR_STATS
+from utils.llm_configuration import release_http_connections
+from utils.llm_scheduler import scheduler_summary
+from utils.model_warmup import format_warmup, warm_up
+from utils.response_cache import get_response_cache
+from utils.single_flight import SingleFlight
+from utils.streaming import TokenBroadcast
+from utils.telemetry import METRICS
+
+
+# -------------------------------------------------------------------
+# Request Options
+# -------------------------------------------------------------------
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class AdviceOptions:
+    """
+    Options of one advisory request.
+
+    Requests with equal options are coalesced, so the dataclass is
+    frozen and used as part of the single-flight key.
+    """
+
+    use_cache: bool = True
+    structured_output: bool = False
+    validate_stream: bool = False
+
+    @classmethod
+    async def from_request(cls, request: Request) -> "AdviceOptions":
+        """Reads options from the query string and, for POST, the JSON body."""
+        values = await _request_values(request)
+
+        def flag(name: str) -> bool:
+            value = values.get(name, False)
+            if isinstance(value, str):
+                return value.lower() in _TRUE_VALUES
+            return bool(value)
+
+        return cls(
+            use_cache=not flag("fresh"),
+            structured_output=flag("structured_output"),
+            validate_stream=flag("validate_stream")
+        )
+
+
+class InvalidRequest(ValueError):
+    """Raised for a request body the service cannot read (answered with 400)."""
+
+
+async def _request_values(request: Request) -> dict:
+    """Returns the query parameters, updated with a POST's JSON body."""
+    values = dict(request.query_params)
+    if request.method == "POST":
+        body = await request.body()
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError as error:
+                raise InvalidRequest(f"request body is not valid JSON: {error}")
+            if not isinstance(data, dict):
+                raise InvalidRequest("request body must be a JSON object")
+            values.update(data)
+    return values
+
+
+def _recommendation_payload(outcome):
+    """Converts an agent outcome to JSON: (recommendation, error)."""
+    if isinstance(outcome, BaseException):
+        return None, str(outcome)
+    return outcome.model_dump(), None
+
+
+# -------------------------------------------------------------------
+# Coalescing Service
+# -------------------------------------------------------------------
+class AdvisoryService:
+    """
+    Runs advisory workflows for HTTP requests, coalescing
+    identical in-flight work.
+
+    Attributes:
+        flights (SingleFlight):
+            Shared in-flight generations and their counters.
+
+        sessions (SessionStore):
+            Follow-up conversations, least recently used evicted.
+    """
+
+    def __init__(self, sessions: SessionStore = None):
+        self.flights = SingleFlight()
+        self.sessions = sessions if sessions is not None else SessionStore()
+        self._broadcasts = {}
+
+    # ---------------------------------------------------------------
+    # Market Analysis
+    # ---------------------------------------------------------------
+    async def _generate_market_analysis(self, options, broadcast) -> tuple:
+        try:
+            # Always streamed: streaming clients listen to the
+            # broadcast, JSON clients just await the result.
+            return await run_market_analysis(
+                options.use_cache, stream=True, sink=broadcast.publish
+            )
+        finally:
+            await broadcast.close()
+
+    def market_analysis(self, options: AdviceOptions) -> tuple:
+        """
+        Joins (or starts) the market-analysis generation.
+
+        Returns:
+            tuple:
+                (task, broadcast). The task resolves to
+                (market_analysis, cache_hit, ttft); the broadcast
+                replays and then follows the generated tokens.
+        """
+        key = ("market_analysis", options.use_cache)
+        if not self.flights.in_flight(key):
+            self._broadcasts[key] = TokenBroadcast()
+        broadcast = self._broadcasts[key]
+        task = self.flights.task_for(
+            key, lambda: self._generate_market_analysis(options, broadcast)
+        )
+        return task, broadcast
+
+    # ---------------------------------------------------------------
+    # Investment Recommendations
+    # ---------------------------------------------------------------
+    async def recommendations(self, market_analysis: str, options: AdviceOptions) -> tuple:
+        """
+        Joins (or starts) the recommendations for a market analysis.
+
+        Returns:
+            tuple:
+                (short_term_outcome, long_term_outcome), as returned
+                by run_investment_recommendations().
+        """
+        digest = hashlib.sha256(market_analysis.encode("utf-8")).hexdigest()
+        return await self.flights.do(
+            ("recommendations", digest, options),
+            lambda: run_investment_recommendations(
+                market_analysis,
+                options.use_cache,
+                options.structured_output,
+                options.validate_stream
+            )
+        )
+
+    # ---------------------------------------------------------------
+    # Full Report
+    # ---------------------------------------------------------------
+    async def advise(self, options: AdviceOptions) -> dict:
+        """
+        Produces a full report.
+
+        Unlike the CLI, a failing investment agent does not fail the
+        whole report: its recommendation is None and the error is
+        listed under "errors".
+        """
+        start_time = time.perf_counter()
+        market_task, _ = self.market_analysis(options)
+        market_analysis, cache_hit, ttft = await asyncio.shield(market_task)
+        short_term_outcome, long_term_outcome = await self.recommendations(
+            market_analysis, options
+        )
+
+        short_term, short_term_error = _recommendation_payload(short_term_outcome)
+        long_term, long_term_error = _recommendation_payload(long_term_outcome)
+        errors = {
+            name: error
+            for name, error in (("short_term", short_term_error), ("long_term", long_term_error))
+            if error is not None
+        }
+
+        return {
+            "market_analysis": market_analysis,
+            "short_term_investment": short_term,
+            "long_term_investment": long_term,
+            "errors": errors,
+            "market_analysis_cached": cache_hit,
+            "timings": {
+                "market_analysis_ttft": ttft,
+                "total": time.perf_counter() - start_time
+            }
+        }
+
+    async def advise_events(self, options: AdviceOptions):
+        """
+        Produces a full report as a sequence of SSE events.
+
+        Yields:
+            dict: Events for EventSourceResponse.
+        """
+        market_task, broadcast = self.market_analysis(options)
+        async for token in broadcast.listen():
+            yield {"event": "token", "data": token}
+
+        try:
+            market_analysis, cache_hit, _ = await asyncio.shield(market_task)
+        except Exception as error:
+            yield {"event": "error", "data": json.dumps({"stage": "market_analyst", "error": str(error)})}
+            yield {"event": "done", "data": "{}"}
+            return
+
+        yield {
+            "event": "market_analysis",
+            "data": json.dumps({"text": market_analysis, "cached": cache_hit})
+        }
+
+        outcomes = await self.recommendations(market_analysis, options)
+        for name, outcome in zip(("short_term", "long_term"), outcomes):
+            recommendation, error = _recommendation_payload(outcome)
+            if error is None:
+                yield {"event": name, "data": json.dumps(recommendation)}
+            else:
+                yield {"event": "error", "data": json.dumps({"stage": name, "error": error})}
+        yield {"event": "done", "data": "{}"}
+
+    # ---------------------------------------------------------------
+    # Sessions
+    # ---------------------------------------------------------------
+    async def start_session(self, options: AdviceOptions, client_profile=None) -> dict:
+        """
+        Produces a client's report and opens a session for it.
+
+        The market analysis is joined like any other request's;
+        the recommendations are the client's own.
+
+        Returns:
+            dict: The session id and the report.
+        """
+        market_task, _ = self.market_analysis(options)
+        market_analysis, _, _ = await asyncio.shield(market_task)
+        session = self.sessions.add(session_report(
+            market_analysis,
+            await run_investment_recommendations(
+                market_analysis,
+                options.use_cache,
+                options.structured_output,
+                options.validate_stream,
+                client_profile=format_client_profile(client_profile)
+            ),
+            client_profile
+        ))
+        return {"session_id": session.session_id, "report": session.report}
+
+    def stats(self) -> dict:
+        """Returns coalescing, cache, validation, scheduler, session and latency counters."""
+        return {
+            "coalescing": self.flights.stats.as_dict(),
+            "cache": get_response_cache().summary(),
+            "validation": validation_summary(),
+            "repair": REPAIR_STATS.as_dict(),
+            "scheduler": scheduler_summary(),
+            "sessions": self.sessions.summary(),
+            "stages": METRICS.snapshot(include_records=False)["stages"]
+        }
+
+
+# -------------------------------------------------------------------
+# ASGI Application
+# -------------------------------------------------------------------
+def create_app(service: AdvisoryService = None, warmup: bool = None) -> Starlette:
+    """
+    Builds the Starlette application.
+
+    Args:
+        service (AdvisoryService):
+            Service instance to use; a new one by default.
+
+        warmup (bool):
+            Preload the models into Ollama at start-up. Defaults to
+            $ADVISOR_WARMUP.
+
+    Returns:
+        Starlette: The ASGI application (service at app.state.service).
+    """
+    service = service or AdvisoryService()
+    if warmup is None:
+        warmup = os.getenv("ADVISOR_WARMUP", "") not in ("", "0")
+
+    async def advise(request: Request):
+        options = await AdviceOptions.from_request(request)
+        try:
+            report = await service.advise(options)
+        except Exception as error:
+            return JSONResponse({"error": str(error)}, status_code=502)
+        return JSONResponse(report, status_code=502 if report["errors"] else 200)
+
+    async def advise_stream(request: Request):
+        options = await AdviceOptions.from_request(request)
+        return EventSourceResponse(service.advise_events(options))
+
+    async def start_session(request: Request):
+        options = await AdviceOptions.from_request(request)
+        values = await _request_values(request)
+        try:
+            payload = await service.start_session(options, values.get("client_profile"))
+        except Exception as error:
+            return JSONResponse({"error": str(error)}, status_code=502)
+        return JSONResponse(payload, status_code=502 if payload["report"]["errors"] else 200)
+
+    async def ask(request: Request):
+        question = (await _request_values(request)).get("question")
+        if not question:
+            return JSONResponse({"error": "question is required"}, status_code=400)
+        try:
+            session = service.sessions.get(request.path_params["session_id"])
+            answer = await session.ask(question)
+        except SessionNotFound:
+            return JSONResponse({"error": "unknown or expired session"}, status_code=404)
+        except QuestionTooLong as error:
+            return JSONResponse({"error": str(error)}, status_code=400)
+        except Exception as error:
+            return JSONResponse({"error": str(error)}, status_code=502)
+        return JSONResponse({"answer": answer, "session": session.as_dict()})
+
+    async def close_session(request: Request):
+        service.sessions.remove(request.path_params["session_id"])
+        return Response(status_code=204)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok"})
+
+    async def metrics(request: Request):
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    async def stats(request: Request):
+        return JSONResponse(service.stats())
+
+    async def invalid_request(request: Request, error: InvalidRequest):
+        return JSONResponse({"error": str(error)}, status_code=400)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Build the agents and load the models before serving, in
+        # parallel (both block, so they run in threads)
+        startup = [asyncio.to_thread(load_agents)]
+        if warmup:
+            startup.append(asyncio.to_thread(warm_up))
+        results = await asyncio.gather(*startup)
+        if warmup:
+            print(format_warmup(results[1]))
+        yield
+        # Close pooled connections to Ollama on shutdown
+        await release_http_connections()
+
+    app = Starlette(
+        routes=[
+            Route("/advise", advise, methods=["GET", "POST"]),
+            Route("/advise/stream", advise_stream, methods=["GET", "POST"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"]),
+            Route("/stats", stats, methods=["GET"]),
+            Route("/sessions", start_session, methods=["POST"]),
+            Route("/sessions/{session_id}/ask", ask, methods=["POST"]),
+            Route("/sessions/{session_id}", close_session, methods=["DELETE"]),
+        ],
+        exception_handlers={InvalidRequest: invalid_request},
+        lifespan=lifespan
+    )
+    app.state.service = service
+    return app
+
+
+# Application served by `uvicorn service.advisory_service:app`
+app = create_app()
+
+
+def main(argv=None):
+    """Runs the advisory service in the foreground."""
+    parser = argparse.ArgumentParser(description="Agentic AI Financial Advisor service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--warmup", action="store_true", help="Preload the models into Ollama at start-up."
+    )
+    args = parser.parse_args(argv)
+
+    application = create_app(warmup=True) if args.warmup else app
+    uvicorn.run(application, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
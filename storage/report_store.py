@@ -0,0 +1,612 @@
+"""
+
+Report Store
+
+Purpose:
+    This file provides a persistent archive of final advisory
+    reports: every report (market analysis plus both investment
+    recommendations) is appended to compressed segment files and
+    indexed by time, asset name, risk level and horizon.
+
+Why this file exists:
+    Reports were printed by main.py and lost (or pasted into
+    output.md by hand), so there was no history to query, compare
+    or backtest. The store keeps that history compact and
+    queryable:
+    - each report is one zlib-compressed frame, using a preset
+      dictionary of the report's field names and common phrases,
+      so even a single small JSON document compresses well
+    - a SQLite index maps timestamps, asset names, risk levels and
+      horizons to (segment, offset), so a query such as "all High-
+      risk short-term picks last quarter" reads only the matching
+      frames, never the whole archive
+    - compaction rewrites old segments into blocks of many reports
+      compressed together (a much better ratio for cold data) and
+      can drop reports past a retention date
+
+Layout (one directory):
+    index.sqlite                SQLite index (reports, picks)
+    segments/000001.seg, ...    append-only segment files; the
+                                highest number is the active one
+
+Frame format:
+    <kind: u8><length: u32><crc32: u32><payload>
+    kind 1: payload is one zlib-compressed JSON report
+    kind 2: payload is a zlib-compressed JSON list of reports (a
+            block written by compaction)
+    The preset dictionary (ZDICT) is part of the format: changing
+    it requires new frame kinds.
+
+Durability:
+    A frame is written (and optionally fsynced) before its index
+    rows are committed. A crash in between leaves unindexed bytes
+    in the segment, never an index row without data.
+
+Usage:
+    python -m storage.report_store query reports/ --risk High --horizon short --days 90
+    python -m storage.report_store compact reports/ --older-than-days 30
+    python -m storage.report_store stats reports/
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+
+
+# Preset compression dictionary: strings that occur in most reports.
+ZDICT = (
+    '{"created_at": "market_analysis": "market_snapshot": "market_data": '
+    '"short_term_investment": {"asset_name": "rationale": "risk_level": '
+    '"Low", "Medium", "High", "expected_return": "time_horizon": "Short-term"}, '
+    '"long_term_investment": "Long-term"}} annually per annum NIFTY 50 ETF '
+    "market inflation interest rates central bank RBI sentiment volatility "
+    "sector banking IT FMCG pharma equity bonds gold growth earnings outlook "
+    "investors economy global Indian markets stable risk return the and of to "
+).encode("utf-8")
+
+RECORD = 1
+BLOCK = 2
+_HEADER = struct.Struct("<BII")
+
+# Active segments are rolled over at this size (bytes).
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+
+# Reports per block written by compaction.
+DEFAULT_BLOCK_REPORTS = 64
+
+# Report slots holding a recommendation, and their horizon label.
+HORIZONS = {
+    "short_term_investment": "short-term",
+    "long_term_investment": "long-term",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    slot INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_by_time ON reports (created_at);
+CREATE INDEX IF NOT EXISTS reports_by_segment ON reports (segment);
+CREATE TABLE IF NOT EXISTS picks (
+    report_id INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    horizon TEXT NOT NULL,
+    asset_key TEXT NOT NULL,
+    risk_level TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS picks_by_risk ON picks (risk_level, horizon, created_at);
+CREATE INDEX IF NOT EXISTS picks_by_asset ON picks (asset_key, created_at);
+CREATE INDEX IF NOT EXISTS picks_by_time ON picks (created_at);
+CREATE INDEX IF NOT EXISTS picks_by_report ON picks (report_id);
+"""
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+def _compress(value) -> bytes:
+    compressor = zlib.compressobj(level=9, zdict=ZDICT)
+    data = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(payload: bytes):
+    decompressor = zlib.decompressobj(zdict=ZDICT)
+    return json.loads(decompressor.decompress(payload) + decompressor.flush())
+
+
+def _asset_key(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+
+def _horizon_label(horizon: str) -> str:
+    # Accepts "short", "Short-term", "short_term_investment", ...
+    lower = horizon.lower()
+    for label in HORIZONS.values():
+        if lower.startswith(label.split("-")[0]):
+            return label
+    raise ValueError(f"Unknown horizon: {horizon!r}")
+
+
+def to_timestamp(value) -> float:
+    """Converts an epoch number, ISO date/datetime string or datetime to epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def archive_record(report: dict, created_at: float = None, **extra) -> dict:
+    """
+    Returns the archived form of a final report.
+
+    Recommendation models are dumped to dicts; timing and
+    statistics sections are left out, since they describe the run
+    rather than the advice.
+
+    Args:
+        report (dict):
+            A final report (see run_agentic_financial_advisor_async)
+            or a batch row.
+
+        created_at (float):
+            Epoch seconds; defaults to now.
+
+        **extra:
+            Additional fields to keep (for example variant="v2").
+
+    Returns:
+        dict: JSON-serializable record.
+    """
+    record = {"created_at": created_at if created_at is not None else time.time()}
+    for key in ("id", "as_of", "market_analysis", "market_snapshot", "market_data", *HORIZONS):
+        value = report.get(key)
+        if value is None:
+            continue
+        record[key] = value.model_dump() if hasattr(value, "model_dump") else value
+    record.update(extra)
+    return record
+
+
+@dataclass
+class StoreStats:
+    """
+    Size of a report store.
+
+    Attributes:
+        reports (int): Reports indexed.
+        segments (int): Segment files on disk.
+        stored_bytes (int): Total size of the segment files.
+        frames_read (int): Frames decoded by this instance (queries
+            only read the frames they need).
+    """
+
+    reports: int
+    segments: int
+    stored_bytes: int
+    frames_read: int
+
+
+# -------------------------------------------------------------------
+# Report Store
+# -------------------------------------------------------------------
+class ReportStore:
+    """
+    Append-only, indexed and compressed archive of reports.
+
+    Args:
+        directory (str):
+            Store location; created if missing.
+
+        segment_bytes (int):
+            Size at which the active segment is rolled over.
+
+        sync (bool):
+            fsync every appended frame (slower, survives power loss).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        sync: bool = False
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync = sync
+        self.frames_read = 0
+        os.makedirs(self._segment_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite"))
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+
+        numbers = self._segment_numbers()
+        self._active = numbers[-1] if numbers else 1
+        self._handle = None
+
+    @property
+    def _segment_dir(self) -> str:
+        return os.path.join(self.directory, "segments")
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self._segment_dir, f"{number:06d}.seg")
+
+    def _segment_numbers(self) -> list:
+        return sorted(
+            int(name.split(".")[0])
+            for name in os.listdir(self._segment_dir)
+            if name.endswith(".seg")
+        )
+
+    # ---------------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------------
+    def _write_frame(self, handle, kind: int, payload: bytes) -> int:
+        offset = handle.tell()
+        handle.write(_HEADER.pack(kind, len(payload), zlib.crc32(payload)))
+        handle.write(payload)
+        handle.flush()
+        if self.sync:
+            os.fsync(handle.fileno())
+        return offset
+
+    def _active_handle(self):
+        if self._handle is not None and self._handle.tell() >= self.segment_bytes:
+            self._handle.close()
+            self._handle = None
+            self._active = max(self._segment_numbers() + [self._active]) + 1
+        if self._handle is None:
+            self._handle = open(self._segment_path(self._active), "ab")
+        return self._handle
+
+    def _index_picks(self, report_id: int, record: dict) -> None:
+        self.connection.executemany(
+            "INSERT INTO picks (report_id, created_at, horizon, asset_key, risk_level) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    report_id,
+                    record["created_at"],
+                    horizon,
+                    _asset_key(record[slot].get("asset_name", "")),
+                    str(record[slot].get("risk_level", "")).capitalize()
+                )
+                for slot, horizon in HORIZONS.items()
+                if isinstance(record.get(slot), dict)
+            ]
+        )
+
+    def append(self, report: dict, created_at=None, **extra) -> int:
+        """
+        Archives one report.
+
+        Args:
+            report (dict):
+                Final report or batch row (see archive_record()).
+
+            created_at:
+                When the report was made (epoch seconds, ISO string or
+                datetime); defaults to now.
+
+            **extra:
+                Additional fields stored with the report.
+
+        Returns:
+            int: The report id.
+        """
+        record = archive_record(report, to_timestamp(created_at), **extra)
+        handle = self._active_handle()
+        offset = self._write_frame(handle, RECORD, _compress(record))
+        with self.connection:
+            report_id = self.connection.execute(
+                "INSERT INTO reports (created_at, segment, offset, slot) VALUES (?, ?, ?, -1)",
+                (record["created_at"], self._active, offset)
+            ).lastrowid
+            self._index_picks(report_id, record)
+        return report_id
+
+    # ---------------------------------------------------------------
+    # Reading
+    # ---------------------------------------------------------------
+    def _read_frames(self, locations: list) -> dict:
+        """
+        Reads reports by (report_id, segment, offset, slot), visiting
+        each segment once, in file order, and each block once.
+        """
+        reports = {}
+        by_segment = {}
+        for report_id, segment, offset, slot in locations:
+            by_segment.setdefault(segment, []).append((offset, slot, report_id))
+
+        for segment, entries in by_segment.items():
+            with open(self._segment_path(segment), "rb") as handle:
+                blocks = {}
+                for offset, slot, report_id in sorted(entries):
+                    if offset not in blocks:
+                        handle.seek(offset)
+                        kind, length, checksum = _HEADER.unpack(handle.read(_HEADER.size))
+                        payload = handle.read(length)
+                        if zlib.crc32(payload) != checksum:
+                            raise ValueError(
+                                f"Corrupt frame in segment {segment} at offset {offset}"
+                            )
+                        blocks[offset] = _decompress(payload)
+                        self.frames_read += 1
+                    value = blocks[offset]
+                    reports[report_id] = value[slot] if slot >= 0 else value
+        return reports
+
+    def get(self, report_id: int) -> dict:
+        """Returns one archived report, or None."""
+        row = self.connection.execute(
+            "SELECT id, segment, offset, slot FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        return self._read_frames([row])[report_id] if row else None
+
+    def query(
+        self,
+        since=None,
+        until=None,
+        asset_name: str = None,
+        risk_level: str = None,
+        horizon: str = None,
+        limit: int = None
+    ) -> list:
+        """
+        Returns archived picks matching every given filter, newest
+        first. Only the matching reports are read from disk.
+
+        Args:
+            since, until:
+                Time range, inclusive start and exclusive end (epoch
+                seconds, ISO string or datetime).
+
+            asset_name (str):
+                Asset name, case- and whitespace-insensitive.
+
+            risk_level (str):
+                "Low", "Medium" or "High".
+
+            horizon (str):
+                "short" / "Short-term" or "long" / "Long-term".
+
+            limit (int):
+                Maximum picks returned.
+
+        Returns:
+            list[dict]:
+                Flat picks: the recommendation fields plus report_id,
+                created_at, as_of, horizon and any extra report fields
+                (variant, id, ...). They can be fed to
+                evaluation.backtest.RecommendationBatch.from_records().
+        """
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("picks.created_at >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            conditions.append("picks.created_at < ?")
+            params.append(to_timestamp(until))
+        if asset_name is not None:
+            conditions.append("picks.asset_key = ?")
+            params.append(_asset_key(asset_name))
+        if risk_level is not None:
+            conditions.append("picks.risk_level = ?")
+            params.append(risk_level.capitalize())
+        if horizon is not None:
+            conditions.append("picks.horizon = ?")
+            params.append(_horizon_label(horizon))
+
+        sql = (
+            "SELECT reports.id, reports.segment, reports.offset, reports.slot, picks.horizon "
+            "FROM picks JOIN reports ON reports.id = picks.report_id"
+            + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            + " ORDER BY picks.created_at DESC, reports.id DESC"
+            + (" LIMIT ?" if limit is not None else "")
+        )
+        if limit is not None:
+            params.append(limit)
+        rows = self.connection.execute(sql, params).fetchall()
+
+        reports = self._read_frames({row[:4] for row in rows})
+        picks = []
+        for report_id, _, _, _, horizon in rows:
+            report = reports[report_id]
+            slot = next(key for key, label in HORIZONS.items() if label == horizon)
+            shared = {
+                key: value for key, value in report.items()
+                if key not in HORIZONS and key not in ("market_analysis", "market_snapshot", "market_data")
+            }
+            shared.setdefault("as_of", date.fromtimestamp(report["created_at"]).isoformat())
+            picks.append({**shared, **report[slot], "report_id": report_id, "horizon": horizon})
+        return picks
+
+    # ---------------------------------------------------------------
+    # Compaction
+    # ---------------------------------------------------------------
+    def compact(
+        self,
+        older_than=None,
+        drop_before=None,
+        block_reports: int = DEFAULT_BLOCK_REPORTS
+    ) -> dict:
+        """
+        Rewrites closed segments into one segment of compressed blocks.
+
+        Args:
+            older_than:
+                Only segments whose newest report is older than this
+                are compacted (default: every closed segment).
+                Segments already holding only compressed blocks are
+                skipped unless `drop_before` removes reports from them.
+
+            drop_before:
+                Reports created before this are removed entirely
+                (retention).
+
+            block_reports (int):
+                Reports compressed together per block.
+
+        Returns:
+            dict:
+                segments, reports kept and dropped, bytes before and
+                after.
+        """
+        # Close the active segment so it can be compacted too
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        numbers = self._segment_numbers()
+        cutoff = to_timestamp(older_than)
+        drop_cutoff = to_timestamp(drop_before)
+        candidates = []
+        for number in numbers:
+            newest, oldest, plain = self.connection.execute(
+                "SELECT MAX(created_at), MIN(created_at), SUM(slot < 0) FROM reports WHERE segment = ?",
+                (number,)
+            ).fetchone()
+            if cutoff is not None and (newest or 0) >= cutoff:
+                continue
+            # Segments of blocks only are already compacted; rewriting
+            # them is wasted work unless retention drops rows from them
+            if not plain and (drop_cutoff is None or oldest is None or oldest >= drop_cutoff):
+                continue
+            candidates.append(number)
+        summary = {"segments": len(candidates), "kept": 0, "dropped": 0, "bytes_before": 0, "bytes_after": 0}
+        if not candidates:
+            return summary
+
+        target = max(numbers) + 1
+        summary["bytes_before"] = sum(os.path.getsize(self._segment_path(n)) for n in candidates)
+
+        placeholders = ",".join("?" * len(candidates))
+        rows = self.connection.execute(
+            f"SELECT id, segment, offset, slot, created_at FROM reports "
+            f"WHERE segment IN ({placeholders}) ORDER BY created_at, id",
+            candidates
+        ).fetchall()
+        dropped = [row[0] for row in rows if drop_cutoff is not None and row[4] < drop_cutoff]
+        kept = [row for row in rows if drop_cutoff is None or row[4] >= drop_cutoff]
+
+        # Write the new segment first; the index switches over in one
+        # transaction afterwards
+        moves = []
+        with open(self._segment_path(target), "wb") as handle:
+            for start in range(0, len(kept), block_reports):
+                chunk = kept[start:start + block_reports]
+                reports = self._read_frames([row[:4] for row in chunk])
+                offset = self._write_frame(
+                    handle, BLOCK, _compress([reports[row[0]] for row in chunk])
+                )
+                moves.extend((target, offset, slot, row[0]) for slot, row in enumerate(chunk))
+            os.fsync(handle.fileno())
+
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE reports SET segment = ?, offset = ?, slot = ? WHERE id = ?", moves
+            )
+            for start in range(0, len(dropped), 500):
+                chunk = dropped[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                self.connection.execute(f"DELETE FROM picks WHERE report_id IN ({marks})", chunk)
+                self.connection.execute(f"DELETE FROM reports WHERE id IN ({marks})", chunk)
+        for number in candidates:
+            os.remove(self._segment_path(number))
+        if not kept:
+            os.remove(self._segment_path(target))
+
+        # New reports go to a fresh segment after the compacted one
+        self._active = target + 1
+        summary.update(
+            kept=len(kept),
+            dropped=len(dropped),
+            bytes_after=os.path.getsize(self._segment_path(target)) if kept else 0
+        )
+        return summary
+
+    # ---------------------------------------------------------------
+    # Housekeeping
+    # ---------------------------------------------------------------
+    def stats(self) -> StoreStats:
+        """Returns the size of the store."""
+        numbers = self._segment_numbers()
+        return StoreStats(
+            reports=self.connection.execute("SELECT COUNT(*) FROM reports").fetchone()[0],
+            segments=len(numbers),
+            stored_bytes=sum(os.path.getsize(self._segment_path(n)) for n in numbers),
+            frames_read=self.frames_read
+        )
+
+    def close(self) -> None:
+        """Closes the active segment and the index."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        self.connection.close()
+
+    def __enter__(self) -> "ReportStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Query and maintain the report archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="Print matching picks as JSONL.")
+    query.add_argument("directory")
+    query.add_argument("--since", help="ISO date or datetime.")
+    query.add_argument("--until", help="ISO date or datetime.")
+    query.add_argument("--days", type=float, help="Only the last N days.")
+    query.add_argument("--asset")
+    query.add_argument("--risk", choices=("Low", "Medium", "High"))
+    query.add_argument("--horizon", choices=("short", "long"))
+    query.add_argument("--limit", type=int)
+    compact = commands.add_parser("compact", help="Compact closed segments.")
+    compact.add_argument("directory")
+    compact.add_argument("--older-than-days", type=float)
+    compact.add_argument("--drop-older-than-days", type=float)
+    stats = commands.add_parser("stats", help="Print store size.")
+    stats.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    def days_ago(days):
+        return time.time() - days * 86400 if days is not None else None
+
+    with ReportStore(args.directory) as store:
+        if args.command == "query":
+            picks = store.query(
+                since=args.since or days_ago(args.days),
+                until=args.until,
+                asset_name=args.asset,
+                risk_level=args.risk,
+                horizon=args.horizon,
+                limit=args.limit
+            )
+            for pick in picks:
+                print(json.dumps(pick))
+        elif args.command == "compact":
+            print(json.dumps(store.compact(
+                older_than=days_ago(args.older_than_days),
+                drop_before=days_ago(args.drop_older_than_days)
+            )))
+        else:
+            print(json.dumps(vars(store.stats())))
+
+
+if __name__ == "__main__":
+    main()
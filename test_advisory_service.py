@@ -0,0 +1,121 @@
+"""
+test_advisory_service.py
+
+Tests the HTTP advisory service against the local stub LLM
+server. No Ollama server is needed.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from service.advisory_service import AdvisoryService, create_app
+from utils.llm_configuration import release_http_connections
+
+
+def _parse_events(text: str) -> list:
+    """Splits an SSE body into (event, data) pairs."""
+    events = []
+    for block in text.replace("\r\n", "\n").strip().split("\n\n"):
+        event, data = "message", []
+        for line in block.split("\n"):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].removeprefix(" "))
+        events.append((event, "\n".join(data)))
+    return events
+
+
+def test_advisory_service_coalescing():
+    """Test that a burst of identical requests shares one generation."""
+    print("Testing advisory service request coalescing...")
+    print("=" * 50)
+
+    service = AdvisoryService()
+    app = create_app(service)
+    config = StubConfig(ttft=0.05, per_token_latency=0.002)
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+                responses = await asyncio.gather(*(
+                    client.get("/advise", params={"fresh": "1"}) for _ in range(20)
+                ))
+                stats = (await client.get("/stats")).json()
+            await release_http_connections()
+            return responses, stats
+
+        responses, stats = asyncio.run(scenario())
+
+    assert all(response.status_code == 200 for response in responses)
+    report = responses[0].json()
+    assert report["market_analysis"].startswith("Global equity markets")
+    assert report["short_term_investment"]["time_horizon"] == "Short-term"
+    assert report["long_term_investment"]["time_horizon"] == "Long-term"
+
+    # One market analysis and one pair of recommendations for 20 clients
+    assert server.stats.requests == 3
+    assert stats["coalescing"]["calls"] == 40
+    assert stats["coalescing"]["executions"] == 2
+
+    print(f"Coalescing: {stats['coalescing']}")
+    print("\n✅ Test completed successfully!")
+
+
+def test_advisory_service_stream():
+    """Test the SSE variant of /advise."""
+    app = create_app(AdvisoryService())
+    config = StubConfig(ttft=0.01, per_token_latency=0.001)
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+                response = await client.post("/advise/stream", json={"fresh": True})
+            await release_http_connections()
+            return response
+
+        response = asyncio.run(scenario())
+
+    events = _parse_events(response.text)
+    names = [event for event, _ in events]
+    tokens = "".join(data for event, data in events if event == "token")
+
+    assert names[-1] == "done"
+    assert "error" not in names
+    assert tokens == config.market_text
+    market = json.loads(dict(events)["market_analysis"])
+    assert market["text"] == config.market_text
+    assert json.loads(dict(events)["long_term"])["time_horizon"] == "Long-term"
+
+
+def test_invalid_request_body():
+    """Test that a body that is not a JSON object is answered with 400."""
+    app = create_app(AdvisoryService())
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+            return [
+                await client.post(path, content=body, headers={"Content-Type": "application/json"})
+                for path in ("/advise", "/advise/stream", "/sessions", "/sessions/any/ask")
+                for body in ("{not json", "[1, 2]")
+            ]
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [400] * 8
+    errors = [response.json()["error"] for response in responses]
+    assert all("not valid JSON" in error for error in errors[::2])
+    assert all("JSON object" in error for error in errors[1::2])
+
+
+if __name__ == "__main__":
+    test_advisory_service_coalescing()
+    test_advisory_service_stream()
+    test_invalid_request_body()
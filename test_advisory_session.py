@@ -0,0 +1,238 @@
+"""
+test_advisory_session.py
+
+Tests multi-turn advisory sessions: follow-ups answered from the
+kept report and history, the bounded prompt size, summaries, LRU
+eviction and the service's session endpoints. No Ollama server is
+needed.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from pydantic_ai.messages import ModelResponse, SystemPromptPart, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.conversation_summary_agent import get_conversation_summary_agent
+from agents.follow_up_agent import FOLLOW_UP_PROMPT, get_follow_up_agent
+from agents.long_term_investment_agent import get_long_term_investment_agent
+from agents.market_analyst_agent import get_market_analyst_agent
+from agents.short_term_investment_agent import get_short_term_investment_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import RECOMMENDATIONS, StubConfig, StubLLMServer
+from orchestrator.advisory_session import (
+    QuestionTooLong,
+    SessionNotFound,
+    SessionStore,
+    message_text,
+    session_report
+)
+from service.advisory_service import AdvisoryService, create_app
+from utils.llm_configuration import release_http_connections
+
+
+REPORT = {
+    "client_profile": "age: 42",
+    "market_analysis": "Markets are calm.",
+    "short_term_investment": RECOMMENDATIONS["Short-term"],
+    "long_term_investment": RECOMMENDATIONS["Long-term"],
+    "errors": {}
+}
+
+
+def text_model(answer, calls: list = None) -> FunctionModel:
+    """A FunctionModel answering `answer(messages)` (or a fixed text) and logging the messages."""
+    async def respond(messages, info):
+        if calls is not None:
+            calls.append(messages)
+        return ModelResponse(parts=[TextPart(answer(messages) if callable(answer) else answer)])
+    return FunctionModel(respond)
+
+
+def prompt_words(messages) -> int:
+    """Words sent to the model in one request."""
+    return sum(len(message_text(message).split()) for message in messages)
+
+
+def test_follow_ups_reuse_the_report():
+    """Test that follow-ups skip the workflow and see the earlier turns."""
+    print("Testing advisory sessions...")
+    print("=" * 50)
+
+    analyst_calls, recommendation_calls, follow_up_calls = [], [], []
+    store = SessionStore()
+
+    async def scenario():
+        with get_market_analyst_agent().override(model=text_model("Markets are calm.", analyst_calls)), \
+                get_short_term_investment_agent().override(model=text_model(
+                    json.dumps(RECOMMENDATIONS["Short-term"]), recommendation_calls)), \
+                get_long_term_investment_agent().override(model=text_model(
+                    json.dumps(RECOMMENDATIONS["Long-term"]), recommendation_calls)), \
+                get_follow_up_agent().override(model=text_model(
+                    lambda messages: f"Answer {len(follow_up_calls)}", follow_up_calls)):
+            session = await store.start(client_profile={"age": 42}, use_cache=False)
+            first = await store.ask(session.session_id, "What if I'm more risk-averse?")
+            second = await store.ask(session.session_id, "And with a 10 year horizon?")
+            return session, first, second
+
+    session, first, second = asyncio.run(scenario())
+
+    assert session.report["client_profile"] == "age: 42"
+    assert session.report["short_term_investment"]["time_horizon"] == "Short-term"
+    assert (first, second) == ("Answer 1", "Answer 2")
+    # One report, two follow-ups: no new market analysis
+    assert (len(analyst_calls), len(recommendation_calls), len(follow_up_calls)) == (1, 2, 2)
+
+    # The system prompt and report come first, then the earlier turn
+    last_request = follow_up_calls[-1]
+    system_parts = [part.content for part in last_request[0].parts if isinstance(part, SystemPromptPart)]
+    assert system_parts[0] == FOLLOW_UP_PROMPT
+    assert "Markets are calm." in system_parts[1] and "age: 42" in system_parts[1]
+    text = "\n".join(message_text(message) for message in last_request)
+    assert text.count(FOLLOW_UP_PROMPT) == 1
+    assert "more risk-averse" in text and "Answer 1" in text
+    assert session.as_dict()["asked"] == 2
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_prompt_size_stays_bounded():
+    """Test that old turns are summarized so prompts stop growing."""
+    store = SessionStore(history_tokens=300)
+    session = store.add(REPORT)
+    follow_up_calls, summary_prompts = [], []
+
+    def summarize(messages):
+        summary_prompts.append(messages[-1].parts[-1].content)
+        return f"Summary {len(summary_prompts)}: the client is cautious."
+
+    async def scenario():
+        with get_follow_up_agent().override(model=text_model("word " * 60, follow_up_calls)), \
+                get_conversation_summary_agent().override(model=text_model(summarize)):
+            for number in range(30):
+                await session.ask(f"Question {number}?")
+            await session.settle()
+
+    asyncio.run(scenario())
+
+    sizes = [prompt_words(messages) for messages in follow_up_calls]
+    # Summarized every few turns, not on every turn
+    assert 5 <= len(summary_prompts) <= 15
+    assert session.summarized_turns + len(session.turns) == 30
+    # The prompt grows at first, then stays under a fixed ceiling
+    assert max(sizes[10:]) <= max(sizes[:10])
+    assert session.turn_tokens <= session.history_tokens
+
+    # The summary carries the earlier turns into later prompts and
+    # into the next summary
+    assert "Summary 1:" in summary_prompts[1]
+    assert f"Summary {len(summary_prompts)}:" in session.context()
+    assert "Question 0?" not in message_text(session.message_history()[-1])
+
+
+def test_summary_failure_keeps_prompt_bounded():
+    """Test that a failing summary agent drops old turns instead of growing the prompt."""
+    session = SessionStore(history_tokens=200).add(REPORT)
+    follow_up_calls = []
+
+    async def fail(messages, info):
+        raise RuntimeError("summary model crashed")
+
+    async def scenario():
+        with get_follow_up_agent().override(model=text_model("word " * 60, follow_up_calls)), \
+                get_conversation_summary_agent().override(model=FunctionModel(fail)):
+            for number in range(12):
+                await session.ask(f"Question {number}?")
+            await session.settle()
+
+    asyncio.run(scenario())
+
+    assert session.summary_failures > 0 and session.summary == ""
+    sizes = [prompt_words(messages) for messages in follow_up_calls]
+    assert max(sizes[6:]) <= max(sizes[:6])
+
+
+def test_store_evicts_least_recently_used():
+    """Test LRU eviction and unknown session ids."""
+    store = SessionStore(max_sessions=2)
+    first, second = store.add(REPORT), store.add(REPORT)
+    # Using the first session makes the second the least recently used
+    assert store.get(first.session_id) is first
+    third = store.add(REPORT)
+
+    with pytest.raises(SessionNotFound):
+        store.get(second.session_id)
+    assert store.get(third.session_id) is third
+    store.remove(first.session_id)
+    assert len(store) == 1
+    assert store.summary() == {
+        "active": 1, "max_sessions": 2, "started": 3, "evicted": 1, "not_found": 1
+    }
+
+    # Overly long questions are rejected before any generation
+    with pytest.raises(QuestionTooLong):
+        asyncio.run(SessionStore(max_question_chars=50).add(REPORT).ask("Why? " * 20))
+
+    # Failed and missing recommendations are kept out of the prompt
+    report = session_report("Calm.", (RuntimeError("timeout"), None))
+    assert report["errors"] == {"short_term": "timeout"}
+    assert "Recommendation" not in store.add(report).context()
+
+
+def test_session_endpoints():
+    """Test the service's session endpoints against the stub server."""
+    service = AdvisoryService(SessionStore(max_sessions=1, max_question_chars=200))
+    app = create_app(service)
+    config = StubConfig(ttft=0.01, per_token_latency=0.0)
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+                started = await client.post(
+                    "/sessions", json={"fresh": True, "client_profile": {"age": 42}}
+                )
+                session_id = started.json()["session_id"]
+                requests_after_report = server.stats.requests
+                answer = await client.post(f"/sessions/{session_id}/ask", json={"question": "Why?"})
+                requests_after_answer = server.stats.requests
+                missing = await client.post("/sessions/nope/ask", json={"question": "Why?"})
+                empty = await client.post(f"/sessions/{session_id}/ask", json={})
+                too_long = await client.post(
+                    f"/sessions/{session_id}/ask", json={"question": "Why? " * 100}
+                )
+                closed = await client.delete(f"/sessions/{session_id}")
+                after_close = await client.post(f"/sessions/{session_id}/ask", json={"question": "Why?"})
+                stats = (await client.get("/stats")).json()
+            await release_http_connections()
+            return (started, answer, missing, empty, too_long, closed, after_close, stats,
+                    requests_after_report, requests_after_answer)
+
+        (started, answer, missing, empty, too_long, closed, after_close, stats,
+         requests_after_report, requests_after_answer) = asyncio.run(scenario())
+
+    assert started.status_code == 200
+    report = started.json()["report"]
+    assert report["client_profile"] == "age: 42"
+    assert report["long_term_investment"]["time_horizon"] == "Long-term"
+
+    assert answer.status_code == 200, answer.text
+    assert answer.json()["answer"] == config.market_text
+    assert answer.json()["session"]["asked"] == 1
+    # A follow-up is one generation
+    assert requests_after_answer - requests_after_report == 1
+
+    assert (missing.status_code, empty.status_code) == (404, 400)
+    assert too_long.status_code == 400 and "limit is 200" in too_long.json()["error"]
+    assert (closed.status_code, after_close.status_code) == (204, 404)
+    assert stats["sessions"]["started"] == 1 and stats["sessions"]["active"] == 0
+
+
+if __name__ == "__main__":
+    test_follow_ups_reuse_the_report()
+    test_prompt_size_stays_bounded()
+    test_summary_failure_keeps_prompt_bounded()
+    test_store_evicts_least_recently_used()
+    test_session_endpoints()
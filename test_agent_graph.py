@@ -0,0 +1,224 @@
+"""
+test_agent_graph.py
+
+Tests the declarative agent graph: the default graph against the
+built-in workflow, concurrent and critical-path scheduling, partial
+re-execution and graph validation. No Ollama server is needed.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.stub_llm_server import RECOMMENDATIONS
+from orchestrator.agent_graph import AgentGraph, GraphResult, load_graph, run_graph
+from orchestrator.financial_orchestrator import run_agentic_financial_advisor_async
+from schemas.investment_schema import InvestmentRecommendation
+
+
+def user_prompt(messages) -> str:
+    """The last user prompt sent to a FunctionModel."""
+    return messages[-1].parts[-1].content
+
+
+def recorder(text, log, name, delay=0.0):
+    """A FunctionModel answering `text` and logging (name, prompt, start, end)."""
+    async def respond(messages, info):
+        started = time.perf_counter()
+        await asyncio.sleep(delay)
+        log.append((name, user_prompt(messages), started, time.perf_counter()))
+        return ModelResponse(parts=[TextPart(text(messages) if callable(text) else text)])
+    return FunctionModel(respond)
+
+
+def default_models(log, delay=0.0):
+    """Overrides for the three built-in agents."""
+    return [
+        market_analyst_agent.override(model=recorder("Markets are calm.", log, "market_analyst", delay)),
+        short_term_investment_agent.override(model=recorder(
+            json.dumps(RECOMMENDATIONS["Short-term"]), log, "short_term", delay
+        )),
+        long_term_investment_agent.override(model=recorder(
+            json.dumps(RECOMMENDATIONS["Long-term"]), log, "long_term", delay
+        )),
+    ]
+
+
+def graph_of(*nodes, name="test") -> AgentGraph:
+    return AgentGraph.from_dict({"name": name, "nodes": list(nodes)})
+
+
+def custom(name, prompt, **extra):
+    """A graph-defined node (its own agent)."""
+    return {"name": name, "system_prompt": f"You are the {name} agent.", "prompt": prompt, **extra}
+
+
+def override_nodes(graph, models: dict):
+    """Overrides the agents of graph-defined nodes."""
+    return [graph.nodes[name].get_agent().override(model=model) for name, model in models.items()]
+
+
+def run_with(overrides, coroutine_factory):
+    async def scenario():
+        for override in overrides:
+            override.__enter__()
+        try:
+            return await coroutine_factory()
+        finally:
+            for override in reversed(overrides):
+                override.__exit__(None, None, None)
+    return asyncio.run(scenario())
+
+
+def test_default_graph_matches_builtin_workflow():
+    """Test that the default graph sends the built-in workflow's prompts."""
+    print("Testing the agent graph...")
+    print("=" * 50)
+
+    inputs = {"market_data": "NIFTY up 2%", "research": "RBI held rates."}
+    builtin_log, graph_log = [], []
+    run_with(default_models(builtin_log), lambda: run_agentic_financial_advisor_async(
+        use_cache=False, market_data=inputs["market_data"], research=inputs["research"]
+    ))
+    result = run_with(default_models(graph_log, delay=0.05), lambda: run_graph(
+        load_graph(), inputs, use_cache=False
+    ))
+
+    assert result.complete and result.reused == []
+    assert result.ran == ["market_analyst", "short_term", "long_term"]
+    assert isinstance(result.outputs["short_term"], InvestmentRecommendation)
+    assert result.outputs["long_term"].time_horizon == "Long-term"
+    # Same prompts, so both share cached outputs
+    assert sorted(entry[:2] for entry in graph_log) == sorted(entry[:2] for entry in builtin_log)
+    # The investment agents overlap
+    calls = {name: (start, end) for name, _, start, end in graph_log}
+    assert calls["long_term"][0] < calls["short_term"][1]
+    assert calls["short_term"][0] < calls["long_term"][1]
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_partial_reexecution():
+    """Test that only nodes with changed inputs run again."""
+    graph = graph_of(
+        custom("macro", "Describe the economy. {region}"),
+        custom("sector", ["Sectors given: {macro}"]),
+        custom("tax", ["Tax advice for {client_profile}", "Context: {macro}"]),
+        custom("plan", ["Combine {sector} and {tax}"]),
+    )
+    log = []
+    answers = {
+        "macro": lambda messages: "Growth is steady.",
+        "sector": lambda messages: "Banks lead.",
+        # Same advice for any adult, different for minors
+        "tax": lambda messages: "Minor rules." if "age: 17" in user_prompt(messages) else "Use ELSS.",
+        "plan": lambda messages: "Buy bank ELSS funds.",
+    }
+    models = {name: recorder(answer, log, name) for name, answer in answers.items()}
+
+    def run(inputs, previous=None):
+        log.clear()
+        result = run_with(override_nodes(graph, models), lambda: run_graph(
+            graph, inputs, previous=previous, use_cache=False
+        ))
+        return result, sorted(entry[0] for entry in log)
+
+    first, ran = run({"region": "India", "client_profile": "age: 42"})
+    assert first.complete and ran == ["macro", "plan", "sector", "tax"]
+
+    # Nothing changed: nothing runs
+    second, ran = run({"region": "India", "client_profile": "age: 42"}, first)
+    assert ran == [] and sorted(second.reused) == ["macro", "plan", "sector", "tax"]
+
+    # A new client: tax runs again, its output is unchanged, so plan is reused
+    third, ran = run({"region": "India", "client_profile": "age: 43"}, second)
+    assert ran == ["tax"] and "plan" in third.reused
+
+    # A different output propagates to its dependents; a saved and
+    # restored result works the same way
+    restored = GraphResult.from_dict(json.loads(json.dumps(third.to_dict())), graph)
+    fourth, ran = run({"region": "India", "client_profile": "age: 17"}, restored)
+    assert ran == ["plan", "tax"]
+    assert fourth.outputs["tax"] == "Minor rules."
+
+
+def test_critical_path_and_failures():
+    """Test critical-path order under limited concurrency, and skipped dependents."""
+    graph = graph_of(
+        custom("quick", "Quick note.", cost=1.0),
+        custom("chain_start", "Start.", cost=1.0),
+        custom("chain_end", "Finish {chain_start}.", cost=10.0),
+        custom("broken", "Fail.", cost=0.5),
+        custom("after_broken", "Use {broken}.", cost=0.5),
+    )
+    assert graph.critical_path() == ["chain_start", "chain_end"]
+    assert graph.inputs == []
+
+    log = []
+
+    async def fail(messages, info):
+        raise RuntimeError("model crashed")
+
+    models = {name: recorder("ok", log, name, 0.01) for name in ("quick", "chain_start", "chain_end")}
+    models["broken"] = FunctionModel(fail)
+    result = run_with(override_nodes(graph, models), lambda: run_graph(
+        graph, use_cache=False, max_concurrency=1
+    ))
+
+    # Longest remaining chain first, the cheap leaf last
+    assert result.ran == ["chain_start", "chain_end", "quick", "broken"]
+    assert [entry[0] for entry in log] == ["chain_start", "chain_end", "quick"]
+    assert "model crashed" in result.errors["broken"]
+    assert result.errors["after_broken"] == "skipped: broken failed"
+    assert not result.complete and result.outputs["chain_end"] == "ok"
+
+
+def test_graph_validation(tmp_path):
+    """Test that invalid graphs are rejected and YAML graphs load."""
+    with pytest.raises(ValueError, match="cycle"):
+        graph_of(custom("a", "{b}"), custom("b", "{a}"))
+    with pytest.raises(ValueError, match="unknown nodes"):
+        graph_of(custom("a", "x", depends_on=["missing"]))
+    with pytest.raises(ValueError, match="unknown agent"):
+        graph_of({"name": "a", "agent": "nope", "prompt": "x"})
+    with pytest.raises(ValueError, match="Duplicate"):
+        graph_of(custom("a", "x"), custom("a", "y"))
+    with pytest.raises(ValueError, match="output schema"):
+        graph_of(custom("a", "x", output="NoSuchSchema"))
+
+    path = tmp_path / "graph.yaml"
+    path.write_text(
+        "name: medium\n"
+        "nodes:\n"
+        "  - name: market_analyst\n"
+        "    agent: market_analyst\n"
+        "    prompt: Analyze current financial market conditions.\n"
+        "  - name: medium_term\n"
+        "    system_prompt: You are a medium-term investment advisor.\n"
+        "    output: schemas.investment_schema:InvestmentRecommendation\n"
+        "    prompt: ['Market Context: {market_analyst}', 'Provide a 1-3 year recommendation.']\n"
+    )
+    graph = load_graph(str(path))
+    assert graph.name == "medium" and graph.order == ["market_analyst", "medium_term"]
+    assert graph.nodes["medium_term"].schema is InvestmentRecommendation
+    assert graph.nodes["medium_term"].render({"market_analyst": "Calm."}) == (
+        "Market Context: Calm.\n\nProvide a 1-3 year recommendation."
+    )
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_default_graph_matches_builtin_workflow()
+    test_partial_reexecution()
+    test_critical_path_and_failures()
+    with tempfile.TemporaryDirectory() as directory:
+        test_graph_validation(pathlib.Path(directory))
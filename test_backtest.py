@@ -0,0 +1,196 @@
+"""
+test_backtest.py
+
+Tests the recommendation backtest: instrument mapping, return and
+horizon parsing, realized returns, risk calibration, grouping and
+throughput. No Ollama server is needed.
+"""
+
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_market_data import synthetic_history
+from evaluation.backtest import (
+    EVALUATED,
+    PENDING,
+    UNRESOLVED,
+    Backtester,
+    InstrumentResolver,
+    RecommendationBatch,
+    backtest_report,
+    parse_claimed_return,
+    parse_horizon_days,
+    read_recommendations
+)
+from market_data.loader import PriceHistory
+
+
+def make_history() -> PriceHistory:
+    """Three symbols with known paths over 300 trading days."""
+    days = np.arange(300)
+    close = np.column_stack([
+        100 * 1.001 ** days,                         # steady riser
+        100 * (1 + 0.05 * np.sin(days / 3)),         # volatile, flat
+        # Listed late, falls with mild noise
+        np.r_[np.full(100, np.nan), np.linspace(50, 40, 200) * (1 + 0.01 * np.sin(days[:200]))],
+    ])
+    return PriceHistory(
+        symbols=np.array(["HDFCBANK", "RELIANCE", "NIFTYBEES"]),
+        dates=np.datetime64("2025-01-01") + days,
+        fields={"close": close}
+    )
+
+
+def test_parsing_and_resolution():
+    """Test free-text parsing of claims, horizons and asset names."""
+    print("Testing backtest parsing...")
+    print("=" * 50)
+
+    assert parse_claimed_return("10-12% annually") == (0.11, True)
+    assert parse_claimed_return("About 5% over the quarter") == (0.05, False)
+    assert np.isnan(parse_claimed_return("Moderate gains")[0])
+    assert parse_horizon_days("Short-term") == 63
+    assert parse_horizon_days("6 months") == 126
+    assert np.isnan(parse_horizon_days("Whenever"))
+
+    resolver = InstrumentResolver(np.array(["HDFCBANK", "RELIANCE", "NIFTYBEES"]))
+    assert resolver.resolve("HDFC Bank") == 0
+    assert resolver.resolve("Reliance Industries Ltd.") == 1
+    assert resolver.resolve("NIFTY 50 ETF") == 2
+    assert resolver.resolve("Dogecoin") == -1
+    assert resolver.resolve("HDFC Bank Ltd") == 0
+
+    # Generic words alone never pick an instrument
+    resolver = InstrumentResolver(np.array(["RELIANCE", "ENERGY", "GOLD", "INDEX"]))
+    assert resolver.resolve("Energy Sector Index Fund") == -1
+    assert resolver.resolve("Sovereign Gold Bond") == -1
+    assert resolver.resolve("Reliance Power") == 0
+    # Every distinctive word has to agree
+    assert resolver.resolve("Reliance Tata Fund") == -1
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_backtest_outcomes():
+    """Test realized returns, statuses and the aggregated report."""
+    backtester = Backtester(make_history())
+    batch = RecommendationBatch.from_records([
+        {"as_of": "2025-01-01", "asset_name": "HDFC Bank", "risk_level": "Low",
+         "expected_return": "5%", "time_horizon": "20 days", "variant": "a"},
+        {"as_of": "2025-01-01", "asset_name": "Reliance", "risk_level": "High",
+         "expected_return": "8-10% annually", "time_horizon": "3 months", "variant": "b"},
+        # Falls after listing
+        {"as_of": "2025-06-01", "asset_name": "NIFTY 50 ETF", "risk_level": "Medium",
+         "expected_return": "12%", "time_horizon": "Short-term", "variant": "b"},
+        # Unknown instrument, missing date, horizon beyond the data
+        {"as_of": "2025-01-01", "asset_name": "Dogecoin", "time_horizon": "Short-term"},
+        {"asset_name": "HDFC Bank", "time_horizon": "Short-term"},
+        {"as_of": "2025-10-01", "asset_name": "HDFC Bank", "time_horizon": "Long-term"},
+        # Made before the price history starts
+        {"as_of": "2019-03-01", "asset_name": "HDFC Bank", "risk_level": "Low",
+         "expected_return": "5%", "time_horizon": "20 days"},
+    ])
+    result = backtester.run(batch)
+
+    assert list(result.status) == [EVALUATED] * 3 + [UNRESOLVED, UNRESOLVED, PENDING, UNRESOLVED]
+    assert np.isnan(result.realized[6])
+    assert np.isclose(result.realized[0], 1.001 ** 20 - 1)
+    assert np.isclose(result.claimed[1], 1.09 ** (63 / 252) - 1)
+    assert result.realized[2] < 0
+
+    report = backtest_report(result)
+    assert report["evaluated"] == 3 and report["unresolved"] == 3 and report["pending"] == 1
+    assert np.isclose(report["hit_rate"], 2 / 3)
+    # Volatility: Low (steady riser) < Medium (mild noise) < High (large swings)
+    assert report["calibrated"] is True
+
+    by_variant = backtest_report(result, by="variant")
+    assert by_variant["a"]["evaluated"] == 1 and by_variant["a"]["hit_rate"] == 1.0
+    assert by_variant["b"]["evaluated"] == 2
+
+
+def test_reads_batch_output(tmp_path):
+    """Test reading report rows with nested recommendations."""
+    path = tmp_path / "reports.jsonl"
+    row = {
+        "id": "client-1",
+        "as_of": "2025-01-01",
+        "short_term_investment": {"asset_name": "HDFC Bank", "time_horizon": "Short-term",
+                                  "risk_level": "Low", "expected_return": "6%"},
+        "long_term_investment": None,
+        "errors": {"long_term": "timeout"},
+    }
+    path.write_text(json.dumps(row) + "\n")
+
+    batch = read_recommendations(str(path))
+    assert len(batch) == 1
+    assert batch.as_of[0] == np.datetime64("2025-01-01")
+    assert batch.asset_name[0] == "HDFC Bank"
+
+
+def test_retried_rows_replace_earlier_ones(tmp_path):
+    """Test that a resumed batch's retried row is the only one scored."""
+    path = tmp_path / "reports.jsonl"
+    recommendation = {"asset_name": "HDFC Bank", "risk_level": "Low", "expected_return": "6%"}
+    rows = [
+        {"id": "client-1", "as_of": "2025-01-01",
+         "short_term_investment": {**recommendation, "time_horizon": "Short-term"},
+         "long_term_investment": None, "errors": {"long_term": "timeout"}},
+        {"id": "client-2", "as_of": "2025-01-01",
+         "short_term_investment": {**recommendation, "time_horizon": "Short-term"},
+         "long_term_investment": {**recommendation, "time_horizon": "Long-term"}, "errors": {}},
+        {**recommendation, "as_of": "2025-01-01", "time_horizon": "Short-term"},
+        # The resumed run retries client-1
+        {"id": "client-1", "as_of": "2025-01-02",
+         "short_term_investment": {**recommendation, "time_horizon": "Short-term"},
+         "long_term_investment": {**recommendation, "time_horizon": "Long-term"}, "errors": {}},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    batch = read_recommendations(str(path))
+    assert len(batch) == 5
+    assert list(batch.as_of).count(np.datetime64("2025-01-02")) == 2
+
+
+def test_throughput():
+    """Test tens of thousands of recommendations per second."""
+    history = synthetic_history(n_symbols=500, n_days=2520)
+    backtester = Backtester(history)
+
+    rng = np.random.default_rng(0)
+    count = 50_000
+    symbols = history.symbols[rng.integers(0, 500, count)]
+    dates = history.dates[rng.integers(0, 2400, count)]
+    batch = RecommendationBatch.from_records([
+        {
+            "as_of": str(dates[i]),
+            "asset_name": str(symbols[i]),
+            "risk_level": ("Low", "Medium", "High")[i % 3],
+            "expected_return": f"{i % 15}% annually",
+            "time_horizon": ("Short-term", "Long-term")[i % 2],
+            "variant": ("a", "b")[i % 2],
+        }
+        for i in range(count)
+    ])
+
+    started = time.perf_counter()
+    result = backtester.run(batch)
+    report = backtest_report(result, by="variant")
+    elapsed = time.perf_counter() - started
+
+    assert report["a"]["evaluated"] + report["b"]["evaluated"] > count * 0.8
+    assert count / elapsed > 20_000, elapsed
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_parsing_and_resolution()
+    test_backtest_outcomes()
+    with tempfile.TemporaryDirectory() as directory:
+        test_reads_batch_output(pathlib.Path(directory))
+        test_retried_rows_replace_earlier_ones(pathlib.Path(directory))
+    test_throughput()
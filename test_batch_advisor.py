@@ -0,0 +1,73 @@
+"""
+test_batch_advisor.py
+
+Tests the JSONL batch mode against the local stub LLM server,
+including resuming from a checkpoint. No Ollama server is needed.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from batch.batch_advisor import run_batch
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from utils.llm_configuration import release_http_connections
+
+
+def _run(*args, **kwargs):
+    async def scenario():
+        try:
+            return await run_batch(*args, **kwargs)
+        finally:
+            await release_http_connections()
+
+    return asyncio.run(scenario())
+
+
+def test_batch_advisor():
+    """Test a batch run, then a resumed run after more rows are added."""
+    print("Testing batch mode...")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "clients.jsonl")
+        output_path = os.path.join(directory, "reports.jsonl")
+
+        with open(input_path, "w", encoding="utf-8") as handle:
+            for index in range(6):
+                handle.write(json.dumps({
+                    "id": f"client-{index}",
+                    "profile": {"age": 30 + index, "risk_tolerance": "Medium"}
+                }) + "\n")
+            handle.write("not json\n")
+
+        config = StubConfig(ttft=0.01, per_token_latency=0.001)
+        with StubLLMServer(config) as server, agents_using(server.base_url):
+            summary = _run(input_path, output_path, concurrency=3, use_cache=False)
+            # One shared market analysis plus two agents per client
+            assert server.stats.requests == 1 + 2 * 6
+
+            # Simulate new rows after a crash: finished rows are skipped
+            # and the checkpointed market analysis is reused.
+            with open(input_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps({"id": "client-6", "profile": "Retired"}) + "\n")
+            resumed = _run(input_path, output_path, concurrency=3, use_cache=False)
+            assert server.stats.requests == 1 + 2 * 7
+
+        with open(output_path, encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+
+    assert summary.completed == 6 and summary.invalid == 1
+    assert resumed.completed == 1 and resumed.skipped == 6
+    assert sorted(row["id"] for row in rows) == [f"client-{index}" for index in range(7)]
+    assert all(not row["errors"] for row in rows)
+    assert rows[0]["long_term_investment"]["time_horizon"] == "Long-term"
+
+    print(f"Summary: {summary.as_dict()}")
+    print("\n✅ Test completed successfully!")
+
+
+if __name__ == "__main__":
+    test_batch_advisor()
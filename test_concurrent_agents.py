@@ -0,0 +1,110 @@
+"""
+test_concurrent_agents.py
+
+Tests that the short-term and long-term investment agents run
+concurrently and that a failure in one is reported separately from
+the other's result. No Ollama server is needed.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.stub_llm_server import RECOMMENDATIONS
+from orchestrator.financial_orchestrator import (
+    run_agentic_financial_advisor_async,
+    run_investment_recommendations
+)
+from schemas.investment_schema import InvestmentRecommendation
+
+DELAY = 0.3
+
+
+def timed(text, log, name):
+    """A FunctionModel answering `text` after DELAY, logging (name, start, end)."""
+    async def respond(messages, info):
+        started = time.perf_counter()
+        await asyncio.sleep(DELAY)
+        log.append((name, started, time.perf_counter()))
+        return ModelResponse(parts=[TextPart(text)])
+    return FunctionModel(respond)
+
+
+def failing(message):
+    """A FunctionModel that raises after DELAY."""
+    async def respond(messages, info):
+        await asyncio.sleep(DELAY)
+        raise RuntimeError(message)
+    return FunctionModel(respond)
+
+
+def test_agents_run_concurrently():
+    """Test that both investment agents are in flight at the same time."""
+    print("Testing concurrent investment agents...")
+    print("=" * 50)
+
+    log = []
+
+    async def scenario():
+        with market_analyst_agent.override(model=timed("Markets are calm.", log, "market_analyst")), \
+                short_term_investment_agent.override(model=timed(
+                    json.dumps(RECOMMENDATIONS["Short-term"]), log, "short_term"
+                )), \
+                long_term_investment_agent.override(model=timed(
+                    json.dumps(RECOMMENDATIONS["Long-term"]), log, "long_term"
+                )):
+            started = time.perf_counter()
+            report = await run_agentic_financial_advisor_async(use_cache=False)
+            return report, time.perf_counter() - started
+
+    report, elapsed = asyncio.run(scenario())
+
+    assert isinstance(report["short_term_investment"], InvestmentRecommendation)
+    assert report["long_term_investment"].time_horizon == "Long-term"
+    calls = {name: (start, end) for name, start, end in log}
+    # Both start after the analysis and overlap each other
+    assert min(calls["short_term"][0], calls["long_term"][0]) >= calls["market_analyst"][1]
+    assert calls["short_term"][0] < calls["long_term"][1]
+    assert calls["long_term"][0] < calls["short_term"][1]
+    # Two generation times, not three
+    assert elapsed < 3 * DELAY
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_failures_reported_per_agent():
+    """Test that one agent's failure does not hide the other's result."""
+    async def recommendations():
+        with short_term_investment_agent.override(model=failing("short-term model crashed")), \
+                long_term_investment_agent.override(model=timed(
+                    json.dumps(RECOMMENDATIONS["Long-term"]), [], "long_term"
+                )):
+            return await run_investment_recommendations("Markets are calm.", use_cache=False)
+
+    short_term, long_term = asyncio.run(recommendations())
+    assert isinstance(short_term, RuntimeError) and "short-term model crashed" in str(short_term)
+    assert long_term.time_horizon == "Long-term"
+
+    # The full workflow still surfaces the failure to its caller
+    async def workflow():
+        with market_analyst_agent.override(model=timed("Markets are calm.", [], "market_analyst")), \
+                short_term_investment_agent.override(model=timed(
+                    json.dumps(RECOMMENDATIONS["Short-term"]), [], "short_term"
+                )), \
+                long_term_investment_agent.override(model=failing("long-term model crashed")):
+            return await run_agentic_financial_advisor_async(use_cache=False)
+
+    with pytest.raises(RuntimeError, match="long-term model crashed"):
+        asyncio.run(workflow())
+
+
+if __name__ == "__main__":
+    test_agents_run_concurrently()
+    test_failures_reported_per_agent()
@@ -0,0 +1,203 @@
+"""
+test_deadline_hedging.py
+
+Tests request deadlines (cancellation and partial reports) and
+hedged requests to a second endpoint. No Ollama server is needed.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import RECOMMENDATIONS, StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import (
+    run_agentic_financial_advisor_async,
+    run_investment_recommendations
+)
+from schemas.investment_schema import InvestmentRecommendation
+from utils.deadline import DeadlineExceeded, deadline_scope, remaining, within_deadline
+from utils.hedging import (
+    HEDGE_POLICIES,
+    HEDGE_STATS,
+    HedgePolicy,
+    HedgeStats,
+    backup_model,
+    hedged_generator
+)
+from utils.llm_configuration import get_llm_model, release_http_connections
+
+
+def answer(text):
+    """A FunctionModel answering immediately with the given text."""
+    return FunctionModel(lambda messages, info: ModelResponse(parts=[TextPart(text)]))
+
+
+def stalled(cancelled):
+    """A FunctionModel that never answers; records its cancellation."""
+    async def respond(messages, info):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    return FunctionModel(respond)
+
+
+def test_deadline_returns_partial_report():
+    """Test that a stalled agent is cancelled and the report is partial."""
+    print("Testing request deadlines...")
+    print("=" * 50)
+
+    cancelled = []
+
+    async def scenario():
+        with market_analyst_agent.override(model=answer("Markets are calm.")), \
+                short_term_investment_agent.override(model=stalled(cancelled)), \
+                long_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Long-term"]))
+                ):
+            return await run_agentic_financial_advisor_async(use_cache=False, deadline=0.5)
+
+    started = time.perf_counter()
+    report = asyncio.run(scenario())
+    assert time.perf_counter() - started < 3
+
+    assert report["complete"] is False
+    assert report["market_analysis"] == "Markets are calm."
+    assert report["short_term_investment"] is None
+    assert isinstance(report["long_term_investment"], InvestmentRecommendation)
+    assert list(report["errors"]) == ["short_term"]
+    assert "deadline" in report["errors"]["short_term"]
+    # The stalled generation was cancelled, not left running
+    assert cancelled == [True]
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_missed_analysis_skips_recommendations():
+    """Test that a report without analysis skips the investment agents."""
+    cancelled = []
+
+    async def scenario():
+        with market_analyst_agent.override(model=stalled(cancelled)):
+            return await run_agentic_financial_advisor_async(use_cache=False, deadline=0.2)
+
+    report = asyncio.run(scenario())
+    assert report["market_analysis"] is None
+    assert report["short_term_investment"] is None and report["long_term_investment"] is None
+    assert list(report["errors"]) == ["market_analyst"]
+    assert cancelled == [True]
+
+
+def test_deadline_scopes_nest():
+    """Test that nested scopes can shorten but never extend a deadline."""
+    async def scenario():
+        assert remaining() is None
+        with deadline_scope(10):
+            with deadline_scope(100):
+                assert remaining() <= 10
+            with deadline_scope(0.05):
+                try:
+                    await within_deadline(asyncio.sleep(1), "inner")
+                except DeadlineExceeded as error:
+                    assert error.stage == "inner"
+                else:
+                    raise AssertionError("deadline did not expire")
+            # Other timeouts are not mistaken for the deadline
+            try:
+                await within_deadline(asyncio.wait_for(asyncio.sleep(1), 0.01), "outer")
+            except DeadlineExceeded:
+                raise AssertionError("wrong exception")
+            except TimeoutError:
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_hedge_to_second_endpoint():
+    """Test that slow calls are duplicated to a backup endpoint."""
+    slow = StubConfig(ttft=2.0, per_token_latency=0.0)
+    fast = StubConfig(ttft=0.01, per_token_latency=0.0)
+    saved_policies = dict(HEDGE_POLICIES)
+    HEDGE_STATS.clear()
+
+    with StubLLMServer(slow) as primary, StubLLMServer(fast) as backup, \
+            agents_using(primary.base_url):
+        for agent_name in ("short_term", "long_term"):
+            HEDGE_POLICIES[agent_name] = HedgePolicy(base_url=backup.base_url, delay=0.1)
+
+        async def scenario():
+            try:
+                return await run_investment_recommendations(
+                    "Markets are calm.", use_cache=False, hedge=True
+                )
+            finally:
+                await release_http_connections()
+
+        try:
+            started = time.perf_counter()
+            outcomes = asyncio.run(scenario())
+            elapsed = time.perf_counter() - started
+        finally:
+            HEDGE_POLICIES.update(saved_policies)
+
+    assert all(isinstance(outcome, InvestmentRecommendation) for outcome in outcomes)
+    assert elapsed < 1.5
+    assert backup.stats.requests == 2
+    for agent_name in ("short_term", "long_term"):
+        stats = HEDGE_STATS[agent_name]
+        assert (stats.calls, stats.hedged, stats.backup_wins) == (1, 1, 1)
+
+
+def test_hedge_delay_follows_p95():
+    """Test that the hedge delay is the observed p95 once trusted."""
+    policy = HedgePolicy(min_samples=20)
+    stats = HedgeStats()
+    stats.latencies.extend([1.0] * 10)
+    assert stats.delay(policy) is None
+
+    stats.latencies.extend([1.0] * 85 + [5.0] * 5)
+    assert stats.delay(policy) == 1.0
+    assert stats.delay(HedgePolicy(delay=0.3)) == 0.3
+
+
+def test_hedge_needs_distinct_backup():
+    """Test that hedging is skipped, with a warning, when the backup equals the primary."""
+    agent = short_term_investment_agent
+
+    async def generate(user_prompt, **run_kwargs):
+        return user_prompt
+
+    with agent.override(model=get_llm_model("llama3.2:latest", base_url="http://gpu-1:11434/v1")):
+        assert backup_model(agent, HedgePolicy(base_url="http://gpu-1:11434/v1")) is None
+        with pytest.warns(RuntimeWarning, match="no effect"):
+            assert hedged_generator(agent, "short_term", HedgePolicy(
+                base_url="http://gpu-1:11434/v1"
+            ), generate) is generate
+
+        # Another endpoint, another model or a router over several endpoints
+        assert backup_model(agent, HedgePolicy(base_url="http://gpu-2:11434/v1")) is not None
+        assert backup_model(agent, HedgePolicy(
+            model_name="llama3.2:1b", base_url="http://gpu-1:11434/v1"
+        )) is not None
+        assert backup_model(agent, HedgePolicy(
+            base_url="http://gpu-1:11434/v1,http://gpu-2:11434/v1"
+        )) is not None
+
+
+if __name__ == "__main__":
+    test_deadline_returns_partial_report()
+    test_missed_analysis_skips_recommendations()
+    test_deadline_scopes_nest()
+    test_hedge_to_second_endpoint()
+    test_hedge_delay_follows_p95()
+    test_hedge_needs_distinct_backup()
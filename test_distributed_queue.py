@@ -0,0 +1,246 @@
+"""
+test_distributed_queue.py
+
+Tests the Redis job queue and its workers on fakeredis: shared
+market analysis, visibility timeouts, redelivery, leases and
+dead-lettering. No Redis or Ollama server is needed.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import fakeredis
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.stub_llm_server import RECOMMENDATIONS
+from distributed.job_queue import DEAD, DONE, JobQueue, submit
+from distributed.worker import AdvisoryWorker
+
+
+def answer(text, calls=None, delay=0.0):
+    """A FunctionModel answering with the given text, counting calls."""
+    async def respond(messages, info):
+        if calls is not None:
+            calls.append(True)
+        await asyncio.sleep(delay)
+        return ModelResponse(parts=[TextPart(text)])
+    return FunctionModel(respond)
+
+
+def queues(count, **kwargs):
+    """`count` JobQueue clients sharing one fake Redis server."""
+    server = fakeredis.FakeServer()
+    return [JobQueue(fakeredis.FakeAsyncRedis(server=server), **kwargs) for _ in range(count)]
+
+
+def test_workers_share_market_analysis():
+    """Test that several workers complete every job with one analysis."""
+    print("Testing the distributed job queue...")
+    print("=" * 50)
+
+    analyses = []
+    producer, *worker_queues = queues(3)
+    workers = [AdvisoryWorker(queue, concurrency=3, use_cache=False, poll_interval=0.01)
+               for queue in worker_queues]
+
+    async def scenario():
+        job_ids = [
+            await producer.enqueue({"id": number, "profile": {"age": 30 + number}})
+            for number in range(10)
+        ]
+        with market_analyst_agent.override(model=answer("Markets are calm.", analyses, 0.05)), \
+                short_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Short-term"]), delay=0.01)
+                ), \
+                long_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Long-term"]), delay=0.01)
+                ):
+            await asyncio.gather(*(worker.run(until_empty=True) for worker in workers))
+        return [await producer.wait(job_id, timeout=1) for job_id in job_ids], await producer.stats()
+
+    states, stats = asyncio.run(scenario())
+
+    assert all(state["status"] == DONE for state in states)
+    assert [state["result"]["id"] for state in states] == list(range(10))
+    assert states[0]["result"]["short_term_investment"]["time_horizon"] == "Short-term"
+    assert stats == {"ready": 0, "inflight": 0, "dead": 0}
+    # Published once, shared by both workers
+    assert len(analyses) == 1
+    assert sum(worker.stats.analyses for worker in workers) == 1
+    assert sum(worker.stats.completed for worker in workers) == 10
+    assert all(worker.stats.completed for worker in workers)
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_visibility_timeout_and_leases():
+    """Test redelivery of abandoned jobs and rejection of stale acks."""
+    queue, = queues(1, visibility_timeout=0.2, max_attempts=2)
+
+    async def scenario():
+        job_id = await queue.enqueue({"profile": "retired"})
+        first = await queue.claim()
+        assert first.attempts == 1 and await queue.claim() is None
+
+        # The worker holding it goes silent: the job comes back
+        await asyncio.sleep(0.3)
+        assert await queue.requeue_expired() == {"requeued": 1, "dead": 0}
+        second = await queue.claim()
+        assert (second.id, second.attempts) == (job_id, 2)
+
+        # The first worker returns late: its lease is no longer valid
+        assert not await queue.ack(first, {"stale": True})
+        assert not await queue.extend(first)
+        assert await queue.extend(second)
+
+        # Abandoned again on the last attempt: dead-lettered
+        await asyncio.sleep(0.3)
+        assert await queue.requeue_expired() == {"requeued": 0, "dead": 1}
+        state = await queue.wait(job_id, timeout=1)
+        assert state["status"] == DEAD and "visibility timeout" in state["error"]
+        assert not await queue.ack(second, {"late": True})
+
+        # Dead letters can be sent back to the queue
+        assert [letter["id"] for letter in await queue.dead_letters()] == [job_id]
+        assert await queue.retry_dead(job_id)
+        third = await queue.claim()
+        assert third.attempts == 1
+        assert await queue.ack(third, {"ok": True})
+
+        # Only dead letters: a done job and an unknown id are untouched
+        assert not await queue.retry_dead(job_id)
+        assert not await queue.retry_dead("unknown")
+        assert await queue.status("unknown") is None
+        return await queue.wait(job_id, timeout=1), await queue.stats()
+
+    state, stats = asyncio.run(scenario())
+    assert state["status"] == DONE and state["result"] == {"ok": True}
+    assert stats == {"ready": 0, "inflight": 0, "dead": 0}
+
+
+def test_failing_jobs_are_dead_lettered():
+    """Test that jobs whose agents keep failing end in the dead-letter list."""
+    queue, = queues(1, max_attempts=2)
+    worker = AdvisoryWorker(queue, concurrency=2, use_cache=False, poll_interval=0.01)
+
+    async def scenario():
+        job_id = await queue.enqueue({"profile": "aggressive"})
+        with market_analyst_agent.override(model=answer("Markets are calm.")), \
+                short_term_investment_agent.override(model=answer("not json at all")), \
+                long_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Long-term"]))
+                ):
+            await worker.run(until_empty=True)
+        return await queue.wait(job_id, timeout=1), await queue.stats()
+
+    state, stats = asyncio.run(scenario())
+    assert state["status"] == DEAD and state["attempts"] == 2
+    assert "short_term" in json.loads(state["error"])
+    assert stats == {"ready": 0, "inflight": 0, "dead": 1}
+    assert worker.stats.failed == 2
+
+
+def test_enqueue_existing_id_runs_once():
+    """Test that an id still queued or running is not enqueued twice."""
+    queue, = queues(1)
+
+    async def scenario():
+        await queue.enqueue({"profile": "first"}, "client-1")
+        # Queued: the second enqueue leaves the job alone
+        await queue.enqueue({"profile": "second"}, "client-1")
+        assert await queue.stats() == {"ready": 1, "inflight": 0, "dead": 0}
+        job = await queue.claim()
+        assert job.payload == {"profile": "first"} and await queue.claim() is None
+
+        # Running: still not queued again, and the lease stays valid
+        await queue.enqueue({"profile": "third"}, "client-1")
+        assert await queue.claim() is None
+        assert await queue.ack(job, {"ok": 1})
+
+        # Finished: enqueueing the id again runs it again
+        await queue.enqueue({"profile": "fourth"}, "client-1")
+        again = await queue.claim()
+        assert again.payload == {"profile": "fourth"} and again.attempts == 1
+        assert await queue.nack(again, "boom", retry=False)
+
+        # Dead-lettered: replaced, and removed from the dead letters
+        await queue.enqueue({"profile": "fifth"}, "client-1")
+        return await queue.stats()
+
+    assert asyncio.run(scenario()) == {"ready": 1, "inflight": 0, "dead": 0}
+
+
+def test_claim_skips_expired_jobs():
+    """Test that claiming an id whose hash expired leaves no orphan hash."""
+    queue, = queues(1)
+
+    async def scenario():
+        expired = await queue.enqueue({"profile": "expired"})
+        live = await queue.enqueue({"profile": "live"})
+        await queue.client.delete(queue._job_key(expired))
+        job = await queue.claim()
+        return job, await queue.client.exists(queue._job_key(expired)), await queue.stats()
+
+    job, orphan, stats = asyncio.run(scenario())
+    assert job.payload == {"profile": "live"}
+    assert not orphan
+    assert stats == {"ready": 0, "inflight": 1, "dead": 0}
+
+
+def test_submit_keeps_a_bounded_window():
+    """Test that submit writes every result while few jobs are outstanding."""
+    producer, worker_queue = queues(2)
+    worker = AdvisoryWorker(worker_queue, concurrency=2, use_cache=False, poll_interval=0.01)
+    outstanding = []
+    statuses = producer.statuses
+
+    async def watched(job_ids):
+        outstanding.append(len(job_ids))
+        return await statuses(job_ids)
+
+    producer.statuses = watched
+
+    async def scenario(input_path, output_path):
+        with market_analyst_agent.override(model=answer("Markets are calm.")), \
+                short_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Short-term"]), delay=0.01)
+                ), \
+                long_term_investment_agent.override(
+                    model=answer(json.dumps(RECOMMENDATIONS["Long-term"]), delay=0.01)
+                ):
+            stop = asyncio.Event()
+            serving = asyncio.create_task(worker.run(stop=stop))
+            counts = await submit(producer, input_path, output_path, {}, window=3, poll_interval=0.01)
+            stop.set()
+            await serving
+        return counts
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "requests.jsonl")
+        output_path = os.path.join(directory, "results.jsonl")
+        with open(input_path, "w", encoding="utf-8") as handle:
+            for number in range(8):
+                handle.write(json.dumps({"id": number, "profile": {"age": 30 + number}}) + "\n")
+            handle.write("not json\n")
+        counts = asyncio.run(scenario(input_path, output_path))
+        with open(output_path, encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+
+    assert counts == {"submitted": 8, "done": 8, "dead": 0, "invalid": 1}
+    assert sorted(row["id"] for row in rows) == list(range(8))
+    assert outstanding and max(outstanding) <= 3
+
+
+if __name__ == "__main__":
+    test_workers_share_market_analysis()
+    test_visibility_timeout_and_leases()
+    test_failing_jobs_are_dead_lettered()
+    test_enqueue_existing_id_runs_once()
+    test_claim_skips_expired_jobs()
+    test_submit_keeps_a_bounded_window()
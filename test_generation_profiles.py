@@ -0,0 +1,98 @@
+"""
+test_generation_profiles.py
+
+Tests per-agent generation profiles (stop sequences, token
+budgets) and adaptive budgets. No Ollama server is needed.
+"""
+
+import asyncio
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import run_investment_recommendations
+from utils.generation_profiles import (
+    ADAPTIVE_BUDGETS,
+    adaptive_max_tokens,
+    configure_adaptive_budgets,
+    restore_json_stop
+)
+from utils.json_repair import REPAIR_STATS
+from utils.llm_configuration import release_http_connections
+from utils.telemetry import METRICS, StageRecord
+
+
+def test_json_stop_sequence():
+    """Test that JSON agents stop at the closing brace and still validate cleanly."""
+    print("Testing generation profiles with the stub server...")
+    print("=" * 50)
+
+    assert long_term_investment_agent.model_settings["stop_sequences"] == ["}"]
+    assert market_analyst_agent.model_settings["max_tokens"] < 2000
+
+    config = StubConfig(ttft=0.01, per_token_latency=0.001)
+    repaired_before = REPAIR_STATS.repaired
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                return await run_investment_recommendations("Markets are calm.", use_cache=False)
+            finally:
+                await release_http_connections()
+
+        short_term, long_term = asyncio.run(scenario())
+
+    # Both outputs were cut by the stop sequence...
+    assert server.stats.stopped == 2
+    # ...and parsed without needing the repair stage
+    assert short_term.time_horizon == "Short-term"
+    assert long_term.time_horizon == "Long-term"
+    assert REPAIR_STATS.repaired == repaired_before
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_restore_json_stop():
+    """Test restoring braces removed by the stop sequence."""
+    assert restore_json_stop('{"a": "b"\n') == '{"a": "b"\n}'
+    assert restore_json_stop('{"a": "b"}') == '{"a": "b"}'
+    assert restore_json_stop({"a": "b"}) == {"a": "b"}
+    # Braces inside strings are not counted
+    assert restore_json_stop('{"a": "{b} \\"{"\n') == '{"a": "{b} \\"{"\n}'
+    # Stopped at a "}" inside a string: left for repair or a correction retry
+    assert restore_json_stop('{"a": "b", "c": "uses {x') == '{"a": "b", "c": "uses {x'
+
+
+def test_adaptive_budget():
+    """Test budgets derived from observed output lengths."""
+    saved = vars(ADAPTIVE_BUDGETS).copy()
+    saved_records = list(METRICS.records)
+    METRICS.clear()
+    try:
+        configure_adaptive_budgets(enabled=True, min_samples=10)
+        for tokens in range(100, 200, 5):
+            METRICS.add(StageRecord("short_term", completion_tokens=tokens, requests=1))
+        # Cache hits (no requests) are ignored
+        METRICS.add(StageRecord("short_term", cache_hit=True))
+
+        # p95 of 100..195 is 190; * 1.25 = 237.5, rounded up to 256
+        assert adaptive_max_tokens("short_term") == 256
+        # Not enough samples yet for the market analyst
+        assert adaptive_max_tokens("market_analyst") is None
+
+        # Never above the profile's own max_tokens
+        for _ in range(20):
+            METRICS.add(StageRecord("short_term", completion_tokens=5000, requests=1))
+        assert adaptive_max_tokens("short_term") == 320
+    finally:
+        configure_adaptive_budgets(**saved)
+        METRICS.clear()
+        for record in saved_records:
+            METRICS.add(record)
+
+
+if __name__ == "__main__":
+    test_json_stop_sequence()
+    test_restore_json_stop()
+    test_adaptive_budget()
@@ -0,0 +1,97 @@
+"""
+test_json_repair.py
+
+Simple test script for the local JSON repair stage and the
+correction-hint retry path. No Ollama server is needed.
+"""
+
+import asyncio
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from orchestrator.financial_orchestrator import (
+    _run_investment_agent,
+    extract_investment_data
+)
+from utils.json_repair import REPAIR_STATS
+
+
+def test_json_repair():
+    """Test that common formatting mistakes are repaired locally."""
+    print("Testing JSON Repair...")
+    print("=" * 50)
+
+    malformed_outputs = [
+        # Markdown fence with a trailing comma
+        '```json\n{"asset_name": "Gold ETF", "rationale": "Hedge", '
+        '"risk_level": "low", "expected_return": "8%", '
+        '"time_horizon": "Short-term",}\n```',
+        # Leading prose and single quotes
+        "Here is my recommendation: {'asset_name': 'Gold ETF', "
+        "'rationale': \"It's a hedge\", 'risk_level': 'LOW', "
+        "'expected_return': '8%', 'time_horizon': 'Short-term'} Hope it helps!",
+        # Missing closing brace (generation stopped early)
+        '{"asset_name": "Gold ETF", "rationale": "Hedge", "risk_level": "Low", '
+        '"expected_return": "8%", "time_horizon": "Short-term"',
+    ]
+
+    repaired_before = REPAIR_STATS.repaired
+    for output in malformed_outputs:
+        investment = extract_investment_data(output)
+        assert investment.asset_name == "Gold ETF"
+        assert investment.risk_level == "Low"
+    assert REPAIR_STATS.repaired == repaired_before + len(malformed_outputs)
+
+    try:
+        extract_investment_data("I cannot recommend anything today.")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unrepairable output must raise ValueError")
+
+    # Only the casing of a risk level is repaired, not the value
+    for risk_level in ("Moderate", "Extreme"):
+        try:
+            extract_investment_data(
+                '{"asset_name": "Gold ETF", "rationale": "Hedge", '
+                f'"risk_level": "{risk_level}", "expected_return": "8%", '
+                '"time_horizon": "Short-term"}'
+            )
+        except ValueError as error:
+            assert "Low, Medium or High" in str(error)
+        else:
+            raise AssertionError(f"risk_level {risk_level!r} must raise ValueError")
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_correction_retry():
+    """Test that unrepairable output is retried with a correction hint."""
+    prompts = []
+
+    def fake_model(messages, info):
+        prompts.append(messages[-1].parts[-1].content)
+        if len(prompts) == 1:
+            return ModelResponse(parts=[TextPart("Buy gold, it is low risk.")])
+        return ModelResponse(parts=[TextPart(
+            '{"asset_name": "Gold ETF", "rationale": "Hedge", '
+            '"risk_level": "Low", "expected_return": "8%", '
+            '"time_horizon": "Short-term"}'
+        )])
+
+    agent = Agent(FunctionModel(fake_model), system_prompt="Return JSON.")
+
+    investment = asyncio.run(_run_investment_agent(
+        agent, "short_term", "Calm markets.", "short-term", use_cache=False
+    ))
+
+    assert investment.asset_name == "Gold ETF"
+    assert len(prompts) == 2
+    assert "It was rejected because" in prompts[1]
+
+
+if __name__ == "__main__":
+    test_json_repair()
+    test_correction_retry()
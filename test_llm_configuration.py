@@ -0,0 +1,78 @@
+"""
+test_llm_configuration.py
+
+Tests the memoized model factory: shared models, one provider per
+endpoint, one pooled HTTP client for all of them, and reuse of that
+client across event loops. No Ollama server is needed.
+"""
+
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from utils.llm_configuration import (
+    configure_http_client,
+    get_http_client,
+    get_llm_model,
+    get_ollama_provider,
+    release_http_connections
+)
+
+GPU_1 = "http://gpu-1:11434/v1"
+GPU_2 = "http://gpu-2:11434/v1"
+
+
+def test_models_and_providers_are_shared():
+    """Test that equal arguments give the same model and endpoints share providers."""
+    print("Testing the shared model factory...")
+    print("=" * 50)
+
+    model = get_llm_model("llama3.2:latest", base_url=GPU_1)
+    assert get_llm_model("llama3.2:latest", base_url=GPU_1) is model
+    assert get_llm_model("llama3.2:latest", base_url=[GPU_1]) is model
+    assert get_llm_model("llama3.2:latest", base_url=GPU_1, temperature=0.7) is not model
+
+    # Another model on the same endpoint uses the same provider
+    small = get_llm_model("llama3.2:1b", base_url=GPU_1)
+    assert small is not model
+    assert small.wrapped.client is model.wrapped.client is get_ollama_provider(GPU_1).client
+
+    # Every endpoint's provider sends through the one pooled client
+    # (the OpenAI client keeps the httpx client it was given)
+    other = get_llm_model("llama3.2:latest", base_url=GPU_2)
+    assert other.wrapped.client is not model.wrapped.client
+    assert get_ollama_provider(GPU_1).client._client is get_http_client()
+    assert get_ollama_provider(GPU_2).client._client is get_http_client()
+
+    # Pool settings cannot change once the shared client exists
+    with pytest.raises(RuntimeError, match="already exists"):
+        configure_http_client(max_connections=1)
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_client_survives_event_loops():
+    """Test that the shared client serves several asyncio.run() calls."""
+    config = StubConfig(ttft=0.01, per_token_latency=0.0)
+    with StubLLMServer(config) as server:
+        agent = Agent(get_llm_model("llama3.2:latest", base_url=server.base_url))
+
+        async def ask():
+            try:
+                return (await agent.run("Describe the market.")).output
+            finally:
+                # Close this loop's pooled connections before it ends
+                await release_http_connections()
+
+        answers = [asyncio.run(ask()) for _ in range(3)]
+
+    assert answers == [config.market_text] * 3
+    assert server.stats.requests == 3
+    assert not get_http_client().is_closed
+
+
+if __name__ == "__main__":
+    test_models_and_providers_are_shared()
+    test_client_survives_event_loops()
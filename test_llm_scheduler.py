@@ -0,0 +1,223 @@
+"""
+test_llm_scheduler.py
+
+Tests admission control and priority scheduling in front of the
+LLM endpoints: the concurrency limit, priority order, queue limits
+and cancellation. No Ollama server is needed.
+"""
+
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import run_agentic_financial_advisor_async
+from utils.deadline import deadline_scope
+from utils.llm_configuration import release_http_connections
+from utils.llm_scheduler import (
+    SCHEDULER,
+    SCHEDULERS,
+    EndpointScheduler,
+    ScheduledModel,
+    SchedulerOverloaded,
+    configure_scheduler,
+    request_class
+)
+from utils.model_router import RoutedModel, RouterConfig
+from utils.telemetry import stage_span
+
+
+@pytest.fixture(autouse=True)
+def restore_scheduler():
+    """Restores the shared scheduler settings after each test."""
+    saved = vars(SCHEDULER).copy()
+    yield
+    configure_scheduler(**saved)
+    SCHEDULERS.clear()
+
+
+async def hold(scheduler, order, name, seconds=0.02):
+    """Takes a slot, records the start order and holds it briefly."""
+    async with scheduler.slot():
+        order.append(name)
+        await asyncio.sleep(seconds)
+
+
+def test_concurrency_limit_on_endpoint():
+    """Test that full reports never exceed the endpoint's slots."""
+    print("Testing the LLM scheduler...")
+    print("=" * 50)
+
+    configure_scheduler(max_concurrency=2)
+    SCHEDULERS.clear()
+    config = StubConfig(ttft=0.02, per_token_latency=0.0)
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                return await asyncio.gather(*(
+                    run_agentic_financial_advisor_async(use_cache=False) for _ in range(4)
+                ))
+            finally:
+                await release_http_connections()
+
+        reports = asyncio.run(scenario())
+        peak_active = server.stats.peak_active
+
+    assert all(report["complete"] for report in reports)
+    # 4 reports x 3 agents would run 8 recommendations at once
+    assert peak_active == 2
+    assert server.base_url in reports[-1]["scheduler"]
+    # Other reports may still have been running when the last one
+    # took its snapshot, so check the scheduler once all are done
+    summary = SCHEDULERS[server.base_url].as_dict()
+    assert summary["admitted"] == 12
+    assert summary["peak_depth"] > 0
+    assert summary["running"] == 0 and summary["depth"] == 0
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_priority_order():
+    """Test interactive before batch, analysis first, earliest deadline first."""
+    configure_scheduler(max_concurrency=1)
+    scheduler = EndpointScheduler("http://stub")
+    order = []
+
+    async def waiter(name, stage, batch=False, deadline=None):
+        with request_class("batch" if batch else "interactive"), \
+                deadline_scope(deadline), stage_span(stage):
+            await hold(scheduler, order, name)
+
+    async def scenario():
+        first = asyncio.create_task(hold(scheduler, order, "first", 0.05))
+        await asyncio.sleep(0.01)
+        # Queued in the reverse of the expected order
+        waiters = []
+        for name, stage, batch, deadline in [
+            ("batch_analysis", "market_analyst", True, None),
+            ("late_deadline", "short_term", False, 30.0),
+            ("no_deadline", "long_term", False, None),
+            ("early_deadline", "short_term", False, 10.0),
+            ("analysis", "market_analyst", False, None),
+        ]:
+            waiters.append(asyncio.create_task(waiter(name, stage, batch, deadline)))
+            await asyncio.sleep(0)
+        await asyncio.gather(first, *waiters)
+
+    asyncio.run(scenario())
+    assert order == [
+        "first", "analysis", "early_deadline", "late_deadline", "no_deadline", "batch_analysis"
+    ]
+    assert scheduler.stats.peak_depth == 5
+
+
+def test_backpressure_rejects_requests():
+    """Test that a full queue or a long wait raises SchedulerOverloaded."""
+    configure_scheduler(max_concurrency=1, max_queue=1, max_wait=0.05)
+    scheduler = EndpointScheduler("http://stub")
+    order = []
+
+    async def scenario():
+        busy = asyncio.create_task(hold(scheduler, order, "busy", 0.2))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(hold(scheduler, order, "waiting"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(SchedulerOverloaded):
+            await scheduler.acquire()
+        with pytest.raises(SchedulerOverloaded):
+            await waiting
+        await busy
+
+    asyncio.run(scenario())
+    assert order == ["busy"]
+    stats = scheduler.as_dict()
+    assert (stats["rejected"], stats["timed_out"]) == (1, 1)
+    assert (stats["running"], stats["depth"]) == (0, 0)
+
+
+def test_cancelled_waiters_do_not_leak_slots():
+    """Test that cancelling waiting requests frees their places and slots."""
+    configure_scheduler(max_concurrency=1)
+    scheduler = EndpointScheduler("http://stub")
+    order = []
+
+    async def scenario():
+        busy = asyncio.create_task(hold(scheduler, order, "busy", 0.05))
+        await asyncio.sleep(0.01)
+        cancelled = [asyncio.create_task(hold(scheduler, order, f"c{n}")) for n in range(3)]
+        survivor = asyncio.create_task(hold(scheduler, order, "survivor"))
+        await asyncio.sleep(0.01)
+        for task in cancelled:
+            task.cancel()
+        await asyncio.gather(busy, survivor)
+        await asyncio.gather(*cancelled, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert order == ["busy", "survivor"]
+    assert (scheduler.running, scheduler.depth) == (0, 0)
+
+
+def test_slot_wait_is_recorded_on_the_stage():
+    """Test that time spent waiting for a slot is the stage's queue wait."""
+    configure_scheduler(max_concurrency=1)
+    scheduler = EndpointScheduler("http://stub")
+    order = []
+
+    async def waiter():
+        with stage_span("short_term") as record:
+            await hold(scheduler, order, "waiter")
+        return record
+
+    async def scenario():
+        busy = asyncio.create_task(hold(scheduler, order, "busy", 0.05))
+        await asyncio.sleep(0)
+        record = await waiter()
+        await busy
+        return record
+
+    record = asyncio.run(scenario())
+    assert order == ["busy", "waiter"]
+    assert record.queue_wait >= 0.04
+    assert record.queue_wait == pytest.approx(scheduler.stats.waits[-1])
+
+
+def test_busy_endpoint_fails_over_without_ejection():
+    """Test that rejected calls move to another endpoint and eject nothing."""
+    configure_scheduler(max_concurrency=1, max_queue=0)
+    busy, idle = EndpointScheduler("http://busy"), EndpointScheduler("http://idle")
+
+    def answering(name):
+        async def respond(messages, info):
+            return ModelResponse(parts=[TextPart(name)])
+        return FunctionModel(respond)
+
+    router = RoutedModel(
+        [ScheduledModel(answering("busy"), busy), ScheduledModel(answering("idle"), idle)],
+        RouterConfig(failure_threshold=2)
+    )
+    agent = Agent(router)
+
+    async def scenario():
+        # Another caller holds the busy endpoint's only slot
+        async with busy.slot():
+            return [(await agent.run("Hello")).output for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["idle"] * 3
+    busy_state = router.endpoints[0]
+    assert (busy_state.rejected, busy_state.failures) == (3, 0)
+    assert not busy_state.ejected
+    assert busy.as_dict()["rejected"] == 3
+
+
+if __name__ == "__main__":
+    test_concurrency_limit_on_endpoint()
+    test_priority_order()
+    test_backpressure_rejects_requests()
+    test_cancelled_waiters_do_not_leak_slots()
+    test_slot_wait_is_recorded_on_the_stage()
+    test_busy_endpoint_fails_over_without_ejection()
@@ -0,0 +1,154 @@
+"""
+test_market_data.py
+
+Tests the market data layer: loaders, vectorized indicators, the
+prompt summary and how the summary reaches the agents. No Ollama
+server is needed.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+from pydantic_ai.messages import ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.market_analyst_agent import market_analyst_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.bench_market_data import synthetic_history
+from market_data.indicators import (
+    IndicatorConfig,
+    compute_indicators,
+    summarize_indicators,
+    top_k
+)
+from market_data.loader import load_price_history, save_price_history
+from orchestrator.financial_orchestrator import (
+    run_investment_recommendations,
+    run_market_analysis
+)
+
+
+def recommendation(horizon: str) -> str:
+    """Returns a valid recommendation JSON for a horizon."""
+    return (
+        '{"asset_name": "NIFTY 50 ETF", "rationale": "Broad exposure with steady growth", '
+        f'"risk_level": "Medium", "expected_return": "10-12% annually", "time_horizon": "{horizon}"}}'
+    )
+
+
+def test_indicators_match_reference():
+    """Test vectorized indicators against a per-symbol reference."""
+    print("Testing vectorized indicators...")
+    print("=" * 50)
+
+    history = synthetic_history(n_symbols=6, n_days=300, seed=3)
+    close = history.close
+    # A suspension: the gap is forward-filled
+    close[-30:-25, 0] = np.nan
+    config = IndicatorConfig(momentum=20, volatility=30, drawdown=100, ma_short=10, ma_long=50)
+    table = compute_indicators(history, config)
+
+    for column in range(1, 6):
+        prices = close[:, column]
+        if np.isnan(prices[-config.lookback:]).any():
+            # Listed too recently for some indicators
+            continue
+        assert np.isclose(table.momentum[column], prices[-1] / prices[-21] - 1)
+        returns = np.diff(np.log(prices[-31:]))
+        assert np.isclose(table.volatility[column], returns.std(ddof=1) * np.sqrt(252))
+        window = prices[-100:]
+        worst = min(window[i] / window[:i + 1].max() - 1 for i in range(len(window)))
+        assert np.isclose(table.max_drawdown[column], worst)
+        assert np.isclose(table.trend[column], prices[-10:].mean() / prices[-50:].mean() - 1)
+
+    # The suspended symbol uses the last price before the gap
+    assert not np.isnan(table.momentum[0])
+
+    values = np.array([0.1, np.nan, 0.5, -0.2, 0.3])
+    assert list(top_k(values, 2)) == [2, 4]
+    assert list(top_k(values, 2, largest=False)) == [3, 0]
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_csv_loader_and_summary(tmp_path):
+    """Test pivoting long-format CSV rows into columnar arrays."""
+    path = tmp_path / "prices.csv"
+    lines = ["Date,Symbol,Close,Volume"]
+    for day in range(260):
+        date = np.datetime64("2025-10-01") + day
+        lines.append(f"{date},TCS,{100 + day},1000")
+        # INFY has no bar on some days
+        if day % 7:
+            lines.append(f"{date},INFY,{300 - day * 0.5},2000")
+    path.write_text("\n".join(lines))
+
+    history = load_price_history(str(path))
+    assert list(history.symbols) == ["INFY", "TCS"]
+    assert history.shape == (260, 2)
+    assert np.isnan(history.close[0, 0]) and history.close[0, 1] == 100
+    assert "volume" in history.fields
+
+    summary = summarize_indicators(compute_indicators(history), k=1)
+    assert "Strongest 63d momentum: TCS" in summary
+    assert "Weakest 63d momentum: INFY" in summary
+
+
+def test_memory_mapped_universe_is_fast(tmp_path):
+    """Test thousands of symbols x years of bars in well under a second."""
+    save_price_history(synthetic_history(n_symbols=2000, n_days=2520), str(tmp_path))
+
+    started = time.perf_counter()
+    history = load_price_history(str(tmp_path))
+    summary = summarize_indicators(compute_indicators(history))
+    elapsed = time.perf_counter() - started
+
+    assert isinstance(history.close, np.memmap)
+    assert summary.startswith("Market data as of 2026-10-16")
+    assert elapsed < 0.5, elapsed
+
+
+def test_summary_reaches_analyst_and_short_term_agent():
+    """Test that the summary is added to the analyst and short-term prompts only."""
+    prompts = {}
+
+    def responder(name, output):
+        def respond(messages, info):
+            parts = [part for part in messages[0].parts if isinstance(part, UserPromptPart)]
+            prompts[name] = parts[-1].content
+            return ModelResponse(parts=[TextPart(output)])
+        return FunctionModel(respond)
+
+    summary = "Market data as of 2026-10-16 (2 symbols):\n- Strongest 63d momentum: TCS +12.0%"
+
+    async def scenario():
+        with market_analyst_agent.override(model=responder("market_analyst", "Calm markets.")), \
+                short_term_investment_agent.override(
+                    model=responder("short_term", recommendation("Short-term"))), \
+                long_term_investment_agent.override(
+                    model=responder("long_term", recommendation("Long-term"))):
+            analysis, _, _ = await run_market_analysis(use_cache=False, market_data=summary)
+            return await run_investment_recommendations(
+                analysis, use_cache=False, market_data=summary
+            )
+
+    short_term, long_term = asyncio.run(scenario())
+    assert short_term.time_horizon == "Short-term"
+    assert long_term.time_horizon == "Long-term"
+    assert summary in prompts["market_analyst"]
+    assert summary in prompts["short_term"]
+    assert "Market Data" not in prompts["long_term"]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_indicators_match_reference()
+    with tempfile.TemporaryDirectory() as directory:
+        test_csv_loader_and_summary(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_memory_mapped_universe_is_fast(pathlib.Path(directory))
+    test_summary_reaches_analyst_and_short_term_agent()
@@ -0,0 +1,79 @@
+"""
+test_market_snapshot.py
+
+Tests the compact MarketSnapshot hand-off against the local stub
+LLM server. No Ollama server is needed.
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import MARKET_SNAPSHOT, StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import (
+    run_agentic_financial_advisor,
+    run_market_snapshot,
+    split_market_snapshot
+)
+from schemas.market_snapshot import MarketSnapshot
+from utils.llm_configuration import release_http_connections
+
+
+def test_snapshot_handoff():
+    """Test a full report with the snapshot hand-off."""
+    print("Testing the market snapshot hand-off...")
+    print("=" * 50)
+
+    config = StubConfig(ttft=0.01, per_token_latency=0.001)
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = run_agentic_financial_advisor(use_cache=False, handoff="snapshot")
+
+    # The snapshot came with the analysis: no extra extraction call
+    assert server.stats.requests == 3
+    assert report["market_snapshot"]["rates_trend"] == "Stable"
+    assert "SNAPSHOT:" not in report["market_analysis"]
+    assert report["market_analysis"] == config.market_text
+    assert report["long_term_investment"].time_horizon == "Long-term"
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_snapshot_extraction_fallback():
+    """Test extracting a snapshot with the Market Snapshot Agent."""
+    config = StubConfig(ttft=0.01, per_token_latency=0.001)
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                return await run_market_snapshot(config.market_text, use_cache=False)
+            finally:
+                await release_http_connections()
+
+        snapshot = asyncio.run(scenario())
+
+    assert snapshot == MarketSnapshot(**MARKET_SNAPSHOT)
+
+
+def test_split_and_serialize():
+    """Test splitting the inline snapshot and its compact form."""
+    line = json.dumps(MARKET_SNAPSHOT)
+    prose, snapshot = split_market_snapshot(f"Markets are calm.\nSNAPSHOT: {line}")
+    assert prose == "Markets are calm."
+    assert snapshot.to_prompt() == (
+        "sentiment=Cautiously optimistic; rates=Stable; "
+        "inflation=Easing towards target; "
+        "sectors=Banking:+0.7,IT:+0.5,FMCG:-0.3; "
+        "risks=Geopolitics,Crude oil prices"
+    )
+
+    # Missing or broken snapshot lines leave the text untouched
+    assert split_market_snapshot("Markets are calm.") == ("Markets are calm.", None)
+    assert split_market_snapshot("Calm.\nSNAPSHOT: {oops") == ("Calm.\nSNAPSHOT: {oops", None)
+
+
+if __name__ == "__main__":
+    test_snapshot_handoff()
+    test_snapshot_extraction_fallback()
+    test_split_and_serialize()
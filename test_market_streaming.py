@@ -0,0 +1,82 @@
+"""
+test_market_streaming.py
+
+Tests streaming of the market analysis against the local stub LLM
+server: tokens reach a caller-supplied sink as they are generated,
+and the time-to-first-token is reported and recorded. No Ollama
+server is needed.
+"""
+
+import asyncio
+import time
+
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import run_agentic_financial_advisor_async
+from utils.llm_configuration import release_http_connections
+from utils.telemetry import METRICS
+
+
+def test_tokens_reach_the_sink_early():
+    """Test that the sink gets the analysis token by token, well before the report."""
+    print("Testing market analysis streaming...")
+    print("=" * 50)
+
+    config = StubConfig(ttft=0.2, per_token_latency=0.005)
+    received = []
+
+    async def sink(token):
+        received.append((token, time.perf_counter()))
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                started = time.perf_counter()
+                report = await run_agentic_financial_advisor_async(
+                    use_cache=False, stream=True, sink=sink
+                )
+                return started, report, time.perf_counter()
+            finally:
+                await release_http_connections()
+
+        started, report, finished = asyncio.run(scenario())
+
+    tokens = [token for token, _ in received]
+    assert "".join(tokens) == config.market_text == report["market_analysis"]
+    assert len(tokens) > 10
+    # The first token arrives after the server's TTFT, long before the
+    # last token and the recommendations
+    first_seen = received[0][1] - started
+    assert 0.2 <= first_seen < received[-1][1] - started < finished - started
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_ttft_reported_and_recorded():
+    """Test that the report and the market_analyst stage record carry the TTFT."""
+    config = StubConfig(ttft=0.15, per_token_latency=0.001)
+
+    async def sink(token):
+        pass
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                return await run_agentic_financial_advisor_async(
+                    use_cache=False, stream=True, sink=sink
+                )
+            finally:
+                await release_http_connections()
+
+        report = asyncio.run(scenario())
+
+    timings = report["timings"]
+    assert 0.15 <= timings["market_analysis_ttft"] < timings["total"]
+    record = METRICS.recent("market_analyst")[-1]
+    assert record.ttft == timings["market_analysis_ttft"]
+    assert not record.cache_hit and record.completion_tokens > 0
+
+
+if __name__ == "__main__":
+    test_tokens_reach_the_sink_early()
+    test_ttft_reported_and_recorded()
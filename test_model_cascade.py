@@ -0,0 +1,135 @@
+"""
+test_model_cascade.py
+
+Tests cascade routing (cheap model first, escalate on failure)
+against the local stub LLM server. No Ollama server is needed.
+"""
+
+import asyncio
+
+from agents.long_term_investment_agent import long_term_investment_agent
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import RECOMMENDATIONS, StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import run_investment_recommendations
+from schemas.investment_schema import InvestmentRecommendation
+from utils.json_repair import REPAIR_STATS
+from utils.llm_configuration import get_llm_model, release_http_connections
+from utils.model_cascade import (
+    CASCADE_POLICIES,
+    CASCADE_STATS,
+    CascadePolicy,
+    default_confidence_rule
+)
+
+
+def test_model_cascade():
+    """Test that cheap answers are used when valid and escalated otherwise."""
+    print("Testing cascade routing...")
+    print("=" * 50)
+
+    # The cheap model produces malformed output half of the time.
+    config = StubConfig(
+        ttft=0.01,
+        per_token_latency=0.001,
+        model_malformed_rates={"tiny:latest": 0.5},
+        seed=7
+    )
+    saved_policies = dict(CASCADE_POLICIES)
+    CASCADE_STATS.clear()
+    REPAIR_STATS.clean = REPAIR_STATS.repaired = REPAIR_STATS.unrepairable = 0
+
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        for agent_name in ("short_term", "long_term"):
+            CASCADE_POLICIES[agent_name] = CascadePolicy(("tiny:latest",), base_url=server.base_url)
+
+        async def scenario():
+            try:
+                return [
+                    await run_investment_recommendations(
+                        "Markets are calm.", use_cache=False, cascade=True
+                    )
+                    for _ in range(8)
+                ]
+            finally:
+                await release_http_connections()
+
+        try:
+            outcomes = asyncio.run(scenario())
+        finally:
+            CASCADE_POLICIES.update(saved_policies)
+
+    # Every call ends with a valid recommendation
+    assert all(
+        isinstance(outcome, InvestmentRecommendation)
+        for pair in outcomes for outcome in pair
+    )
+
+    for agent_name in ("short_term", "long_term"):
+        cheap = CASCADE_STATS[f"{agent_name}/tiny:latest"]
+        final = CASCADE_STATS[f"{agent_name}/llama3.2:latest"]
+        assert cheap.attempts == 8
+        assert cheap.accepted + cheap.rejected + cheap.low_confidence + cheap.errors == 8
+        # Only calls the cheap tier could not answer were escalated
+        assert final.attempts == 8 - cheap.accepted
+        assert len(cheap.latencies) == 8
+
+    # Each returned output is counted once, not once per check
+    assert REPAIR_STATS.clean + REPAIR_STATS.repaired == 16
+    assert REPAIR_STATS.unrepairable == 0
+
+    assert any(CASCADE_STATS[f"{name}/tiny:latest"].accepted for name in ("short_term", "long_term"))
+    assert any(CASCADE_STATS[f"{name}/llama3.2:latest"].attempts for name in ("short_term", "long_term"))
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_final_tier_uses_active_model():
+    """Test that final-tier statistics name the model that actually ran."""
+    config = StubConfig(ttft=0.01, per_token_latency=0.001, model_malformed_rates={"tiny:latest": 1.0})
+    saved_policies = dict(CASCADE_POLICIES)
+    CASCADE_STATS.clear()
+
+    with StubLLMServer(config) as server:
+        model = get_llm_model("large:latest", base_url=server.base_url)
+        for agent_name in ("short_term", "long_term"):
+            CASCADE_POLICIES[agent_name] = CascadePolicy(("tiny:latest",), base_url=server.base_url)
+
+        async def scenario():
+            try:
+                return await run_investment_recommendations(
+                    "Markets are calm.", use_cache=False, cascade=True
+                )
+            finally:
+                await release_http_connections()
+
+        try:
+            with short_term_investment_agent.override(model=model), \
+                    long_term_investment_agent.override(model=model):
+                outcomes = asyncio.run(scenario())
+        finally:
+            CASCADE_POLICIES.update(saved_policies)
+
+    assert all(isinstance(outcome, InvestmentRecommendation) for outcome in outcomes)
+    for agent_name in ("short_term", "long_term"):
+        assert CASCADE_STATS[f"{agent_name}/large:latest"].accepted == 1
+        assert f"{agent_name}/llama3.2:latest" not in CASCADE_STATS
+
+
+def test_default_confidence_rule():
+    """Test the confidence rule on good and weak recommendations."""
+    good = InvestmentRecommendation(**RECOMMENDATIONS["Short-term"])
+    assert default_confidence_rule(good, "short-term") is None
+    assert default_confidence_rule(good, "long-term") is not None
+
+    placeholder = good.model_copy(update={"asset_name": "Name of the investment"})
+    assert default_confidence_rule(placeholder, "short-term") is not None
+
+    vague = good.model_copy(update={"expected_return": "Good returns"})
+    assert default_confidence_rule(vague, "short-term") is not None
+
+
+if __name__ == "__main__":
+    test_model_cascade()
+    test_final_tier_uses_active_model()
+    test_default_confidence_rule()
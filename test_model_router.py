@@ -0,0 +1,93 @@
+"""
+test_model_router.py
+
+Tests the multi-endpoint model router against several local stub
+LLM servers. No Ollama server is needed.
+"""
+
+import asyncio
+import time
+
+from agents.market_analyst_agent import market_analyst_agent
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from utils.llm_configuration import get_llm_model, release_http_connections
+from utils.model_router import RoutedModel, RouterConfig
+
+
+def test_model_router():
+    """Test least-loaded dispatch, ejection, failover and probing."""
+    print("Testing model router with three stub endpoints...")
+    print("=" * 50)
+
+    healthy = [StubLLMServer(StubConfig(ttft=0.05, per_token_latency=0.001)) for _ in range(2)]
+    broken = StubLLMServer(StubConfig(ttft=0.01, error_rate=1.0))
+    servers = healthy + [broken]
+    for server in servers:
+        server.start()
+
+    try:
+        router = RoutedModel(
+            [get_llm_model("llama3.2:latest", base_url=server.base_url) for server in servers],
+            RouterConfig(failure_threshold=1, ejection_seconds=0.5, max_ejection_seconds=0.5)
+        )
+
+        async def burst(count):
+            with market_analyst_agent.override(model=router):
+                results = await asyncio.gather(*(
+                    market_analyst_agent.run("Analyze current financial market conditions.")
+                    for _ in range(count)
+                ))
+            return [result.output for result in results]
+
+        async def scenario():
+            try:
+                first = await burst(6)
+                ejected_after_failures = router.endpoints[2].ejected
+
+                # The broken endpoint recovers; after the cooldown a
+                # probe request brings it back into rotation.
+                broken.config.error_rate = 0.0
+                await asyncio.sleep(0.6)
+                second = await burst(6)
+                return first + second, ejected_after_failures
+            finally:
+                await release_http_connections()
+
+        outputs, ejected_after_failures = asyncio.run(scenario())
+    finally:
+        for server in servers:
+            server.stop()
+
+    # Every call succeeded despite the failing endpoint (failover)
+    assert all(output.startswith("Global equity markets") for output in outputs)
+    assert ejected_after_failures
+    # Load was spread over both healthy endpoints
+    assert healthy[0].stats.requests >= 2 and healthy[1].stats.requests >= 2
+    # The recovered endpoint was probed back in
+    assert not router.endpoints[2].ejected
+    assert broken.stats.requests > broken.stats.errors
+
+    print(f"Endpoints: {router.snapshot()}")
+    print("\n✅ Test completed successfully!")
+
+
+def test_model_router_selection():
+    """Test that selection prefers fewer outstanding requests, then lower latency."""
+    router = RoutedModel([
+        get_llm_model("llama3.2:latest", base_url=f"http://127.0.0.1:{port}/v1")
+        for port in (1, 2, 3)
+    ])
+    first, second, third = router.endpoints
+    first.outstanding, second.outstanding, third.outstanding = 2, 1, 1
+    second.latency_ewma, third.latency_ewma = 0.9, 0.4
+    assert router.select_endpoint() is third
+
+    third.ejected_until = time.monotonic() + 60
+    assert router.select_endpoint() is second
+    assert router.select_endpoint(exclude=[second, first]) is third
+    assert router.model_name == "llama3.2:latest"
+
+
+if __name__ == "__main__":
+    test_model_router()
+    test_model_router_selection()
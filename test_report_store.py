@@ -0,0 +1,142 @@
+"""
+test_report_store.py
+
+Tests the report archive: appending, indexed queries that read only
+the matching reports, segment rollover, compaction and retention.
+No Ollama server is needed.
+"""
+
+import os
+from datetime import datetime
+
+from schemas.investment_schema import InvestmentRecommendation
+from storage.report_store import ReportStore
+
+DAY = 86400
+START = datetime(2026, 1, 1).timestamp()
+RISKS = ("Low", "Medium", "High")
+
+
+def report(number):
+    """A final report whose picks vary with the number."""
+    return {
+        "market_analysis": f"Analysis {number}: rates on hold, inflation easing.",
+        "short_term_investment": InvestmentRecommendation(
+            asset_name=("NIFTY 50 ETF", "Bank Nifty ETF")[number % 2],
+            rationale="Short-term momentum in large caps.",
+            risk_level=RISKS[number % 3],
+            expected_return="8-10% annually",
+            time_horizon="Short-term"
+        ),
+        "long_term_investment": {
+            "asset_name": "Gold ETF",
+            "rationale": "Hedge against inflation.",
+            "risk_level": "Low",
+            "expected_return": "7% annually",
+            "time_horizon": "Long-term"
+        },
+        "timing": {"total": 1.0},
+    }
+
+
+def fill(store, count):
+    """Appends one report per day, starting at START."""
+    return [store.append(report(number), created_at=START + number * DAY) for number in range(count)]
+
+
+def test_query_reads_only_matches(tmp_path):
+    """Test that filtered queries return the right picks and read only those reports."""
+    print("Testing the report store...")
+    print("=" * 50)
+
+    with ReportStore(str(tmp_path / "reports")) as store:
+        ids = fill(store, 120)
+
+        picks = store.query(
+            since="2026-02-01", until="2026-03-01", risk_level="high", horizon="Short-term"
+        )
+        expected = [
+            number for number in range(120)
+            if number % 3 == 2 and 31 <= number < 59
+        ]
+        assert [pick["report_id"] for pick in picks] == [ids[n] for n in reversed(expected)]
+        assert all(pick["risk_level"] == "High" and pick["horizon"] == "short-term" for pick in picks)
+        assert picks[0]["as_of"] == "2026-02-26"
+        assert "market_analysis" not in picks[0]
+        assert store.stats().frames_read == len(expected)
+
+        gold = store.query(asset_name="  gold   etf", limit=5)
+        assert len(gold) == 5 and gold[0]["report_id"] == ids[-1]
+
+        archived = store.get(ids[7])
+        assert archived["market_analysis"].startswith("Analysis 7")
+        assert archived["short_term_investment"]["asset_name"] == "Bank Nifty ETF"
+        assert "timing" not in archived
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_rollover_and_reopen(tmp_path):
+    """Test that small segments roll over and the store reopens intact."""
+    directory = str(tmp_path / "reports")
+    with ReportStore(directory, segment_bytes=2_000) as store:
+        fill(store, 40)
+        assert store.stats().segments > 3
+
+    with ReportStore(directory, segment_bytes=2_000) as store:
+        new_id = store.append(report(40), created_at=START + 40 * DAY)
+        assert store.stats().reports == 41
+        assert store.get(new_id)["market_analysis"].startswith("Analysis 40")
+        assert len(store.query(horizon="long")) == 41
+
+
+def test_compaction_and_retention(tmp_path):
+    """Test that compaction shrinks the store without changing answers."""
+    directory = str(tmp_path / "reports")
+    with ReportStore(directory, segment_bytes=4_000) as store:
+        fill(store, 200)
+        before = store.stats()
+        expected = store.query(risk_level="Medium", horizon="short")
+
+        summary = store.compact(older_than=START + 150 * DAY)
+        after = store.stats()
+        assert 0 < summary["segments"] < before.segments
+        assert after.segments < before.segments
+        assert after.stored_bytes < before.stored_bytes
+        assert store.query(risk_level="Medium", horizon="short") == expected
+
+        # Compacting again leaves the compacted segment alone
+        compacted = sorted(os.listdir(directory))
+        summary = store.compact(older_than=START + 150 * DAY)
+        assert summary["segments"] == 0 and summary["bytes_before"] == 0
+        assert sorted(os.listdir(directory)) == compacted
+        assert (store.stats().segments, store.stats().stored_bytes) == (after.segments, after.stored_bytes)
+
+        # Retention drops old reports from the data and the index
+        summary = store.compact(drop_before=START + 100 * DAY)
+        assert summary["dropped"] == 100
+        assert store.stats().reports == 100
+        assert store.stats().segments == 1
+        remaining = store.query(horizon="short")
+        assert len(remaining) == 100
+        assert min(pick["created_at"] for pick in remaining) == START + 100 * DAY
+
+        # New reports go after the compacted segment
+        new_id = store.append(report(200), created_at=START + 200 * DAY)
+        assert store.get(new_id)["market_analysis"].startswith("Analysis 200")
+
+    with ReportStore(directory) as store:
+        assert store.stats().reports == 101
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (
+        test_query_reads_only_matches,
+        test_rollover_and_reopen,
+        test_compaction_and_retention,
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
@@ -0,0 +1,91 @@
+"""
+test_response_cache.py
+
+Simple test script for the persistent response cache.
+Uses an in-process function model, so no Ollama server is needed.
+"""
+
+import asyncio
+import tempfile
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from utils.response_cache import ResponseCache, make_cache_key, register_system_prompt
+
+
+def test_response_cache():
+    """Test hits, misses, key sensitivity and the bypass flag."""
+    calls = []
+
+    def fake_model(messages, info):
+        calls.append(messages)
+        return ModelResponse(parts=[TextPart(f"answer {len(calls)}")])
+
+    agent = Agent(FunctionModel(fake_model), system_prompt="You are a test agent.")
+
+    print("Testing Response Cache...")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(directory=directory, enabled=True)
+
+        async def scenario():
+            first = await cache.run(agent, "market_analyst", "same prompt")
+            second = await cache.run(agent, "market_analyst", "same prompt")
+            other = await cache.run(agent, "market_analyst", "other prompt")
+            bypassed = await cache.run(
+                agent, "market_analyst", "same prompt", bypass=True
+            )
+            return first, second, other, bypassed
+
+        first, second, other, bypassed = asyncio.run(scenario())
+        cache.close()
+
+    assert first == ("answer 1", False)
+    assert second == ("answer 1", True)
+    assert other == ("answer 2", False)
+    assert bypassed == ("answer 3", False)
+    assert cache.summary()["market_analyst"] == {
+        "hits": 1, "misses": 2, "bypassed": 1
+    }
+
+    # Any change in settings must produce a different key
+    key_a = make_cache_key("m", {"temperature": 0.3}, "sys", "user")
+    key_b = make_cache_key("m", {"temperature": 0.7}, "sys", "user")
+    assert key_a != key_b
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_key_follows_override_and_system_prompt():
+    """Test that keys use the overriding model and the registered system prompt."""
+    def model(name):
+        return FunctionModel(
+            lambda messages, info: ModelResponse(parts=[TextPart(name)]), model_name=name
+        )
+
+    agent = register_system_prompt(Agent(model("base"), system_prompt="Prompt A."), "Prompt A.")
+    other = register_system_prompt(Agent(model("base"), system_prompt="Prompt B."), "Prompt B.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(directory=directory, enabled=True)
+        base_key = cache.key_for(agent, "same prompt")
+        assert cache.key_for(other, "same prompt") != base_key
+
+        with agent.override(model=model("overridden")):
+            overridden_key = cache.key_for(agent, "same prompt")
+            output, _ = asyncio.run(cache.run(agent, "market_analyst", "same prompt"))
+        assert overridden_key != base_key
+        assert cache.key_for(agent, "same prompt") == base_key
+
+        # The override's answer is not served to the base model
+        assert output == "overridden"
+        assert asyncio.run(cache.run(agent, "market_analyst", "same prompt")) == ("base", False)
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_response_cache()
+    test_key_follows_override_and_system_prompt()
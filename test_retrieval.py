@@ -0,0 +1,155 @@
+"""
+test_retrieval.py
+
+Tests the BM25 research index: incremental updates from a
+directory, ranking, deletions, segment merging, prompt-budget
+selection and injection into the analyst prompt. No Ollama server
+is needed.
+"""
+
+import asyncio
+import os
+import time
+
+from pydantic_ai.messages import ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.function import FunctionModel
+
+from agents.market_analyst_agent import market_analyst_agent
+from benchmarks.bench_retrieval import QUERIES, synthetic_documents
+from orchestrator.financial_orchestrator import run_market_analysis
+from retrieval.bm25_index import BM25Index, research_context
+from retrieval.passages import Passage, select_passages, split_passages
+
+RBI_NOTE = (
+    "The RBI held the repo rate at 6.5% as inflation eased toward target.\n\n"
+    "Bank credit growth stayed strong, supporting lender margins."
+)
+CRUDE_NOTE = "Crude oil rose on supply cuts, pressuring the rupee and the import bill."
+
+
+def write(directory, name, text, mtime=None):
+    """Writes a corpus file, optionally with a fixed modification time."""
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_incremental_directory_index(tmp_path):
+    """Test that only new, changed and removed files are processed."""
+    print("Testing the BM25 research index...")
+    print("=" * 50)
+
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write(corpus, "rbi.md", RBI_NOTE)
+    write(corpus, "crude.txt", CRUDE_NOTE)
+    write(corpus, "image.png", "not text")
+    index_path = str(tmp_path / "research.bm25")
+
+    with BM25Index(index_path) as index:
+        update = index.update_from_directory(str(corpus))
+        assert (update.added, update.unchanged) == (2, 0)
+        assert index.search("repo rate inflation", 1)[0].source == "rbi.md"
+        assert index.search("rupee crude", 1)[0].source == "crude.txt"
+        assert index.search("cryptocurrency", 5) == []
+
+    with BM25Index(index_path) as index:
+        # Nothing changed: nothing is re-read
+        assert index.update_from_directory(str(corpus)).unchanged == 2
+
+        write(corpus, "crude.txt", "Gold prices hit a record as the dollar weakened.", mtime=1)
+        os.remove(corpus / "rbi.md")
+        update = index.update_from_directory(str(corpus))
+        assert (update.updated, update.removed) == (1, 1)
+
+        # Old text is never returned, in the same process...
+        assert index.search("crude rupee repo", 5) == []
+        assert index.search("gold record", 1)[0].source == "crude.txt"
+
+    # ...or after reopening and merging segments
+    with BM25Index(index_path) as index:
+        assert index.search("crude rupee repo", 5) == []
+        index.merge_segments()
+        assert index.segment_count() == 1
+        assert index.search("gold dollar", 1)[0].source == "crude.txt"
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_passages_and_budget():
+    """Test passage splitting and token-budget selection."""
+    text = "\n\n".join(["short paragraph here"] * 5 + ["word " * 300])
+    passages = split_passages(text, passage_words=120)
+    assert passages[0] == " ".join(["short paragraph here"] * 5)
+    assert [len(passage.split()) for passage in passages[1:]] == [120, 120, 60]
+
+    candidates = [
+        Passage(1, "a.md", "alpha " * 90, 9.0),
+        Passage(2, "a.md", "beta " * 10, 8.0),
+        Passage(3, "a.md", "gamma " * 10, 7.0),   # third from a.md
+        Passage(4, "b.md", "delta " * 300, 6.0),  # does not fit
+        Passage(5, "c.md", "epsilon " * 10, 5.0),
+    ]
+    selected = select_passages(candidates, token_budget=150, per_source=2)
+    assert [passage.passage_id for passage in selected] == [1, 2, 5]
+
+
+def test_query_latency(tmp_path):
+    """Test that queries stay in the low milliseconds."""
+    index_path = str(tmp_path / "bench.bm25")
+    with BM25Index(index_path, flush_postings=50_000) as index:
+        for name, text in synthetic_documents(5_000):
+            index.add_document(name, text)
+        assert index.segment_count() > 1
+
+    with BM25Index(index_path) as index:
+        index.search("warm up", 1)
+        started = time.perf_counter()
+        for query in QUERIES:
+            assert index.search(query, 10)
+        average = (time.perf_counter() - started) / len(QUERIES)
+    assert average < 0.02, average
+
+
+def test_research_reaches_analyst_prompt(tmp_path):
+    """Test that selected passages are added to the analyst prompt."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write(corpus, "rbi.md", RBI_NOTE)
+    index_path = str(tmp_path / "research.bm25")
+    with BM25Index(index_path) as index:
+        index.update_from_directory(str(corpus))
+
+    research = research_context(index_path, token_budget=200)
+    assert research.startswith("[1] (rbi.md) The RBI held the repo rate")
+
+    prompts = []
+
+    def respond(messages, info):
+        parts = [part for part in messages[0].parts if isinstance(part, UserPromptPart)]
+        prompts.append(parts[-1].content)
+        return ModelResponse(parts=[TextPart("Rates are on hold.")])
+
+    async def scenario():
+        with market_analyst_agent.override(model=FunctionModel(respond)):
+            return await run_market_analysis(use_cache=False, research=research)
+
+    analysis, _, _ = asyncio.run(scenario())
+    assert analysis == "Rates are on hold."
+    assert f"Research Notes:\n{research}" in prompts[0]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    for test in (
+        test_incremental_directory_index,
+        test_query_latency,
+        test_research_reaches_analyst_prompt,
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    test_passages_and_budget()
@@ -0,0 +1,92 @@
+"""
+test_startup.py
+
+Tests fast start-up: lazy agent construction (no PydanticAI import
+until an agent is used) and the model warm-up against the stub
+server's simulated model load. No Ollama server is needed.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import run_agentic_financial_advisor_async
+from utils.llm_configuration import release_http_connections
+from utils.model_warmup import advisor_models, warm_up
+
+
+def run_python(code: str) -> str:
+    """Runs code in a fresh interpreter and returns its output."""
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_agents_are_built_lazily():
+    """Test that importing main builds no agent and imports no PydanticAI."""
+    print("Testing lazy agent construction...")
+    print("=" * 50)
+
+    output = run_python(
+        "import sys, main\n"
+        "import agents.market_analyst_agent as module\n"
+        "print('pydantic_ai' in sys.modules, 'openai' in sys.modules,"
+        " 'market_analyst_agent' in vars(module))\n"
+        "from agents.market_analyst_agent import market_analyst_agent\n"
+        "print('pydantic_ai' in sys.modules,"
+        " market_analyst_agent is module.get_market_analyst_agent())\n"
+    )
+    assert output.splitlines() == ["False False False", "True True"]
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_warmup_preloads_models():
+    """Test that a warmed-up endpoint skips the model load on the first report."""
+    config = StubConfig(ttft=0.01, per_token_latency=0.0, load_time=0.5)
+
+    def first_report(warm: bool):
+        with StubLLMServer(config) as server, agents_using(server.base_url):
+            results = warm_up([("llama3.2:latest", server.base_url)], keep_alive="1h") if warm else []
+
+            async def scenario():
+                try:
+                    started = time.perf_counter()
+                    await run_agentic_financial_advisor_async(use_cache=False)
+                    return time.perf_counter() - started
+                finally:
+                    await release_http_connections()
+
+            return asyncio.run(scenario()), results, server.stats
+
+    cold_seconds, _, cold_stats = first_report(warm=False)
+    warm_seconds, results, warm_stats = first_report(warm=True)
+
+    assert cold_stats.loads == 1 and cold_seconds >= 0.5
+    assert [result.ok for result in results] == [True]
+    assert results[0].seconds >= 0.5
+    assert warm_stats.loads == 1 and warm_stats.keep_alive == "1h"
+    assert warm_seconds < cold_seconds - 0.3
+
+
+def test_warmup_targets_and_failures():
+    """Test the preloaded (model, endpoint) pairs and unreachable endpoints."""
+    endpoints = "http://gpu-1:11434/v1,http://gpu-2:11434/v1"
+    assert advisor_models(base_url=endpoints) == [
+        ("llama3.2:latest", "http://gpu-1:11434/v1"),
+        ("llama3.2:latest", "http://gpu-2:11434/v1"),
+    ]
+    assert ("llama3.2:1b", "http://localhost:11434/v1") in advisor_models(cascade=True)
+
+    # Failures are reported, not raised
+    results = warm_up([("llama3.2:latest", "http://127.0.0.1:9/v1")], timeout=2)
+    assert not results[0].ok and "ConnectError" in results[0].error
+
+
+if __name__ == "__main__":
+    test_agents_are_built_lazily()
+    test_warmup_preloads_models()
+    test_warmup_targets_and_failures()
@@ -0,0 +1,101 @@
+"""
+test_streaming_json_validator.py
+
+Simple test script for the incremental streaming JSON validator.
+No Ollama server is needed.
+"""
+
+import asyncio
+
+from pydantic_ai import Agent
+from pydantic_ai.models.function import FunctionModel
+
+from orchestrator.financial_orchestrator import (
+    RejectedOutputError,
+    _validated_stream_generator,
+    OutputValidationStats
+)
+from utils.streaming_json_validator import (
+    IncrementalRecommendationValidator,
+    StreamValidationError
+)
+
+VALID_JSON = (
+    '{"asset_name": "NIFTY 50 ETF", "rationale": "Broad exposure", '
+    '"risk_level": "Medium", "expected_return": "10-12%", '
+    '"time_horizon": "Short-term"}'
+)
+
+
+def _feed_in_chunks(text: str, size: int = 7):
+    validator = IncrementalRecommendationValidator()
+    for start in range(0, len(text), size):
+        if validator.feed(text[start:start + size]):
+            break
+    return validator
+
+
+def test_streaming_json_validator():
+    """Test early completion and early rejection."""
+    print("Testing Streaming JSON Validator...")
+    print("=" * 50)
+
+    # Stops at the closing brace and ignores trailing text
+    validator = _feed_in_chunks("```json\n" + VALID_JSON + "\n``` Enjoy!")
+    assert validator.complete
+    assert validator.text.endswith("}")
+
+    rejected_outputs = {
+        "prose": "Sure! Here is the JSON: " + VALID_JSON,
+        "unknown key": '{"asset_name": "X", "confidence": "high"}',
+        "bad risk level": '{"asset_name": "X", "risk_level": "Moderate"}',
+        "missing fields": '{"asset_name": "X"}',
+        "non-string value": '{"asset_name": 42}',
+    }
+    for label, output in rejected_outputs.items():
+        try:
+            validator = _feed_in_chunks(output)
+        except StreamValidationError as error:
+            print(f"Rejected ({label}): {error}")
+        else:
+            raise AssertionError(f"Output should be rejected: {label}")
+
+    # A bad risk level is rejected before the value is finished
+    validator = IncrementalRecommendationValidator()
+    try:
+        validator.feed('{"asset_name": "X", "risk_level": "Mod')
+    except StreamValidationError:
+        pass
+    else:
+        raise AssertionError("Invalid prefix should be rejected early")
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_stream_is_cancelled_early():
+    """Test that a rejected generation stops consuming tokens."""
+    produced = []
+
+    async def stream_function(messages, info):
+        for token in ["I think ", "you should ", "buy ", "gold ", "now."]:
+            produced.append(token)
+            yield token
+
+    agent = Agent(FunctionModel(stream_function=stream_function))
+    stats = OutputValidationStats()
+    generate = _validated_stream_generator(agent, stats)
+
+    try:
+        asyncio.run(generate("Recommend something."))
+    except RejectedOutputError:
+        pass
+    else:
+        raise AssertionError("Prose output should be rejected")
+
+    assert stats.early_aborts == 1
+    assert len(produced) < 5
+
+
+if __name__ == "__main__":
+    test_streaming_json_validator()
+    test_stream_is_cancelled_early()
@@ -0,0 +1,107 @@
+"""
+test_structured_output.py
+
+Tests schema-constrained decoding for the investment agents against
+the local stub LLM server: the response_format payload, and
+validation statistics kept apart from the prompt-only mode. No
+Ollama server is needed.
+"""
+
+import asyncio
+
+import pytest
+
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import RECOMMENDATIONS, StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import (
+    VALIDATION_STATS,
+    RejectedOutputError,
+    _run_investment_agent,
+    run_investment_recommendations
+)
+from schemas.investment_schema import InvestmentRecommendation
+from utils.llm_configuration import release_http_connections
+
+
+def run_with_stub(config: StubConfig, coroutine_factory):
+    """Runs a coroutine with every agent pointed at a stub server; returns (result, server)."""
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            try:
+                return await coroutine_factory()
+            finally:
+                await release_http_connections()
+        return asyncio.run(scenario()), server
+
+
+def test_schema_sent_as_response_format():
+    """Test that structured output sends InvestmentRecommendation's JSON Schema."""
+    print("Testing structured output...")
+    print("=" * 50)
+
+    config = StubConfig(ttft=0.01, per_token_latency=0.0)
+    outcomes, server = run_with_stub(config, lambda: run_investment_recommendations(
+        "Markets are calm.", use_cache=False, structured_output=True
+    ))
+
+    assert [outcome.time_horizon for outcome in outcomes] == ["Short-term", "Long-term"]
+    assert server.stats.requests == 2
+    assert server.stats.response_formats == [{
+        "type": "json_schema",
+        "json_schema": {
+            "name": "InvestmentRecommendation",
+            "schema": InvestmentRecommendation.model_json_schema(),
+            "strict": True
+        }
+    }] * 2
+
+    # Prompt-only mode sends no schema
+    _, server = run_with_stub(config, lambda: run_investment_recommendations(
+        "Markets are calm.", use_cache=False
+    ))
+    assert server.stats.requests == 2 and server.stats.response_formats == []
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_retries_counted_per_output_mode():
+    """Test that correction retries are counted separately for prompt and schema mode."""
+    saved = dict(VALIDATION_STATS)
+    VALIDATION_STATS.clear()
+    # Valid JSON, but not an accepted risk level: every answer needs a correction
+    rejected = StubConfig(ttft=0.01, per_token_latency=0.0, recommendations={
+        **RECOMMENDATIONS,
+        "Short-term": {**RECOMMENDATIONS["Short-term"], "risk_level": "Moderate"}
+    })
+    clean = StubConfig(ttft=0.01, per_token_latency=0.0)
+
+    def run_short_term(structured_output):
+        return lambda: _run_investment_agent(
+            short_term_investment_agent, "short_term", "Markets are calm.", "short-term",
+            use_cache=False, structured_output=structured_output
+        )
+
+    try:
+        with pytest.raises(RejectedOutputError, match="Low, Medium or High"):
+            run_with_stub(rejected, run_short_term(False))
+        recommendation, server = run_with_stub(clean, run_short_term(True))
+        stats = {key: value.as_dict() for key, value in VALIDATION_STATS.items()}
+    finally:
+        VALIDATION_STATS.clear()
+        VALIDATION_STATS.update(saved)
+
+    assert recommendation.time_horizon == "Short-term"
+    assert len(server.stats.response_formats) == 1
+    assert sorted(stats) == ["short_term/prompt", "short_term/schema"]
+
+    prompt, schema = stats["short_term/prompt"], stats["short_term/schema"]
+    assert (prompt["generations"], prompt["failures"], prompt["corrections"]) == (3, 3, 2)
+    assert prompt["failure_rate"] == 1.0
+    assert (schema["generations"], schema["failures"], schema["corrections"]) == (1, 0, 0)
+    assert schema["failure_rate"] == 0.0
+
+
+if __name__ == "__main__":
+    test_schema_sent_as_response_format()
+    test_retries_counted_per_output_mode()
@@ -0,0 +1,67 @@
+"""
+test_stub_end_to_end.py
+
+End-to-end test of the orchestrator against the local stub
+LLM server. No Ollama server is needed.
+"""
+
+import asyncio
+import time
+
+from agents.short_term_investment_agent import short_term_investment_agent
+from benchmarks.bench_advisor import agents_using
+from benchmarks.stub_llm_server import StubConfig, StubLLMServer
+from orchestrator.financial_orchestrator import (
+    OutputValidationStats,
+    RejectedOutputError,
+    _validated_stream_generator,
+    run_agentic_financial_advisor
+)
+from utils.llm_configuration import release_http_connections
+
+
+def test_stub_end_to_end():
+    """Test a full report over HTTP against the stub server."""
+    print("Testing orchestrator against the stub LLM server...")
+    print("=" * 50)
+
+    config = StubConfig(ttft=0.01, per_token_latency=0.001)
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        report = run_agentic_financial_advisor(use_cache=False)
+
+    assert report["market_analysis"].startswith("Global equity markets")
+    assert report["short_term_investment"].time_horizon == "Short-term"
+    assert report["long_term_investment"].time_horizon == "Long-term"
+    assert server.stats.requests == 3
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_stub_cancelled_stream():
+    """Test that a rejected streamed generation is cut off server-side."""
+    config = StubConfig(ttft=0.01, per_token_latency=0.005, malformed_rate=1.0, seed=3)
+    with StubLLMServer(config) as server, agents_using(server.base_url):
+        async def scenario():
+            generate = _validated_stream_generator(
+                short_term_investment_agent, OutputValidationStats()
+            )
+            rejected = 0
+            for _ in range(4):
+                try:
+                    await generate("Provide a short-term investment recommendation.")
+                except RejectedOutputError:
+                    rejected += 1
+            await release_http_connections()
+            return rejected
+
+        rejected = asyncio.run(scenario())
+        # Give the server a moment to notice the closed connections
+        time.sleep(0.2)
+
+    assert rejected >= 1
+    assert server.stats.streams_cancelled >= 1
+
+
+if __name__ == "__main__":
+    test_stub_end_to_end()
+    test_stub_cancelled_stream()
@@ -0,0 +1,80 @@
+"""
+test_telemetry.py
+
+Simple test script for per-stage telemetry.
+No Ollama server is needed.
+"""
+
+import time
+
+from utils.telemetry import (
+    METRICS,
+    MetricsCollector,
+    StageRecord,
+    percentile,
+    record_queue_wait,
+    record_ttft,
+    stage_span
+)
+
+
+def test_telemetry():
+    """Test stage records and percentile summaries."""
+    print("Testing Telemetry...")
+    print("=" * 50)
+
+    METRICS.clear()
+    for ttft in (0.1, 0.2, 0.3):
+        with stage_span("market_analyst") as record:
+            record_ttft(ttft)
+            record.prompt_tokens += 100
+            record.completion_tokens += 10
+
+    snapshot = METRICS.snapshot()
+    stage = snapshot["stages"]["market_analyst"]
+    assert stage["count"] == 3
+    assert stage["prompt_tokens"] == 300
+    assert stage["ttft"]["p50"] == 0.2
+    assert percentile([1, 2, 3, 4], 99) == 4
+    assert percentile([], 50) is None
+
+    print("\n✅ Test completed successfully!")
+
+
+def test_records_are_bounded():
+    """Test that totals cover every record but only recent ones are kept."""
+    collector = MetricsCollector(window=10)
+    for seconds in range(100):
+        collector.add(StageRecord("short_term", generation_seconds=seconds, prompt_tokens=1))
+    collector.add(StageRecord("long_term", generation_seconds=1.0))
+
+    assert len(collector.records) == 10
+    assert [r.generation_seconds for r in collector.recent("short_term")] == list(range(90, 100))
+    assert collector.recent("market_analyst") == ()
+
+    snapshot = collector.snapshot(include_records=False)
+    assert "records" not in snapshot
+    stage = snapshot["stages"]["short_term"]
+    assert (stage["count"], stage["prompt_tokens"]) == (100, 100)
+    # Percentiles describe the recent window
+    assert stage["generation_seconds"]["p50"] == 94
+
+
+def test_waits_inside_a_stage_are_queue_wait():
+    """Test that recorded waits move from generation time to queue wait."""
+    queued_at = time.perf_counter() - 0.5
+    with stage_span("short_term", queued_at) as record:
+        # Stands in for waiting on a scheduler slot
+        time.sleep(0.1)
+        record_queue_wait(0.1)
+
+    assert record.queue_wait >= 0.6
+    assert 0 <= record.generation_seconds < 0.05
+    # Outside a stage there is nothing to charge
+    record_queue_wait(1.0)
+
+
+if __name__ == "__main__":
+    test_telemetry()
+    test_records_are_bounded()
+    test_waits_inside_a_stage_are_queue_wait()
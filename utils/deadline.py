@@ -0,0 +1,116 @@
+"""
+
+Request Deadlines
+
+Purpose:
+    This file defines end-to-end deadlines for advisory reports: a
+    caller sets one deadline for the whole report, and every agent
+    call made on its behalf is cancelled when that deadline expires.
+
+Why this file exists:
+    Agent calls had no time limit, so one stalled Ollama generation
+    kept the whole report waiting indefinitely. Timeouts per call
+    do not help much: three calls with 30-second timeouts can still
+    take 90 seconds. A single deadline, carried in a ContextVar,
+    reaches every coroutine and task started for the report without
+    threading a parameter through every function, and nested scopes
+    can only shorten it.
+
+    Cancelling the waiting coroutine also closes its HTTP request,
+    which makes Ollama stop the generation instead of finishing it
+    for nobody.
+
+Usage:
+    with deadline_scope(20.0):
+        analysis = await within_deadline(run_analysis(), "market_analyst")
+"""
+
+# Standard library imports
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Absolute deadline (time.monotonic() value) of the current request.
+_DEADLINE = ContextVar("advisor_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage is cancelled because the deadline expired."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"{stage} did not finish before the deadline")
+        self.stage = stage
+
+
+@contextmanager
+def deadline_scope(seconds: float = None):
+    """
+    Sets the deadline for code (and tasks) started inside the block.
+
+    Args:
+        seconds (float):
+            Time budget from now. None leaves the current deadline
+            (if any) unchanged. A nested scope never extends an
+            outer deadline.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(deadline if current is None else min(deadline, current))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def deadline_at() -> float:
+    """The current deadline as a time.monotonic() value, or None."""
+    return _DEADLINE.get()
+
+
+def remaining() -> float:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _DEADLINE.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def within_deadline(awaitable, stage: str):
+    """
+    Awaits an agent call, cancelling it when the deadline expires.
+
+    Args:
+        awaitable:
+            The coroutine to run.
+
+        stage (str):
+            Stage name used in the DeadlineExceeded message.
+
+    Returns:
+        The awaitable's result.
+
+    Raises:
+        DeadlineExceeded: The deadline expired first (or already had).
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Never started: close the coroutine to avoid a warning
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(stage)
+
+    timeout = asyncio.timeout(left)
+    try:
+        async with timeout:
+            return await awaitable
+    except TimeoutError:
+        # Only our own expiry is a missed deadline; other timeouts
+        # (connect, read, ...) keep their meaning
+        if timeout.expired():
+            raise DeadlineExceeded(stage) from None
+        raise
@@ -0,0 +1,251 @@
+"""
+
+Generation Profiles
+
+Purpose:
+    This file defines per-agent generation settings: token budget
+    (max_tokens), stop sequences and temperature.
+
+Why this file exists:
+    Generation length is the main driver of latency: every output
+    token costs one decoding step. get_llm_model() applies the same
+    max_tokens=2000 to every agent, although:
+    - the JSON recommendation agents need about 150 tokens and can
+      stop right after the closing brace of the object
+    - the market analyst only needs a concise overview, but keeps
+      going until it hits the cap
+
+    Each agent gets a profile sized for its job. Profiles are
+    applied as the agent's own model settings, so they override
+    the model defaults and are part of the response-cache key.
+
+Adaptive budgets:
+    When enabled (configure_adaptive_budgets() or
+    ADVISOR_ADAPTIVE_BUDGETS=1), max_tokens is derived from the
+    observed output lengths of recent stages (see utils.telemetry):
+    the chosen percentile plus headroom, rounded up to a multiple
+    of `granularity` (so the budget, and with it the cache key,
+    changes rarely) and never above the profile's max_tokens.
+
+Stop sequences:
+    The API does not return the stop sequence itself, so JSON
+    agents that stop on "}" receive the object without its
+    closing brace. restore_json_stop() puts it back before the
+    output is validated or cached. A "}" inside a string value
+    stops the generation too; that truncated output is left to
+    the repair stage and the correction retry.
+"""
+
+# Standard library imports
+import math
+import os
+from dataclasses import dataclass
+
+# Observed output lengths come from the per-stage telemetry records
+from utils.telemetry import METRICS, percentile
+
+
+# -------------------------------------------------------------------
+# Static Profiles
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class GenerationProfile:
+    """
+    Generation settings for one agent.
+
+    Attributes:
+        max_tokens (int): Upper bound on the output length.
+        temperature (float): Sampling temperature.
+        stop_sequences (tuple): Strings that end the generation.
+    """
+
+    max_tokens: int
+    temperature: float = 0.3
+    stop_sequences: tuple = ()
+
+    def model_settings(self) -> dict:
+        """Returns the profile as PydanticAI model settings."""
+        settings = {
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        if self.stop_sequences:
+            settings["stop_sequences"] = list(self.stop_sequences)
+        return settings
+
+
+# Profiles per agent name (the same names as the cache and telemetry).
+GENERATION_PROFILES = {
+    # A concise overview: a few paragraphs, not 2000 tokens.
+    "market_analyst": GenerationProfile(max_tokens=768, temperature=0.3),
+
+    # Short extraction into a nested JSON object (no "}" stop:
+    # the sector list contains objects of its own).
+    "market_snapshot": GenerationProfile(max_tokens=256, temperature=0.0),
+
+    # One flat JSON object: ~150 tokens, done at the first "}".
+    "short_term": GenerationProfile(max_tokens=320, temperature=0.2, stop_sequences=("}",)),
+    "long_term": GenerationProfile(max_tokens=320, temperature=0.2, stop_sequences=("}",)),
+
+    # Session follow-ups: a short answer, not another full report.
+    "follow_up": GenerationProfile(max_tokens=384, temperature=0.3),
+
+    # Running session summary: one short paragraph. The budget also
+    # bounds the summary that every later follow-up prompt carries.
+    "conversation_summary": GenerationProfile(max_tokens=160, temperature=0.0),
+}
+
+# Used for agents without a profile (the get_llm_model() defaults).
+DEFAULT_PROFILE = GenerationProfile(max_tokens=2000, temperature=0.3)
+
+
+def get_generation_profile(agent_name: str) -> GenerationProfile:
+    """Returns the generation profile of an agent."""
+    return GENERATION_PROFILES.get(agent_name, DEFAULT_PROFILE)
+
+
+def restore_json_stop(output):
+    """
+    Adds back closing braces removed by a "}" stop sequence.
+
+    Only braces outside string literals are counted. A "}" inside a
+    string value also triggers the stop, leaving the output cut off
+    inside that string: such outputs are returned unchanged, for the
+    repair stage or a correction retry to handle.
+
+    Args:
+        output:
+            Raw agent output.
+
+    Returns:
+        The output with its braces balanced; non-string outputs,
+        balanced strings and strings ending inside a string literal
+        are returned unchanged.
+    """
+    if not isinstance(output, str):
+        return output
+    missing = 0
+    in_string = escaped = False
+    for char in output:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            missing += 1
+        elif char == "}":
+            missing -= 1
+    if in_string or missing <= 0:
+        return output
+    return output.rstrip() + "\n" + "}" * missing
+
+
+# -------------------------------------------------------------------
+# Adaptive Budgets
+# -------------------------------------------------------------------
+@dataclass
+class AdaptiveBudgetConfig:
+    """
+    Settings of adaptive token budgets.
+
+    Attributes:
+        enabled (bool): Whether budgets adapt at all.
+        percentile (float): Output-length percentile to cover.
+        headroom (float): Multiplier applied to that percentile.
+        min_samples (int): Stages observed before adapting.
+        window (int): Most recent stages considered per agent.
+        granularity (int): Budgets are rounded up to a multiple of this.
+        floor (int): Smallest budget ever used.
+    """
+
+    enabled: bool = os.getenv("ADVISOR_ADAPTIVE_BUDGETS", "") in ("1", "true", "yes")
+    percentile: float = 95
+    headroom: float = 1.25
+    min_samples: int = 20
+    window: int = 200
+    granularity: int = 64
+    floor: int = 64
+
+
+ADAPTIVE_BUDGETS = AdaptiveBudgetConfig()
+
+
+def configure_adaptive_budgets(**changes) -> AdaptiveBudgetConfig:
+    """
+    Updates the adaptive budget settings.
+
+    Example:
+        configure_adaptive_budgets(enabled=True, percentile=99)
+    """
+    for name, value in changes.items():
+        if not hasattr(ADAPTIVE_BUDGETS, name):
+            raise TypeError(f"Unknown adaptive budget setting: {name}")
+        setattr(ADAPTIVE_BUDGETS, name, value)
+    return ADAPTIVE_BUDGETS
+
+
+def observed_output_lengths(agent_name: str) -> list:
+    """
+    Returns completion tokens per model request for the agent's
+    most recent generated stages (cache hits are skipped).
+    """
+    lengths = [
+        record.completion_tokens / record.requests
+        for record in METRICS.recent(agent_name)
+        if record.requests
+    ]
+    return lengths[-ADAPTIVE_BUDGETS.window:]
+
+
+def adaptive_max_tokens(agent_name: str) -> int:
+    """
+    Returns the adaptive token budget of an agent.
+
+    Returns:
+        int:
+            The budget, or None while adaptive budgets are disabled
+            or fewer than min_samples stages have been observed.
+    """
+    config = ADAPTIVE_BUDGETS
+    if not config.enabled:
+        return None
+    lengths = observed_output_lengths(agent_name)
+    if len(lengths) < config.min_samples:
+        return None
+
+    budget = percentile(lengths, config.percentile) * config.headroom
+    budget = math.ceil(budget / config.granularity) * config.granularity
+    ceiling = get_generation_profile(agent_name).max_tokens
+    return int(min(max(budget, config.floor), ceiling))
+
+
+def generation_settings(agent_name: str) -> dict:
+    """
+    Returns per-run model settings for an agent.
+
+    The static profile is already applied by the agent itself; this
+    only carries the adaptive budget, when there is one.
+
+    Returns:
+        dict:
+            {"max_tokens": budget}, or None.
+    """
+    budget = adaptive_max_tokens(agent_name)
+    return {"max_tokens": budget} if budget is not None else None
+
+
+def budget_summary() -> dict:
+    """Returns the static and effective max_tokens of every profile."""
+    return {
+        agent_name: {
+            "profile_max_tokens": profile.max_tokens,
+            "adaptive_max_tokens": adaptive_max_tokens(agent_name),
+            "observed_p95": percentile(observed_output_lengths(agent_name), 95),
+        }
+        for agent_name, profile in GENERATION_PROFILES.items()
+    }
@@ -0,0 +1,271 @@
+"""
+
+Hedged Requests
+
+Purpose:
+    This file defines hedging policies: when an agent call is still
+    running after its usual (p95) latency, a duplicate request is
+    sent to a second endpoint or model, and whichever answer
+    arrives first is used. The slower request is cancelled.
+
+Why this file exists:
+    Most generations finish close to their typical latency, but a
+    few stall: a busy GPU, a model being swapped in, a slow node.
+    Waiting out those stragglers sets the report's tail latency.
+    Duplicating every call would halve throughput; duplicating only
+    the calls already slower than p95 costs about 5% extra requests
+    and cuts the tail to roughly p95 plus one normal generation.
+
+    The delay is learned from the call latencies observed so far
+    (per agent). Until enough calls have been seen, a policy either
+    uses its fixed delay or does not hedge at all.
+
+Configuration:
+    Policies are keyed by agent name. The backup can also be set
+    with environment variables:
+
+        ADVISOR_HEDGE_ENDPOINTS=http://gpu-2:11434/v1 python main.py --hedge
+        ADVISOR_HEDGE_MODEL=llama3.2:1b python main.py --hedge
+
+    Without either, the duplicate goes to the agent's own model on
+    the default endpoints. That only helps with several
+    OLLAMA_ENDPOINTS (the router sends it to another server); with
+    a single endpoint the backup would repeat the primary request,
+    so the call is not hedged and a RuntimeWarning is issued.
+"""
+
+# Standard library imports
+import asyncio
+import os
+import time
+import warnings
+from collections import deque
+from dataclasses import dataclass, field
+
+# Percentiles are computed the same way as for stage metrics
+from utils.telemetry import percentile
+
+# Backup models are built like every other model
+from utils.llm_configuration import OLLAMA_ENDPOINTS_ENV, get_llm_model
+
+# The primary request runs on the agent's active (possibly overridden) model
+from utils.response_cache import active_model
+
+
+# Environment variables configuring the backup request.
+HEDGE_ENDPOINTS_ENV = "ADVISOR_HEDGE_ENDPOINTS"
+HEDGE_MODEL_ENV = "ADVISOR_HEDGE_MODEL"
+
+# Number of latency samples kept per agent.
+LATENCY_WINDOW = 1024
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    Hedging for one agent.
+
+    Attributes:
+        model_name (str): Model for the duplicate request; None uses
+            the agent's own model.
+        base_url (str | list): Endpoint(s) for the duplicate; None
+            uses the same endpoints as get_llm_model().
+        delay (float): Fixed hedge delay in seconds; None uses the
+            observed latency percentile.
+        quantile (float): Latency percentile that triggers the hedge.
+        min_samples (int): Calls observed before the percentile is
+            trusted.
+    """
+
+    model_name: str = None
+    base_url: object = None
+    delay: float = None
+    quantile: float = 95
+    min_samples: int = 20
+
+
+def hedge_policy_from_env() -> HedgePolicy:
+    """Returns the default policy, with the backup from the environment."""
+    return HedgePolicy(
+        model_name=os.getenv(HEDGE_MODEL_ENV) or None,
+        base_url=os.getenv(HEDGE_ENDPOINTS_ENV) or None
+    )
+
+
+# Policies per agent name. Agents without a policy never hedge.
+HEDGE_POLICIES = {
+    name: hedge_policy_from_env()
+    for name in ("market_analyst", "short_term", "long_term")
+}
+
+
+# -------------------------------------------------------------------
+# Per-Agent Statistics
+# -------------------------------------------------------------------
+@dataclass
+class HedgeStats:
+    """
+    Hedging outcomes of one agent.
+
+    Attributes:
+        calls (int): Calls made through the policy.
+        hedged (int): Calls for which a duplicate was sent.
+        backup_wins (int): Hedged calls answered by the duplicate.
+        latencies (deque): Recent call durations in seconds.
+    """
+
+    calls: int = 0
+    hedged: int = 0
+    backup_wins: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def delay(self, policy: HedgePolicy) -> float:
+        """Seconds to wait before hedging, or None to not hedge yet."""
+        if policy.delay is not None:
+            return policy.delay
+        if len(self.latencies) < policy.min_samples:
+            return None
+        return percentile(list(self.latencies), policy.quantile)
+
+    def as_dict(self) -> dict:
+        """Returns the counters and latency percentiles as a plain dict."""
+        latencies = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "backup_wins": self.backup_wins,
+            "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+        }
+
+
+# Statistics keyed by agent name.
+HEDGE_STATS = {}
+
+
+def hedge_stats(agent_name: str) -> HedgeStats:
+    """Returns (creating if needed) the statistics of one agent."""
+    return HEDGE_STATS.setdefault(agent_name, HedgeStats())
+
+
+def hedge_summary() -> dict:
+    """Returns every agent's hedging statistics as plain dicts."""
+    return {name: stats.as_dict() for name, stats in HEDGE_STATS.items()}
+
+
+# -------------------------------------------------------------------
+# Hedged Generation
+# -------------------------------------------------------------------
+async def _first_success(primary, start_backup, delay: float, stats: HedgeStats):
+    """
+    Awaits the primary task, starting the backup after `delay`
+    seconds, and returns the first successful result. Whatever is
+    still running at the end (or on cancellation) is cancelled.
+    """
+    tasks = [primary]
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, 0.0))
+            if not done:
+                stats.hedged += 1
+                tasks.append(asyncio.create_task(start_backup()))
+
+        error = None
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary if both finished in the same step
+            for task in sorted(done, key=lambda task: task is not primary):
+                tasks.remove(task)
+                if task.exception() is None:
+                    if task is not primary:
+                        stats.backup_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def backup_model(agent, policy: HedgePolicy):
+    """
+    Returns the model a hedged call of `agent` duplicates to, or None
+    when the duplicate would go to the same endpoint and model as
+    the primary request.
+
+    A backup differs when it serves another model, uses other
+    endpoints, or is a RoutedModel over several endpoints (the
+    router sends the duplicate to a less-loaded one).
+    """
+    primary = active_model(agent)
+    backup = get_llm_model(policy.model_name or primary.model_name, base_url=policy.base_url)
+    if len(getattr(backup, "endpoints", ())) > 1:
+        return backup
+    if backup.model_name != primary.model_name:
+        return backup
+    if getattr(backup, "base_url", None) != getattr(primary, "base_url", None):
+        return backup
+    return None
+
+
+def hedged_generator(agent, agent_name: str, policy: HedgePolicy, generate):
+    """
+    Returns a generate() coroutine for the response cache that sends
+    a duplicate request once a call passes the policy's delay.
+
+    The duplicate runs the same generate() with the agent overridden
+    to the backup model, in its own task, so the override does not
+    leak into the primary request. A failing request does not fail
+    the call while the other one is still running.
+
+    Args:
+        agent:
+            The agent being run.
+
+        agent_name (str):
+            Short agent name, used for the statistics.
+
+        policy (HedgePolicy):
+            Backup model/endpoint and delay rule.
+
+        generate:
+            The generate() coroutine function to hedge (plain or
+            streamed with early abort).
+
+    Returns:
+        The hedged generate(), or `generate` itself (with a
+        RuntimeWarning) when there is no distinct backup, see
+        backup_model().
+    """
+    backup = backup_model(agent, policy)
+    if backup is None:
+        warnings.warn(
+            f"Hedging {agent_name} has no effect: the backup is the same endpoint and model. "
+            f"Set {HEDGE_ENDPOINTS_ENV}, {HEDGE_MODEL_ENV} or several {OLLAMA_ENDPOINTS_ENV}.",
+            RuntimeWarning,
+            stacklevel=2
+        )
+        return generate
+
+    async def hedged(user_prompt: str, **run_kwargs):
+        stats = hedge_stats(agent_name)
+        stats.calls += 1
+
+        async def start_backup():
+            with agent.override(model=backup):
+                return await generate(user_prompt, **run_kwargs)
+
+        started = time.perf_counter()
+        output = await _first_success(
+            asyncio.create_task(generate(user_prompt, **run_kwargs)),
+            start_backup,
+            stats.delay(policy),
+            stats
+        )
+        stats.latencies.append(time.perf_counter() - started)
+        return output
+
+    return hedged
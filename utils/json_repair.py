@@ -0,0 +1,240 @@
+"""
+
+JSON Repair
+
+Purpose:
+    This file provides a fast, pure-Python repair stage for
+    almost-valid JSON returned by the investment agents.
+
+Why this file exists:
+    Small models often wrap otherwise correct JSON in markdown
+    fences, add a sentence before it, leave a trailing comma or
+    use single quotes. Each of those used to raise an error and
+    cost another multi-second generation. Fixing them locally
+    takes microseconds, so the model is only asked again when
+    the output genuinely cannot be used.
+
+Repairs applied (in order):
+    1. Strip ``` / ```json code fences
+    2. Extract the outermost balanced {...} object, ignoring any
+       prose around it (missing closing braces are added)
+    3. Normalize quotes: curly quotes and single-quoted strings
+       become standard double-quoted JSON strings
+    4. Replace Python literals (True, False, None) with JSON ones
+    5. Remove trailing commas before } or ]
+"""
+
+# Standard library imports
+import json
+import re
+from dataclasses import dataclass
+
+
+# Canonical spelling of the allowed risk levels,
+# keyed by their lower-case form.
+RISK_LEVELS = {"low": "Low", "medium": "Medium", "high": "High"}
+
+# Regular expression matching a leading/trailing markdown code fence.
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+
+# Typographic quotes some models emit instead of ASCII quotes.
+_CURLY_QUOTES = str.maketrans({
+    "“": '"', "”": '"', "‘": "'", "’": "'"
+})
+
+# Python literals and their JSON equivalents.
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+# -------------------------------------------------------------------
+# Repair Statistics
+# -------------------------------------------------------------------
+@dataclass
+class RepairStats:
+    """
+    Counts how outputs were handled by extract-and-repair.
+
+    Attributes:
+        clean (int):
+            Outputs that were valid JSON as returned.
+
+        repaired (int):
+            Outputs that were fixed locally. Each one is an LLM
+            retry avoided.
+
+        unrepairable (int):
+            Outputs that could not be fixed and had to go back
+            to the model.
+    """
+
+    clean: int = 0
+    repaired: int = 0
+    unrepairable: int = 0
+
+    @property
+    def retries_avoided(self) -> int:
+        """Number of LLM retries saved by local repair."""
+        return self.repaired
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a plain dict."""
+        return {
+            "clean": self.clean,
+            "repaired": self.repaired,
+            "unrepairable": self.unrepairable,
+            "retries_avoided": self.retries_avoided
+        }
+
+
+# Process-wide repair counters.
+REPAIR_STATS = RepairStats()
+
+
+# -------------------------------------------------------------------
+# Repair Steps
+# -------------------------------------------------------------------
+def strip_code_fences(text: str) -> str:
+    """Removes a surrounding markdown code fence, if any."""
+    return _FENCE_RE.sub("", text.strip())
+
+
+def extract_outermost_object(text: str) -> str:
+    """
+    Returns the outermost balanced {...} object in a text.
+
+    Braces inside strings are ignored. If the text ends before
+    the object is closed (for example because generation stopped
+    at a stop sequence), the missing closing braces are added.
+
+    Raises:
+        ValueError:
+            If the text contains no opening brace.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in output")
+
+    depth = 0
+    quote = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+
+    # Unterminated object: close any open string and braces.
+    return text[start:] + (quote or "") + "}" * depth
+
+
+def normalize_quotes(text: str) -> str:
+    """
+    Converts curly quotes and single-quoted strings into
+    standard double-quoted JSON strings.
+    """
+    text = text.translate(_CURLY_QUOTES)
+
+    out = []
+    quote = None
+    escaped = False
+    for char in text:
+        if quote is None:
+            if char in "\"'":
+                quote = char
+                out.append('"')
+            else:
+                out.append(char)
+            continue
+
+        if escaped:
+            # \' is not a valid JSON escape; keep the bare quote.
+            out.append(char if char == "'" and quote == "'" else "\\" + char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == quote:
+            quote = None
+            out.append('"')
+        elif char == '"':
+            # A double quote inside a single-quoted string.
+            out.append('\\"')
+        elif char == "\n":
+            out.append("\\n")
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _replace_outside_strings(text: str, replace) -> str:
+    """Applies replace() to every segment of text outside strings."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(
+        part if index % 2 else replace(part)
+        for index, part in enumerate(parts)
+    )
+
+
+def fix_literals_and_commas(text: str) -> str:
+    """Replaces Python literals and removes trailing commas."""
+    def _fix(segment: str) -> str:
+        segment = re.sub(
+            r"\b(True|False|None)\b",
+            lambda m: _PYTHON_LITERALS[m.group(1)],
+            segment
+        )
+        return re.sub(r",\s*([}\]])", r"\1", segment)
+
+    return _replace_outside_strings(text, _fix)
+
+
+def normalize_risk_level(value):
+    """
+    Coerces a risk level to its canonical casing
+    ("low" -> "Low", " HIGH " -> "High").
+
+    Values that are not a known risk level are returned unchanged.
+    """
+    if isinstance(value, str):
+        return RISK_LEVELS.get(value.strip().lower(), value)
+    return value
+
+
+def repair_json_object(text: str) -> dict:
+    """
+    Repairs an almost-valid JSON object and parses it.
+
+    Args:
+        text (str):
+            Raw model output.
+
+    Returns:
+        dict:
+            The parsed object.
+
+    Raises:
+        ValueError:
+            If the output cannot be repaired into a JSON object.
+    """
+    candidate = extract_outermost_object(strip_code_fences(text))
+    candidate = fix_literals_and_commas(normalize_quotes(candidate))
+
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Output is not repairable JSON: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError("Output is not a JSON object")
+    return data
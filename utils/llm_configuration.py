@@ -11,25 +11,252 @@ Why this file exists:
     - Avoids hardcoding model settings inside agent files
     - Makes it easy to switch models or providers in the future
     - Explicitly configures Ollama to avoid environment variable issues
+    - Shares one provider and one pooled HTTP client across all
+      agents, so every agent talks to the Ollama daemon through
+      the same bounded set of keep-alive connections
 """
 
-# Import the OpenAI-compatible chat model interface used by PydanticAI.
-# Even though we are NOT using OpenAI, this abstraction allows
-# Ollama models to be accessed in a standardized way.
-from pydantic_ai.models.openai import (
-    OpenAIChatModel,
-    OpenAIChatModelSettings
-)
+# Standard library imports used for memoization, shutdown
+# handling and per-event-loop bookkeeping.
+import asyncio
+import atexit
+import os
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-# Import the Ollama provider.
-# This provider enables communication with a locally running
-# open-source LLM through the Ollama service.
-from pydantic_ai.providers.ollama import OllamaProvider
+# httpx is the HTTP library used underneath the OpenAI client.
+# Configuring it directly lets us control pooling and timeouts.
+import httpx
 
+# PydanticAI and the OpenAI client stack take most of the start-up
+# time, so they are imported by the functions that build models,
+# not here: importing this module (or the orchestrator) stays cheap
+# until the first agent is built.
+if TYPE_CHECKING:
+    from pydantic_ai.models.openai import OpenAIChatModelSettings
+    from pydantic_ai.providers.ollama import OllamaProvider
+    from utils.llm_scheduler import ScheduledModel
+    from utils.model_router import RoutedModel
 
-def get_llm_model(model_name: str = "llama3.2:latest") -> OpenAIChatModel:
+
+# Default address of the locally running Ollama service.
+DEFAULT_OLLAMA_BASE_URL = "http://localhost:11434/v1"
+
+# Comma-separated list of Ollama endpoints serving the same models.
+# When set, models are routed across all of them (see
+# utils.model_router) instead of using DEFAULT_OLLAMA_BASE_URL.
+OLLAMA_ENDPOINTS_ENV = "OLLAMA_ENDPOINTS"
+
+
+# -------------------------------------------------------------------
+# HTTP Client Configuration
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class HttpClientConfig:
+    """
+    Connection pool and timeout settings for the shared HTTP client.
+
+    Every value can be overridden with an environment variable
+    (see from_env), or programmatically with configure_http_client()
+    before the first model is created.
+
+    Attributes:
+        max_connections (int):
+            Upper bound on open connections to the Ollama daemon.
+
+        max_keepalive_connections (int):
+            Number of idle connections kept open for reuse.
+
+        keepalive_expiry (float):
+            Seconds an idle connection is kept before closing it.
+
+        connect_timeout (float):
+            Seconds to wait when opening a new connection.
+
+        read_timeout (float):
+            Seconds to wait for data from the server. LLM
+            generations are slow, so this is deliberately long.
+
+        pool_timeout (float):
+            Seconds to wait for a free connection from the pool.
+    """
+
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 300.0
+    pool_timeout: float = 60.0
+
+    @classmethod
+    def from_env(cls) -> "HttpClientConfig":
+        """
+        Builds a configuration from OLLAMA_HTTP_* environment
+        variables, falling back to the defaults above.
+        """
+        defaults = cls()
+        return cls(
+            max_connections=int(os.getenv(
+                "OLLAMA_HTTP_MAX_CONNECTIONS", defaults.max_connections
+            )),
+            max_keepalive_connections=int(os.getenv(
+                "OLLAMA_HTTP_MAX_KEEPALIVE", defaults.max_keepalive_connections
+            )),
+            keepalive_expiry=float(os.getenv(
+                "OLLAMA_HTTP_KEEPALIVE_EXPIRY", defaults.keepalive_expiry
+            )),
+            connect_timeout=float(os.getenv(
+                "OLLAMA_HTTP_CONNECT_TIMEOUT", defaults.connect_timeout
+            )),
+            read_timeout=float(os.getenv(
+                "OLLAMA_HTTP_READ_TIMEOUT", defaults.read_timeout
+            )),
+            pool_timeout=float(os.getenv(
+                "OLLAMA_HTTP_POOL_TIMEOUT", defaults.pool_timeout
+            )),
+        )
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport that keeps one connection pool per event loop.
+
+    Why this class exists:
+        Pooled connections are bound to the event loop that opened
+        them. The synchronous entry points call asyncio.run() once
+        per report, so a single process can go through several
+        event loops. Keeping a pool per loop lets the shared client
+        be reused safely across all of them.
+    """
+
+    def __init__(self, config: HttpClientConfig):
+        self._limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+        self._transports = weakref.WeakKeyDictionary()
+
+    def _transport_for_current_loop(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self._limits)
+            self._transports[loop] = transport
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transport_for_current_loop()
+        return await transport.handle_async_request(request)
+
+    async def release_current_loop(self) -> None:
+        """Closes the connection pool owned by the running event loop."""
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    async def aclose(self) -> None:
+        await self.release_current_loop()
+
+
+# Module-level state for the shared client.
+_http_config = HttpClientConfig.from_env()
+_http_transport = None
+_http_client = None
+
+
+def configure_http_client(**overrides) -> HttpClientConfig:
+    """
+    Overrides the shared HTTP client settings.
+
+    Must be called before the first model is created; the shared
+    client is built once and then reused.
+
+    Args:
+        **overrides:
+            Any field of HttpClientConfig.
+
+    Returns:
+        HttpClientConfig:
+            The configuration that will be used.
+
+    Raises:
+        RuntimeError:
+            If the shared client has already been created.
+    """
+    global _http_config
+
+    if _http_client is not None:
+        raise RuntimeError(
+            "The shared HTTP client already exists; "
+            "call configure_http_client() before creating any model."
+        )
+
+    _http_config = HttpClientConfig(**{**_http_config.__dict__, **overrides})
+    return _http_config
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the single HTTP client shared by every Ollama provider.
+
+    Returns:
+        httpx.AsyncClient:
+            A pooled client with the configured limits and timeouts.
+    """
+    global _http_client, _http_transport
+
+    if _http_client is None:
+        _http_transport = _LoopLocalTransport(_http_config)
+        _http_client = httpx.AsyncClient(
+            transport=_http_transport,
+            timeout=httpx.Timeout(
+                connect=_http_config.connect_timeout,
+                read=_http_config.read_timeout,
+                write=_http_config.connect_timeout,
+                pool=_http_config.pool_timeout
+            )
+        )
+    return _http_client
+
+
+@lru_cache(maxsize=None)
+def get_ollama_provider(base_url: str = DEFAULT_OLLAMA_BASE_URL) -> "OllamaProvider":
+    """
+    Returns the shared Ollama provider for a base URL.
+
+    Args:
+        base_url (str):
+            Address of the Ollama OpenAI-compatible endpoint.
+
+    Returns:
+        OllamaProvider:
+            A provider that uses the shared HTTP client.
+    """
+    # Import the Ollama provider.
+    # This provider enables communication with a locally running
+    # open-source LLM through the Ollama service.
+    from pydantic_ai.providers.ollama import OllamaProvider
+
+    # The base_url points to the locally running Ollama service.
+    # Using an explicit URL avoids dependency on environment variables
+    # and ensures predictable behavior across environments.
+    return OllamaProvider(
+        base_url=base_url,
+        http_client=get_http_client()
+    )
+
+
+def get_llm_model(
+    model_name: str = "llama3.2:latest",
+    base_url=None,
+    temperature: float = 0.3,
+    max_tokens: int = 2000
+):
     """
-    Creates and returns a configured LLM instance connected to Ollama.
+    Returns a configured LLM instance connected to Ollama.
 
     Why this function is important:
         All agents call this function to obtain the same
@@ -38,28 +265,107 @@ def get_llm_model(model_name: str = "llama3.2:latest") -> OpenAIChatModel:
         - Centralized tuning of model parameters
         - Easier maintenance and debugging
 
+    Models are memoized: calling this function again with the
+    same model name, base URL and settings returns the same
+    instance, and all instances share one provider per base URL
+    and one pooled HTTP client.
+
     Args:
         model_name (str):
             Name of the Ollama model to use.
             Default is "llama3.2:latest", which refers to the
             latest locally available LLaMA 3.2 model.
 
+        base_url (str | list):
+            Address of the Ollama OpenAI-compatible endpoint, or
+            several addresses (a list or a comma-separated string).
+            Defaults to $OLLAMA_ENDPOINTS, then to
+            DEFAULT_OLLAMA_BASE_URL.
+
+        temperature (float):
+            Sampling temperature for the model.
+
+        max_tokens (int):
+            Maximum length of the model response.
+
     Returns:
-        OpenAIChatModel:
+        ScheduledModel | RoutedModel:
             A model instance that communicates with the local
-            Ollama service using an OpenAI-compatible interface.
+            Ollama service using an OpenAI-compatible interface,
+            through the endpoint's scheduler (concurrency limit and
+            priority queue, see utils.llm_scheduler). With several
+            endpoints, a RoutedModel that dispatches each request
+            to the least-loaded healthy endpoint.
     """
+    endpoints = resolve_endpoints(base_url)
+    if len(endpoints) > 1:
+        return _build_routed_model(model_name, endpoints, temperature, max_tokens)
+    return _build_llm_model(model_name, endpoints[0], temperature, max_tokens)
 
-    # ---------------------------------------------------------------
-    # Configure Ollama Provider
-    # ---------------------------------------------------------------
-    # The base_url points to the locally running Ollama service.
-    # Using an explicit URL avoids dependency on environment variables
-    # and ensures predictable behavior across environments.
-    provider = OllamaProvider(
-        base_url="http://localhost:11434/v1"
+
+def resolve_endpoints(base_url=None) -> tuple:
+    """
+    Normalizes a base URL argument to a tuple of endpoint URLs.
+
+    Args:
+        base_url (str | list | None):
+            One URL, a comma-separated string, a sequence of URLs,
+            or None for $OLLAMA_ENDPOINTS / DEFAULT_OLLAMA_BASE_URL.
+
+    Returns:
+        tuple:
+            Endpoint URLs, without duplicates, in the given order.
+    """
+    if base_url is None:
+        base_url = os.environ.get(OLLAMA_ENDPOINTS_ENV) or DEFAULT_OLLAMA_BASE_URL
+    if isinstance(base_url, str):
+        base_url = base_url.split(",")
+    endpoints = tuple(dict.fromkeys(url.strip() for url in base_url if url.strip()))
+    if not endpoints:
+        raise ValueError("At least one Ollama endpoint is required")
+    return endpoints
+
+
+@lru_cache(maxsize=None)
+def _build_routed_model(
+    model_name: str,
+    endpoints: tuple,
+    temperature: float,
+    max_tokens: int
+) -> "RoutedModel":
+    """Creates the RoutedModel behind get_llm_model() for several endpoints."""
+    # Router used when several Ollama endpoints are configured
+    from utils.model_router import RoutedModel, RouterConfig
+
+    return RoutedModel(
+        [
+            _build_llm_model(model_name, url, temperature, max_tokens)
+            for url in endpoints
+        ],
+        RouterConfig()
     )
 
+
+@lru_cache(maxsize=None)
+def _build_llm_model(
+    model_name: str,
+    base_url: str,
+    temperature: float,
+    max_tokens: int
+) -> "ScheduledModel":
+    """
+    Creates the model instance behind get_llm_model(): an
+    OpenAIChatModel whose requests go through the endpoint's
+    scheduler (see utils.llm_scheduler).
+    """
+    # Import the OpenAI-compatible chat model interface used by PydanticAI.
+    # Even though we are NOT using OpenAI, this abstraction allows
+    # Ollama models to be accessed in a standardized way.
+    from pydantic_ai.models.openai import OpenAIChatModel, OpenAIChatModelSettings
+
+    # Admission control and priority scheduling per endpoint
+    from utils.llm_scheduler import ScheduledModel, get_scheduler
+
     # ---------------------------------------------------------------
     # Configure Model Settings
     # ---------------------------------------------------------------
@@ -67,8 +373,8 @@ def get_llm_model(model_name: str = "llama3.2:latest") -> OpenAIChatModel:
     # A lower temperature makes responses more deterministic
     # and reduces hallucinations, which is important for finance.
     model_settings = OpenAIChatModelSettings(
-        temperature=0.3,   # Lower value = more stable and consistent output
-        max_tokens=2000    # Maximum length of the model response
+        temperature=temperature,  # Lower value = more stable and consistent output
+        max_tokens=max_tokens     # Maximum length of the model response
     )
 
     # ---------------------------------------------------------------
@@ -76,8 +382,97 @@ def get_llm_model(model_name: str = "llama3.2:latest") -> OpenAIChatModel:
     # ---------------------------------------------------------------
     # The OpenAIChatModel wrapper is used here purely as an interface.
     # The actual inference is performed by the Ollama-hosted model.
-    return OpenAIChatModel(
+    model = OpenAIChatModel(
         model_name=model_name,
-        provider=provider,
+        provider=get_ollama_provider(base_url),
         settings=model_settings
     )
+
+    # Every model served by this endpoint shares one scheduler, so
+    # the concurrency limit holds across agents and models
+    return ScheduledModel(model, get_scheduler(base_url))
+
+
+# -------------------------------------------------------------------
+# Structured Output (Schema-Constrained Decoding)
+# -------------------------------------------------------------------
+def structured_output_settings(schema_model) -> "OpenAIChatModelSettings":
+    """
+    Returns per-run model settings that ask Ollama to constrain
+    decoding to the JSON Schema of a Pydantic model.
+
+    Why this function exists:
+        Prompt instructions alone ("Return ONLY a valid JSON object")
+        do not guarantee well-formed output, and every malformed
+        answer costs a full extra generation. Ollama's
+        OpenAI-compatible endpoint accepts a `response_format` with a
+        JSON Schema and turns it into a decoding grammar, so the
+        output is valid JSON for the schema by construction.
+
+    The schema is sent through `extra_body`, so the agent output
+    stays a JSON string and is still parsed by the orchestrator.
+
+    Args:
+        schema_model:
+            Pydantic model class describing the expected output.
+
+    Returns:
+        OpenAIChatModelSettings:
+            Settings to pass as `model_settings` to Agent.run().
+    """
+    from pydantic_ai.models.openai import OpenAIChatModelSettings
+
+    return OpenAIChatModelSettings(
+        extra_body={
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema_model.__name__,
+                    "schema": schema_model.model_json_schema(),
+                    "strict": True
+                }
+            }
+        }
+    )
+
+
+# -------------------------------------------------------------------
+# Shutdown Helpers
+# -------------------------------------------------------------------
+async def release_http_connections() -> None:
+    """
+    Closes the pooled connections opened by the running event loop.
+
+    The synchronous orchestrator calls this before its event loop
+    ends, so no sockets are left attached to a closed loop. The
+    shared client itself stays usable for later loops.
+    """
+    if _http_transport is not None:
+        await _http_transport.release_current_loop()
+
+
+def close_llm_clients() -> None:
+    """
+    Closes the shared HTTP client and forgets all memoized
+    providers and models.
+
+    Registered with atexit so the process shuts down cleanly.
+    A later call to get_llm_model() builds fresh instances.
+    """
+    global _http_client, _http_transport
+
+    client, _http_client, _http_transport = _http_client, None, None
+    _build_llm_model.cache_clear()
+    _build_routed_model.cache_clear()
+    get_ollama_provider.cache_clear()
+
+    if client is not None and not client.is_closed:
+        try:
+            asyncio.run(client.aclose())
+        except RuntimeError:
+            # An event loop is still running (e.g. inside a server);
+            # its own shutdown will drop the connections.
+            pass
+
+
+atexit.register(close_llm_clients)
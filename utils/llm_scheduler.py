@@ -0,0 +1,394 @@
+"""
+
+LLM Scheduler
+
+Purpose:
+    This file provides admission control and priority scheduling in
+    front of every Ollama endpoint: at most `max_concurrency` model
+    requests run on an endpoint at once, and waiting requests are
+    started in priority order instead of first come, first served.
+
+Why this file exists:
+    Ollama generates only OLLAMA_NUM_PARALLEL responses at a time
+    and queues the rest internally, in arrival order, with no notion
+    of who is waiting. Under load, an interactive report waits
+    behind a whole batch, every request slows down, and timeouts
+    cascade into retries that add even more load. Holding the
+    excess requests here instead:
+    - keeps the endpoint at its efficient parallelism
+    - starts interactive requests before batch requests, the market
+      analysis (which everything else waits for) before
+      recommendations, and earlier deadlines first
+    - rejects requests when the queue is too deep or a request has
+      waited too long (backpressure), rather than letting latency
+      grow without bound
+    - measures queue depth and wait time per endpoint
+
+Priority (lower starts first):
+    1. request class: "interactive" (default), then "batch"; set with
+       request_class() around batch work
+    2. stage: market_analyst, market_snapshot, then the investment
+       agents (taken from the running telemetry stage)
+    3. deadline (see utils.deadline), earliest first
+    4. arrival order
+
+Configuration:
+    ADVISOR_MAX_PARALLEL    requests per endpoint (default 4, like
+                            Ollama's default; 0 disables scheduling)
+    ADVISOR_MAX_QUEUE       waiting requests per endpoint (default 256)
+    ADVISOR_MAX_QUEUE_WAIT  seconds a request may wait (default: none)
+
+    or configure_scheduler(max_concurrency=2, max_queue=32).
+"""
+
+# Standard library imports
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Prometheus metrics, next to the stage metrics
+from prometheus_client import Counter, Gauge, Histogram
+
+# PydanticAI model interface; rejections look like an API error
+from pydantic_ai.exceptions import ModelAPIError
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+from utils.deadline import deadline_at
+from utils.telemetry import current_stage, percentile, record_queue_wait
+
+
+# -------------------------------------------------------------------
+# Configuration
+# -------------------------------------------------------------------
+def _env_float(name: str, default=None):
+    value = os.getenv(name, "")
+    return float(value) if value else default
+
+
+@dataclass
+class SchedulerConfig:
+    """
+    Admission control settings, shared by every endpoint.
+
+    Attributes:
+        max_concurrency (int): Requests running per endpoint; 0 or
+            None disables scheduling.
+        max_queue (int): Requests waiting per endpoint before new
+            ones are rejected.
+        max_wait (float): Seconds a request may wait for a slot;
+            None waits as long as needed (or until the deadline).
+    """
+
+    max_concurrency: int = int(_env_float("ADVISOR_MAX_PARALLEL", 4))
+    max_queue: int = int(_env_float("ADVISOR_MAX_QUEUE", 256))
+    max_wait: float = _env_float("ADVISOR_MAX_QUEUE_WAIT")
+
+
+SCHEDULER = SchedulerConfig()
+
+
+def configure_scheduler(**changes) -> SchedulerConfig:
+    """
+    Updates the scheduler settings (they apply immediately).
+
+    Example:
+        configure_scheduler(max_concurrency=2, max_wait=10.0)
+    """
+    for name, value in changes.items():
+        if not hasattr(SCHEDULER, name):
+            raise TypeError(f"Unknown scheduler setting: {name}")
+        setattr(SCHEDULER, name, value)
+    return SCHEDULER
+
+
+# Request classes, in priority order.
+REQUEST_CLASSES = ("interactive", "batch")
+
+# Stage priorities; unknown stages go last.
+STAGE_PRIORITIES = {
+    "market_analyst": 0,
+    "market_snapshot": 1,
+    "short_term": 2,
+    "long_term": 2,
+}
+
+_REQUEST_CLASS = ContextVar("advisor_request_class", default="interactive")
+
+
+@contextmanager
+def request_class(name: str):
+    """
+    Sets the request class of model calls made inside the block
+    (and in tasks started from it).
+
+    Args:
+        name (str): "interactive" or "batch".
+    """
+    if name not in REQUEST_CLASSES:
+        raise ValueError(f"Unknown request class: {name!r}")
+    token = _REQUEST_CLASS.set(name)
+    try:
+        yield
+    finally:
+        _REQUEST_CLASS.reset(token)
+
+
+def current_priority() -> tuple:
+    """Priority key of a model call made now (lower starts first)."""
+    stage = current_stage()
+    deadline = deadline_at()
+    return (
+        REQUEST_CLASSES.index(_REQUEST_CLASS.get()),
+        STAGE_PRIORITIES.get(stage.stage if stage else None, len(STAGE_PRIORITIES)),
+        math.inf if deadline is None else deadline,
+    )
+
+
+class SchedulerOverloaded(ModelAPIError):
+    """
+    Raised when a request is rejected: the endpoint's queue is full
+    or the request waited longer than max_wait.
+
+    RoutedModel moves the call to another endpoint, without
+    counting it as a failure: a busy endpoint is not ejected.
+    """
+
+
+# -------------------------------------------------------------------
+# Metrics
+# -------------------------------------------------------------------
+QUEUE_DEPTH = Gauge(
+    "advisor_llm_queue_depth",
+    "Model requests waiting for an endpoint slot.",
+    ["endpoint"]
+)
+
+QUEUE_WAIT = Histogram(
+    "advisor_llm_queue_wait_seconds",
+    "Time model requests waited for an endpoint slot.",
+    ["endpoint"],
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+
+QUEUE_REJECTED = Counter(
+    "advisor_llm_queue_rejected_total",
+    "Model requests rejected by admission control, by reason (full, timeout).",
+    ["endpoint", "reason"]
+)
+
+# Wait-time samples kept per endpoint for percentiles.
+WAIT_WINDOW = 4096
+
+
+@dataclass
+class SchedulerStats:
+    """
+    Counters of one endpoint's scheduler.
+
+    Attributes:
+        admitted (int): Requests that got a slot.
+        rejected (int): Requests refused because the queue was full.
+        timed_out (int): Requests that waited longer than max_wait.
+        peak_depth (int): Largest queue seen.
+        waits (deque): Recent queue waits in seconds.
+    """
+
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    peak_depth: int = 0
+    waits: deque = field(default_factory=lambda: deque(maxlen=WAIT_WINDOW))
+
+
+# -------------------------------------------------------------------
+# Endpoint Scheduler
+# -------------------------------------------------------------------
+class EndpointScheduler:
+    """
+    Concurrency limit and priority queue for one endpoint.
+
+    Args:
+        endpoint (str): Endpoint URL, used in metrics.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.running = 0
+        self.depth = 0
+        self.stats = SchedulerStats()
+        # Heap of (priority, arrival, future); cancelled waiters are
+        # skipped when popped
+        self._waiters = []
+        self._arrivals = itertools.count()
+
+    def _admit(self, waited: float) -> None:
+        self.stats.admitted += 1
+        self.stats.waits.append(waited)
+        QUEUE_WAIT.labels(self.endpoint).observe(waited)
+        # Also charged to the running stage, as queue wait
+        record_queue_wait(waited)
+
+    def _left_queue(self) -> None:
+        self.depth -= 1
+        QUEUE_DEPTH.labels(self.endpoint).set(self.depth)
+
+    async def acquire(self) -> None:
+        """
+        Waits for a slot on the endpoint.
+
+        Raises:
+            SchedulerOverloaded: The queue is full, or max_wait passed.
+        """
+        limit = SCHEDULER.max_concurrency
+        if not limit or (self.running < limit and not self.depth):
+            self.running += 1
+            self._admit(0.0)
+            return
+
+        if self.depth >= SCHEDULER.max_queue:
+            self.stats.rejected += 1
+            QUEUE_REJECTED.labels(self.endpoint, "full").inc()
+            raise SchedulerOverloaded(
+                self.endpoint, f"{self.depth} requests already waiting for {self.endpoint}"
+            )
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (current_priority(), next(self._arrivals), future))
+        self.depth += 1
+        self.stats.peak_depth = max(self.stats.peak_depth, self.depth)
+        QUEUE_DEPTH.labels(self.endpoint).set(self.depth)
+
+        try:
+            await asyncio.wait({future}, timeout=SCHEDULER.max_wait)
+        except asyncio.CancelledError:
+            # Cancelled (e.g. deadline): if a slot was handed over
+            # meanwhile, pass it on instead of leaking it
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self._left_queue()
+            raise
+
+        if not future.done():
+            future.cancel()
+            self._left_queue()
+            self.stats.timed_out += 1
+            QUEUE_REJECTED.labels(self.endpoint, "timeout").inc()
+            raise SchedulerOverloaded(
+                self.endpoint, f"waited more than {SCHEDULER.max_wait}s for {self.endpoint}"
+            )
+        self._admit(time.perf_counter() - started)
+
+    def release(self) -> None:
+        """Frees a slot, handing it to the highest-priority waiter."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot moves to the waiter: running is unchanged
+                self._left_queue()
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def as_dict(self) -> dict:
+        """Returns the current state and counters as a plain dict."""
+        waits = list(self.stats.waits)
+        return {
+            "running": self.running,
+            "depth": self.depth,
+            "peak_depth": self.stats.peak_depth,
+            "admitted": self.stats.admitted,
+            "rejected": self.stats.rejected,
+            "timed_out": self.stats.timed_out,
+            "wait_p50": percentile(waits, 50),
+            "wait_p95": percentile(waits, 95),
+            "wait_p99": percentile(waits, 99),
+        }
+
+
+# Schedulers keyed by endpoint URL (one per Ollama server, shared by
+# every model served there).
+SCHEDULERS = {}
+
+
+def get_scheduler(endpoint: str) -> EndpointScheduler:
+    """Returns (creating if needed) the scheduler of an endpoint."""
+    return SCHEDULERS.setdefault(endpoint, EndpointScheduler(endpoint))
+
+
+def scheduler_summary() -> dict:
+    """Returns every endpoint's scheduler state as plain dicts."""
+    return {endpoint: scheduler.as_dict() for endpoint, scheduler in SCHEDULERS.items()}
+
+
+# -------------------------------------------------------------------
+# Scheduled Model
+# -------------------------------------------------------------------
+class ScheduledModel(WrapperModel):
+    """
+    A model whose requests go through an endpoint scheduler.
+
+    It is transparent for agents, the response cache and the router:
+    as a WrapperModel, name, settings, profile, client and any other
+    attribute are the wrapped model's.
+
+    Args:
+        model (Model): The endpoint model.
+        scheduler (EndpointScheduler): The endpoint's scheduler.
+    """
+
+    def __init__(self, model: Model, scheduler: EndpointScheduler):
+        super().__init__(model)
+        self.scheduler = scheduler
+
+    @property
+    def base_url(self) -> str:
+        # Model defines base_url itself, so WrapperModel does not forward it
+        return self.wrapped.base_url
+
+    def customize_request_parameters(self, model_request_parameters):
+        return model_request_parameters
+
+    def prepare_request(self, model_settings, model_request_parameters):
+        # The wrapped model prepares its own request
+        return model_settings, model_request_parameters
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        """Sends the request once the endpoint has a free slot."""
+        async with self.scheduler.slot():
+            return await self.wrapped.request(messages, model_settings, model_request_parameters)
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages,
+        model_settings,
+        model_request_parameters,
+        run_context=None
+    ):
+        """Opens the stream once the endpoint has a free slot; the slot
+        is held until the stream is closed."""
+        async with self.scheduler.slot():
+            async with self.wrapped.request_stream(
+                messages, model_settings, model_request_parameters, run_context
+            ) as response:
+                yield response
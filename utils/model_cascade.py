@@ -0,0 +1,186 @@
+"""
+
+Model Cascade
+
+Purpose:
+    This file defines cascade policies: an agent first tries a
+    small, cheap model and escalates to a larger one only when the
+    cheap answer is not good enough.
+
+Why this file exists:
+    The JSON-only investment agents have a simple job, and a small
+    or quantized model usually gets it right at a fraction of the
+    latency. Sending every call to the largest model wastes most of
+    that time. A cascade pays the large-model cost only for the
+    calls that need it:
+    - the answer fails validation (InvestmentRecommendation), or
+    - a confidence rule trips (placeholder text, wrong horizon,
+      an expected return without a number, ...)
+
+    Per-tier statistics (acceptance rate, latency percentiles)
+    show whether a cheap tier is worth keeping and how to tune
+    the confidence rules.
+
+Configuration:
+    Policies are keyed by agent name ("short_term", "long_term").
+    The cheap tiers can also be set with an environment variable:
+
+        ADVISOR_CASCADE_MODELS=llama3.2:1b,qwen2.5:0.5b python main.py --cascade
+
+    The final tier is always the agent's own model.
+"""
+
+# Standard library imports
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Percentiles are computed the same way as for stage metrics
+from utils.telemetry import percentile
+
+
+# Cheap models tried before the agent's own model, unless configured.
+DEFAULT_CASCADE_MODELS = ("llama3.2:1b",)
+
+# Environment variable overriding DEFAULT_CASCADE_MODELS.
+CASCADE_MODELS_ENV = "ADVISOR_CASCADE_MODELS"
+
+# Number of latency samples kept per tier for percentiles.
+LATENCY_WINDOW = 1024
+
+
+# -------------------------------------------------------------------
+# Confidence Rules
+# -------------------------------------------------------------------
+# Values copied from the prompt template instead of a real answer.
+_PLACEHOLDERS = {
+    "name of the investment",
+    "why this investment is recommended",
+    "expected return description",
+}
+
+
+def default_confidence_rule(recommendation, horizon_label: str) -> str:
+    """
+    Checks a schema-valid recommendation for signs of a weak answer.
+
+    Args:
+        recommendation (InvestmentRecommendation):
+            The validated recommendation from a cheap tier.
+
+        horizon_label (str):
+            "short-term" or "long-term", the horizon that was asked for.
+
+    Returns:
+        str:
+            The reason the answer is not trusted, or None when it
+            is accepted.
+    """
+    fields = (
+        recommendation.asset_name,
+        recommendation.rationale,
+        recommendation.expected_return,
+    )
+    if any(value.strip().lower() in _PLACEHOLDERS for value in fields):
+        return "copied a placeholder from the prompt"
+    if len(recommendation.rationale.split()) < 5:
+        return "rationale is too short"
+    if not re.search(r"\d", recommendation.expected_return):
+        return "expected return has no figure"
+    if horizon_label.split("-")[0] not in recommendation.time_horizon.lower():
+        return f"time horizon is not {horizon_label}"
+    return None
+
+
+@dataclass(frozen=True)
+class CascadePolicy:
+    """
+    Cascade for one agent.
+
+    Attributes:
+        models (tuple): Cheap model names, tried in order before the
+            agent's own model.
+        confidence_rule (Callable): (recommendation, horizon_label) ->
+            reason or None; see default_confidence_rule().
+        base_url (str | list): Endpoint(s) serving the cheap models;
+            None uses the same endpoints as get_llm_model().
+    """
+
+    models: tuple = DEFAULT_CASCADE_MODELS
+    confidence_rule: Callable = default_confidence_rule
+    base_url: object = None
+
+
+def cascade_models_from_env() -> tuple:
+    """Returns the cheap tiers from ADVISOR_CASCADE_MODELS, if set."""
+    value = os.getenv(CASCADE_MODELS_ENV, "")
+    models = tuple(name.strip() for name in value.split(",") if name.strip())
+    return models or DEFAULT_CASCADE_MODELS
+
+
+# Policies per agent name. Agents without a policy never cascade.
+CASCADE_POLICIES = {
+    "short_term": CascadePolicy(cascade_models_from_env()),
+    "long_term": CascadePolicy(cascade_models_from_env()),
+}
+
+
+# -------------------------------------------------------------------
+# Per-Tier Statistics
+# -------------------------------------------------------------------
+@dataclass
+class TierStats:
+    """
+    Outcomes of one cascade tier for one agent.
+
+    Attributes:
+        attempts (int): Calls that reached this tier.
+        accepted (int): Answers used as the agent's output.
+        rejected (int): Answers that failed validation.
+        low_confidence (int): Valid answers a confidence rule rejected.
+        errors (int): Calls that raised (connection, HTTP, ...).
+        latencies (deque): Recent call durations in seconds.
+    """
+
+    attempts: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    low_confidence: int = 0
+    errors: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of attempts answered by this tier."""
+        return self.accepted / self.attempts if self.attempts else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counters and latency percentiles as a plain dict."""
+        latencies = list(self.latencies)
+        return {
+            "attempts": self.attempts,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "low_confidence": self.low_confidence,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+            "latency_mean": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+        }
+
+
+# Tier statistics keyed by "<agent_name>/<model_name>".
+CASCADE_STATS = {}
+
+
+def tier_stats(agent_name: str, model_name: str) -> TierStats:
+    """Returns (creating if needed) the statistics of one tier."""
+    return CASCADE_STATS.setdefault(f"{agent_name}/{model_name}", TierStats())
+
+
+def cascade_summary() -> dict:
+    """Returns every tier's statistics as plain dicts."""
+    return {key: stats.as_dict() for key, stats in CASCADE_STATS.items()}
@@ -0,0 +1,385 @@
+"""
+
+Model Router
+
+Purpose:
+    This file provides RoutedModel, a PydanticAI model that spreads
+    agent calls over several OpenAI-compatible endpoints serving
+    the same model (for example one Ollama instance per GPU host).
+
+Why this file exists:
+    A single Ollama endpoint processes a limited number of requests
+    at once; additional replicas only help if calls are spread over
+    them and a broken replica stops receiving traffic.
+
+How requests are routed:
+    - Least outstanding: each call goes to the healthy endpoint
+      with the fewest requests in flight; ties are broken by the
+      lowest latency EWMA (exponentially weighted moving average)
+    - Failover: a call that fails with a server, connection or
+      timeout error is retried on the next best endpoint
+    - Overload: a call rejected by the endpoint's own admission
+      control (utils.llm_scheduler) also moves to the next endpoint,
+      but is not a failure: the endpoint is busy, not broken, and
+      ejecting it would only push its load onto the others
+    - Ejection: after `failure_threshold` consecutive failures an
+      endpoint is ejected for a cooldown period, which doubles on
+      every repeated ejection (up to `max_ejection_seconds`)
+    - Probing: once the cooldown has passed, exactly one call is
+      let through as a probe. Success brings the endpoint back;
+      failure ejects it again. probe_ejected() checks ejected
+      endpoints actively with a cheap GET /models.
+
+Usage:
+    model = get_llm_model(base_url=[
+        "http://gpu-1:11434/v1",
+        "http://gpu-2:11434/v1",
+    ])
+    # or: OLLAMA_ENDPOINTS=http://gpu-1:11434/v1,http://gpu-2:11434/v1
+"""
+
+# Standard library imports
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+
+import httpx
+
+# PydanticAI model interface and the errors raised by providers
+from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+# Rejections by an endpoint's admission control (busy, not broken)
+from utils.llm_scheduler import SchedulerOverloaded
+
+
+# -------------------------------------------------------------------
+# Router Configuration
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class RouterConfig:
+    """
+    Routing, ejection and timeout settings.
+
+    Attributes:
+        ewma_alpha (float): Weight of the newest latency sample.
+        failure_threshold (int): Consecutive failures before ejection.
+        ejection_seconds (float): First ejection cooldown.
+        max_ejection_seconds (float): Upper bound of the cooldown.
+        request_timeout (float): Seconds before a call (or, for
+            streams, the first chunk) counts as failed. None disables
+            the router's own timeout.
+        max_attempts (int): Endpoints tried per call. None tries
+            every endpoint once.
+    """
+
+    ewma_alpha: float = 0.3
+    failure_threshold: int = 2
+    ejection_seconds: float = 5.0
+    max_ejection_seconds: float = 60.0
+    request_timeout: float = None
+    max_attempts: int = None
+
+
+@dataclass
+class EndpointState:
+    """
+    Routing state of one endpoint.
+
+    Attributes:
+        model (Model): Model talking to this endpoint.
+        outstanding (int): Requests currently in flight.
+        latency_ewma (float): Smoothed request latency in seconds.
+        requests (int): Requests sent.
+        failures (int): Requests that failed.
+        rejected (int): Requests turned away by admission control.
+        consecutive_failures (int): Failures since the last success.
+        ejections (int): Times the endpoint was ejected.
+        ejected_until (float): time.monotonic() when the cooldown ends
+            (0 when the endpoint is healthy).
+        probing (bool): True while a probe request is in flight.
+    """
+
+    model: Model
+    outstanding: int = 0
+    latency_ewma: float = None
+    requests: int = 0
+    failures: int = 0
+    rejected: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    probing: bool = field(default=False)
+
+    @property
+    def base_url(self) -> str:
+        return getattr(self.model, "base_url", None) or self.model.model_name
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > 0
+
+    def as_dict(self) -> dict:
+        """Returns the state as a plain dict (for /stats and logs)."""
+        return {
+            "base_url": self.base_url,
+            "outstanding": self.outstanding,
+            "latency_ewma": self.latency_ewma,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "ejections": self.ejections,
+            "ejected": self.ejected,
+        }
+
+
+class NoEndpointAvailableError(ModelAPIError):
+    """Raised when every endpoint failed for one call."""
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """
+    Returns True for errors that say something about the endpoint's
+    health: timeouts, connection problems, HTTP 429 and 5xx.
+
+    Other HTTP errors (for example 400 for a bad request) would fail
+    on every endpoint, so they are neither retried nor counted.
+    Admission-control rejections (SchedulerOverloaded) are retried
+    elsewhere but not counted either: see is_endpoint_overload().
+    """
+    if is_endpoint_overload(error):
+        return False
+    if isinstance(error, ModelHTTPError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (ModelAPIError, httpx.HTTPError, OSError, asyncio.TimeoutError))
+
+
+def is_endpoint_overload(error: BaseException) -> bool:
+    """Returns True when the endpoint's admission control turned the call away."""
+    return isinstance(error, SchedulerOverloaded)
+
+
+# -------------------------------------------------------------------
+# Routed Model
+# -------------------------------------------------------------------
+class RoutedModel(WrapperModel):
+    """
+    A model that routes each request to one of several equivalent
+    endpoint models (see module docstring).
+
+    Args:
+        models (list):
+            One model per endpoint. They should serve the same model
+            with the same settings; the first one provides the name,
+            settings and profile used by agents and the cache.
+
+        config (RouterConfig):
+            Routing settings.
+    """
+
+    def __init__(self, models, config: RouterConfig = None):
+        if not models:
+            raise ValueError("RoutedModel needs at least one endpoint model")
+        # The first endpoint model is the wrapped one: it provides the
+        # name, settings and profile (WrapperModel forwards them), so
+        # the router is transparent for agents and the cache
+        super().__init__(models[0])
+        self.config = config or RouterConfig()
+        self.endpoints = [EndpointState(model) for model in models]
+
+    @property
+    def base_url(self) -> str:
+        return ",".join(endpoint.base_url for endpoint in self.endpoints)
+
+    def customize_request_parameters(self, model_request_parameters):
+        return model_request_parameters
+
+    def prepare_request(self, model_settings, model_request_parameters):
+        # Each endpoint model prepares its own request
+        return model_settings, model_request_parameters
+
+    # ---------------------------------------------------------------
+    # Endpoint Selection and Health
+    # ---------------------------------------------------------------
+    def _available(self, endpoint: EndpointState, now: float) -> bool:
+        if not endpoint.ejected:
+            return True
+        # Half-open: one probe request once the cooldown has passed
+        return now >= endpoint.ejected_until and not endpoint.probing
+
+    def select_endpoint(self, exclude=()) -> EndpointState:
+        """
+        Returns the endpoint for the next request.
+
+        Args:
+            exclude:
+                Endpoints already tried for this call.
+
+        Returns:
+            EndpointState:
+                The available endpoint with the fewest outstanding
+                requests (then lowest latency EWMA), or None when
+                every endpoint was tried.
+        """
+        candidates = [e for e in self.endpoints if e not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        available = [e for e in candidates if self._available(e, now)]
+        if not available:
+            # Everything is ejected: rather than failing outright,
+            # try the endpoint that is due back first.
+            return min(candidates, key=lambda e: e.ejected_until)
+        return min(
+            available,
+            key=lambda e: (e.outstanding, e.latency_ewma or 0.0)
+        )
+
+    def _record_success(self, endpoint: EndpointState, seconds: float) -> None:
+        alpha = self.config.ewma_alpha
+        if endpoint.latency_ewma is None:
+            endpoint.latency_ewma = seconds
+        else:
+            endpoint.latency_ewma = alpha * seconds + (1 - alpha) * endpoint.latency_ewma
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = 0.0
+
+    def _record_failure(self, endpoint: EndpointState) -> None:
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.ejected or endpoint.consecutive_failures >= self.config.failure_threshold:
+            # Failed probe or too many failures: (re-)eject with
+            # an exponentially growing cooldown.
+            cooldown = min(
+                self.config.ejection_seconds * 2 ** endpoint.ejections,
+                self.config.max_ejection_seconds
+            )
+            endpoint.ejections += 1
+            endpoint.ejected_until = time.monotonic() + cooldown
+
+    @asynccontextmanager
+    async def _dispatch(self, endpoint: EndpointState):
+        """Tracks one request on an endpoint: outstanding count, probe flag."""
+        is_probe = endpoint.ejected
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        endpoint.probing = endpoint.probing or is_probe
+        try:
+            yield
+        finally:
+            endpoint.outstanding -= 1
+            if is_probe:
+                endpoint.probing = False
+
+    def _max_attempts(self) -> int:
+        return min(self.config.max_attempts or len(self.endpoints), len(self.endpoints))
+
+    async def probe_ejected(self) -> int:
+        """
+        Actively checks every ejected endpoint with GET /models and
+        restores those that answer.
+
+        Returns:
+            int:
+                Number of endpoints brought back.
+        """
+        restored = 0
+        for endpoint in self.endpoints:
+            if not endpoint.ejected:
+                continue
+            client = getattr(endpoint.model, "client", None)
+            if client is None:
+                continue
+            try:
+                await asyncio.wait_for(client.models.list(), timeout=self.config.request_timeout or 5.0)
+            except Exception:
+                continue
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = 0.0
+            restored += 1
+        return restored
+
+    def snapshot(self) -> list:
+        """Returns the state of every endpoint as plain dicts."""
+        return [endpoint.as_dict() for endpoint in self.endpoints]
+
+    # ---------------------------------------------------------------
+    # Model Interface
+    # ---------------------------------------------------------------
+    async def request(self, messages, model_settings, model_request_parameters):
+        """Sends a request to the best endpoint, failing over on errors."""
+        tried, errors = [], []
+        for _ in range(self._max_attempts()):
+            endpoint = self.select_endpoint(exclude=tried)
+            tried.append(endpoint)
+            started = time.perf_counter()
+            async with self._dispatch(endpoint):
+                try:
+                    response = await asyncio.wait_for(
+                        endpoint.model.request(messages, model_settings, model_request_parameters),
+                        timeout=self.config.request_timeout
+                    )
+                except Exception as error:
+                    if is_endpoint_overload(error):
+                        # Busy: try another endpoint, keep this one
+                        endpoint.rejected += 1
+                    elif is_endpoint_failure(error):
+                        self._record_failure(endpoint)
+                    else:
+                        raise
+                    errors.append(f"{endpoint.base_url}: {error!r}")
+                    continue
+            self._record_success(endpoint, time.perf_counter() - started)
+            return response
+        raise NoEndpointAvailableError(self.model_name, "All endpoints failed: " + "; ".join(errors))
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages,
+        model_settings,
+        model_request_parameters,
+        run_context=None
+    ):
+        """
+        Opens a stream on the best endpoint, failing over while no
+        output has been produced yet. The request timeout applies
+        to opening the stream (the first chunk).
+        """
+        tried, errors = [], []
+        for _ in range(self._max_attempts()):
+            endpoint = self.select_endpoint(exclude=tried)
+            tried.append(endpoint)
+            started = time.perf_counter()
+            async with self._dispatch(endpoint), AsyncExitStack() as stack:
+                try:
+                    async with asyncio.timeout(self.config.request_timeout):
+                        response = await stack.enter_async_context(
+                            endpoint.model.request_stream(
+                                messages, model_settings, model_request_parameters, run_context
+                            )
+                        )
+                except Exception as error:
+                    if is_endpoint_overload(error):
+                        # Busy: try another endpoint, keep this one
+                        endpoint.rejected += 1
+                    elif is_endpoint_failure(error):
+                        self._record_failure(endpoint)
+                    else:
+                        raise
+                    errors.append(f"{endpoint.base_url}: {error!r}")
+                    continue
+
+                # Output may already have reached the caller, so
+                # failures from here on are recorded but not retried.
+                try:
+                    yield response
+                except Exception as error:
+                    if is_endpoint_failure(error):
+                        self._record_failure(endpoint)
+                    raise
+                self._record_success(endpoint, time.perf_counter() - started)
+                return
+        raise NoEndpointAvailableError(self.model_name, "All endpoints failed: " + "; ".join(errors))
@@ -0,0 +1,228 @@
+"""
+
+Model Warm-up
+
+Purpose:
+    This file preloads the advisor's models into Ollama's memory
+    before the first report, and pins them there with a keep-alive.
+
+Why this file exists:
+    Ollama loads a model on the first request that names it, and
+    unloads it after OLLAMA_KEEP_ALIVE (5 minutes by default) without
+    requests. The first report after start-up, or after a quiet
+    period, therefore waits several seconds for the model load on
+    top of its own generations. Ollama's native API loads a model
+    without generating anything when a request has no prompt, and
+    accepts a `keep_alive` for how long to keep it. The
+    OpenAI-compatible endpoint used by the agents has no such
+    option, so the warm-up goes to the native API directly. It
+    uses plain httpx, so it can run in a background thread while
+    the rest of the process is still importing PydanticAI and
+    building agents.
+
+    Note that Ollama resets a model's keep-alive on every request.
+    Requests from the agents use the server default, so set
+    OLLAMA_KEEP_ALIVE on the Ollama server as well to keep models
+    loaded between reports.
+
+Usage:
+    python main.py --warmup
+    python main.py --warmup --keep-alive 1h
+
+    from utils.model_warmup import warm_up
+    results = warm_up()                      # every agent model, every endpoint
+"""
+
+# Standard library imports
+import importlib
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+# Plain HTTP client for Ollama's native API
+import httpx
+
+from utils.llm_configuration import resolve_endpoints
+
+
+# How long Ollama keeps a preloaded model: a duration ("30m", "1h"),
+# seconds, or -1 for "until the server stops".
+DEFAULT_KEEP_ALIVE = os.getenv("ADVISOR_KEEP_ALIVE", "30m")
+
+# Model loads of large models on CPU can take minutes.
+DEFAULT_WARMUP_TIMEOUT = 300.0
+
+# Agent modules whose MODEL_NAME is preloaded.
+ADVISOR_AGENT_MODULES = (
+    "agents.market_analyst_agent",
+    "agents.market_snapshot_agent",
+    "agents.short_term_investment_agent",
+    "agents.long_term_investment_agent",
+    "agents.follow_up_agent",
+    "agents.conversation_summary_agent",
+)
+
+
+@dataclass
+class WarmupResult:
+    """
+    Outcome of preloading one model on one endpoint.
+
+    Attributes:
+        model (str): Model name.
+        endpoint (str): OpenAI-compatible endpoint URL.
+        seconds (float): Time the request took (mostly the load).
+        error (str): Why the preload failed, or None.
+    """
+
+    model: str
+    endpoint: str
+    seconds: float
+    error: str = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def ollama_api_url(base_url: str) -> str:
+    """Native API root of an Ollama endpoint (".../v1" removed)."""
+    url = base_url.rstrip("/")
+    return url[: -len("/v1")] if url.endswith("/v1") else url
+
+
+def advisor_models(cascade: bool = False, base_url=None) -> list:
+    """
+    Returns the (model, endpoint) pairs the advisor will call.
+
+    Agents are not built: only their MODEL_NAME is read.
+
+    Args:
+        cascade (bool):
+            Include the cheap cascade tiers (see utils.model_cascade).
+
+        base_url (str | list):
+            Endpoint(s) of the agents; see get_llm_model().
+
+    Returns:
+        list: Unique (model name, endpoint URL) pairs.
+    """
+    pairs = {}
+    endpoints = resolve_endpoints(base_url)
+    for module_name in ADVISOR_AGENT_MODULES:
+        model_name = importlib.import_module(module_name).MODEL_NAME
+        for endpoint in endpoints:
+            pairs[(model_name, endpoint)] = True
+    if cascade:
+        from utils.model_cascade import CASCADE_POLICIES
+
+        for policy in CASCADE_POLICIES.values():
+            for model_name in policy.models:
+                for endpoint in resolve_endpoints(policy.base_url):
+                    pairs[(model_name, endpoint)] = True
+    return list(pairs)
+
+
+def preload_model(
+    model_name: str,
+    endpoint: str,
+    keep_alive=DEFAULT_KEEP_ALIVE,
+    timeout: float = DEFAULT_WARMUP_TIMEOUT
+) -> WarmupResult:
+    """
+    Loads one model into an Ollama server's memory.
+
+    Args:
+        model_name (str): Model to load.
+        endpoint (str): OpenAI-compatible endpoint URL of the server.
+        keep_alive (str | int): How long Ollama keeps the model loaded.
+        timeout (float): Seconds to wait for the load.
+
+    Returns:
+        WarmupResult: Timing, and the error if the load failed.
+    """
+    started = time.perf_counter()
+    try:
+        # A generate request without a prompt only loads the model
+        response = httpx.post(
+            f"{ollama_api_url(endpoint)}/api/generate",
+            json={"model": model_name, "keep_alive": keep_alive},
+            timeout=timeout
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as error:
+        return WarmupResult(
+            model_name, endpoint, time.perf_counter() - started, f"{type(error).__name__}: {error}"
+        )
+    return WarmupResult(model_name, endpoint, time.perf_counter() - started)
+
+
+def warm_up(
+    models: list = None,
+    keep_alive=DEFAULT_KEEP_ALIVE,
+    cascade: bool = False,
+    timeout: float = DEFAULT_WARMUP_TIMEOUT,
+    base_url=None
+) -> list:
+    """
+    Preloads models on every endpoint, all at once.
+
+    Failures are reported, not raised: a cold model only makes the
+    first report slower.
+
+    Args:
+        models (list):
+            (model name, endpoint) pairs; advisor_models(cascade)
+            by default.
+
+        keep_alive (str | int):
+            How long Ollama keeps the models loaded.
+
+        cascade (bool):
+            With the default models, include the cascade tiers.
+
+        timeout (float):
+            Seconds to wait for each load.
+
+        base_url (str | list):
+            With the default models, the agents' endpoint(s).
+
+    Returns:
+        list: One WarmupResult per pair.
+    """
+    models = models if models is not None else advisor_models(cascade, base_url)
+    if not models:
+        return []
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        return list(pool.map(
+            lambda pair: preload_model(pair[0], pair[1], keep_alive, timeout), models
+        ))
+
+
+def start_warmup(**kwargs) -> Future:
+    """
+    Runs warm_up(**kwargs) in a background thread.
+
+    Started before the heavy imports, the model load overlaps with
+    them instead of adding to the first report.
+
+    Returns:
+        Future: Resolves to the list of WarmupResult.
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+    future = pool.submit(warm_up, **kwargs)
+    # Let the thread exit once the warm-up is done
+    pool.shutdown(wait=False)
+    return future
+
+
+def format_warmup(results: list) -> str:
+    """One line per preloaded model, for the terminal."""
+    lines = []
+    for result in results:
+        status = "ready" if result.ok else f"failed ({result.error})"
+        lines.append(
+            f"🔥 {result.model} @ {result.endpoint}: {status} in {result.seconds:.2f}s"
+        )
+    return "\n".join(lines)
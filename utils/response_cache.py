@@ -0,0 +1,465 @@
+"""
+
+Response Cache
+
+Purpose:
+    This file provides a persistent, on-disk cache for agent
+    outputs, so repeated runs with unchanged inputs can skip
+    the LLM generation entirely.
+
+Why this file exists:
+    - A full generation takes several seconds; a cache lookup
+      takes milliseconds
+    - Market conditions do not change meaningfully within a few
+      minutes, so a recent analysis can be safely reused
+    - Keeps caching logic out of the agents and the orchestrator
+
+How entries are keyed:
+    The cache key covers everything that influences the output:
+    model name (of the overriding model while an override is
+    active), model settings (temperature, max_tokens, ...), the
+    agent's system prompt (see register_system_prompt()) and the
+    user prompt. Changing any of these produces a different key,
+    so stale answers are never returned for a different question.
+"""
+
+# Standard library imports
+import hashlib
+import json
+import os
+import time
+import weakref
+from dataclasses import dataclass
+
+# Streaming helper used by run_stream()
+from utils.streaming import TokenSink, console_sink, stream_agent_text
+
+# Token usage is reported to the running telemetry stage
+from utils.telemetry import record_usage
+
+# diskcache provides a process-safe, SQLite-backed key/value store
+# with built-in expiry and size-bounded eviction.
+import diskcache
+
+
+# Default location of the cache on disk.
+DEFAULT_CACHE_DIR = os.getenv("ADVISOR_CACHE_DIR", ".cache/llm_responses")
+
+# Default upper bound on the cache size (bytes).
+DEFAULT_SIZE_LIMIT = int(os.getenv("ADVISOR_CACHE_SIZE_LIMIT", 256 * 1024 * 1024))
+
+# Time-to-live per agent, in seconds.
+# A market snapshot that is ten minutes old is acceptable; long-term
+# recommendations change even more slowly.
+DEFAULT_TTLS = {
+    "market_analyst": 10 * 60,
+    "short_term": 10 * 60,
+    "long_term": 60 * 60,
+}
+
+# TTL used for agents that are not listed above.
+DEFAULT_TTL = 10 * 60
+
+
+def make_cache_key(
+    model_name: str,
+    model_settings: dict,
+    system_prompt: str,
+    user_prompt: str,
+    **extra
+) -> str:
+    """
+    Builds a stable cache key for one agent call.
+
+    Args:
+        model_name (str):
+            Name of the model that would generate the output.
+
+        model_settings (dict):
+            Effective model settings (temperature, max_tokens, ...).
+
+        system_prompt (str):
+            The agent's system prompt.
+
+        user_prompt (str):
+            The prompt sent for this call.
+
+        **extra:
+            Any other input that changes the output
+            (for example the output mode).
+
+    Returns:
+        str:
+            A SHA-256 hex digest identifying the call.
+    """
+    payload = json.dumps(
+        {
+            "model_name": model_name,
+            "model_settings": model_settings or {},
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "extra": extra,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# System prompts of the agents, recorded where each agent is built:
+# id(agent) -> (weak reference to the agent, system prompt).
+_SYSTEM_PROMPTS = {}
+
+
+def register_system_prompt(agent, system_prompt: str):
+    """
+    Records the system prompt an agent was built with, so that it
+    becomes part of the agent's cache keys.
+
+    Returns:
+        The agent, so a builder can `return register_system_prompt(...)`.
+    """
+    _SYSTEM_PROMPTS[id(agent)] = (weakref.ref(agent), system_prompt)
+    return agent
+
+
+def agent_system_prompt(agent) -> str:
+    """Returns the registered system prompt of an agent ("" if none)."""
+    reference, system_prompt = _SYSTEM_PROMPTS.get(id(agent), (None, ""))
+    # An id can be reused once its agent is gone
+    return system_prompt if reference is not None and reference() is agent else ""
+
+
+def active_model(agent):
+    """
+    Returns the model an agent would run with right now: the model
+    of an active `agent.override(model=...)`, else agent.model.
+    """
+    # PydanticAI has no public accessor for the override
+    override = getattr(agent, "_override_model", None)
+    overridden = override.get() if override is not None else None
+    return overridden.value if overridden is not None else agent.model
+
+
+def describe_agent_call(agent, model_settings: dict = None) -> tuple:
+    """
+    Returns the (model_name, model_settings, system_prompt) that an
+    agent would use for a call.
+
+    Args:
+        agent:
+            A PydanticAI Agent.
+
+        model_settings (dict):
+            Settings passed for this specific call, if any.
+            They take precedence over model and agent settings.
+
+    Returns:
+        tuple:
+            (model_name, merged model settings, system prompt).
+    """
+    model = active_model(agent)
+    settings = {
+        **dict(getattr(model, "settings", None) or {}),
+        **dict(agent.model_settings or {}),
+        **dict(model_settings or {}),
+    }
+    return getattr(model, "model_name", str(model)), settings, agent_system_prompt(agent)
+
+
+def agent_output_generator(agent):
+    """Returns the default generate() coroutine: Agent.run().output."""
+    async def generate(user_prompt: str, **run_kwargs):
+        result = await agent.run(user_prompt, **run_kwargs)
+        record_usage(result.usage())
+        return result.output
+    return generate
+
+
+@dataclass
+class CacheStats:
+    """
+    Hit/miss counters for one agent.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that required a generation.
+        bypassed (int): Number of calls that skipped the cache.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+
+
+class ResponseCache:
+    """
+    Persistent cache of agent outputs with per-agent TTLs and
+    size-bounded LRU eviction.
+
+    Args:
+        directory (str):
+            Folder holding the cache files.
+
+        size_limit (int):
+            Maximum size of the cache in bytes. When exceeded, the
+            least recently used entries are evicted.
+
+        ttls (dict):
+            Time-to-live per agent name, in seconds.
+
+        enabled (bool):
+            When False, every call bypasses the cache. Can also be
+            turned off with ADVISOR_CACHE_BYPASS=1.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        size_limit: int = DEFAULT_SIZE_LIMIT,
+        ttls: dict = None,
+        enabled: bool = None
+    ):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        if enabled is None:
+            enabled = os.getenv("ADVISOR_CACHE_BYPASS", "") not in ("1", "true", "yes")
+        self.enabled = enabled
+        self.stats = {}
+        self._store = None
+
+    @property
+    def store(self) -> diskcache.Cache:
+        """The underlying diskcache store, opened on first use."""
+        if self._store is None:
+            self._store = diskcache.Cache(
+                self.directory,
+                size_limit=self.size_limit,
+                eviction_policy="least-recently-used"
+            )
+        return self._store
+
+    def _stats_for(self, agent_name: str) -> CacheStats:
+        return self.stats.setdefault(agent_name, CacheStats())
+
+    def ttl_for(self, agent_name: str) -> float:
+        """Returns the TTL (seconds) used for an agent's entries."""
+        return self.ttls.get(agent_name, DEFAULT_TTL)
+
+    def get(self, agent_name: str, key: str):
+        """
+        Looks up a cached output.
+
+        Returns:
+            The cached output, or None on a miss.
+        """
+        value = self.store.get(key)
+        stats = self._stats_for(agent_name)
+        if value is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return value
+
+    def set(self, agent_name: str, key: str, value) -> None:
+        """Stores an output with the agent's TTL."""
+        self.store.set(key, value, expire=self.ttl_for(agent_name))
+
+    def key_for(
+        self,
+        agent,
+        user_prompt: str,
+        model_settings: dict = None,
+        cache_extra: dict = None
+    ) -> str:
+        """
+        Returns the cache key for running an agent on a prompt.
+
+        Args:
+            agent:
+                The PydanticAI Agent that would run.
+
+            user_prompt (str):
+                Prompt for the agent.
+
+            model_settings (dict):
+                Per-call model settings, if any.
+
+            cache_extra (dict):
+                Additional inputs that must be part of the key.
+
+        Returns:
+            str:
+                The cache key.
+        """
+        model_name, settings, system_prompt = describe_agent_call(
+            agent, model_settings
+        )
+        return make_cache_key(
+            model_name, settings, system_prompt, user_prompt,
+            **(cache_extra or {})
+        )
+
+    async def run(
+        self,
+        agent,
+        agent_name: str,
+        user_prompt: str,
+        bypass: bool = False,
+        cache_extra: dict = None,
+        validator=None,
+        generate=None,
+        **run_kwargs
+    ):
+        """
+        Runs an agent, answering from the cache when possible.
+
+        Args:
+            agent:
+                The PydanticAI Agent to run on a cache miss.
+
+            agent_name (str):
+                Short name used for TTLs and statistics.
+
+            user_prompt (str):
+                Prompt for the agent.
+
+            bypass (bool):
+                Skip the cache for this call (neither read nor write).
+
+            cache_extra (dict):
+                Additional inputs that must be part of the key.
+
+            validator (callable):
+                Optional function applied to the output. Its return
+                value is returned instead of the raw output, and an
+                output is only cached if the validator accepts it
+                (exceptions propagate to the caller).
+
+            generate (callable):
+                Optional coroutine function generate(user_prompt,
+                **run_kwargs) returning the raw output. Defaults to
+                Agent.run(); used for streamed generations.
+
+            **run_kwargs:
+                Passed through to Agent.run() (or generate).
+
+        Returns:
+            tuple:
+                (output, cache_hit) where output is the agent's
+                output (or the validator's result) and cache_hit
+                tells whether it came from the cache.
+        """
+        validate = validator or (lambda output: output)
+        generate = generate or agent_output_generator(agent)
+
+        if bypass or not self.enabled:
+            self._stats_for(agent_name).bypassed += 1
+            output = await generate(user_prompt, **run_kwargs)
+            return validate(output), False
+
+        key = self.key_for(
+            agent, user_prompt, run_kwargs.get("model_settings"), cache_extra
+        )
+
+        cached = self.get(agent_name, key)
+        if cached is not None:
+            return validate(cached), True
+
+        output = await generate(user_prompt, **run_kwargs)
+        value = validate(output)
+        self.set(agent_name, key, output)
+        return value, False
+
+    def remember(
+        self,
+        agent,
+        agent_name: str,
+        user_prompt: str,
+        output,
+        bypass: bool = False,
+        cache_extra: dict = None,
+        model_settings: dict = None
+    ) -> None:
+        """
+        Stores an output for a prompt that was answered some other
+        way (for example by a correction retry), so the next run
+        of the same prompt is a cache hit.
+        """
+        if bypass or not self.enabled:
+            return
+        key = self.key_for(agent, user_prompt, model_settings, cache_extra)
+        self.set(agent_name, key, output)
+
+    async def run_stream(
+        self,
+        agent,
+        agent_name: str,
+        user_prompt: str,
+        sink: TokenSink = console_sink,
+        bypass: bool = False,
+        cache_extra: dict = None,
+        **run_kwargs
+    ):
+        """
+        Streaming variant of run() for text agents.
+
+        On a cache miss the agent is streamed and every chunk is
+        forwarded to the sink. On a hit the cached text is sent to
+        the sink in one piece.
+
+        Returns:
+            tuple:
+                (output, cache_hit, ttft) where ttft is the
+                time-to-first-token in seconds.
+        """
+        if bypass or not self.enabled:
+            self._stats_for(agent_name).bypassed += 1
+            output, ttft = await stream_agent_text(
+                agent, user_prompt, sink, **run_kwargs
+            )
+            return output, False, ttft
+
+        start = time.perf_counter()
+        key = self.key_for(
+            agent, user_prompt, run_kwargs.get("model_settings"), cache_extra
+        )
+
+        cached = self.get(agent_name, key)
+        if cached is not None:
+            ttft = time.perf_counter() - start
+            await sink(cached)
+            return cached, True, ttft
+
+        output, ttft = await stream_agent_text(
+            agent, user_prompt, sink, **run_kwargs
+        )
+        self.set(agent_name, key, output)
+        return output, False, ttft
+
+    def summary(self) -> dict:
+        """Returns hit/miss counters per agent as plain dicts."""
+        return {name: vars(stats).copy() for name, stats in self.stats.items()}
+
+    def clear(self) -> None:
+        """Removes every cached entry."""
+        self.store.clear()
+
+    def close(self) -> None:
+        """Closes the underlying store."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+# Shared cache instance, created on first use.
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide ResponseCache instance."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
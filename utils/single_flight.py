@@ -0,0 +1,119 @@
+"""
+
+Single Flight
+
+Purpose:
+    This file provides request coalescing ("single-flight") for
+    asyncio code: concurrent callers asking for the same key share
+    one execution instead of each starting their own.
+
+Why this file exists:
+    When many clients ask for the current market view at the same
+    moment, they all need the same market-analyst generation. With
+    single-flight, a burst of hundreds of identical requests turns
+    into one LLM call whose result is handed to every caller.
+"""
+
+# Standard library imports
+import asyncio
+from dataclasses import dataclass
+
+
+@dataclass
+class SingleFlightStats:
+    """
+    Counters for a SingleFlight group.
+
+    Attributes:
+        calls (int): Number of do() calls.
+        executions (int): Number of times the work actually ran.
+    """
+
+    calls: int = 0
+    executions: int = 0
+
+    @property
+    def coalesced(self) -> int:
+        """Calls that joined an execution already in flight."""
+        return self.calls - self.executions
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a plain dict."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    Usage:
+        group = SingleFlight()
+        result = await group.do("market", run_market_analysis)
+
+    Only calls that overlap in time are coalesced; once the shared
+    execution finishes, the next call for the key starts a new one
+    (use the response cache for reuse over time).
+
+    A caller that is cancelled (for example a disconnected client)
+    does not cancel the shared execution, because other callers
+    may still be waiting for it.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.stats = SingleFlightStats()
+
+    def in_flight(self, key) -> bool:
+        """Returns True while an execution for the key is running."""
+        return key in self._inflight
+
+    def task_for(self, key, factory) -> asyncio.Task:
+        """
+        Returns the in-flight task for a key, starting it with
+        factory() if there is none.
+
+        Args:
+            key:
+                Hashable identifier of the work.
+
+            factory:
+                Zero-argument callable returning a coroutine.
+
+        Returns:
+            asyncio.Task:
+                The shared task.
+        """
+        self.stats.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats.executions += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def _forget(finished, key=key):
+                if self._inflight.get(key) is finished:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        return task
+
+    async def do(self, key, factory):
+        """
+        Runs factory() once for all concurrent callers of a key.
+
+        Args:
+            key:
+                Hashable identifier of the work.
+
+            factory:
+                Zero-argument callable returning a coroutine.
+
+        Returns:
+            The result of the shared execution (exceptions are
+            raised to every caller).
+        """
+        return await asyncio.shield(self.task_for(key, factory))
@@ -0,0 +1,153 @@
+"""
+
+Streaming Helpers
+
+Purpose:
+    This file provides helpers for streaming an agent's text
+    output token by token, instead of waiting for the whole
+    generation to finish.
+
+Why this file exists:
+    - The market analysis is free text and is readable long
+      before the whole workflow completes
+    - Showing tokens as they arrive greatly reduces perceived
+      latency for the user
+    - Measuring time-to-first-token (TTFT) tells us how long the
+      user actually waits before seeing anything
+"""
+
+# Standard library imports
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable
+
+# TTFT and token usage are reported to the running telemetry stage
+from utils.telemetry import record_ttft, record_usage
+
+# A sink receives each text chunk as soon as it is generated.
+TokenSink = Callable[[str], Awaitable[None]]
+
+
+async def console_sink(token: str) -> None:
+    """
+    Default sink: writes tokens to the terminal immediately.
+
+    Args:
+        token (str):
+            Text chunk produced by the model.
+    """
+    sys.stdout.write(token)
+    sys.stdout.flush()
+
+
+async def stream_agent_text(
+    agent,
+    user_prompt: str,
+    sink: TokenSink = console_sink,
+    **run_kwargs
+) -> tuple:
+    """
+    Runs a text agent with Agent.run_stream and forwards every
+    chunk to a sink as it arrives.
+
+    Args:
+        agent:
+            A PydanticAI Agent with text output.
+
+        user_prompt (str):
+            Prompt for the agent.
+
+        sink (TokenSink):
+            Async callable receiving each text chunk.
+
+        **run_kwargs:
+            Passed through to Agent.run_stream().
+
+    Returns:
+        tuple:
+            (full_text, ttft) where ttft is the time-to-first-token
+            in seconds (None if the model produced no text).
+    """
+    start = time.perf_counter()
+    ttft = None
+    chunks = []
+
+    async with agent.run_stream(user_prompt, **run_kwargs) as result:
+        # debounce_by=None forwards every chunk without grouping,
+        # so tokens appear on screen as soon as they are generated.
+        async for delta in result.stream_text(delta=True, debounce_by=None):
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            chunks.append(delta)
+            await sink(delta)
+        record_usage(result.usage())
+
+    if ttft is not None:
+        record_ttft(ttft)
+    return "".join(chunks), ttft
+
+
+class TokenBroadcast:
+    """
+    Fans one token stream out to any number of listeners.
+
+    Why this exists:
+        When several clients wait on the same coalesced generation
+        (see utils.single_flight), each of them should still see
+        the tokens as they arrive. publish() is used as the sink of
+        the single generation; every listener iterates listen().
+        Listeners that join late first receive the tokens they
+        missed, so everyone ends up with the full text.
+
+    Usage:
+        broadcast = TokenBroadcast()
+        await stream_agent_text(agent, prompt, sink=broadcast.publish)
+        await broadcast.close()
+
+        async for token in broadcast.listen():
+            ...
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+    @property
+    def text(self) -> str:
+        """Everything published so far."""
+        return "".join(self._chunks)
+
+    async def publish(self, token: str) -> None:
+        """Sink: records a chunk and wakes every listener."""
+        async with self._condition:
+            self._chunks.append(token)
+            self._condition.notify_all()
+
+    async def close(self) -> None:
+        """Marks the stream as finished (successfully or not)."""
+        async with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    async def listen(self):
+        """
+        Yields every chunk, from the first one, until the stream
+        is closed.
+        """
+        index = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: len(self._chunks) > index or self._closed
+                )
+                pending = self._chunks[index:]
+                index += len(pending)
+                finished = self._closed and index == len(self._chunks)
+            for chunk in pending:
+                yield chunk
+            if finished:
+                return
@@ -0,0 +1,225 @@
+"""
+
+Streaming JSON Validator
+
+Purpose:
+    This file provides an incremental validator that checks an
+    investment recommendation while it is still being generated.
+
+Why this file exists:
+    Without it, a bad recommendation is only detected after the
+    model has finished, which can mean up to max_tokens wasted
+    tokens and several seconds per failed attempt. Checking each
+    chunk as it arrives lets the orchestrator cancel a generation
+    as soon as it can no longer become valid, and stop as soon as
+    the closing brace of the object arrives.
+
+A generation is rejected as soon as it contains:
+    - prose before the opening brace (a leading ```json fence is
+      tolerated, because the repair stage removes it)
+    - a key that is not a field of the schema
+    - a value that is not a string
+    - a risk_level that is not Low, Medium or High
+    - a closing brace while required fields are still missing
+"""
+
+# Standard library imports
+import re
+
+# Import the schema whose fields are validated
+from schemas.investment_schema import InvestmentRecommendation
+
+# Canonical risk levels (lower-case -> canonical spelling)
+from utils.json_repair import RISK_LEVELS
+
+
+# Whitespace and an optional, possibly incomplete ```json fence.
+_PRELUDE_RE = re.compile(r"\s*(`{1,2}|```[a-zA-Z]*\s*)?")
+
+
+class StreamValidationError(ValueError):
+    """Raised as soon as a streamed output can no longer become valid."""
+
+
+class IncrementalRecommendationValidator:
+    """
+    Consumes streamed text chunks and validates the fields of an
+    InvestmentRecommendation as they complete.
+
+    Usage:
+        validator = IncrementalRecommendationValidator()
+        for chunk in stream:
+            if validator.feed(chunk):
+                break              # closing brace received
+        json_text = validator.text
+
+    Args:
+        fields:
+            Allowed (and required) field names. Defaults to the
+            fields of InvestmentRecommendation.
+
+        allowed_values (dict):
+            Field name -> allowed values (case-insensitive).
+            Defaults to the risk levels for "risk_level".
+
+    Attributes:
+        text (str):
+            Everything consumed so far. Once complete, it ends
+            with the closing brace of the object.
+
+        complete (bool):
+            True once the top-level object has been closed.
+    """
+
+    def __init__(self, fields=None, allowed_values: dict = None):
+        self.fields = set(fields or InvestmentRecommendation.model_fields)
+        if allowed_values is None:
+            allowed_values = {"risk_level": RISK_LEVELS.keys()}
+        self.allowed_values = {
+            name: {value.lower() for value in values}
+            for name, values in allowed_values.items()
+        }
+
+        self.text = ""
+        self.complete = False
+        self.seen_fields = set()
+
+        self._prelude = ""
+        self._started = False
+        # What the parser expects next at the top level:
+        # "key", "colon", "value" or "comma"
+        self._expect = "key"
+        self._quote = None
+        self._escaped = False
+        self._string = []
+        self._string_role = None
+        self._current_key = None
+
+    # ---------------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------------
+    def feed(self, chunk: str) -> bool:
+        """
+        Consumes the next chunk of streamed text.
+
+        Args:
+            chunk (str):
+                Newly generated text.
+
+        Returns:
+            bool:
+                True once the closing brace of the object has been
+                received; any text after it is ignored.
+
+        Raises:
+            StreamValidationError:
+                If the output can no longer become valid.
+        """
+        for char in chunk:
+            if self.complete:
+                break
+            self.text += char
+            self._consume(char)
+        return self.complete
+
+    # ---------------------------------------------------------------
+    # Parser
+    # ---------------------------------------------------------------
+    def _fail(self, reason: str):
+        raise StreamValidationError(reason)
+
+    def _consume(self, char: str) -> None:
+        if not self._started:
+            self._consume_prelude(char)
+        elif self._quote:
+            self._consume_string(char)
+        else:
+            self._consume_top_level(char)
+
+    def _consume_prelude(self, char: str) -> None:
+        if char == "{":
+            self._started = True
+            return
+        self._prelude += char
+        if not _PRELUDE_RE.fullmatch(self._prelude):
+            self._fail("Output contains text before the JSON object")
+
+    def _consume_top_level(self, char: str) -> None:
+        if char.isspace():
+            return
+
+        if char == "}":
+            if self._expect not in ("key", "comma"):
+                self._fail("Object closed in the middle of a field")
+            missing = self.fields - self.seen_fields
+            if missing:
+                self._fail(f"Missing fields: {', '.join(sorted(missing))}")
+            self.complete = True
+            return
+
+        if char in "\"'":
+            if self._expect == "key":
+                self._start_string(char, "key")
+            elif self._expect == "value":
+                self._start_string(char, "value")
+            else:
+                self._fail(f"Unexpected string (expected {self._expect})")
+            return
+
+        if char == ":" and self._expect == "colon":
+            self._expect = "value"
+        elif char == "," and self._expect == "comma":
+            self._expect = "key"
+        elif self._expect == "value":
+            self._fail(f"Value of '{self._current_key}' must be a string")
+        else:
+            self._fail(f"Unexpected character {char!r} (expected {self._expect})")
+
+    def _start_string(self, quote: str, role: str) -> None:
+        self._quote = quote
+        self._string = []
+        self._string_role = role
+
+    def _consume_string(self, char: str) -> None:
+        if self._escaped:
+            self._escaped = False
+            self._string.append(char)
+            return
+        if char == "\\":
+            self._escaped = True
+            return
+        if char == self._quote:
+            self._quote = None
+            self._finish_string("".join(self._string))
+            return
+
+        self._string.append(char)
+        if self._string_role == "key" or self._current_key in self.allowed_values:
+            self._check_partial_string("".join(self._string))
+
+    def _check_partial_string(self, partial: str) -> None:
+        """Rejects keys and enum values that cannot be completed."""
+        if self._string_role == "key":
+            if not any(field.startswith(partial) for field in self.fields):
+                self._fail(f"Unknown key starting with '{partial}'")
+        else:
+            allowed = self.allowed_values.get(self._current_key)
+            candidate = partial.lstrip().lower()
+            if allowed and not any(value.startswith(candidate) for value in allowed):
+                self._fail(
+                    f"Invalid {self._current_key} '{partial}' "
+                    f"(allowed: {', '.join(sorted(allowed))})"
+                )
+
+    def _finish_string(self, value: str) -> None:
+        if self._string_role == "key":
+            if value not in self.fields:
+                self._fail(f"Unknown key '{value}'")
+            self._current_key = value
+            self.seen_fields.add(value)
+            self._expect = "colon"
+        else:
+            allowed = self.allowed_values.get(self._current_key)
+            if allowed and value.strip().lower() not in allowed:
+                self._fail(f"Invalid {self._current_key} '{value}'")
+            self._expect = "comma"
@@ -0,0 +1,354 @@
+"""
+
+Telemetry
+
+Purpose:
+    This file provides per-stage instrumentation for the agentic
+    workflow: OpenTelemetry spans, Prometheus metrics and an
+    in-process collector that can be dumped as JSON.
+
+Why this file exists:
+    Before tuning anything we need to know where time goes:
+    is the p99 dominated by the market analyst or by the JSON
+    agents, by queueing or by generation, by long prompts or by
+    retries? Every agent call is recorded as a "stage" with:
+    - queue wait (time between being scheduled and starting)
+    - time-to-first-token (streamed calls only)
+    - generation time
+    - prompt / completion token counts
+    - retries and validation failures
+
+Where the data goes:
+    - OpenTelemetry spans: exported by whatever SDK is configured
+      (for example `logfire.configure()`); no-ops otherwise
+    - Prometheus metrics: registered on the default registry, see
+      start_metrics_server()
+    - METRICS collector: aggregated in-process, see
+      metrics_snapshot() and dump_metrics_json(). Totals cover the
+      whole process; percentiles and the raw records cover the most
+      recent ADVISOR_METRICS_WINDOW records per stage, so a
+      long-running service or worker keeps bounded memory.
+"""
+
+# Standard library imports
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+# OpenTelemetry API: creates spans, exported by the configured SDK.
+from opentelemetry import trace
+
+# Prometheus client: exposes metrics for scraping.
+from prometheus_client import Counter, Histogram, start_http_server
+
+
+# Tracer used for all workflow spans.
+tracer = trace.get_tracer("agentic_financial_advisor")
+
+
+# -------------------------------------------------------------------
+# Prometheus Metrics
+# -------------------------------------------------------------------
+# Latency buckets tuned for local LLM calls (10 ms to 5 minutes).
+_LATENCY_BUCKETS = (
+    0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300
+)
+
+STAGE_LATENCY = Histogram(
+    "advisor_stage_latency_seconds",
+    "Latency of a workflow stage, by phase (queue_wait, ttft, generation).",
+    ["stage", "phase"],
+    buckets=_LATENCY_BUCKETS
+)
+
+STAGE_TOKENS = Counter(
+    "advisor_stage_tokens_total",
+    "Tokens processed by a workflow stage, by kind (prompt, completion).",
+    ["stage", "kind"]
+)
+
+STAGE_RETRIES = Counter(
+    "advisor_stage_retries_total",
+    "Correction retries sent back to the model.",
+    ["stage"]
+)
+
+STAGE_VALIDATION_FAILURES = Counter(
+    "advisor_stage_validation_failures_total",
+    "Agent outputs rejected by validation.",
+    ["stage"]
+)
+
+STAGE_CACHE_HITS = Counter(
+    "advisor_stage_cache_hits_total",
+    "Stages answered from the response cache.",
+    ["stage"]
+)
+
+
+def start_metrics_server(port: int = 9464) -> None:
+    """Serves the Prometheus metrics on http://0.0.0.0:<port>/metrics."""
+    start_http_server(port)
+
+
+# -------------------------------------------------------------------
+# Stage Records
+# -------------------------------------------------------------------
+@dataclass
+class StageRecord:
+    """
+    Measurements for one execution of a workflow stage.
+
+    Attributes:
+        stage (str): Stage name, e.g. "market_analyst".
+        queue_wait (float): Seconds between scheduling and start, plus
+            waits recorded inside the stage (see record_queue_wait()).
+        ttft (float): Time-to-first-token in seconds (streamed calls).
+        generation_seconds (float): Seconds spent in the stage, not
+            counting the waits recorded inside it.
+        prompt_tokens (int): Prompt tokens over all model requests.
+        completion_tokens (int): Completion tokens over all requests.
+        requests (int): Number of model requests made.
+        retries (int): Correction retries sent back to the model.
+        validation_failures (int): Outputs rejected by validation.
+        cache_hit (bool): Whether the stage was served from cache.
+    """
+
+    stage: str
+    queue_wait: float = 0.0
+    ttft: float = None
+    generation_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    validation_failures: int = 0
+    cache_hit: bool = False
+
+
+def percentile(values, q: float) -> float:
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        values: Numbers to summarize.
+        q (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, or None for an empty list.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# Most recent records kept per stage (and overall, for the JSON
+# dump). Older records only count in the per-stage totals.
+DEFAULT_RECORD_WINDOW = int(os.getenv("ADVISOR_METRICS_WINDOW", 1000))
+
+# StageRecord counters summed into the per-stage totals.
+_TOTAL_FIELDS = (
+    "cache_hit", "prompt_tokens", "completion_tokens", "requests",
+    "retries", "validation_failures"
+)
+
+
+class MetricsCollector:
+    """
+    Keeps running per-stage totals and a bounded window of recent
+    StageRecords per stage, and summarizes them.
+
+    Attributes:
+        window (int): Records kept per stage.
+        records (deque): The most recent records of all stages.
+    """
+
+    def __init__(self, window: int = DEFAULT_RECORD_WINDOW):
+        self.window = window
+        self.records = deque(maxlen=window)
+        self._recent = {}
+        self._totals = {}
+
+    def add(self, record: StageRecord) -> None:
+        """Stores a finished stage record."""
+        self.records.append(record)
+        self._recent.setdefault(record.stage, deque(maxlen=self.window)).append(record)
+        totals = self._totals.setdefault(record.stage, dict.fromkeys(("count",) + _TOTAL_FIELDS, 0))
+        totals["count"] += 1
+        for name in _TOTAL_FIELDS:
+            totals[name] += getattr(record, name)
+
+    def recent(self, stage: str):
+        """Returns the stage's most recent records, oldest first."""
+        return self._recent.get(stage, ())
+
+    def clear(self) -> None:
+        """Forgets all records and totals."""
+        self.records.clear()
+        self._recent.clear()
+        self._totals.clear()
+
+    def snapshot(self, include_records: bool = True) -> dict:
+        """
+        Returns per-stage aggregates and the recent raw records.
+
+        Args:
+            include_records (bool):
+                Include the raw records (for offline analysis).
+
+        Returns:
+            dict:
+                {"stages": {stage: summary}, "records": [...]}
+                where each summary holds process-wide counts and
+                token totals, and p50/p95/p99 for queue wait, TTFT
+                and generation over the stage's recent records.
+        """
+        summary = {}
+        for stage, records in self._recent.items():
+            totals = self._totals[stage]
+            entry = {
+                "count": totals["count"],
+                "cache_hits": totals["cache_hit"],
+                **{name: totals[name] for name in _TOTAL_FIELDS[1:]}
+            }
+            for phase in ("queue_wait", "ttft", "generation_seconds"):
+                values = [
+                    getattr(r, phase) for r in records
+                    if getattr(r, phase) is not None
+                ]
+                entry[phase] = {
+                    f"p{q}": percentile(values, q) for q in (50, 95, 99)
+                }
+            summary[stage] = entry
+
+        snapshot = {"stages": summary}
+        if include_records:
+            snapshot["records"] = [asdict(record) for record in self.records]
+        return snapshot
+
+
+# Process-wide collector.
+METRICS = MetricsCollector()
+
+# Stage record of the agent call currently running in this task.
+_current_stage = ContextVar("current_stage", default=None)
+
+
+@contextmanager
+def stage_span(stage: str, queued_at: float = None):
+    """
+    Measures one workflow stage.
+
+    Opens an OpenTelemetry span, makes the StageRecord available
+    to record_usage()/record_ttft() for code running inside the
+    block, and publishes the record to Prometheus and METRICS
+    when the block exits.
+
+    Args:
+        stage (str):
+            Stage name, e.g. "short_term".
+
+        queued_at (float):
+            time.perf_counter() value when the stage was scheduled,
+            used to compute the queue wait.
+
+    Yields:
+        StageRecord:
+            The record being filled in.
+    """
+    started = time.perf_counter()
+    queued = started - queued_at if queued_at is not None else 0.0
+    record = StageRecord(stage=stage, queue_wait=queued)
+    token = _current_stage.set(record)
+
+    with tracer.start_as_current_span(f"advisor.{stage}") as span:
+        try:
+            yield record
+        finally:
+            waited = record.queue_wait - queued
+            record.generation_seconds = time.perf_counter() - started - waited
+            _current_stage.reset(token)
+            _publish(record, span)
+
+
+def current_stage() -> StageRecord:
+    """Returns the StageRecord of the running stage, if any."""
+    return _current_stage.get()
+
+
+def record_usage(usage) -> None:
+    """
+    Adds a PydanticAI RunUsage to the running stage.
+
+    Args:
+        usage:
+            Result of AgentRunResult.usage() or
+            StreamedRunResult.usage().
+    """
+    record = _current_stage.get()
+    if record is None or usage is None:
+        return
+    record.prompt_tokens += usage.input_tokens or 0
+    record.completion_tokens += usage.output_tokens or 0
+    record.requests += usage.requests or 0
+
+
+def record_ttft(ttft: float) -> None:
+    """Stores the first time-to-first-token seen by the running stage."""
+    record = _current_stage.get()
+    if record is not None and record.ttft is None:
+        record.ttft = ttft
+
+
+def record_queue_wait(seconds: float) -> None:
+    """
+    Adds time spent waiting (e.g. for a scheduler slot) to the stage.
+
+    The time moves from the stage's generation_seconds to its
+    queue_wait. EndpointScheduler calls this for every admitted
+    model request.
+    """
+    record = _current_stage.get()
+    if record is not None:
+        record.queue_wait += seconds
+
+
+def _publish(record: StageRecord, span) -> None:
+    """Exports a finished record to the span, Prometheus and METRICS."""
+    for name, value in asdict(record).items():
+        if value is not None:
+            span.set_attribute(f"advisor.{name}", value)
+
+    STAGE_LATENCY.labels(record.stage, "queue_wait").observe(record.queue_wait)
+    STAGE_LATENCY.labels(record.stage, "generation").observe(record.generation_seconds)
+    if record.ttft is not None:
+        STAGE_LATENCY.labels(record.stage, "ttft").observe(record.ttft)
+    STAGE_TOKENS.labels(record.stage, "prompt").inc(record.prompt_tokens)
+    STAGE_TOKENS.labels(record.stage, "completion").inc(record.completion_tokens)
+    STAGE_RETRIES.labels(record.stage).inc(record.retries)
+    STAGE_VALIDATION_FAILURES.labels(record.stage).inc(record.validation_failures)
+    if record.cache_hit:
+        STAGE_CACHE_HITS.labels(record.stage).inc()
+
+    METRICS.add(record)
+
+
+def metrics_snapshot(**extra) -> dict:
+    """
+    Returns METRICS.snapshot() merged with extra sections
+    (for example cache or repair counters).
+    """
+    return {**METRICS.snapshot(), **extra}
+
+
+def dump_metrics_json(path: str, **extra) -> None:
+    """Writes metrics_snapshot(**extra) to a JSON file."""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(metrics_snapshot(**extra), handle, indent=2, default=str)